@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+Agent 池化模块
+负责缓存预构建的 Agent 模板 (系统提示词 + 已解析 schema 的工具)，
+并复用空闲的 AssistantAgent 实例，避免每次请求都重新组装 Agent。
+
+说明：
+1. 模板按 (角色, 领域, 提示词版本, 目标数量) 缓存，提示词更新/删除时自动失效。
+2. Agent 实例在归还后放入空闲列表，下次借出前调用 on_reset 清空上下文。
+3. RoundRobinGroupChat 内部持有绑定事件循环的队列，无法跨请求复用，
+   因此团队每次新建，但其构造耗时会被记录，用于观察 p99 开销。
+"""
+
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from autogen_agentchat.agents import AssistantAgent
+from autogen_agentchat.teams import RoundRobinGroupChat
+from autogen_core import CancellationToken
+from autogen_core.tools import BaseTool, FunctionTool
+
+from backend.database.prompt_db import prompt_db
+
+# (role, domain, prompt_version, target_count)
+PoolKey = Tuple[str, str, str, Optional[int]]
+
+# 每个模板最多保留的空闲 Agent 数量
+MAX_IDLE_PER_KEY = 8
+
+# 每个阶段保留的耗时样本数量 (用于计算分位数)
+TIMING_WINDOW = 1000
+
+
+class AgentTemplate:
+    """
+    Agent 模板
+    保存构造 AssistantAgent 所需的全部参数，工具在模板创建时一次性包装为 FunctionTool。
+    """
+
+    def __init__(self, name: str, model_client, system_message: str,
+                 tools: List[Callable] = None, prompt_id: int = None):
+        self.name = name
+        self.model_client = model_client
+        self.system_message = system_message
+        self.prompt_id = prompt_id
+        self.tools = [
+            tool if isinstance(tool, BaseTool) else FunctionTool(tool, description=tool.__doc__ or "")
+            for tool in (tools or [])
+        ]
+
+    def instantiate(self) -> AssistantAgent:
+        """基于模板创建一个新的 Agent 实例"""
+        return AssistantAgent(
+            name=self.name,
+            model_client=self.model_client,
+            tools=list(self.tools) or None,
+            system_message=self.system_message
+        )
+
+
+class AgentPool:
+    """
+    Agent 池
+    线程安全：每个生成任务运行在独立线程的事件循环中，会并发借出/归还 Agent。
+    """
+
+    def __init__(self, max_idle_per_key: int = MAX_IDLE_PER_KEY):
+        self.max_idle_per_key = max_idle_per_key
+        self._templates: Dict[PoolKey, AgentTemplate] = {}
+        self._idle: Dict[PoolKey, List[AssistantAgent]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self._stats = {"template_builds": 0, "template_hits": 0, "created": 0, "reused": 0, "released": 0}
+        self._timings: Dict[str, deque] = defaultdict(lambda: deque(maxlen=TIMING_WINDOW))
+        # 提示词变更时清理对应模板
+        prompt_db.add_invalidation_listener(self.invalidate_prompt)
+
+    def get_template(self, key: PoolKey, build: Callable[[], AgentTemplate]) -> AgentTemplate:
+        """
+        获取 Agent 模板，不存在时调用 build 构建
+
+        :param key: 池键 (role, domain, prompt_version, target_count)
+        :param build: 模板构建函数
+        :return: AgentTemplate
+        """
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self._stats["template_hits"] += 1
+                return template
+
+        start = time.perf_counter()
+        template = build()
+        self.record_timing("template_build", time.perf_counter() - start)
+
+        with self._lock:
+            # 并发构建时保留先写入的模板
+            template = self._templates.setdefault(key, template)
+            self._stats["template_builds"] += 1
+        return template
+
+    async def acquire(self, key: PoolKey, build: Callable[[], AgentTemplate]) -> AssistantAgent:
+        """
+        借出一个 Agent：优先复用空闲实例 (重置上下文)，否则按模板新建
+
+        :param key: 池键
+        :param build: 模板构建函数 (仅在模板未缓存时调用)
+        :return: 可直接加入团队的 AssistantAgent
+        """
+        start = time.perf_counter()
+        with self._lock:
+            idle = self._idle.get(key)
+            agent = idle.pop() if idle else None
+
+        if agent is not None:
+            await agent.on_reset(CancellationToken())
+            with self._lock:
+                self._stats["reused"] += 1
+        else:
+            agent = self.get_template(key, build).instantiate()
+            with self._lock:
+                self._stats["created"] += 1
+
+        self.record_timing("agent_acquire", time.perf_counter() - start)
+        return agent
+
+    def release(self, key: PoolKey, agent: AssistantAgent):
+        """
+        归还 Agent (任务结束后调用)
+        模板已失效或空闲列表已满时直接丢弃。
+
+        :param key: 借出时使用的池键
+        :param agent: Agent 实例
+        """
+        with self._lock:
+            if key not in self._templates:
+                return
+            idle = self._idle[key]
+            if len(idle) < self.max_idle_per_key:
+                idle.append(agent)
+                self._stats["released"] += 1
+
+    async def build_team(self, members: List[Tuple[PoolKey, Callable[[], AgentTemplate]]], **team_kwargs):
+        """
+        借出一组 Agent 并组装 RoundRobinGroupChat，记录团队构造耗时
+
+        :param members: [(池键, 模板构建函数), ...]，顺序即发言顺序
+        :param team_kwargs: 透传给 RoundRobinGroupChat 的参数 (termination_condition, max_turns 等)
+        :return: (team, leases)，任务正常结束后应调用 release_all(leases) 归还
+        """
+        start = time.perf_counter()
+        leases = []
+        for key, build in members:
+            leases.append((key, await self.acquire(key, build)))
+        team = RoundRobinGroupChat([agent for _, agent in leases], **team_kwargs)
+        self.record_timing("team_build", time.perf_counter() - start)
+        return team, leases
+
+    def release_all(self, leases: List[Tuple[PoolKey, AssistantAgent]]):
+        """
+        归还 build_team 借出的全部 Agent
+
+        :param leases: build_team 返回的借出记录
+        """
+        for key, agent in leases:
+            self.release(key, agent)
+
+    def invalidate_prompt(self, prompt_id: int):
+        """
+        清理使用了指定提示词的模板及空闲 Agent
+
+        :param prompt_id: 提示词 ID
+        """
+        with self._lock:
+            for key in [k for k, t in self._templates.items() if t.prompt_id == prompt_id]:
+                self._templates.pop(key, None)
+                self._idle.pop(key, None)
+
+    def record_timing(self, stage: str, seconds: float):
+        """
+        记录某个构造阶段的耗时
+
+        :param stage: 阶段名称 (template_build / agent_acquire / team_build)
+        :param seconds: 耗时 (秒)
+        """
+        with self._lock:
+            self._timings[stage].append(seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取池统计信息，包含各阶段耗时的 avg/p50/p99 (毫秒)
+
+        :return: 统计字典
+        """
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["templates"] = len(self._templates)
+            stats["idle"] = sum(len(v) for v in self._idle.values())
+            samples = {stage: list(values) for stage, values in self._timings.items()}
+
+        stats["timings_ms"] = {stage: summarize_timings(values) for stage, values in samples.items()}
+        return stats
+
+
+def summarize_timings(values: List[float]) -> Dict[str, Any]:
+    """
+    计算耗时样本的统计值
+
+    :param values: 耗时样本 (秒)
+    :return: count/avg/p50/p99/max (毫秒)
+    """
+    if not values:
+        return {"count": 0, "avg": 0.0, "p50": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(values)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "avg": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50": round(percentile(0.50) * 1000, 3),
+        "p99": round(percentile(0.99) * 1000, 3),
+        "max": round(ordered[-1] * 1000, 3)
+    }
+
+
+# 实例化全局对象
+agent_pool = AgentPool()
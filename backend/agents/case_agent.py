@@ -9,26 +9,27 @@
 """
 # backend/agents/case_agent.py
 
+import asyncio
 import json
 import re
+import time
 import traceback
 
-from autogen_agentchat.teams import RoundRobinGroupChat
 from autogen_agentchat.conditions import TextMentionTermination
 from autogen_agentchat.agents import AssistantAgent
 
 # 导入项目模块
 from backend.agents.llm_factory import get_gemini_client
-from backend.database.case_db import save_case, get_existing_case_titles
-from backend.database.prompt_db import get_prompt_by_id
+from backend.database.case_db import save_case
 from backend.utils.stream_utils import AutoGenStreamProcessor, format_sse
-from backend.config import DIFY_CONFIG, FEATURE_CONFIG
+from backend.config import DIFY_CONFIG, FEATURE_CONFIG, SYSTEM_CONFIG
 
 # 导入新增模块
-from backend.agents.prompt_manager import PromptManager
-from backend.agents.test_dimension import TestDimensionManager
-from backend.agents.context_manager import ContextManager
-from backend.agents.knowledge_manager import get_knowledge_manager
+from backend.agents.prompt_manager import prompt_manager
+from backend.agents.agent_pool import agent_pool, AgentTemplate
+from backend.agents.test_dimension import dimension_manager
+from backend.agents.context_manager import context_manager
+from backend.agents.knowledge_manager import get_knowledge_manager, KnowledgePrefetcher, postprocess_knowledge
 
 # 🔥 1. 确保头部导入了这两个 DB 方法
 from backend.database.requirement_db import get_batch_functional_points
@@ -53,9 +54,6 @@ TOOL_NAMES_MAP = {
 }
 
 # 初始化新增管理器
-prompt_manager = PromptManager()
-dimension_manager = TestDimensionManager()
-context_manager = ContextManager()
 knowledge_manager = get_knowledge_manager()
 
 
@@ -63,38 +61,61 @@ knowledge_manager = get_knowledge_manager()
 # Agent 定义区域
 # -------------------------------------------------------------------------
 
-def create_test_generator(target_count: int = 5, domain='base', prompt_id: int = None):
+def resolve_generator_prompt(target_count: int = 5, domain='base', prompt_id: int = None):
     """
-    创建用例生成 Agent (Generator)
+    解析 Generator 的系统提示词
     :param target_count: 目标生成数量
     :param domain: 领域类型
     :param prompt_id: 提示词ID
+    :return: (system_message, prompt_version, 实际使用的提示词ID)
     """
-    print(f"🔍 [DEBUG] 正在创建 Generator Agent, 目标数量: {target_count}")
-
-    # 获取提示词
+    # 获取提示词 (编译缓存命中时不再访问数据库)
     if prompt_id:
         print(f"📝 [提示词] 开始使用自定义提示词，ID: {prompt_id}")
-        prompt = get_prompt_by_id(prompt_id)
-        if prompt:
+        custom = prompt_manager.get_custom_prompt(prompt_id, 'generator', target_count=target_count)
+        if custom:
+            system_message, prompt = custom
             print(f"📝 [提示词] 成功获取提示词: {prompt['name']} (领域: {prompt['domain']}, 类型: {prompt['type']})")
-            # 确保提示词包含目标数量信息
-            system_message = prompt['content']
-            # 检查是否包含目标数量占位符
-            if '{target_count}' not in system_message:
-                # 如果不包含，在提示词开头添加
-                system_message = f"设计约 **{{target_count}}** 个测试用例。\n" + system_message
-                print(f"📝 [提示词] 提示词中不包含目标数量信息，已自动添加")
-            # 替换目标数量
-            system_message = system_message.replace('{target_count}', str(target_count))
             print(f"📝 [提示词] 使用自定义提示词: {prompt['name']}")
             print(f"📝 [提示词] 提示词内容: {system_message[:100]}..." if len(system_message) > 100 else f"📝 [提示词] 提示词内容: {system_message}")
-        else:
-            system_message = prompt_manager.get_prompt('generator', domain, target_count=target_count)
-            print(f"⚠️  [提示词] 提示词ID {prompt_id} 不存在，使用默认提示词")
+            return system_message, f"prompt:{prompt_id}@{prompt.get('updated_at')}", prompt_id
+        print(f"⚠️  [提示词] 提示词ID {prompt_id} 不存在，使用默认提示词")
     else:
-        system_message = prompt_manager.get_prompt('generator', domain, target_count=target_count)
         print(f"📝 [提示词] 未指定提示词ID，使用默认提示词 (领域: {domain})")
+    return prompt_manager.get_prompt('generator', domain, target_count=target_count), "builtin", None
+
+
+def resolve_reviewer_prompt(domain='base', prompt_id: int = None):
+    """
+    解析 Reviewer 的系统提示词
+    :param domain: 领域类型
+    :param prompt_id: 提示词ID
+    :return: (system_message, prompt_version, 实际使用的提示词ID)
+    """
+    if prompt_id:
+        print(f"📝 [提示词] 开始使用自定义评审提示词，ID: {prompt_id}")
+        custom = prompt_manager.get_custom_prompt(prompt_id, 'reviewer')
+        if custom:
+            system_message, prompt = custom
+            print(f"📝 [提示词] 成功获取评审提示词: {prompt['name']} (领域: {prompt['domain']}, 类型: {prompt['type']})")
+            print(f"📝 [提示词] 使用自定义评审提示词: {prompt['name']}")
+            print(f"📝 [提示词] 评审提示词内容: {system_message[:100]}..." if len(system_message) > 100 else f"📝 [提示词] 评审提示词内容: {system_message}")
+            return system_message, f"prompt:{prompt_id}@{prompt.get('updated_at')}", prompt_id
+        print(f"⚠️  [提示词] 提示词ID {prompt_id} 不存在，使用默认评审提示词")
+    else:
+        print(f"📝 [提示词] 未指定提示词ID，使用默认评审提示词 (领域: {domain})")
+    return prompt_manager.get_prompt('reviewer', domain), "builtin", None
+
+
+def create_test_generator(target_count: int = 5, domain='base', prompt_id: int = None):
+    """
+    创建用例生成 Agent (Generator)
+    :param target_count: 目标生成数量
+    :param domain: 领域类型
+    :param prompt_id: 提示词ID
+    """
+    print(f"🔍 [DEBUG] 正在创建 Generator Agent, 目标数量: {target_count}")
+    system_message, _, _ = resolve_generator_prompt(target_count, domain, prompt_id)
 
     return AssistantAgent(
         name="test_generator",
@@ -110,21 +131,7 @@ def create_test_reviewer(domain='base', prompt_id: int = None):
     :param domain: 领域类型
     :param prompt_id: 提示词ID
     """
-    # 获取提示词
-    if prompt_id:
-        print(f"📝 [提示词] 开始使用自定义评审提示词，ID: {prompt_id}")
-        prompt = get_prompt_by_id(prompt_id)
-        if prompt:
-            print(f"📝 [提示词] 成功获取评审提示词: {prompt['name']} (领域: {prompt['domain']}, 类型: {prompt['type']})")
-            system_message = prompt['content']
-            print(f"📝 [提示词] 使用自定义评审提示词: {prompt['name']}")
-            print(f"📝 [提示词] 评审提示词内容: {system_message[:100]}..." if len(system_message) > 100 else f"📝 [提示词] 评审提示词内容: {system_message}")
-        else:
-            system_message = prompt_manager.get_prompt('reviewer', domain)
-            print(f"⚠️  [提示词] 提示词ID {prompt_id} 不存在，使用默认评审提示词")
-    else:
-        system_message = prompt_manager.get_prompt('reviewer', domain)
-        print(f"📝 [提示词] 未指定提示词ID，使用默认评审提示词 (领域: {domain})")
+    system_message, _, _ = resolve_reviewer_prompt(domain, prompt_id)
 
     return AssistantAgent(
         name="test_reviewer",
@@ -134,6 +141,33 @@ def create_test_reviewer(domain='base', prompt_id: int = None):
     )
 
 
+async def build_case_team(target_count: int = 5, domain='base', prompt_id: int = None, max_turns: int = 6):
+    """
+    从 Agent 池组装用例生成团队 (Generator + Reviewer)
+    :param target_count: 目标生成数量
+    :param domain: 领域类型
+    :param prompt_id: 提示词ID
+    :param max_turns: 最大轮次
+    :return: (team, leases)，任务正常结束后调用 agent_pool.release_all(leases) 归还 Agent
+    """
+    # 提示词解析可能访问数据库，放到线程中执行，避免阻塞事件循环
+    gen_message, gen_version, gen_prompt_id = await asyncio.to_thread(
+        resolve_generator_prompt, target_count, domain, prompt_id)
+    rev_message, rev_version, rev_prompt_id = await asyncio.to_thread(resolve_reviewer_prompt, domain, prompt_id)
+
+    members = [
+        (("test_generator", domain, gen_version, target_count),
+         lambda: AgentTemplate("test_generator", gemini_client, gen_message, prompt_id=gen_prompt_id)),
+        (("test_reviewer", domain, rev_version, None),
+         lambda: AgentTemplate("test_reviewer", gemini_client, rev_message, tools=[save_case], prompt_id=rev_prompt_id)),
+    ]
+    return await agent_pool.build_team(
+        members,
+        termination_condition=TextMentionTermination("TERMINATE"),
+        max_turns=max_turns
+    )
+
+
 # -------------------------------------------------------------------------
 # 辅助解析函数
 # -------------------------------------------------------------------------
@@ -161,12 +195,103 @@ def parse_generator_output(content: str):
     return "正在构思测试场景..."
 
 
+# -------------------------------------------------------------------------
+# 前置阶段 (Preflight)
+# -------------------------------------------------------------------------
+
+# 前置阶段显示名称
+PREFLIGHT_STAGE_NAMES = {
+    "dimension": "维度分析",
+    "context": "上下文",
+    "knowledge": "知识检索",
+    "team": "团队组装",
+    "total": "合计"
+}
+
+
+def build_knowledge_query(feature_name: str, desc: str) -> str:
+    """构建功能点的知识检索查询语句 (单条生成与批量预取共用，保证去重/缓存键一致)"""
+    return f"{feature_name} {desc}"
+
+
+async def run_preflight(req_id: int, req: dict, target_count: int, domain: str, prompt_id: int, max_turns: int,
+                        prefetcher: KnowledgePrefetcher = None):
+    """
+    并发执行首次 LLM 调用前的全部准备阶段
+    维度分析、上下文查询 (DB)、团队组装 (提示词查询) 为必需阶段；
+    知识检索 (HTTP) 为可选阶段，超过截止时间后不再等待，本次生成直接跳过。
+
+    :param prefetcher: 批量预取器，包含当前需求时直接取预取结果
+    :return: {"test_matrix", "context", "team": (team, leases), "knowledge": 检索结果/None, "timings": {阶段: 毫秒}}
+    """
+    deadline = SYSTEM_CONFIG.get("preflight_deadline", 8)
+    started = time.perf_counter()
+    timings = {}
+
+    async def timed(stage, awaitable):
+        stage_start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            timings[stage] = round((time.perf_counter() - stage_start) * 1000, 1)
+
+    knowledge_task = None
+    if FEATURE_CONFIG.get("use_knowledge", True):
+        # 构建知识检索查询
+        knowledge_query = build_knowledge_query(req['feature_name'], req['description'])
+        # 排除当前功能点自身，避免本地索引把需求原文当作知识返回
+        exclude = {f"fp:{req_id}"}
+        if prefetcher is not None and prefetcher.has(req_id):
+            print(f"📚 [用例生成] 使用批量预取的知识，查询内容: {knowledge_query}")
+            knowledge_call = prefetcher.get(req_id)
+        else:
+            print(f"📚 [用例生成] 开始知识检索，查询内容: {knowledge_query}")
+            knowledge_call = knowledge_manager.aretrieve(knowledge_query, exclude=exclude)
+        knowledge_task = asyncio.create_task(timed("knowledge", knowledge_call))
+
+    try:
+        test_matrix, context, team = await asyncio.gather(
+            timed("dimension", asyncio.to_thread(dimension_manager.generate_test_matrix, req)),
+            timed("context", asyncio.to_thread(context_manager.get_context, req_id, req)),
+            timed("team", build_case_team(target_count, domain, prompt_id, max_turns)),
+        )
+    except BaseException:
+        # 必需阶段失败 (或任务被取消) 时取消知识检索，避免遗留未等待的任务
+        if knowledge_task is not None:
+            knowledge_task.cancel()
+            await asyncio.gather(knowledge_task, return_exceptions=True)
+        raise
+
+    knowledge = None
+    if knowledge_task is not None:
+        remaining = deadline - (time.perf_counter() - started)
+        done, _ = await asyncio.wait({knowledge_task}, timeout=max(0.0, remaining))
+        if done:
+            try:
+                knowledge = knowledge_task.result()
+            except Exception as e:
+                print(f"📚 [用例生成] 知识检索异常: {str(e)}")
+                knowledge = {"items": [], "latency_ms": timings.get("knowledge"), "status": "error", "cache": None}
+        else:
+            # 后台请求仍会完成并写入缓存，这里只是不再等待；本地索引结果不依赖网络，照常使用
+            knowledge_task.cancel()
+            local_items = await asyncio.to_thread(knowledge_manager.search_local, knowledge_query, exclude=exclude)
+            timings["knowledge"] = round((time.perf_counter() - started) * 1000, 1)
+            knowledge = {"items": local_items, "latency_ms": timings["knowledge"], "status": "deadline",
+                         "cache": None, "local_count": len(local_items)}
+
+    timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+    print(f"⏱️ [Preflight] 耗时明细: {timings}")
+    return {"test_matrix": test_matrix, "context": context, "team": team, "knowledge": knowledge, "timings": timings}
+
+
 # -------------------------------------------------------------------------
 # 主业务流程 (Case Generation)
 # -------------------------------------------------------------------------
 
 async def run_case_generation_stream(req_id: int, feature_name: str, desc: str, target_count: int = 5,
-                                     mode: str = "new", domain='base', prompt_id: int = None):
+                                     mode: str = "new", domain='base', prompt_id: int = None,
+                                     prefetcher: KnowledgePrefetcher = None):
     """
     用例生成流式任务入口
 
@@ -176,6 +301,7 @@ async def run_case_generation_stream(req_id: int, feature_name: str, desc: str,
     :param target_count: 目标生成数量
     :param mode: 'new' (全新生成) 或 'append' (追加生成)
     :param domain: 领域类型 ('base', 'web', 'api' 等)
+    :param prefetcher: 批量知识预取器 (批量生成时传入)
     """
     print(f"🚀 [Case Stream] 开始处理 ID: {req_id}, Mode: {mode}")
 
@@ -195,20 +321,41 @@ async def run_case_generation_stream(req_id: int, feature_name: str, desc: str,
     yield format_sse("message", json.dumps(prepare_info, ensure_ascii=False))
 
     try:
-        # --- 2. 根据模式构建 Prompt 上下文 ---
+        # --- 2. 动态配置轮次 ---
+        # 假设每轮能生成 3-5 条，计算需要的最大轮次，防止截断
+        dynamic_turns = max(6, int(target_count / 3) + 4)
+        print(f"⚙️ [DEBUG] Team 组装完成，最大轮次: {dynamic_turns}")
+
+        # --- 3. 并发执行前置阶段 (维度分析 / 上下文 / 知识检索 / 团队组装) ---
+        req = {'feature_name': feature_name, 'description': desc}
+        preflight = await run_preflight(req_id, req, target_count, domain, prompt_id, dynamic_turns, prefetcher)
+        test_matrix = preflight['test_matrix']
+        context = preflight['context']
+        team, leases = preflight['team']
+
+        # --- 4. 根据模式构建 Prompt 上下文 ---
         existing_context = ""
         focus_instruction = "优先覆盖核心业务流程、P0级功能。"
 
-        if mode == "append":
-            # 增量模式：查出已有用例，防止重复
-            # 注意：这里的 get_existing_case_titles 来自 backend.database.case_db
-            existing_titles = get_existing_case_titles(req_id)
-            existing_json = json.dumps(existing_titles, ensure_ascii=False)
+        # 已有用例：按覆盖盲区/测试维度挑选最相近的少量用例 + 类别数量摘要，替代全量标题
+        existing_titles = context['existing_cases']
+        category_summary = context_manager.summarize_categories(context)
+        relevant_cases = []
+        if existing_titles:
+            focuses = context_manager.plan_focuses(context['coverage_gaps'], test_matrix)
+            if mode == "append":
+                relevant_cases = context_manager.select_relevant_cases(existing_titles, focuses)
+            else:
+                relevant_cases = context_manager.select_relevant_cases(existing_titles, focuses, per_focus=2, limit=5)
 
+        if mode == "append":
+            existing_lines = "\n".join(
+                f"            - [{group['focus']}] " + "；".join(group['titles']) for group in relevant_cases)
             existing_context = f"""
-            【已存在用例列表】
-            数据库中已经有了以下用例，请**绝对不要重复**：
-            {existing_json}
+            【已存在用例】
+            数据库中已有用例（{category_summary}）。
+            以下是与本次补充方向最相近的已有用例，请**绝对不要重复**这些场景：
+{existing_lines}
             """
 
             focus_instruction = """
@@ -217,77 +364,82 @@ async def run_case_generation_stream(req_id: int, feature_name: str, desc: str,
             2. 避开已有的正常流程。
             """
 
-        # --- 3. 动态配置轮次 ---
-        # 假设每轮能生成 3-5 条，计算需要的最大轮次，防止截断
-        dynamic_turns = max(6, int(target_count / 3) + 4)
-        print(f"⚙️ [DEBUG] Team 组装完成，最大轮次: {dynamic_turns}")
-
-        # --- 4. 生成测试维度矩阵 --- 
-        req = {'feature_name': feature_name, 'description': desc}
-        test_matrix = dimension_manager.generate_test_matrix(req)
-        
-        # --- 5. 获取上下文信息 --- 
-        context = context_manager.get_context(req_id, req)
-        
-        # --- 6. 构建测试维度和上下文信息 --- 
+        # --- 5. 构建测试维度和上下文信息 --- 
         dimension_info = "\n\n【测试维度】\n"
         for dim in test_matrix:
             dimension_info += f"- {dim['name']}: {dim['description']} (优先级: {dim['priority']})\n"
         
         context_info = ""
-        if context['existing_cases']:
-            context_info += "\n\n【已存在用例】\n"
-            for title in context['existing_cases'][:5]:  # 只显示前5个
-                context_info += f"- {title}\n"
-            if len(context['existing_cases']) > 5:
-                context_info += f"... 等 {len(context['existing_cases'])} 个用例\n"
+        if existing_titles and mode != "append":
+            context_info += f"\n\n【已存在用例】{category_summary}\n"
+            for group in relevant_cases:
+                for title in group['titles']:
+                    context_info += f"- {title}\n"
         
         if context['coverage_gaps']:
             context_info += "\n【覆盖盲区】\n"
             for gap in context['coverage_gaps']:
                 context_info += f"- {gap}\n"
+
+        if existing_titles:
+            shown = sum(len(group['titles']) for group in relevant_cases)
+            yield format_sse("message", json.dumps({
+                "type": "log",
+                "source": "系统通知",
+                "content": f"🧭 已有用例 {category_summary}，按补充方向选取 {shown} 条相近用例注入提示词",
+                "existing_selection": {"total": len(existing_titles), "shown": shown,
+                                       "category_counts": context.get('category_counts', {}),
+                                       "groups": relevant_cases}
+            }, ensure_ascii=False))
         
-        # --- 7. 知识检索 --- 
+        # --- 6. 知识检索结果 --- 
         knowledge_context = ""
-        try:
-            # 检查是否启用知识库
-            if FEATURE_CONFIG.get("use_knowledge", True):
-                # 构建知识检索查询
-                knowledge_query = f"{feature_name} {desc}"
-                print(f"📚 [用例生成] 开始知识检索，查询内容: {knowledge_query}")
-                # 检索相关知识
-                knowledge_results = knowledge_manager.retrieve_knowledge(knowledge_query)
-                
-                if knowledge_results:
-                    print(f"📚 [用例生成] 成功检索到 {len(knowledge_results)} 条相关知识")
-                    knowledge_context = "\n\n【相关知识】\n"
-                    for i, result in enumerate(knowledge_results[:3]):
-                        if 'content' in result:
-                            content = result['content'][:200] + '...' if len(result['content']) > 200 else result['content']
-                            knowledge_context += f"{i+1}. {content}\n"
-                            print(f"📚 [用例生成] 知识 {i+1} 内容: {content}")
-                        elif 'answer' in result:
-                            content = result['answer'][:200] + '...' if len(result['answer']) > 200 else result['answer']
-                            knowledge_context += f"{i+1}. {content}\n"
-                            print(f"📚 [用例生成] 知识 {i+1} 答案: {content}")
-                    print(f"📚 [用例生成] 传递给智能体的知识上下文: {knowledge_context}")
-                else:
-                    print("📚 [用例生成] 未检索到相关知识")
+        retrieval = preflight['knowledge']
+        if retrieval is None:
+            print("📚 [用例生成] 知识库功能已禁用，跳过知识检索")
+        else:
+            knowledge_results = retrieval["items"]
+            if retrieval['status'] == 'deadline':
+                content = (f"⏱️ 知识检索未在截止时间内完成，本次仅使用本地索引结果 {retrieval.get('local_count', 0)} 条 "
+                           f"(Dify 结果将写入缓存供后续生成使用)")
             else:
-                print("📚 [用例生成] 知识库功能已禁用，跳过知识检索")
-        except Exception as e:
-            print(f"📚 [用例生成] 知识检索异常: {str(e)}")
+                content = (f"📚 知识检索完成：{len(knowledge_results)} 条 (本地索引 {retrieval.get('local_count', 0)} 条)，"
+                           f"耗时 {retrieval['latency_ms']} ms "
+                           f"({retrieval['status']}{'，命中' + retrieval['cache'] + '缓存' if retrieval.get('cache') else ''})")
+            yield format_sse("message", json.dumps({
+                "type": "log",
+                "source": "知识库",
+                "content": content
+            }, ensure_ascii=False))
 
-        # --- 7. 组装 AutoGen Team ---
-        generator = create_test_generator(target_count, domain, prompt_id)
-        reviewer = create_test_reviewer(domain, prompt_id)
-        termination = TextMentionTermination("TERMINATE")
+            if knowledge_results:
+                print(f"📚 [用例生成] 成功检索到 {len(knowledge_results)} 条相关知识")
+                # 去重、排序后按 Token 预算打包，替代固定条数 + 固定字符截断
+                packed, pack_stats = postprocess_knowledge(knowledge_results, build_knowledge_query(feature_name, desc))
+                knowledge_context = "\n\n【相关知识】\n"
+                for i, result in enumerate(packed):
+                    knowledge_context += f"{i+1}. {result['content']}\n"
+                    print(f"📚 [用例生成] 知识 {i+1} (得分 {result['rank_score']}): {result['content']}")
+                yield format_sse("message", json.dumps({
+                    "type": "log",
+                    "source": "知识库",
+                    "content": f"🧹 知识整理：{pack_stats['input']} 条片段，去重 {pack_stats['deduped']} 条，"
+                               f"注入 {pack_stats['packed']} 条 ({pack_stats['tokens']}/{pack_stats['budget']} tokens)",
+                    "knowledge_pack": pack_stats
+                }, ensure_ascii=False))
+                print(f"📚 [用例生成] 传递给智能体的知识上下文: {knowledge_context}")
+            else:
+                print("📚 [用例生成] 未检索到相关知识")
 
-        team = RoundRobinGroupChat(
-            [generator, reviewer],
-            termination_condition=termination,
-            max_turns=dynamic_turns
-        )
+        # --- 7. 前置阶段耗时明细 ---
+        timings = preflight['timings']
+        yield format_sse("message", json.dumps({
+            "type": "log",
+            "source": "系统通知",
+            "content": "⏱️ 前置阶段耗时：" + "，".join(
+                f"{PREFLIGHT_STAGE_NAMES.get(stage, stage)} {ms} ms" for stage, ms in timings.items()),
+            "timings": timings
+        }, ensure_ascii=False))
 
         task_prompt = f"""
         【任务】为功能点编写测试用例并入库。
@@ -301,6 +453,7 @@ async def run_case_generation_stream(req_id: int, feature_name: str, desc: str,
         {existing_context}
         {dimension_info}
         {context_info}
+        {knowledge_context}
 
         【生成策略】
         {focus_instruction}
@@ -343,6 +496,8 @@ async def run_case_generation_stream(req_id: int, feature_name: str, desc: str,
         async for sse_event in processor.process_stream(raw_stream):
             yield sse_event
 
+        # 正常结束后归还 Agent，异常中断的实例直接丢弃
+        agent_pool.release_all(leases)
         print("✅ [DEBUG] run_case_generation_stream 执行完毕")
 
     except Exception as e:
@@ -382,13 +537,21 @@ async def run_batch_functional_generation_stream(ids: list[int], target_count_pe
 
     success_count = 0
 
-    # 2. 循环处理
+    # 2. 并发预取全部条目的知识 (按查询去重)，各条目开始生成时直接取结果
+    prefetcher = None
+    if FEATURE_CONFIG.get("use_knowledge", True) and items:
+        prefetcher = KnowledgePrefetcher(knowledge_manager)
+        prefetcher.start(
+            {item['id']: build_knowledge_query(item['feature_name'], _item_desc(item)) for item in items},
+            {item['id']: {f"fp:{item['id']}"} for item in items}
+        )
+
+    # 3. 循环处理
     for index, item in enumerate(items):
         current_num = index + 1
         req_id = item['id']
         feature_name = item['feature_name']
-        # 兼容不同字段名
-        desc = item.get('description', '') or item.get('feature_name', '')
+        desc = _item_desc(item)
 
         yield format_sse("message", json.dumps({
             "type": "log", "source": "系统调度",
@@ -403,7 +566,8 @@ async def run_batch_functional_generation_stream(ids: list[int], target_count_pe
                     desc=desc,
                     target_count=target_count_per_item,
                     mode="new",
-                    domain='base'
+                    domain='base',
+                    prefetcher=prefetcher
             ):
                 # 过滤掉单条任务的结束信号
                 if "event: finish" not in sse_event:
@@ -417,5 +581,22 @@ async def run_batch_functional_generation_stream(ids: list[int], target_count_pe
                 "type": "log", "source": "系统错误", "content": f"ID {req_id} 处理失败: {str(e)}"
             }, ensure_ascii=False))
 
-    # 3. 结束
-    yield format_sse("finish", json.dumps({"batch_total": total, "success": success_count}, ensure_ascii=False))
\ No newline at end of file
+    # 4. 结束
+    finish_info = {"batch_total": total, "success": success_count}
+    if prefetcher is not None:
+        prefetcher.cancel()
+        summary = prefetcher.summary()
+        finish_info["knowledge_prefetch"] = summary
+        yield format_sse("message", json.dumps({
+            "type": "log", "source": "知识库",
+            "content": f"📚 批量知识预取：{summary['items']} 个条目 (去重后 {summary['unique_queries']} 次检索)，"
+                       f"逐条检索约 {summary['sequential_ms']} ms，实际等待 {summary['waited_ms']} ms，"
+                       f"节省约 {summary['saved_ms']} ms",
+            "knowledge_prefetch": summary
+        }, ensure_ascii=False))
+    yield format_sse("finish", json.dumps(finish_info, ensure_ascii=False))
+
+
+def _item_desc(item: dict) -> str:
+    """批量条目的描述 (兼容不同字段名)"""
+    return item.get('description', '') or item.get('feature_name', '')
\ No newline at end of file
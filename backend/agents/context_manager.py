@@ -4,104 +4,323 @@
 上下文管理模块
 负责在生成测试用例时，分析现有用例，提取测试模式和覆盖盲区，
 从而指导 Agent 生成更全面、不重复的用例。
+
+说明：
+1. 覆盖分类使用编译好的多模式匹配器，标题与步骤一次扫描即可命中全部类别。
+2. 每个需求的分类结果按 req_id 缓存：新增用例时增量更新，用例状态变化时失效重建。
+3. 缓存未命中时优先读取覆盖汇总表 (requirement_coverage) 的分类计数。
+4. 增量模式不再注入全部已有标题，而是按"覆盖盲区 / 测试维度"挑选词面最相近的少量用例，
+   并附上各类别数量摘要，控制提示词长度。
 """
 
-from backend.database.case_db import get_existing_case_titles
+import math
+import threading
+from collections import Counter, OrderedDict
+
+from backend.agents.local_knowledge import tokenize
+from backend.config import SYSTEM_CONFIG
+from backend.database.case_db import case_db
+from backend.database.coverage_db import coverage_db
+from backend.utils.coverage_utils import COVERAGE_PATTERNS, classify_case, coverage_matcher
+
+# 每个需求都应覆盖的基础类别
+BASE_COVERAGE_TYPES = ['成功场景', '失败场景', '边界值测试', '异常场景']
+
+# 最多缓存的需求数量 (LRU 淘汰)
+MAX_CACHED_REQUIREMENTS = 1024
+
+# 相近用例选取：相对最高分的最低比例
+MIN_RELATIVE_SCORE = 0.5
+
 
 class ContextManager:
     """
     上下文管理器
     """
-    
+
     def __init__(self):
-        """初始化"""
-        pass
-    
+        """初始化覆盖分类匹配器与需求级缓存"""
+        self.matcher = coverage_matcher
+        self._cache = OrderedDict()  # req_id -> {"titles", "ids", "counts"}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "incremental": 0, "invalidations": 0}
+        # 正在构建缓存的需求：req_id -> 构建中的任务数；构建期间的用例变更按代次记入 _events 供回放
+        self._building = {}
+        self._generations = {}  # req_id -> 变更代次 (构建期间由变更监听器递增)
+        self._events = {}  # req_id -> [(代次, action, case), ...]
+        # 用例新增/状态变化时更新缓存
+        case_db.add_change_listener(self.on_case_change)
+
     def get_context(self, req_id, req):
         """
         获取上下文信息
-        
+
         :param req_id: 需求ID
         :param req: 需求对象 (包含描述等信息)
         :return: 上下文信息字典
         """
-        # 获取现有用例标题
-        existing_titles = get_existing_case_titles(req_id)
-        
+        entry = self._get_entry(req_id)
+        covered = set(entry['counts'])
+
         # 提取测试模式 (如：已覆盖了哪些类型的测试)
-        test_patterns = self.extract_test_patterns(existing_titles)
-        
+        test_patterns = sorted(covered)
+
         # 识别覆盖盲区 (如：还缺少哪些类型的测试)
-        coverage_gaps = self.identify_coverage_gaps(req, existing_titles)
-        
+        coverage_gaps = self.identify_coverage_gaps(req, covered=covered)
+
         return {
-            'existing_cases': existing_titles,
+            'existing_cases': entry['titles'],
             'test_patterns': test_patterns,
-            'coverage_gaps': coverage_gaps
+            'coverage_gaps': coverage_gaps,
+            'category_counts': dict(entry['counts'])
         }
-    
+
+    def classify(self, text):
+        """
+        对文本进行覆盖分类 (命中的全部类别)
+
+        :param text: 用例标题/步骤文本
+        :return: 类别集合
+        """
+        return self.matcher.labels(text)
+
+    def _get_entry(self, req_id):
+        """获取需求的分类缓存，未命中时从数据库构建"""
+        with self._lock:
+            entry = self._cache.get(req_id)
+            if entry is not None:
+                self._cache.move_to_end(req_id)
+                self._stats["hits"] += 1
+                return self._snapshot(entry)
+            self._stats["misses"] += 1
+            # 登记构建中的需求，构建期间的新增/变更由监听器记录，安装时回放
+            self._building[req_id] = self._building.get(req_id, 0) + 1
+            generation = self._generations.get(req_id, 0)
+
+        try:
+            # 读库不持有管理器锁，避免阻塞其他需求的缓存命中与变更通知
+            entry = self._build_entry(req_id)
+        except BaseException:
+            with self._lock:
+                self._finish_build(req_id)
+            raise
+
+        with self._lock:
+            cacheable = True
+            for event_generation, action, case in self._events.get(req_id, []):
+                if event_generation <= generation:
+                    continue
+                if action == "insert":
+                    self._apply(entry, case)
+                    self._stats["incremental"] += 1
+                else:
+                    # 构建期间有用例状态变化，本次结果可能已过期，只返回不缓存
+                    cacheable = False
+            self._finish_build(req_id)
+            if cacheable and req_id not in self._cache:
+                self._cache[req_id] = entry
+                self._cache.move_to_end(req_id)
+                while len(self._cache) > MAX_CACHED_REQUIREMENTS:
+                    self._cache.popitem(last=False)
+            return self._snapshot(entry)
+
+    @staticmethod
+    def _build_entry(req_id):
+        """从数据库构建需求的分类缓存条目"""
+        # 覆盖汇总表已有该需求的分类计数时，只需读取标题，无需重新分类
+        coverage = coverage_db.get_coverage(req_id)
+        entry = {"titles": [], "ids": set(), "counts": Counter()}
+        for case in case_db.get_case_briefs(req_id=req_id, with_steps=coverage is None):
+            ContextManager._apply(entry, case, classify=coverage is None)
+        if coverage is not None:
+            entry["counts"] = Counter(coverage["category_counts"])
+        return entry
+
+    def _finish_build(self, req_id):
+        """注销一次构建，最后一个构建结束时清理变更记录 (调用方需持有锁)"""
+        self._building[req_id] -= 1
+        if not self._building[req_id]:
+            del self._building[req_id]
+            self._generations.pop(req_id, None)
+            self._events.pop(req_id, None)
+
+    @staticmethod
+    def _snapshot(entry):
+        return {"titles": list(entry["titles"]), "counts": Counter(entry["counts"])}
+
+    @staticmethod
+    def _apply(entry, case, classify=True):
+        """将单条用例计入缓存条目"""
+        if case['id'] in entry['ids']:
+            return
+        entry['ids'].add(case['id'])
+        entry['titles'].append(case.get('case_title'))
+        if classify:
+            entry['counts'].update(classify_case(case))
+
+    def on_case_change(self, table, ids, action):
+        """
+        用例变更监听器
+        新增用例增量计入已缓存的需求；状态变化时使对应需求的缓存失效
+
+        :param table: 表名
+        :param ids: 用例ID列表
+        :param action: insert/update
+        """
+        if table != "test_cases":
+            return
+        with self._lock:
+            if not self._cache and not self._building:
+                return
+        cases = case_db.get_case_briefs(case_ids=ids)
+        with self._lock:
+            for case in cases:
+                req_id = case['requirement_id']
+                if req_id in self._building:
+                    generation = self._generations[req_id] = self._generations.get(req_id, 0) + 1
+                    self._events.setdefault(req_id, []).append((generation, action, case))
+                entry = self._cache.get(req_id)
+                if entry is None:
+                    continue
+                if action == "insert":
+                    self._apply(entry, case)
+                    self._stats["incremental"] += 1
+                else:
+                    self._cache.pop(req_id, None)
+                    self._stats["invalidations"] += 1
+
+    def invalidate(self, req_id=None):
+        """
+        手动清除缓存
+
+        :param req_id: 需求ID，为空时清除全部
+        """
+        with self._lock:
+            if req_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(req_id, None)
+            self._stats["invalidations"] += 1
+
+    def get_cache_stats(self):
+        """获取缓存统计"""
+        with self._lock:
+            return {**self._stats, "cached_requirements": len(self._cache)}
+
+    @staticmethod
+    def plan_focuses(coverage_gaps, test_matrix=None):
+        """
+        生成本次补充方向 (覆盖盲区优先，其次为测试维度)
+
+        :param coverage_gaps: 覆盖盲区列表
+        :param test_matrix: 测试维度列表 [{"name", "description", ...}]
+        :return: [(方向名称, 检索文本), ...]
+        """
+        focuses = []
+        for gap in coverage_gaps or []:
+            # 类别名中的"场景/测试"等通用词会命中大量标题，已知类别只用关键词检索
+            focuses.append((gap, " ".join(COVERAGE_PATTERNS.get(gap) or [gap])))
+        for dim in test_matrix or []:
+            name = dim.get('name')
+            if name and name not in {label for label, _ in focuses}:
+                focuses.append((name, f"{name} {dim.get('description', '')}"))
+        return focuses
+
+    def select_relevant_cases(self, existing_titles, focuses, per_focus=None, limit=None):
+        """
+        为每个补充方向挑选词面最相近的已有用例 (IDF 加权的词项重合度)
+
+        :param existing_titles: 已有用例标题列表 (按入库顺序)
+        :param focuses: plan_focuses() 的返回值
+        :param per_focus: 每个方向最多选取的数量
+        :param limit: 总数量上限
+        :return: [{"focus": 方向名称, "titles": [...]}, ...]，同一标题只出现一次
+        """
+        per_focus = SYSTEM_CONFIG["append_context_per_focus"] if per_focus is None else per_focus
+        limit = SYSTEM_CONFIG["append_context_limit"] if limit is None else limit
+        if not existing_titles or limit <= 0:
+            return []
+
+        title_tokens = [set(tokenize(title)) for title in existing_titles]
+        df = Counter(token for tokens in title_tokens for token in tokens)
+        total = len(existing_titles)
+        idf = {token: math.log(1 + total / count) for token, count in df.items()}
+
+        selected, chosen = [], set()
+        for label, query in focuses:
+            query_tokens = set(tokenize(query))
+            scored = []
+            for idx, tokens in enumerate(title_tokens):
+                if idx in chosen:
+                    continue
+                score = sum(idf[t] for t in tokens & query_tokens)
+                if score > 0:
+                    scored.append((score, idx))
+            # 得分相同时优先较新的用例；只保留不低于最高分一半的结果，过滤仅靠常见词命中的标题
+            scored.sort(reverse=True)
+            picked = [idx for score, idx in scored[:min(per_focus, limit - len(chosen))]
+                      if score >= scored[0][0] * MIN_RELATIVE_SCORE]
+            if picked:
+                chosen.update(picked)
+                selected.append({"focus": label, "titles": [existing_titles[idx] for idx in picked]})
+            if len(chosen) >= limit:
+                break
+
+        # 没有任何方向命中时，退化为最近入库的用例
+        if not selected:
+            recent = existing_titles[-min(per_focus, limit):]
+            selected.append({"focus": "最近用例", "titles": list(reversed(recent))})
+        return selected
+
+    @staticmethod
+    def summarize_categories(context):
+        """
+        已有用例的覆盖类别数量摘要
+
+        :param context: get_context() 的返回值
+        :return: 摘要文本，如 "共 120 条；成功场景 40、失败场景 25"
+        """
+        counts = context.get('category_counts') or {}
+        parts = [f"{label} {counts[label]}" for label in COVERAGE_PATTERNS if counts.get(label)]
+        summary = f"共 {len(context.get('existing_cases') or [])} 条"
+        return summary + ("；" + "、".join(parts) if parts else "")
+
     def extract_test_patterns(self, existing_titles):
         """
         从现有用例标题中提取测试模式
-        
+
         :param existing_titles: 现有用例标题列表
         :return: 测试模式列表
         """
-        patterns = []
-        
-        # 简单的关键词匹配逻辑
+        patterns = set()
         for title in existing_titles:
-            if '成功' in title:
-                patterns.append('成功场景')
-            elif '失败' in title:
-                patterns.append('失败场景')
-            elif '边界' in title:
-                patterns.append('边界值测试')
-            elif '异常' in title:
-                patterns.append('异常场景')
-            elif '安全' in title:
-                patterns.append('安全测试')
-            elif '性能' in title:
-                patterns.append('性能测试')
-        
-        # 去重并返回
-        return list(set(patterns))
-    
-    def identify_coverage_gaps(self, req, existing_titles):
+            patterns |= self.classify(title)
+        return sorted(patterns)
+
+    def identify_coverage_gaps(self, req, existing_titles=None, covered=None):
         """
         识别覆盖盲区
-        
+
         :param req: 需求对象
-        :param existing_titles: 现有用例标题列表
+        :param existing_titles: 现有用例标题列表 (未提供 covered 时用于分类)
+        :param covered: 已覆盖的类别集合
         :return: 覆盖盲区列表
         """
-        gaps = []
-        
-        # 基础测试类型
-        base_types = ['成功场景', '失败场景', '边界值测试', '异常场景']
-        
-        # 分析现有用例，识别已覆盖的类型
-        existing_types = []
-        for title in existing_titles:
-            if '成功' in title:
-                existing_types.append('成功场景')
-            elif '失败' in title:
-                existing_types.append('失败场景')
-            elif '边界' in title:
-                existing_types.append('边界值测试')
-            elif '异常' in title:
-                existing_types.append('异常场景')
-        
+        if covered is None:
+            covered = set(self.extract_test_patterns(existing_titles or []))
+
         # 找出缺失的基础类型
-        for test_type in base_types:
-            if test_type not in existing_types:
-                gaps.append(test_type)
-        
+        gaps = [test_type for test_type in BASE_COVERAGE_TYPES if test_type not in covered]
+
         # 根据需求描述添加特定的覆盖盲区
         desc = req.get('description', '').lower()
-        if 'login' in desc and '安全测试' not in existing_types:
+        if 'login' in desc and '安全测试' not in covered:
             gaps.append('安全测试')
-        if 'api' in desc and '边界值测试' not in existing_types:
+        if 'api' in desc and '边界值测试' not in covered and '边界值测试' not in gaps:
             gaps.append('边界值测试')
-        
+
         return gaps
+
+
+# 实例化全局对象
+context_manager = ContextManager()
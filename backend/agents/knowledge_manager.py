@@ -2,81 +2,413 @@
 # -*- coding: UTF-8 -*-
 """
 知识管理模块
-负责与 Dify 知识库进行交互，检索与当前任务相关的知识，
+负责与 Dify 知识库及本地知识索引进行交互，检索与当前任务相关的知识，
 并将检索结果提供给 Agent，以增强生成的准确性和专业性。
 """
 
-import requests
+import asyncio
+import hashlib
 import json
-from backend.config import DIFY_CONFIG
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import httpx
+
+from backend.agents.local_knowledge import LocalKnowledgeIndex, local_knowledge_index, tokenize
+from backend.config import DIFY_CONFIG, LOCAL_INDEX_CONFIG, SYSTEM_CONFIG
+from backend.database.knowledge_cache_db import knowledge_cache_db
+
+
+class _BackgroundLoop:
+    """
+    后台事件循环线程
+    用例生成任务各自运行在独立线程的事件循环里 (asyncio.run)，
+    httpx.AsyncClient 的连接池绑定在创建它的事件循环上。
+    因此共享连接池统一托管在这个常驻循环中，其他循环通过 asyncio.wrap_future 等待结果。
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        """获取 (必要时启动) 后台事件循环"""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="knowledge-http-loop", daemon=True)
+                thread.start()
+                self._loop = loop
+            return self._loop
+
+    def submit(self, coro):
+        """提交协程到后台循环，返回 concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.get_loop())
+
+
+_background_loop = _BackgroundLoop()
+
+
+def normalize_query(query: str) -> str:
+    """标准化查询语句：去除首尾空白、合并连续空白、转小写"""
+    return re.sub(r'\s+', ' ', (query or '').strip()).lower()
+
+
+class KnowledgeCache:
+    """
+    知识检索结果缓存
+    - 一级：进程内 LRU (OrderedDict)，按条目数淘汰
+    - 二级：可选的 SQLite 表 knowledge_cache，服务重启后仍可命中
+    有结果的条目使用 ttl，空结果使用较短的 negative_ttl。
+    """
+
+    def __init__(self, ttl=None, negative_ttl=None, max_entries=None, use_sqlite=None):
+        self.ttl = DIFY_CONFIG["cache_ttl"] if ttl is None else ttl
+        self.negative_ttl = DIFY_CONFIG["cache_negative_ttl"] if negative_ttl is None else negative_ttl
+        self.max_entries = DIFY_CONFIG["cache_max_entries"] if max_entries is None else max_entries
+        self.use_sqlite = DIFY_CONFIG["cache_sqlite"] if use_sqlite is None else use_sqlite
+        self._entries = OrderedDict()  # cache_key -> {"items", "negative", "expires_at", "endpoint", "query"}
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "sqlite_hits": 0, "negative_hits": 0, "misses": 0,
+                       "stores": 0, "evictions": 0, "expirations": 0}
+
+    @staticmethod
+    def make_key(endpoint: str, app_key: str, query: str) -> str:
+        """
+        生成缓存键：端点 + 应用 (API Key 的哈希，不落明文) + 标准化查询
+
+        :return: sha1 十六进制字符串
+        """
+        app = hashlib.sha1((app_key or '').encode('utf-8')).hexdigest()[:12]
+        raw = f"{(endpoint or '').rstrip('/')}|{app}|{normalize_query(query)}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get(self, cache_key: str):
+        """
+        查询缓存
+
+        :param cache_key: 缓存键
+        :return: (items, tier)，tier 为 'memory' / 'sqlite'；未命中返回 None
+        """
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                if entry["expires_at"] > now:
+                    self._entries.move_to_end(cache_key)
+                    self._stats["memory_hits"] += 1
+                    if entry["negative"]:
+                        self._stats["negative_hits"] += 1
+                    return list(entry["items"]), "memory"
+                del self._entries[cache_key]
+                self._stats["expirations"] += 1
+
+        if self.use_sqlite:
+            try:
+                row = knowledge_cache_db.get_entry(cache_key)
+            except Exception as e:
+                print(f"⚠️ [知识缓存] 读取 SQLite 缓存失败: {e}")
+                row = None
+            if row:
+                self._remember(cache_key, row["endpoint"], row["query"], row["items"], row["negative"],
+                               row["expires_at"])
+                with self._lock:
+                    self._stats["sqlite_hits"] += 1
+                    if row["negative"]:
+                        self._stats["negative_hits"] += 1
+                return list(row["items"]), "sqlite"
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, cache_key: str, endpoint: str, query: str, items):
+        """
+        写入缓存，空结果按 negative_ttl 缓存
+
+        :param cache_key: 缓存键
+        :param endpoint: Dify 端点
+        :param query: 原始查询语句
+        :param items: 检索结果列表
+        """
+        if not self.enabled:
+            return
+        negative = not items
+        expires_at = time.time() + (self.negative_ttl if negative else self.ttl)
+        if negative and self.negative_ttl <= 0:
+            return
+        normalized = normalize_query(query)
+        self._remember(cache_key, endpoint, normalized, items, negative, expires_at)
+        with self._lock:
+            self._stats["stores"] += 1
+
+        if self.use_sqlite:
+            try:
+                knowledge_cache_db.put_entry(cache_key, endpoint, normalized, items, negative, expires_at)
+            except Exception as e:
+                print(f"⚠️ [知识缓存] 写入 SQLite 缓存失败: {e}")
+
+    def _remember(self, cache_key, endpoint, query, items, negative, expires_at):
+        """写入内存层并按 LRU 淘汰"""
+        with self._lock:
+            self._entries[cache_key] = {"items": list(items), "negative": negative, "expires_at": expires_at,
+                                        "endpoint": endpoint, "query": query}
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def flush(self, cache_key: str = None) -> int:
+        """
+        清空缓存 (内存 + SQLite)
+
+        :param cache_key: 仅删除指定键，为空时全部清空
+        :return: 删除的条目数 (两级合计)
+        """
+        with self._lock:
+            if cache_key:
+                removed = 1 if self._entries.pop(cache_key, None) is not None else 0
+            else:
+                removed = len(self._entries)
+                self._entries.clear()
+        if self.use_sqlite:
+            try:
+                removed += knowledge_cache_db.delete_entries(cache_key)
+            except Exception as e:
+                print(f"⚠️ [知识缓存] 清理 SQLite 缓存失败: {e}")
+        return removed
+
+    def inspect(self, limit: int = 100):
+        """
+        查看缓存状态
+
+        :param limit: 每层最多列出的条目数
+        :return: 配置、命中统计及条目摘要
+        """
+        now = time.time()
+        with self._lock:
+            stats = dict(self._stats)
+            memory_entries = [
+                {"cache_key": key, "endpoint": e["endpoint"], "query": e["query"], "negative": e["negative"],
+                 "count": len(e["items"]), "ttl_left": round(e["expires_at"] - now, 1)}
+                for key, e in reversed(self._entries.items())
+            ][:limit]
+        lookups = stats["memory_hits"] + stats["sqlite_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["sqlite_hits"]) / lookups, 4) if lookups else 0.0
+
+        sqlite_entries = []
+        if self.use_sqlite:
+            try:
+                sqlite_entries = knowledge_cache_db.list_entries(limit)
+            except Exception as e:
+                print(f"⚠️ [知识缓存] 读取 SQLite 缓存失败: {e}")
+
+        return {
+            "config": {"ttl": self.ttl, "negative_ttl": self.negative_ttl, "max_entries": self.max_entries,
+                       "use_sqlite": self.use_sqlite},
+            "stats": stats,
+            "memory": {"size": len(memory_entries), "entries": memory_entries},
+            "sqlite": {"entries": sqlite_entries}
+        }
+
+
+# 全局知识缓存 (所有 KnowledgeManager 共享)
+knowledge_cache = KnowledgeCache()
+
 
 class KnowledgeManager:
     """
     知识库管理器
-    封装了 Dify API 的调用逻辑
+    封装了 Dify API 的调用逻辑，并按 backend 组合本地知识索引：
+    - dify: 仅调用 Dify
+    - local: 仅查询本地索引 (无网络请求)
+    - hybrid: 本地索引结果在前，Dify 结果在后
     """
     
-    def __init__(self, api_key=None, endpoint=None):
+    def __init__(self, api_key=None, endpoint=None, cache: KnowledgeCache = None,
+                 backend: str = None, local_index: LocalKnowledgeIndex = None):
         """
         初始化知识管理器
         
         :param api_key: Dify API Key (可选，默认从配置读取)
         :param endpoint: Dify API 端点 (可选，默认从配置读取)
+        :param cache: 检索结果缓存 (可选，默认使用全局 knowledge_cache)
+        :param backend: 检索后端 dify/local/hybrid (可选，默认从配置读取)
+        :param local_index: 本地知识索引 (可选，默认使用全局 local_knowledge_index)
         """
+        self.backend = backend or LOCAL_INDEX_CONFIG["backend"]
+        self.local_index = local_index or local_knowledge_index
+        self.cache = cache or knowledge_cache
         self.api_key = api_key or DIFY_CONFIG["api_key"]
         self.endpoint = endpoint or DIFY_CONFIG["endpoint"]
         self.headers = {
             'Authorization': f'Bearer {self.api_key}',
             'Content-Type': 'application/json'
         }
+        # 连接池与并发控制 (在后台事件循环中懒加载)
+        self._client = None
+        self._semaphore = None
     
-    def retrieve_knowledge(self, query, limit=3):
+    def _get_client(self) -> httpx.AsyncClient:
+        """获取共享的 AsyncClient (只在后台事件循环中调用)"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=httpx.Timeout(
+                    DIFY_CONFIG["read_timeout"],
+                    connect=DIFY_CONFIG["connect_timeout"]
+                ),
+                limits=httpx.Limits(
+                    max_connections=DIFY_CONFIG["max_connections"],
+                    max_keepalive_connections=DIFY_CONFIG["max_keepalive_connections"]
+                )
+            )
+            self._semaphore = asyncio.Semaphore(DIFY_CONFIG["max_concurrency"])
+        return self._client
+
+    async def _fetch(self, query, cache_key):
         """
-        从 Dify 知识库检索相关知识
-        
-        :param query: 查询语句 (通常是功能点名称或描述)
-        :param limit: 返回结果数量限制
-        :return: 知识检索结果列表 List[Dict]
+        在后台事件循环中发起 Dify 对话请求、提取知识并写入缓存
+        即使调用方已放弃等待 (如超过生成前置截止时间)，结果仍会写入缓存供后续使用。
+
+        :return: (知识列表, 状态)
         """
+        client = self._get_client()
+        # 构建聊天请求 URL (Dify 的知识检索通常通过对话接口实现)
+        chat_url = f'{self.endpoint.rstrip("/")}/v1/chat-messages'
+
+        data = {
+            'query': query,
+            'user': 'test_user',
+            'conversation_id': '',
+            'inputs': {},
+            'response_mode': 'blocking',
+            'files': []
+        }
+
+        items, status = [], "ok"
         try:
-            print(f"📚 [知识库] 开始检索知识，查询语句: {query}")
-            # 构建聊天请求 URL (Dify 的知识检索通常通过对话接口实现)
-            chat_url = f'{self.endpoint.rstrip("/")}/v1/chat-messages'
-            
-            data = {
-                'query': query,
-                'user': 'test_user',
-                'conversation_id': '',
-                'inputs': {},
-                'response_mode': 'blocking',
-                'files': []
-            }
-            
             print(f"📚 [知识库] 调用API: {chat_url}")
-            # 打印请求详情便于调试
-            # print(f"📚 [知识库] 请求参数: {json.dumps(data, ensure_ascii=False, indent=2)}")
-            
-            response = requests.post(
-                chat_url,
-                headers=self.headers,
-                json=data,
-                timeout=20  # 设置超时时间
-            )
-            
+            async with self._semaphore:
+                response = await client.post(chat_url, json=data)
+
             if response.status_code == 200:
                 print(f"📚 [知识库] 调用成功，状态码: {response.status_code}")
-                result = response.json()
                 # 提取核心知识内容
-                knowledge_list = self._extract_knowledge(result)
-                print(f"📚 [知识库] 提取知识数量: {len(knowledge_list)}")
-                return knowledge_list
+                items = self._extract_knowledge(response.json())
+                print(f"📚 [知识库] 提取知识数量: {len(items)}")
+                if not items:
+                    status = "empty"
             else:
                 print(f"📚 [知识库] 调用失败，状态码: {response.status_code}")
                 print(f"📚 [知识库] 错误响应: {response.text}")
-                return []
+                status = "error"
+        except httpx.TimeoutException as e:
+            print(f"📚 [知识库] 调用超时: {type(e).__name__}")
+            status = "timeout"
         except Exception as e:
             print(f"📚 [知识库] 调用异常: {str(e)}")
+            status = "error"
+
+        # 只缓存成功的结果 (含空结果)，超时和错误不缓存
+        if status in ("ok", "empty"):
+            self.cache.put(cache_key, self.endpoint, query, items)
+        return items, status
+
+    def search_local(self, query, limit=3, exclude=None):
+        """
+        查询本地知识索引 (backend 为 dify 时返回空列表)
+
+        :param query: 查询语句
+        :param limit: 返回结果数量限制
+        :param exclude: 需要排除的文档键集合 (如当前功能点自身 fp:12)
+        :return: 知识列表 List[Dict]
+        """
+        if self.backend not in ("local", "hybrid"):
+            return []
+        try:
+            return self.local_index.search(query, limit, exclude)
+        except Exception as e:
+            print(f"📇 [本地索引] 检索异常: {str(e)}")
             return []
+
+    async def aretrieve(self, query, limit=3, exclude=None):
+        """
+        异步检索知识，不阻塞调用方事件循环
+
+        :param query: 查询语句 (通常是功能点名称或描述)
+        :param limit: 返回结果数量限制
+        :param exclude: 本地索引中需要排除的文档键集合
+        :return: {"items": 知识列表, "latency_ms": 耗时, "status": ok/empty/error/timeout,
+                  "cache": memory/sqlite/None, "local_count": 本地索引命中数}
+        """
+        start = time.perf_counter()
+        # 本地索引首次使用时会从数据库全量重建 (查询、分词、写快照)，放到线程中执行，避免阻塞其他流式任务
+        local_items = await asyncio.to_thread(self.search_local, query, limit, exclude)
+        if self.backend == "local":
+            latency_ms = round((time.perf_counter() - start) * 1000, 1)
+            print(f"📇 [本地索引] 检索完成，知识数量: {len(local_items)}")
+            return {"items": local_items, "latency_ms": latency_ms, "status": "ok" if local_items else "empty",
+                    "cache": None, "local_count": len(local_items)}
+
+        cache_key = self.cache.make_key(self.endpoint, self.api_key, query)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            items, tier = cached
+            latency_ms = round((time.perf_counter() - start) * 1000, 1)
+            print(f"📚 [知识库] 命中{tier}缓存，知识数量: {len(items)}")
+            return {"items": local_items + items, "latency_ms": latency_ms,
+                    "status": "ok" if items or local_items else "empty", "cache": tier,
+                    "local_count": len(local_items)}
+
+        print(f"📚 [知识库] 开始检索知识，查询语句: {query}")
+        future = _background_loop.submit(self._fetch(query, cache_key))
+        # shield：调用方取消等待时，不取消后台请求
+        items, status = await asyncio.shield(asyncio.wrap_future(future))
+        if local_items and status != "ok":
+            # Dify 无结果或失败时，本地索引结果仍然可用
+            status = "ok"
+
+        latency_ms = round((time.perf_counter() - start) * 1000, 1)
+        return {"items": local_items + items, "latency_ms": latency_ms, "status": status, "cache": None,
+                "local_count": len(local_items)}
+
+    async def aretrieve_knowledge(self, query, limit=3):
+        """
+        异步检索知识
+
+        :param query: 查询语句
+        :param limit: 返回结果数量限制
+        :return: 知识检索结果列表 List[Dict]
+        """
+        result = await self.aretrieve(query, limit)
+        return result["items"]
+
+    def retrieve_knowledge(self, query, limit=3):
+        """
+        从 Dify 知识库检索相关知识 (同步版本，供脚本等非异步场景使用)
+        
+        :param query: 查询语句 (通常是功能点名称或描述)
+        :param limit: 返回结果数量限制
+        :return: 知识检索结果列表 List[Dict]
+        """
+        return _background_loop.submit(self.aretrieve_knowledge(query, limit)).result()
+
+    def close(self):
+        """关闭共享连接池"""
+        if self._client is not None:
+            _background_loop.submit(self._client.aclose()).result()
+            self._client = None
+            self._semaphore = None
     
     def _extract_knowledge(self, response):
         """
@@ -121,6 +453,241 @@ class KnowledgeManager:
         
         return knowledge_list
 
+class KnowledgePrefetcher:
+    """
+    批量知识预取
+    批量生成开始时并发发起全部检索 (按标准化查询去重、按并发上限排队)，
+    各条目开始生成时直接从预取缓冲区取结果，不再逐条等待 Dify 往返。
+    """
+
+    def __init__(self, manager: KnowledgeManager, concurrency: int = None):
+        """
+        :param manager: 知识管理器
+        :param concurrency: 同时进行的预取数量上限 (默认从配置读取)
+        """
+        self.manager = manager
+        self.concurrency = concurrency or DIFY_CONFIG["prefetch_concurrency"]
+        self._tasks = {}  # 标准化查询 -> asyncio.Task
+        self._item_queries = {}  # 条目键 -> 标准化查询
+        self._waits = {}  # 条目键 -> 实际等待耗时 (毫秒)
+        self._started_at = None
+        self._semaphore = None
+
+    def start(self, queries, exclude=None):
+        """
+        启动预取 (需在事件循环中调用)
+
+        :param queries: {条目键: 查询语句}
+        :param exclude: {条目键: 本地索引排除的文档键集合}，同一查询的排除集合会合并
+        """
+        exclude = exclude or {}
+        self._started_at = time.perf_counter()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        grouped = OrderedDict()  # 标准化查询 -> (原始查询, 合并后的排除集合)
+        for key, query in queries.items():
+            normalized = normalize_query(query)
+            self._item_queries[key] = normalized
+            _, excluded = grouped.setdefault(normalized, (query, set()))
+            excluded.update(exclude.get(key, ()))
+
+        for normalized, (query, excluded) in grouped.items():
+            self._tasks[normalized] = asyncio.create_task(self._run(query, excluded))
+        print(f"📚 [知识预取] 已启动 {len(self._tasks)} 个检索 (条目 {len(queries)} 个)")
+
+    async def _run(self, query, exclude):
+        async with self._semaphore:
+            return await self.manager.aretrieve(query, exclude=exclude)
+
+    def has(self, key) -> bool:
+        """条目是否在预取范围内"""
+        return key in self._item_queries
+
+    async def get(self, key):
+        """
+        获取条目的预取结果，尚未完成时等待
+        调用方取消等待 (如超过前置截止时间) 不会取消预取任务本身。
+
+        :param key: 条目键
+        :return: 与 KnowledgeManager.aretrieve 相同的结果字典，额外包含 prefetched/wait_ms
+        """
+        task = self._tasks[self._item_queries[key]]
+        start = time.perf_counter()
+        try:
+            result = await asyncio.shield(task)
+        finally:
+            self._waits[key] = round((time.perf_counter() - start) * 1000, 1)
+        return {**result, "prefetched": True, "wait_ms": self._waits[key]}
+
+    def summary(self):
+        """
+        预取统计
+        逐条检索耗时按每个条目对应检索的实际耗时累加估算，节省时间 = 逐条耗时 - 条目实际等待耗时。
+
+        :return: {"items", "unique_queries", "sequential_ms", "waited_ms", "saved_ms", "wall_ms"}
+        """
+        sequential_ms = 0.0
+        for key, normalized in self._item_queries.items():
+            task = self._tasks[normalized]
+            if task.done() and not task.cancelled() and task.exception() is None:
+                sequential_ms += task.result()["latency_ms"] or 0.0
+        waited_ms = sum(self._waits.values())
+        wall_ms = round((time.perf_counter() - self._started_at) * 1000, 1) if self._started_at else 0.0
+        return {
+            "items": len(self._item_queries),
+            "unique_queries": len(self._tasks),
+            "sequential_ms": round(sequential_ms, 1),
+            "waited_ms": round(waited_ms, 1),
+            "saved_ms": round(max(0.0, sequential_ms - waited_ms), 1),
+            "wall_ms": wall_ms
+        }
+
+    def cancel(self):
+        """取消尚未开始的预取 (已提交到后台循环的请求仍会完成并写入缓存)"""
+        for task in self._tasks.values():
+            if not task.done():
+                task.cancel()
+
+
+# -------------------------------------------------------------------------
+# 知识后处理：去重 -> 排序 -> 按 Token 预算打包
+# -------------------------------------------------------------------------
+
+# 排序权重：来源分数 (同来源内归一化) 与需求词项重合度
+SCORE_WEIGHT = 0.6
+OVERLAP_WEIGHT = 0.4
+
+# 无分数条目 (如 Dify 直接回答) 的默认归一化分数
+DEFAULT_SCORE = 0.5
+
+# 预算剩余不足该值时不再截断放入新片段 (第一个片段除外)
+MIN_CHUNK_TOKENS = 40
+
+_SENTENCE_RE = re.compile(r'[^。！？；!?;\n]+[。！？；!?;\n]*')
+_CJK_CHAR_RE = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff]')
+_WORD_RE = re.compile(r'[A-Za-z0-9_]+')
+
+
+def knowledge_text(item) -> str:
+    """提取知识条目的正文 (content 优先，其次 answer)"""
+    if not isinstance(item, dict):
+        return str(item or '')
+    return str(item.get('content') or item.get('answer') or '').strip()
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文本 Token 数 (不依赖具体模型的分词器)
+    中文按 1 字 1 Token，英文/数字按 1 词约 1.3 Token，其余符号忽略不计。
+    """
+    cjk = len(_CJK_CHAR_RE.findall(text or ''))
+    words = len(_WORD_RE.findall(text or ''))
+    return cjk + math.ceil(words * 1.3)
+
+
+def _similarity(a: set, b: set) -> float:
+    """片段相似度：Jaccard 与包含度取较大值 (短片段被长片段完整包含时视为重复)"""
+    if not a or not b:
+        return 0.0
+    inter = len(a & b)
+    return max(inter / len(a | b), inter / min(len(a), len(b)))
+
+
+def _trim_to_budget(text: str, query_terms: set, budget: int) -> str:
+    """
+    将片段裁剪到预算内：按句子与需求的重合度挑选，保持原文顺序
+    避免固定字符截断把最相关的句子切掉。
+    """
+    sentences = [s.strip() for s in _SENTENCE_RE.findall(text) if s.strip()]
+    ranked = sorted(
+        range(len(sentences)),
+        key=lambda i: len(query_terms & set(tokenize(sentences[i]))) / (len(set(tokenize(sentences[i]))) or 1),
+        reverse=True
+    )
+    chosen, used = set(), 0
+    for i in ranked:
+        cost = estimate_tokens(sentences[i])
+        if used + cost <= budget:
+            chosen.add(i)
+            used += cost
+    if not chosen and sentences:
+        # 单句超长：按字符保留开头部分
+        return sentences[0][:budget] + '...'
+    return ' ... '.join(sentences[i] for i in sorted(chosen))
+
+
+def postprocess_knowledge(items, requirement: str, token_budget: int = None, dedupe_threshold: float = None):
+    """
+    知识后处理：去除近似重复片段，按 (来源分数 + 需求重合度) 排序，
+    再按 Token 预算依次打包，最后一个放不下的片段按句子裁剪。
+
+    :param items: 检索结果列表 (Dify 与本地索引混合)
+    :param requirement: 需求文本 (功能点名称 + 描述)
+    :param token_budget: Token 预算 (默认从配置读取)
+    :param dedupe_threshold: 近似重复阈值 (默认从配置读取)
+    :return: (打包后的知识列表, 统计信息)
+             知识条目额外包含 rank_score / tokens / truncated 字段
+    """
+    token_budget = SYSTEM_CONFIG["knowledge_token_budget"] if token_budget is None else token_budget
+    dedupe_threshold = SYSTEM_CONFIG["knowledge_dedupe_threshold"] if dedupe_threshold is None else dedupe_threshold
+    query_terms = set(tokenize(requirement))
+
+    # 1. 提取正文并计算词项
+    candidates = []
+    for item in items or []:
+        text = knowledge_text(item)
+        if not text:
+            continue
+        metadata = item.get('metadata') if isinstance(item, dict) else None
+        source = (metadata or {}).get('source') or ('dify' if isinstance(item, dict) and 'score' in item else 'answer')
+        score = item.get('score') if isinstance(item, dict) else None
+        candidates.append({"item": item, "text": text, "terms": set(tokenize(text)), "source": source,
+                           "raw_score": score if isinstance(score, (int, float)) else None})
+
+    # 2. 同来源内分数归一化 (BM25 与向量相似度量纲不同)
+    max_scores = {}
+    for c in candidates:
+        if c["raw_score"] is not None:
+            max_scores[c["source"]] = max(max_scores.get(c["source"], 0.0), c["raw_score"])
+    for c in candidates:
+        top = max_scores.get(c["source"])
+        norm = c["raw_score"] / top if c["raw_score"] is not None and top else DEFAULT_SCORE
+        overlap = len(query_terms & c["terms"]) / len(query_terms) if query_terms else 0.0
+        c["rank_score"] = round(SCORE_WEIGHT * norm + OVERLAP_WEIGHT * overlap, 4)
+
+    # 3. 按分数从高到低去重：与已保留片段近似的丢弃
+    candidates.sort(key=lambda c: c["rank_score"], reverse=True)
+    kept = []
+    for c in candidates:
+        if any(_similarity(c["terms"], k["terms"]) >= dedupe_threshold for k in kept):
+            continue
+        kept.append(c)
+
+    # 4. 按预算打包
+    packed, used = [], 0
+    for c in kept:
+        remaining = token_budget - used
+        cost = estimate_tokens(c["text"])
+        truncated = False
+        text = c["text"]
+        if cost > remaining:
+            if packed and remaining < MIN_CHUNK_TOKENS:
+                break
+            text = _trim_to_budget(text, query_terms, remaining)
+            cost = estimate_tokens(text)
+            truncated = True
+        base = dict(c["item"]) if isinstance(c["item"], dict) else {}
+        base.update({"content": text, "rank_score": c["rank_score"], "tokens": cost, "truncated": truncated})
+        packed.append(base)
+        used += cost
+        if truncated:
+            break
+
+    stats = {"input": len(candidates), "deduped": len(candidates) - len(kept), "packed": len(packed),
+             "tokens": used, "budget": token_budget}
+    return packed, stats
+
+
 # 工厂函数
 def get_knowledge_manager():
     return KnowledgeManager()
@@ -0,0 +1,389 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+本地知识索引模块
+对项目自身的功能点、需求拆解验收标准、已通过评审的测试用例建立 BM25 倒排索引，
+作为 KnowledgeManager 的本地检索后端，无需网络请求即可在毫秒级返回 top-k 结果。
+
+说明：
+1. 中文按字符 bigram 切分 (单字片段保留为 unigram)，英文/数字按单词切分。
+2. 数据库写入后通过变更监听器增量更新索引，无需定时全量重建。
+3. 索引以 JSON Lines 追加日志的方式持久化 (put/del)，启动时回放；
+   日志中过期记录过多时自动压缩为快照。
+"""
+
+import heapq
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from backend.config import LOCAL_INDEX_CONFIG
+from backend.database.case_db import case_db
+from backend.database.requirement_db import requirement_db
+
+# 中文字符范围 (基本区 + 扩展 A)
+_CJK_RANGE = '\u3400-\u4dbf\u4e00-\u9fff'
+_TOKEN_RE = re.compile(rf'[{_CJK_RANGE}]+|[a-z0-9_]+')
+_CJK_RE = re.compile(rf'[{_CJK_RANGE}]')
+
+# 表名 -> 文档键前缀
+SOURCE_PREFIX = {
+    "functional_points": "fp",
+    "requirement_breakdown": "bd",
+    "test_cases": "tc"
+}
+
+# 不参与索引的拆解项评审状态
+EXCLUDED_BREAKDOWN_STATUS = {"Reject", "Discard"}
+
+# 参与索引的用例状态 (评审通过)
+INDEXED_CASE_STATUS = "Active"
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    分词：中文字符 bigram + 英文/数字单词
+
+    :param text: 原始文本
+    :return: 词项列表 (保留重复，用于计算词频)
+    """
+    tokens = []
+    for run in _TOKEN_RE.findall((text or '').lower()):
+        if _CJK_RE.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def doc_key(table: str, row_id: int) -> str:
+    """生成文档键，如 fp:12 / bd:3 / tc:45"""
+    return f"{SOURCE_PREFIX[table]}:{row_id}"
+
+
+def _json_list_text(raw, field: str = None) -> List[str]:
+    """将 JSON 列表字符串转换为文本行，解析失败时返回原文本"""
+    if not raw:
+        return []
+    try:
+        parsed = json.loads(raw) if isinstance(raw, str) else raw
+    except (TypeError, ValueError):
+        return [str(raw)]
+    if not isinstance(parsed, list):
+        return [str(parsed)]
+    lines = []
+    for item in parsed:
+        if isinstance(item, dict):
+            lines.append(str(item.get(field, '')) if field else json.dumps(item, ensure_ascii=False))
+        else:
+            lines.append(str(item))
+    return [line for line in lines if line]
+
+
+def build_document(table: str, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    将数据库记录转换为索引文档
+
+    :param table: 表名 (functional_points / requirement_breakdown / test_cases)
+    :param row: 记录字典
+    :return: {"source", "ref_id", "title", "content"}；不应被索引时返回 None
+    """
+    if table == "functional_points":
+        title = row.get('feature_name') or ''
+        lines = [f"【{row.get('module_name') or '公共模块'}】{title}", row.get('description') or '']
+    elif table == "requirement_breakdown":
+        if row.get('review_status') in EXCLUDED_BREAKDOWN_STATUS:
+            return None
+        title = row.get('feature_name') or ''
+        criteria = _json_list_text(row.get('acceptance_criteria'))
+        lines = [title, row.get('description') or '']
+        if criteria:
+            lines.append("验收标准：" + "；".join(criteria))
+    elif table == "test_cases":
+        if row.get('status') != INDEXED_CASE_STATUS:
+            return None
+        title = row.get('case_title') or ''
+        lines = [title, row.get('pre_condition') or '']
+        lines.extend(_json_list_text(row.get('steps'), 'action'))
+        lines.append(row.get('expected_result') or '')
+    else:
+        return None
+
+    content = "\n".join(line.strip() for line in lines if line and line.strip())
+    if not content:
+        return None
+    return {"source": table, "ref_id": row['id'], "title": title, "content": content}
+
+
+class LocalKnowledgeIndex:
+    """
+    本地 BM25 倒排索引
+    线程安全：生成任务与数据库写入可能发生在不同线程。
+    """
+
+    def __init__(self, path: str = None, k1: float = None, b: float = None):
+        self.path = path or LOCAL_INDEX_CONFIG["path"]
+        self.k1 = LOCAL_INDEX_CONFIG["k1"] if k1 is None else k1
+        self.b = LOCAL_INDEX_CONFIG["b"] if b is None else b
+        self._lock = threading.RLock()
+        self._reset_memory()
+        self._stats = {"queries": 0, "upserts": 0, "removals": 0, "rebuilds": 0, "compactions": 0}
+
+    def _reset_memory(self):
+        """清空内存中的索引结构"""
+        self._docs: Dict[str, Dict[str, Any]] = {}  # 文档键 -> 文档 (含词频 terms 与长度 length)
+        self._postings: Dict[str, Dict[str, int]] = {}  # 词项 -> {文档键: 词频}
+        self._total_length = 0
+        self._journal_lines = 0
+        self._loaded = False
+
+    # ---------------------------------------------------------------
+    # 加载 / 持久化
+    # ---------------------------------------------------------------
+    def ensure_loaded(self):
+        """首次使用时加载索引：存在持久化文件则回放，否则从数据库全量构建"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if os.path.exists(self.path):
+                self._load_journal()
+            else:
+                self.rebuild()
+
+    def _load_journal(self):
+        """回放追加日志"""
+        start = time.perf_counter()
+        self._reset_memory()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    print(f"⚠️ [本地索引] 跳过损坏的日志行: {line[:50]}")
+                    continue
+                self._journal_lines += 1
+                if record.get("op") == "put":
+                    self._index(record["key"], record)
+                elif record.get("op") == "del":
+                    self._unindex(record["key"])
+        self._loaded = True
+        print(f"📇 [本地索引] 已加载 {len(self._docs)} 篇文档，耗时 {round((time.perf_counter() - start) * 1000, 1)} ms")
+
+    def _append(self, record: Dict[str, Any]):
+        """追加一条日志记录，过期记录过多时压缩"""
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._journal_lines += 1
+        if self._journal_lines > 2 * len(self._docs) + 200:
+            self.compact()
+
+    def compact(self):
+        """将当前全部文档写成快照 (原子替换)，丢弃被覆盖/删除的历史记录"""
+        with self._lock:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for key, doc in self._docs.items():
+                    f.write(json.dumps(self._record(key, doc), ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.path)
+            self._journal_lines = len(self._docs)
+            self._stats["compactions"] += 1
+
+    @staticmethod
+    def _record(key: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+        return {"op": "put", "key": key, "source": doc["source"], "ref_id": doc["ref_id"],
+                "title": doc["title"], "content": doc["content"]}
+
+    def rebuild(self) -> int:
+        """
+        从数据库全量重建索引并写入快照
+
+        :return: 索引的文档数量
+        """
+        start = time.perf_counter()
+        queries = {
+            "functional_points": "SELECT * FROM functional_points",
+            "requirement_breakdown": "SELECT * FROM requirement_breakdown",
+            "test_cases": f"SELECT * FROM test_cases WHERE status = '{INDEXED_CASE_STATUS}'"
+        }
+        with self._lock:
+            self._reset_memory()
+            for table, sql in queries.items():
+                for row in case_db.execute_query(sql):
+                    document = build_document(table, row)
+                    if document:
+                        self._index(doc_key(table, row['id']), document)
+            self._loaded = True
+            self.compact()
+            self._stats["rebuilds"] += 1
+            count = len(self._docs)
+        print(f"📇 [本地索引] 全量重建完成：{count} 篇文档，耗时 {round((time.perf_counter() - start) * 1000, 1)} ms")
+        return count
+
+    def unload(self):
+        """释放内存索引 (下次使用时重新加载，用于切换索引文件)"""
+        with self._lock:
+            self._reset_memory()
+
+    # ---------------------------------------------------------------
+    # 索引维护
+    # ---------------------------------------------------------------
+    def _index(self, key: str, document: Dict[str, Any]):
+        """将文档写入倒排表 (覆盖同键旧文档)"""
+        self._unindex(key)
+        terms = Counter(tokenize(f"{document['title']}\n{document['content']}"))
+        length = sum(terms.values())
+        self._docs[key] = {"source": document["source"], "ref_id": document["ref_id"],
+                           "title": document["title"], "content": document["content"],
+                           "terms": terms, "length": length}
+        self._total_length += length
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[key] = tf
+
+    def _unindex(self, key: str):
+        """从倒排表移除文档"""
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return
+        self._total_length -= doc["length"]
+        for term in doc["terms"]:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self._postings[term]
+
+    def upsert(self, key: str, document: Dict[str, Any]):
+        """
+        新增或更新文档 (内容未变化时跳过)
+
+        :param key: 文档键
+        :param document: {"source", "ref_id", "title", "content"}
+        """
+        with self._lock:
+            self.ensure_loaded()
+            current = self._docs.get(key)
+            if current and current["title"] == document["title"] and current["content"] == document["content"]:
+                return
+            self._index(key, document)
+            self._append(self._record(key, self._docs[key]))
+            self._stats["upserts"] += 1
+
+    def remove(self, key: str):
+        """
+        删除文档
+
+        :param key: 文档键
+        """
+        with self._lock:
+            self.ensure_loaded()
+            if key not in self._docs:
+                return
+            self._unindex(key)
+            self._append({"op": "del", "key": key})
+            self._stats["removals"] += 1
+
+    def on_db_change(self, table: str, ids: List[int], action: str):
+        """
+        数据库变更监听器：重新读取变更记录并增量更新索引
+
+        :param table: 表名
+        :param ids: 变更记录 ID 列表
+        :param action: 动作 (insert/update)
+        """
+        if table not in SOURCE_PREFIX or LOCAL_INDEX_CONFIG["backend"] == "dify":
+            return
+        rows = case_db.batch_query(table, ids)
+        found = {row['id'] for row in rows}
+        for row in rows:
+            document = build_document(table, row)
+            if document:
+                self.upsert(doc_key(table, row['id']), document)
+            else:
+                self.remove(doc_key(table, row['id']))
+        for missing_id in set(ids) - found:
+            self.remove(doc_key(table, missing_id))
+
+    # ---------------------------------------------------------------
+    # 检索
+    # ---------------------------------------------------------------
+    def search(self, query: str, limit: int = None, exclude=None) -> List[Dict[str, Any]]:
+        """
+        BM25 检索
+
+        :param query: 查询语句
+        :param limit: 返回条数 (默认取配置 top_k)
+        :param exclude: 需要排除的文档键集合 (如当前功能点自身 fp:12)
+        :return: [{"content", "score", "metadata": {"source", "doc_key", "ref_id", "title"}}, ...]
+        """
+        limit = limit or LOCAL_INDEX_CONFIG["top_k"]
+        exclude = set(exclude or ())
+        query_terms = set(tokenize(query))
+        self.ensure_loaded()
+        with self._lock:
+            self._stats["queries"] += 1
+            total_docs = len(self._docs)
+            if not query_terms or not total_docs:
+                return []
+            avg_length = self._total_length / total_docs
+            scores: Dict[str, float] = {}
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+                for key, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._docs[key]["length"] / avg_length)
+                    scores[key] = scores.get(key, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+            top = heapq.nlargest(limit, ((score, key) for key, score in scores.items() if key not in exclude))
+            return [
+                {
+                    "content": self._docs[key]["content"],
+                    "score": round(score, 4),
+                    "metadata": {"source": f"local:{self._docs[key]['source']}", "doc_key": key,
+                                 "ref_id": self._docs[key]["ref_id"], "title": self._docs[key]["title"]}
+                }
+                for score, key in top
+            ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取索引统计信息
+
+        :return: 文档数 (按来源)、词项数、日志行数及操作计数
+        """
+        with self._lock:
+            by_source = Counter(doc["source"] for doc in self._docs.values())
+            return {
+                "path": self.path,
+                "loaded": self._loaded,
+                "documents": len(self._docs),
+                "by_source": dict(by_source),
+                "terms": len(self._postings),
+                "journal_lines": self._journal_lines,
+                **self._stats
+            }
+
+
+# 实例化全局对象
+local_knowledge_index = LocalKnowledgeIndex()
+
+# 数据写入后增量更新索引
+requirement_db.add_change_listener(local_knowledge_index.on_db_change)
+case_db.add_change_listener(local_knowledge_index.on_db_change)
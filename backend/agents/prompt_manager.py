@@ -4,8 +4,81 @@
 提示词管理模块
 负责管理和提供不同测试领域 (Base, Web, API) 的提示词模板。
 这些提示词用于指导 Agent 生成高质量的测试用例。
+
+模板在首次使用时被预编译 (解析并校验占位符)，渲染结果按
+(领域 或 提示词ID, 类型, 目标数量) 缓存，数据库提示词更新/删除时自动失效。
 """
 
+import threading
+from collections import OrderedDict
+from string import Formatter
+from typing import Any, Dict, Optional, Tuple
+
+from backend.database.prompt_db import prompt_db
+
+# 模板中允许出现的占位符
+ALLOWED_PLACEHOLDERS = {'target_count'}
+
+# 渲染结果缓存的最大条目数
+RENDER_CACHE_SIZE = 256
+
+
+class PromptTemplateError(ValueError):
+    """提示词模板编译或渲染失败"""
+
+
+class CompiledPrompt:
+    """
+    预编译的提示词模板
+    将模板一次性拆分为 [(字面文本, 占位符名), ...] 片段，渲染时只做拼接。
+
+    - format 模式：内置模板，遵循 str.format 语法 ({{ }} 为转义)，占位符必须在白名单内
+    - literal 模式：用户在数据库中编辑的提示词，只识别 {target_count}，其余花括号原样保留
+    """
+
+    def __init__(self, template: str, literal: bool = False):
+        self.template = template
+        self.literal = literal
+        self.segments = self._compile(template, literal)
+        self.placeholders = {name for _, name in self.segments if name}
+
+    @staticmethod
+    def _compile(template: str, literal: bool):
+        if literal:
+            parts = template.split('{target_count}')
+            segments = [(part, 'target_count') for part in parts[:-1]]
+            segments.append((parts[-1], None))
+            return segments
+
+        segments = []
+        try:
+            for text, field, spec, conversion in Formatter().parse(template):
+                if field is not None:
+                    if field not in ALLOWED_PLACEHOLDERS or spec or conversion:
+                        raise PromptTemplateError(f"不支持的占位符: {{{field}}}")
+                segments.append((text, field))
+        except ValueError as e:
+            if isinstance(e, PromptTemplateError):
+                raise
+            raise PromptTemplateError(f"模板语法错误: {e}")
+        return segments
+
+    def render(self, **kwargs) -> str:
+        """
+        渲染模板
+
+        :param kwargs: 占位符参数 (如 target_count)
+        :return: 渲染后的提示词
+        :raises PromptTemplateError: format 模式下缺少必需的占位符参数
+        """
+        missing = self.placeholders - kwargs.keys()
+        if missing and not self.literal:
+            raise PromptTemplateError(f"缺少占位符参数: {', '.join(sorted(missing))}")
+        # literal 模式下未提供的占位符原样保留 (与直接 replace 的行为一致)
+        values = {name: str(kwargs[name]) if name in kwargs else '{' + name + '}' for name in self.placeholders}
+        return ''.join(text + (values[name] if name else '') for text, name in self.segments)
+
+
 class PromptManager:
     """
     提示词管理器
@@ -14,6 +87,14 @@ class PromptManager:
     
     def __init__(self):
         """初始化提示词模板"""
+        self._compiled: Dict[Tuple, CompiledPrompt] = {}
+        self._render_cache: "OrderedDict[Tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generations: Dict[int, int] = {}  # prompt_id -> 失效次数，读取提示词后发生失效时不写入缓存
+        self._stats = {"hits": 0, "misses": 0, "compiles": 0, "invalidations": 0}
+        # 数据库提示词变更时，同步清理编译缓存
+        prompt_db.add_invalidation_listener(self.invalidate_prompt)
+
         self.templates = {
             # 基础领域：适用于通用软件测试
             'base': {
@@ -229,23 +310,111 @@ class PromptManager:
         :param kwargs: 格式化参数 (如 target_count)
         :return: 格式化后的提示词字符串
         """
-        # 获取基础提示词
-        base_prompt = self.templates['base'].get(type, "")
-        
-        # 获取领域特定提示词
-        domain_prompt = ""
-        if domain != 'base' and domain in self.templates:
-            domain_prompt = self.templates[domain].get(type, "")
-        
-        # 组合提示词
-        full_prompt = base_prompt + "\n" + domain_prompt
-        
-        # 格式化参数
-        if kwargs:
-            try:
-                full_prompt = full_prompt.format(**kwargs)
-            except KeyError:
-                # 忽略缺失的参数
-                pass
-        
-        return full_prompt
+        if domain == 'base' or domain not in self.templates:
+            domain = 'base'
+        cache_key = ('domain', domain, type, kwargs.get('target_count'))
+
+        def compile_template():
+            # 组合基础提示词与领域特定提示词
+            base_prompt = self.templates['base'].get(type, "")
+            domain_prompt = self.templates[domain].get(type, "") if domain != 'base' else ""
+            return CompiledPrompt(base_prompt + "\n" + domain_prompt)
+
+        return self._render(cache_key, ('domain', domain, type), compile_template, kwargs)
+
+    def get_custom_prompt(self, prompt_id: int, type: str, **kwargs) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        获取数据库中的自定义提示词 (已渲染)
+        生成器提示词如果缺少 {target_count}，会在开头自动补充目标数量说明。
+
+        :param prompt_id: 提示词 ID
+        :param type: 使用方式 ('generator' 或 'reviewer')
+        :param kwargs: 格式化参数 (如 target_count)
+        :return: (渲染后的提示词, 提示词记录)；提示词不存在时返回 None
+        """
+        # 先记录失效代次再读取提示词，安装缓存时据此判断读到的内容是否已过期
+        with self._lock:
+            generation = self._generations.get(prompt_id, 0)
+        prompt = prompt_db.get_prompt_by_id(prompt_id)
+        if not prompt:
+            return None
+
+        cache_key = ('prompt', prompt_id, type, kwargs.get('target_count'))
+
+        def compile_template():
+            content = prompt['content']
+            if type == 'generator' and '{target_count}' not in content:
+                print("📝 [提示词] 提示词中不包含目标数量信息，已自动添加")
+                content = "设计约 **{target_count}** 个测试用例。\n" + content
+            return CompiledPrompt(content, literal=True)
+
+        return self._render(cache_key, ('prompt', prompt_id, type), compile_template, kwargs, generation), prompt
+
+    def _render(self, cache_key: Tuple, compile_key: Tuple, compile_template, kwargs: Dict[str, Any],
+                generation: int = None) -> str:
+        """
+        按缓存键返回渲染结果，未命中时编译 (或复用已编译模板) 并渲染
+
+        :param generation: 自定义提示词读取前记录的失效代次，已变化时只返回结果不写入缓存
+        """
+        with self._lock:
+            rendered = self._render_cache.get(cache_key)
+            if rendered is not None:
+                self._render_cache.move_to_end(cache_key)
+                self._stats["hits"] += 1
+                return rendered
+            self._stats["misses"] += 1
+            compiled = self._compiled.get(compile_key)
+
+        if compiled is None:
+            compiled = compile_template()
+            with self._lock:
+                if self._is_current(compile_key, generation):
+                    self._compiled[compile_key] = compiled
+                self._stats["compiles"] += 1
+
+        rendered = compiled.render(**kwargs)
+
+        with self._lock:
+            if not self._is_current(compile_key, generation):
+                return rendered
+            self._render_cache[cache_key] = rendered
+            if len(self._render_cache) > RENDER_CACHE_SIZE:
+                self._render_cache.popitem(last=False)
+        return rendered
+
+    def _is_current(self, compile_key: Tuple, generation: Optional[int]) -> bool:
+        """自定义提示词在读取后是否未再失效 (调用方需持有锁；内置模板不会失效)"""
+        return generation is None or self._generations.get(compile_key[1], 0) == generation
+
+    def invalidate_prompt(self, prompt_id: int):
+        """
+        使指定自定义提示词的编译结果和渲染缓存失效
+
+        :param prompt_id: 提示词 ID
+        """
+        with self._lock:
+            self._generations[prompt_id] = self._generations.get(prompt_id, 0) + 1
+            for key in [k for k in self._compiled if k[0] == 'prompt' and k[1] == prompt_id]:
+                del self._compiled[key]
+            for key in [k for k in self._render_cache if k[0] == 'prompt' and k[1] == prompt_id]:
+                del self._render_cache[key]
+            self._stats["invalidations"] += 1
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        获取编译缓存统计
+
+        :return: 包含 hits, misses, compiles, invalidations, compiled, rendered, hit_rate 的字典
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["compiled"] = len(self._compiled)
+            stats["rendered"] = len(self._render_cache)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+# 实例化全局对象
+prompt_manager = PromptManager()
@@ -14,12 +14,12 @@ Analyst 负责拆解需求，Reviewer 负责评审并入库。
 import json
 import traceback
 
-from autogen_agentchat.teams import RoundRobinGroupChat
 from autogen_agentchat.conditions import TextMentionTermination
 from autogen_agentchat.agents import AssistantAgent
 
 # 导入项目模块
 from backend.agents.llm_factory import get_gemini_client
+from backend.agents.agent_pool import agent_pool, AgentTemplate
 from backend.database.requirement_db import save_breakdown_item
 from backend.utils.stream_utils import AutoGenStreamProcessor, format_sse
 
@@ -45,17 +45,7 @@ TOOL_NAMES_MAP = {
 # Agent 定义区域
 # -------------------------------------------------------------------------
 
-def create_requirement_analyst():
-    """
-    创建需求分析师 Agent (Analyst)
-    职责：阅读原始需求，将其拆解为独立的、可开发测试的功能点。
-    注意：不需要任何工具 (tools=[])，它只负责思考和输出 JSON。
-    """
-    return AssistantAgent(
-        name="req_analyst",
-        model_client=gemini_client,
-        # tools=[], # 显式移除工具，防止它越权保存
-        system_message="""
+ANALYST_SYSTEM_MESSAGE = """
             你是一个资深产品经理。
 
             【任务】
@@ -96,21 +86,8 @@ def create_requirement_analyst():
             **严禁** 在 Reviewer 操作完成后再次发言。
             如果不知道说什么，就保持沉默或输出 TERMINATE。
         """
-    )
 
-
-# --- 2. 创建 Agent (Reviewer) ---
-def create_requirement_reviewer():
-    """
-    创建需求评审员 Agent (Reviewer)
-    职责：检查 Analyst 的拆解结果，评分并入库。
-    权限：拥有 save_breakdown_item 工具权限。
-    """
-    return AssistantAgent(
-        name="req_reviewer",
-        model_client=gemini_client,
-        tools=[save_breakdown_item],  # 🔥 只有 Reviewer 拥有入库到拆解表的权限
-        system_message="""
+REVIEWER_SYSTEM_MESSAGE = """
             你是一个严格的需求质量评审员。
 
             【工作流】
@@ -150,6 +127,53 @@ def create_requirement_reviewer():
             不要解释，不要总结，不要说“已入库”，直接说 TERMINATE。
             阻止 Analyst 继续发言。
         """
+
+
+def create_requirement_analyst():
+    """
+    创建需求分析师 Agent (Analyst)
+    职责：阅读原始需求，将其拆解为独立的、可开发测试的功能点。
+    注意：不需要任何工具 (tools=[])，它只负责思考和输出 JSON。
+    """
+    return AssistantAgent(
+        name="req_analyst",
+        model_client=gemini_client,
+        # tools=[], # 显式移除工具，防止它越权保存
+        system_message=ANALYST_SYSTEM_MESSAGE
+    )
+
+
+# --- 2. 创建 Agent (Reviewer) ---
+def create_requirement_reviewer():
+    """
+    创建需求评审员 Agent (Reviewer)
+    职责：检查 Analyst 的拆解结果，评分并入库。
+    权限：拥有 save_breakdown_item 工具权限。
+    """
+    return AssistantAgent(
+        name="req_reviewer",
+        model_client=gemini_client,
+        tools=[save_breakdown_item],  # 🔥 只有 Reviewer 拥有入库到拆解表的权限
+        system_message=REVIEWER_SYSTEM_MESSAGE
+    )
+
+
+async def build_requirement_team():
+    """
+    从 Agent 池组装需求分析团队 (Analyst + Reviewer)
+    :return: (team, leases)，任务正常结束后调用 agent_pool.release_all(leases) 归还 Agent
+    """
+    members = [
+        (("req_analyst", "base", "builtin", None),
+         lambda: AgentTemplate("req_analyst", gemini_client, ANALYST_SYSTEM_MESSAGE)),
+        (("req_reviewer", "base", "builtin", None),
+         lambda: AgentTemplate("req_reviewer", gemini_client, REVIEWER_SYSTEM_MESSAGE, tools=[save_breakdown_item])),
+    ]
+    # 两人协作，轮流发言
+    return await agent_pool.build_team(
+        members,
+        termination_condition=TextMentionTermination("TERMINATE"),
+        max_turns=5
     )
 
 
@@ -187,15 +211,7 @@ async def run_requirement_analysis_stream(project_id: int, raw_req: str, instruc
             try:
                 async def process_async():
                     """异步处理函数"""
-                    analyst = create_requirement_analyst()
-                    reviewer = create_requirement_reviewer()
-
-                    # 两人协作，轮流发言
-                    team = RoundRobinGroupChat(
-                        [analyst, reviewer],
-                        termination_condition=TextMentionTermination("TERMINATE"),
-                        max_turns=5
-                    )
+                    team, leases = await build_requirement_team()
 
                     task_prompt = f"""
                     【需求分析任务】
@@ -219,6 +235,8 @@ async def run_requirement_analysis_stream(project_id: int, raw_req: str, instruc
                     raw_stream = team.run_stream(task=task_prompt)
                     async for sse in processor.process_stream(raw_stream):
                         result_queue.put(sse)
+
+                    agent_pool.release_all(leases)
                     
                     # 标记完成
                     result_queue.put(None)
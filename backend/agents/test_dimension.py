@@ -4,97 +4,215 @@
 测试维度管理模块
 负责定义和推荐测试维度 (如功能、安全、性能等)，
 帮助 Agent 生成覆盖面更广的测试用例。
+
+说明：
+1. 维度规则 (关键词、正则、权重、优先级) 保存在 dimension_rules 表，支持中英文需求。
+2. 规则只在加载时编译一次 (关键词去重合并、正则预编译)，一次调用即可得到全部维度的得分与命中证据。
+3. 规则通过 DimensionRuleDB 修改时立即重新编译；其他进程修改时按版本号定期检测后热加载。
 """
 
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List
+
+from backend.config import SYSTEM_CONFIG
+from backend.database.dimension_rule_db import DEFAULT_DIMENSION_RULES, dimension_rule_db
+
+
+class CompiledDimensionRules:
+    """
+    编译后的维度规则 (只读，可多线程共享)
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]], revision: str = None):
+        """
+        编译关键词表与正则
+
+        :param rules: 维度规则列表
+        :param revision: 规则版本号
+        """
+        self.revision = revision
+        self.rules = {rule['dimension']: rule for rule in rules}
+        # 关键词去重合并：同一关键词属于多个维度时只检查一次
+        keyword_dims: Dict[str, List[str]] = {}
+        for rule in rules:
+            for keyword in rule.get('keywords') or []:
+                if keyword:
+                    dims = keyword_dims.setdefault(keyword.lower(), [])
+                    if rule['dimension'] not in dims:
+                        dims.append(rule['dimension'])
+        self.keywords = list(keyword_dims.items())
+
+        # 每条正则单独编译，非法正则跳过，避免一条坏规则导致全部失效
+        self.patterns = []
+        for rule in rules:
+            for pattern in rule.get('patterns') or []:
+                try:
+                    self.patterns.append((rule['dimension'], re.compile(pattern)))
+                except re.error as e:
+                    print(f"⚠️ [Dimension] 维度 {rule['dimension']} 的正则无效，已跳过: {pattern} ({e})")
+
+    def score(self, text: str) -> Dict[str, Dict[str, Any]]:
+        """
+        对文本打分
+
+        :param text: 需求文本
+        :return: {维度: {"score": 得分, "evidence": [命中的关键词/片段]}}，只包含有命中的维度
+        """
+        # 统一转小写后匹配 (关键词与正则均忽略大小写)
+        text = (text or '').lower()
+        evidence: Dict[str, Dict[str, None]] = {}  # 维度 -> 有序去重的证据
+        for keyword, dims in self.keywords:
+            if keyword in text:
+                for dimension in dims:
+                    evidence.setdefault(dimension, {})[keyword] = None
+        for dimension, regex in self.patterns:
+            for match in regex.finditer(text):
+                evidence.setdefault(dimension, {})[match.group(0)] = None
+
+        return {dimension: {"score": round(self.rules[dimension].get('weight', 1.0) * len(hits), 4),
+                            "evidence": list(hits)}
+                for dimension, hits in evidence.items()}
+
+
 class TestDimensionManager:
     """
     测试维度管理器
     """
-    
-    def __init__(self):
-        """初始化测试维度定义"""
-        self.dimensions = {
-            'functional': {
-                'name': '功能测试',
-                'description': '验证核心业务功能是否正常工作',
-                'priority': 'high'
-            },
-            'boundary': {
-                'name': '边界测试',
-                'description': '测试输入输出的边界值',
-                'priority': 'medium'
-            },
-            'exception': {
-                'name': '异常测试',
-                'description': '测试错误处理和异常场景',
-                'priority': 'medium'
-            },
-            'security': {
-                'name': '安全测试',
-                'description': '测试权限、数据安全等',
-                'priority': 'medium'
-            },
-            'performance': {
-                'name': '性能测试',
-                'description': '测试响应时间、并发处理等',
-                'priority': 'low'
-            },
-            'compatibility': {
-                'name': '兼容性测试',
-                'description': '测试不同环境、设备等',
-                'priority': 'low'
-            }
-        }
-    
+
+    def __init__(self, rule_db=dimension_rule_db, reload_interval: float = None):
+        """
+        初始化测试维度管理器 (规则在首次使用时编译)
+
+        :param rule_db: 维度规则数据库操作对象
+        :param reload_interval: 检测规则版本的最短间隔 (秒)，为空时使用系统配置
+        """
+        self.rule_db = rule_db
+        self.reload_interval = (SYSTEM_CONFIG["dimension_rule_reload_interval"]
+                                if reload_interval is None else reload_interval)
+        self._compiled: CompiledDimensionRules = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._stats = {"compiles": 0, "reload_checks": 0}
+        # 通过 DimensionRuleDB 修改规则时立即失效
+        rule_db.add_change_listener(self.on_rule_change)
+
+    @property
+    def dimensions(self) -> Dict[str, Dict[str, Any]]:
+        """当前生效的维度定义 {维度: {name, description, priority}}"""
+        return {key: {'name': rule['name'], 'description': rule['description'], 'priority': rule['priority']}
+                for key, rule in self._get_compiled().rules.items()}
+
+    def on_rule_change(self, table, ids, action):
+        """维度规则变更监听器：下次使用时重新编译"""
+        if table == "dimension_rules":
+            self.invalidate()
+
+    def invalidate(self):
+        """清除编译结果"""
+        with self._lock:
+            self._compiled = None
+
+    def _load_rules(self):
+        """读取启用的规则，规则表不存在或为空时使用默认规则"""
+        try:
+            rules = self.rule_db.get_rules(active_only=True)
+            revision = self.rule_db.get_revision()
+        except sqlite3.OperationalError:
+            return DEFAULT_DIMENSION_RULES, None
+        return (rules, revision) if rules else (DEFAULT_DIMENSION_RULES, revision)
+
+    def _get_compiled(self) -> CompiledDimensionRules:
+        """获取编译后的规则，必要时热加载"""
+        with self._lock:
+            now = time.monotonic()
+            compiled = self._compiled
+            if compiled is not None and now - self._checked_at < self.reload_interval:
+                return compiled
+
+            self._checked_at = now
+            if compiled is not None:
+                self._stats["reload_checks"] += 1
+                try:
+                    if self.rule_db.get_revision() == compiled.revision:
+                        return compiled
+                except sqlite3.OperationalError:
+                    return compiled
+
+            rules, revision = self._load_rules()
+            self._compiled = CompiledDimensionRules(rules, revision)
+            self._stats["compiles"] += 1
+            return self._compiled
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取编译/热加载统计"""
+        compiled = self._compiled
+        return {**self._stats, "revision": compiled.revision if compiled else None,
+                "dimensions": len(compiled.rules) if compiled else 0,
+                "keywords": len(compiled.keywords) if compiled else 0}
+
+    @staticmethod
+    def _req_text(req) -> str:
+        return f"{req.get('feature_name') or ''}\n{req.get('description') or ''}"
+
+    def score_dimensions(self, req, compiled: CompiledDimensionRules = None):
+        """
+        计算需求在各维度上的得分与命中证据
+
+        :param req: 需求对象 (包含名称、描述等信息)
+        :param compiled: 编译后的规则 (批量处理时复用，为空时自动获取)
+        :return: 推荐维度列表 [{"dimension", "name", "description", "priority", "score", "evidence"}]，
+                 始终包含的维度在前，其余按得分降序
+        """
+        compiled = compiled or self._get_compiled()
+        scores = compiled.score(self._req_text(req))
+
+        ranked = []
+        for order, (dimension, rule) in enumerate(compiled.rules.items()):
+            hit = scores.get(dimension, {"score": 0, "evidence": []})
+            if not rule.get('always_include') and (not hit['evidence'] or hit['score'] < rule.get('min_score', 1.0)):
+                continue
+            ranked.append(((not rule.get('always_include'), -hit['score'], order), {
+                'dimension': dimension,
+                'name': rule['name'],
+                'description': rule['description'],
+                'priority': rule['priority'],
+                'score': hit['score'],
+                'evidence': hit['evidence']
+            }))
+        ranked.sort(key=lambda pair: pair[0])
+        return [item for _, item in ranked]
+
+    def classify_batch(self, reqs: Iterable[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        批量识别测试维度 (整批共用同一份编译规则)
+
+        :param reqs: 需求对象列表
+        :return: 与输入顺序一致的推荐维度列表
+        """
+        compiled = self._get_compiled()
+        return [self.score_dimensions(req, compiled) for req in reqs]
+
     def get_relevant_dimensions(self, req):
         """
         根据需求内容，智能推荐相关的测试维度
-        
+
         :param req: 需求对象 (包含描述等信息)
         :return: 相关测试维度列表 (如 ['functional', 'security'])
         """
-        relevant_dims = []
-        
-        # 分析需求，确定相关维度
-        desc = req.get('description', '').lower()
-        
-        # 功能测试是基础，始终包含
-        relevant_dims.append('functional')
-        
-        # 根据关键词匹配其他维度
-        if any(keyword in desc for keyword in ['user', 'login', 'auth', 'permission']):
-            relevant_dims.append('security')
-        
-        if any(keyword in desc for keyword in ['api', 'request', 'response', 'parameter']):
-            relevant_dims.append('boundary')
-            relevant_dims.append('exception')
-        
-        if any(keyword in desc for keyword in ['performance', 'speed', 'response time', 'load']):
-            relevant_dims.append('performance')
-        
-        if any(keyword in desc for keyword in ['browser', 'device', 'platform', 'compatible']):
-            relevant_dims.append('compatibility')
-        
-        # 去重
-        return list(set(relevant_dims))
-    
+        return [item['dimension'] for item in self.score_dimensions(req)]
+
     def generate_test_matrix(self, req):
         """
         生成测试维度矩阵
-        
+
         :param req: 需求对象
-        :return: 测试维度矩阵列表，包含维度名称、描述和优先级
+        :return: 测试维度矩阵列表，包含维度名称、描述、优先级、得分和命中证据
         """
-        relevant_dims = self.get_relevant_dimensions(req)
-        matrix = []
-        
-        for dim in relevant_dims:
-            dim_info = self.dimensions[dim]
-            matrix.append({
-                'dimension': dim,
-                'name': dim_info['name'],
-                'description': dim_info['description'],
-                'priority': dim_info['priority']
-            })
-        
-        return matrix
+        return self.score_dimensions(req)
+
+
+# 实例化全局对象
+dimension_manager = TestDimensionManager()
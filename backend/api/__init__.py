@@ -17,6 +17,8 @@ from .projects import router as projects_router
 from .requirements import router as requirements_router
 from .prompts import router as prompts_router
 from .config import router as config_router
+from .knowledge import router as knowledge_router
+from .search import router as search_router
 
 # 注册子路由
 api_router.include_router(analysis_router, tags=["analysis"])
@@ -26,3 +28,5 @@ api_router.include_router(projects_router, prefix="/projects", tags=["projects"]
 api_router.include_router(requirements_router, prefix="/requirements", tags=["requirements"])
 api_router.include_router(prompts_router, tags=["prompts"])
 api_router.include_router(config_router, tags=["config"])
+api_router.include_router(knowledge_router, prefix="/knowledge", tags=["knowledge"])
+api_router.include_router(search_router, prefix="/search", tags=["search"])
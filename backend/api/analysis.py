@@ -8,6 +8,7 @@ from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
+from backend.database.async_db import run_in_db
 from backend.services import requirement_service
 
 # 创建路由器
@@ -50,26 +51,34 @@ def analyze_requirement_stream(body: AnalysisRequest):
 
 
 @router.get("/requirement_breakdown")
-def list_breakdowns(
+async def list_breakdowns(
         page: int = 1,
         size: int = 10,
         project_id: int = None,
         feature: str = None,
-        status: str = None
+        status: str = None,
+        after_id: int = None,
+        before_id: int = None,
+        include_total: bool = True
 ):
-    """获取需求拆解结果列表"""
+    """获取需求拆解结果列表 (游标分页与 include_total 说明见用例列表接口)"""
     try:
-        return requirement_service.get_breakdowns(page, size, project_id, feature, status)
+        if after_id is not None and before_id is not None:
+            raise HTTPException(400, "after_id 与 before_id 不能同时传入")
+        return await run_in_db(requirement_service.get_breakdowns, page, size, project_id, feature, status,
+                               after_id, before_id, include_total)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取需求拆解结果失败: {str(e)}")
 
 
 @router.put("/requirement_breakdown/{item_id}")
-def update_breakdown(item_id: int, body: BreakdownUpdate):
+async def update_breakdown(item_id: int, body: BreakdownUpdate):
     """更新需求拆解项"""
     try:
         # 使用 model_dump 替代 dict
-        success = requirement_service.update_breakdown(item_id, body.model_dump())
+        success = await run_in_db(requirement_service.update_breakdown, item_id, body.model_dump())
         if success:
             return {"status": "success"}
         raise HTTPException(500, "更新失败")
@@ -80,13 +89,13 @@ def update_breakdown(item_id: int, body: BreakdownUpdate):
 
 
 @router.put("/requirement_breakdown/{item_id}/status")
-def change_breakdown_status(item_id: int, body: StatusUpdate):
+async def change_breakdown_status(item_id: int, body: StatusUpdate):
     """更新需求拆解状态"""
     try:
         if body.status not in ['Pass', 'Reject', 'Discard', 'Pending']:
             raise HTTPException(400, "无效的状态")
 
-        success = requirement_service.update_breakdown_status(item_id, body.status)
+        success = await run_in_db(requirement_service.update_breakdown_status, item_id, body.status)
         if success:
             return {"status": "success", "message": f"状态已更新为 {body.status}"}
         raise HTTPException(500, "状态更新失败")
@@ -8,7 +8,8 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List
 
-from backend.services import test_case_service
+from backend.database.async_db import run_in_db
+from backend.services import normalize_service, test_case_service
 
 # 创建路由器
 router = APIRouter(prefix="", tags=["cases"])
@@ -20,27 +21,104 @@ class BatchUpdateStatusRequest(BaseModel):
 
 
 @router.get("")
-def list_cases(
+async def list_cases(
         page: int = 1,
         size: int = 10,
         req_id: int = None,
-        status: str = None
+        status: str = None,
+        title: str = None,
+        after_id: int = None,
+        before_id: int = None,
+        include_total: bool = True
 ):
-    """获取测试用例列表"""
+    """
+    获取测试用例列表
+    title 为标题模糊查询 (3 个字符及以上走全文索引)；传入 after_id / before_id 时使用游标分页 (翻页请使用返回的 next_cursor)；
+    include_total=false 时不统计总数，total_mode 标明总数为精确值 (exact) 还是估算值 (estimated)
+    """
     try:
-        return test_case_service.get_cases(page, size, req_id=req_id, status=status)
+        if after_id is not None and before_id is not None:
+            raise HTTPException(400, "after_id 与 before_id 不能同时传入")
+        return await run_in_db(test_case_service.get_cases, page, size, req_id=req_id, title=title, status=status,
+                               after_id=after_id, before_id=before_id, include_total=include_total)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取测试用例列表失败: {str(e)}")
 
 
+@router.get("/duplicates")
+async def list_duplicate_cases(project_id: int = None, req_id: int = None, threshold: float = None):
+    """近似重复用例报告 (MinHash LSH，按项目/需求过滤)"""
+    try:
+        if threshold is not None and not 0 < threshold <= 1:
+            raise HTTPException(400, "threshold 取值范围为 (0, 1]")
+        return await run_in_db(test_case_service.find_duplicates, project_id=project_id, req_id=req_id,
+                               threshold=threshold)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取重复用例报告失败: {str(e)}")
+
+
+@router.post("/duplicates/rebuild")
+async def rebuild_duplicate_index(req_id: int = None):
+    """从用例表重建近似重复索引 (指定 req_id 时只重建单个功能点)"""
+    try:
+        count = await run_in_db(test_case_service.rebuild_duplicate_index, req_id)
+        return {"status": "success", "rebuilt": count}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"重建重复索引失败: {str(e)}")
+
+
+@router.get("/normalize")
+async def get_normalize_status():
+    """历史用例规范化任务进度 (待处理行数、已处理/改写行数、吞吐、预计剩余时间)"""
+    try:
+        return await run_in_db(normalize_service.status)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取规范化进度失败: {str(e)}")
+
+
+@router.post("/normalize")
+async def start_normalize(batch_size: int = None):
+    """在后台启动历史用例规范化任务 (上次未完成时从断点继续)"""
+    try:
+        if batch_size is not None and batch_size <= 0:
+            raise HTTPException(400, "batch_size 必须大于 0")
+        return await run_in_db(normalize_service.start, batch_size)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"启动规范化任务失败: {str(e)}")
+
+
+@router.post("/normalize/stop")
+async def stop_normalize():
+    """停止规范化任务 (当前批次完成后停止，断点已保存)"""
+    try:
+        return await run_in_db(normalize_service.stop)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"停止规范化任务失败: {str(e)}")
+
+
+@router.get("/normalize/audit")
+async def list_normalize_audit(case_id: int = None, run_id: int = None, limit: int = 100):
+    """规范化审计记录 (字段原值与新值)"""
+    try:
+        return await run_in_db(normalize_service.get_audit, case_id, run_id, min(limit, 1000))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取规范化审计记录失败: {str(e)}")
+
+
 @router.put("/batch_status")
-def batch_update_case_status(body: BatchUpdateStatusRequest):
+async def batch_update_case_status(body: BatchUpdateStatusRequest):
     """批量更新测试用例状态"""
     try:
         if not body.ids or len(body.ids) == 0:
             raise HTTPException(400, "请选择至少一个测试用例")
         
-        success = test_case_service.batch_update_case_status(body.ids, body.status)
+        success = await run_in_db(test_case_service.batch_update_case_status, body.ids, body.status)
         if success:
             return {"status": "success", "message": f"已更新 {len(body.ids)} 个测试用例的状态为 {body.status}"}
         raise HTTPException(500, "状态更新失败")
@@ -4,10 +4,17 @@
 功能开关配置API
 """
 
+import re
+
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+from typing import List
 
 from backend.config.feature_config import FEATURE_CONFIG
+from backend.agents.agent_pool import agent_pool
+from backend.agents.test_dimension import dimension_manager
+from backend.database.async_db import run_in_db
+from backend.database.dimension_rule_db import dimension_rule_db
 
 router = APIRouter()
 
@@ -19,6 +26,25 @@ class FeatureConfig(BaseModel):
     use_context_manager: bool
 
 
+class DimensionRule(BaseModel):
+    dimension: str
+    name: str = None
+    description: str = ""
+    priority: str = "medium"
+    keywords: List[str] = []
+    patterns: List[str] = []
+    weight: float = 1.0
+    min_score: float = 1.0
+    always_include: bool = False
+    is_active: bool = True
+    sort_order: int = 0
+
+
+class DimensionPreview(BaseModel):
+    feature_name: str = ""
+    description: str = ""
+
+
 @router.get("/config/feature")
 def get_feature_config():
     """
@@ -27,6 +53,47 @@ def get_feature_config():
     return FEATURE_CONFIG
 
 
+@router.get("/config/agent_pool/stats")
+def get_agent_pool_stats():
+    """
+    获取 Agent 池统计 (复用次数、模板数量、团队构造耗时 p50/p99)
+    """
+    return agent_pool.get_stats()
+
+
+@router.get("/config/dimension_rules")
+async def list_dimension_rules(active_only: bool = False):
+    """
+    获取测试维度规则 (关键词、正则、权重、优先级) 及编译统计
+    """
+    return {"rules": await run_in_db(dimension_rule_db.get_rules, active_only=active_only), "stats": dimension_manager.get_stats()}
+
+
+@router.put("/config/dimension_rules")
+async def save_dimension_rule(rule: DimensionRule):
+    """
+    新增或更新测试维度规则 (保存后立即重新编译生效)
+    """
+    for pattern in rule.patterns:
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            raise HTTPException(status_code=400, detail=f"正则表达式无效: {pattern} ({e})")
+    try:
+        rule_id = await run_in_db(dimension_rule_db.save_rule, rule.model_dump())
+        return {"status": "success", "id": rule_id}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"保存维度规则失败: {str(e)}")
+
+
+@router.post("/config/dimension_rules/preview")
+async def preview_dimensions(body: DimensionPreview):
+    """
+    预览需求文本命中的测试维度、得分与命中证据
+    """
+    return await run_in_db(dimension_manager.score_dimensions, body.model_dump())
+
+
 @router.post("/config/feature")
 def update_feature_config(config: FeatureConfig):
     """
@@ -7,6 +7,7 @@
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import Response
 
+from backend.database.async_db import run_in_db
 from backend.services import test_case_service
 
 # 创建路由器
@@ -14,11 +15,11 @@ router = APIRouter(prefix="", tags=["export"])
 
 
 @router.get("")
-def export_cases(req_id: int = None, status: str = None, format: str = "excel"):
+async def export_cases(req_id: int = None, status: str = None, format: str = "excel"):
     """导出测试用例"""
     try:
         # 获取导出数据
-        cases = test_case_service.get_cases_for_export(req_id=req_id, status=status)
+        cases = await run_in_db(test_case_service.get_cases_for_export, req_id=req_id, status=status)
         
         if not cases:
             raise HTTPException(404, "没有找到符合条件的测试用例")
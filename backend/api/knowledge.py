@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+知识库管理 API
+"""
+
+import time
+
+from fastapi import APIRouter, HTTPException
+
+from backend.agents.knowledge_manager import knowledge_cache
+from backend.agents.local_knowledge import local_knowledge_index
+from backend.database.async_db import run_in_db
+
+# 创建路由器
+router = APIRouter(prefix="", tags=["knowledge"])
+
+
+@router.get("/cache")
+async def inspect_knowledge_cache(limit: int = 100):
+    """查看知识检索缓存 (配置、命中统计、条目摘要)"""
+    try:
+        return await run_in_db(knowledge_cache.inspect, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取知识缓存失败: {str(e)}")
+
+
+@router.delete("/cache")
+async def flush_knowledge_cache(cache_key: str = None):
+    """清空知识检索缓存，指定 cache_key 时只删除单条"""
+    try:
+        removed = await run_in_db(knowledge_cache.flush, cache_key)
+        return {"status": "success", "removed": removed}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"清空知识缓存失败: {str(e)}")
+
+
+@router.get("/index")
+async def inspect_local_index():
+    """查看本地知识索引统计 (文档数、词项数、日志行数等)"""
+    try:
+        await run_in_db(local_knowledge_index.ensure_loaded)
+        return await run_in_db(local_knowledge_index.get_stats)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取本地索引状态失败: {str(e)}")
+
+
+@router.get("/index/search")
+async def search_local_index(query: str, limit: int = 5):
+    """直接查询本地知识索引 (用于调试检索效果)"""
+    try:
+        start = time.perf_counter()
+        items = await run_in_db(local_knowledge_index.search, query, limit)
+        return {"items": items, "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"本地索引检索失败: {str(e)}")
+
+
+@router.post("/index/rebuild")
+async def rebuild_local_index():
+    """从数据库全量重建本地知识索引"""
+    try:
+        count = await run_in_db(local_knowledge_index.rebuild)
+        return {"status": "success", "documents": count}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"重建本地索引失败: {str(e)}")
@@ -8,9 +8,11 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional
 
+from backend.database.async_db import run_in_db
 from backend.database.prompt_db import (
-    get_prompts, get_prompt_by_id, create_prompt, update_prompt, delete_prompt
+    get_prompts, get_prompt_by_id, create_prompt, update_prompt, delete_prompt, get_prompt_cache_stats
 )
+from backend.agents.prompt_manager import prompt_manager
 
 # 创建路由器
 router = APIRouter(prefix="/prompts", tags=["prompts"])
@@ -43,20 +45,29 @@ class PromptResponse(PromptBase):
 
 
 @router.get("", response_model=List[PromptResponse])
-def list_prompts(domain: Optional[str] = None, type: Optional[str] = None):
+async def list_prompts(domain: Optional[str] = None, type: Optional[str] = None):
     """获取提示词列表"""
     try:
-        prompts = get_prompts(domain, type)
+        prompts = await run_in_db(get_prompts, domain, type)
         return prompts
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取提示词列表失败: {str(e)}")
 
 
+@router.get("/cache/stats")
+def get_prompt_cache_statistics():
+    """获取提示词缓存命中统计 (数据库行缓存 + 编译缓存)"""
+    return {
+        "prompt_db": get_prompt_cache_stats(),
+        "compiled": prompt_manager.get_cache_stats()
+    }
+
+
 @router.get("/{prompt_id}", response_model=PromptResponse)
-def get_prompt(prompt_id: int):
+async def get_prompt(prompt_id: int):
     """根据ID获取提示词"""
     try:
-        prompt = get_prompt_by_id(prompt_id)
+        prompt = await run_in_db(get_prompt_by_id, prompt_id)
         if not prompt:
             raise HTTPException(status_code=404, detail="提示词不存在")
         return prompt
@@ -67,11 +78,11 @@ def get_prompt(prompt_id: int):
 
 
 @router.post("", response_model=PromptResponse)
-def create_prompt_api(body: PromptCreate):
+async def create_prompt_api(body: PromptCreate):
     """创建提示词"""
     try:
-        prompt_id = create_prompt(body.model_dump())
-        prompt = get_prompt_by_id(prompt_id)
+        prompt_id = await run_in_db(create_prompt, body.model_dump())
+        prompt = await run_in_db(get_prompt_by_id, prompt_id)
         if not prompt:
             raise HTTPException(status_code=500, detail="创建提示词失败")
         return prompt
@@ -80,21 +91,21 @@ def create_prompt_api(body: PromptCreate):
 
 
 @router.put("/{prompt_id}", response_model=PromptResponse)
-def update_prompt_api(prompt_id: int, body: PromptUpdate):
+async def update_prompt_api(prompt_id: int, body: PromptUpdate):
     """更新提示词"""
     try:
         # 检查提示词是否存在
-        existing_prompt = get_prompt_by_id(prompt_id)
+        existing_prompt = await run_in_db(get_prompt_by_id, prompt_id)
         if not existing_prompt:
             raise HTTPException(status_code=404, detail="提示词不存在")
         
         # 更新提示词
-        success = update_prompt(prompt_id, body.model_dump())
+        success = await run_in_db(update_prompt, prompt_id, body.model_dump())
         if not success:
             raise HTTPException(status_code=500, detail="更新提示词失败")
         
         # 返回更新后的提示词
-        updated_prompt = get_prompt_by_id(prompt_id)
+        updated_prompt = await run_in_db(get_prompt_by_id, prompt_id)
         return updated_prompt
     except HTTPException:
         raise
@@ -103,16 +114,16 @@ def update_prompt_api(prompt_id: int, body: PromptUpdate):
 
 
 @router.delete("/{prompt_id}")
-def delete_prompt_api(prompt_id: int):
+async def delete_prompt_api(prompt_id: int):
     """删除提示词"""
     try:
         # 检查提示词是否存在
-        existing_prompt = get_prompt_by_id(prompt_id)
+        existing_prompt = await run_in_db(get_prompt_by_id, prompt_id)
         if not existing_prompt:
             raise HTTPException(status_code=404, detail="提示词不存在")
         
         # 删除提示词
-        success = delete_prompt(prompt_id)
+        success = await run_in_db(delete_prompt, prompt_id)
         if not success:
             raise HTTPException(status_code=500, detail="删除提示词失败")
         
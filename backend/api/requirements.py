@@ -9,6 +9,7 @@ from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List
 
+from backend.database.async_db import run_in_db
 from backend.services import requirement_service, test_case_service
 
 # 创建路由器
@@ -21,20 +22,46 @@ class BatchGenerateRequest(BaseModel):
 
 
 @router.get("")
-def list_requirements(page: int = 1, size: int = 10, feature: str = None):
-    """获取功能点列表"""
+async def list_requirements(page: int = 1, size: int = 10, feature: str = None, after_id: int = None,
+                            before_id: int = None, include_total: bool = True):
+    """获取功能点列表 (游标分页与 include_total 说明见用例列表接口)"""
     try:
-        return requirement_service.get_requirements(page, size, feature_name=feature)
+        if after_id is not None and before_id is not None:
+            raise HTTPException(400, "after_id 与 before_id 不能同时传入")
+        return await run_in_db(requirement_service.get_requirements, page, size, feature_name=feature,
+                               after_id=after_id, before_id=before_id, include_total=include_total)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取功能点列表失败: {str(e)}")
 
 
+@router.post("/coverage/rebuild")
+async def rebuild_requirement_coverage(req_id: int = None):
+    """从用例表重建覆盖汇总 (指定 req_id 时只重建单个功能点)"""
+    try:
+        count = await run_in_db(requirement_service.rebuild_coverage, req_id)
+        return {"status": "success", "rebuilt": count}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"重建覆盖汇总失败: {str(e)}")
+
+
+@router.get("/{req_id}/coverage")
+async def get_requirement_coverage(req_id: int):
+    """获取功能点的用例覆盖汇总 (状态/类型/优先级/覆盖类别分布及质量分)"""
+    try:
+        coverage = await run_in_db(requirement_service.get_coverage, req_id)
+        return coverage or {"requirement_id": req_id, "total_cases": 0}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取覆盖汇总失败: {str(e)}")
+
+
 @router.get("/{req_id}/generate_stream")
 async def generate_cases_stream(req_id: int, count: int = 5, mode: str = "new", domain: str = "base", prompt_id: int = None):
     """单条生成测试用例（流式响应）"""
     try:
         # 尝试获取需求详情
-        req = requirement_service.get_requirement_by_id(req_id)
+        req = await run_in_db(requirement_service.get_requirement_by_id, req_id)
         if not req:
             raise HTTPException(status_code=404, detail="未找到对应的需求")
 
@@ -73,12 +100,12 @@ async def batch_generate_requirements_stream(body: BatchGenerateRequest):
 
 
 @router.get("/{req_id}/cases")
-def get_cases_by_req(req_id: int):
+async def get_cases_by_req(req_id: int):
     """获取指定需求的测试用例列表"""
     try:
         # 这个接口如果你还在用，需要确保 db_tools 或 case_db 里有对应方法
         # 建议统一使用 list_cases 接口
-        result = test_case_service.get_cases(1, 100, req_id=req_id)
+        result = await run_in_db(test_case_service.get_cases, 1, 100, req_id=req_id)
         return result['items']
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取需求相关用例失败: {str(e)}")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+全文检索 API
+"""
+
+from fastapi import APIRouter, HTTPException
+
+from backend.database.async_db import run_in_db
+from backend.database.search_db import SEARCH_SCOPES, search_db
+
+# 创建路由器
+router = APIRouter(prefix="", tags=["search"])
+
+
+@router.get("")
+async def search(
+        q: str,
+        scope: str = "cases",
+        page: int = 1,
+        size: int = 20,
+        project_id: int = None,
+        req_id: int = None,
+        status: str = None,
+        priority: str = None
+):
+    """
+    全文检索用例 (cases)、功能点 (requirements) 或需求拆解项 (breakdowns)
+    多个词用空格分隔 (AND 关系)，结果按相关度排序，highlights 中命中词以 <mark> 包裹；
+    不足 3 个字符的词退回模糊匹配，此时 mode 为 like 且按最新排序
+    """
+    try:
+        if scope not in SEARCH_SCOPES:
+            raise HTTPException(400, f"scope 取值为 {', '.join(SEARCH_SCOPES)}")
+        if not q.strip():
+            raise HTTPException(400, "检索词不能为空")
+        # 只传入该范围支持的过滤条件
+        filters = {key: value for key, value in
+                   {"project_id": project_id, "req_id": req_id, "status": status, "priority": priority}.items()
+                   if value is not None and key in SEARCH_SCOPES[scope]['filters']}
+        return await run_in_db(search_db.search, scope, q, page, min(size, 100), **filters)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"全文检索失败: {str(e)}")
+
+
+@router.post("/rebuild")
+async def rebuild_search_index(scope: str = None):
+    """从原表重建全文索引 (scope 为空时重建全部)"""
+    try:
+        if scope is not None and scope not in SEARCH_SCOPES:
+            raise HTTPException(400, f"scope 取值为 {', '.join(SEARCH_SCOPES)}")
+        return {"status": "success", "rebuilt": await run_in_db(search_db.rebuild, scope)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"重建全文索引失败: {str(e)}")
@@ -1,5 +1,5 @@
 # 配置包初始化文件
-from .config import LLM_CONFIG, DIFY_CONFIG, SYSTEM_CONFIG
+from .config import LLM_CONFIG, DIFY_CONFIG, LOCAL_INDEX_CONFIG, DB_CONFIG, SYSTEM_CONFIG
 from .feature_config import FEATURE_CONFIG
 
-__all__ = ['LLM_CONFIG', 'DIFY_CONFIG', 'FEATURE_CONFIG', 'SYSTEM_CONFIG']
+__all__ = ['LLM_CONFIG', 'DIFY_CONFIG', 'LOCAL_INDEX_CONFIG', 'DB_CONFIG', 'FEATURE_CONFIG', 'SYSTEM_CONFIG']
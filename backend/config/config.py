@@ -5,7 +5,9 @@
 主要包括：
 1. LLM (大语言模型) 配置：API Key、Endpoint 等
 2. Dify 知识库配置：API Key、Endpoint、检索数量限制
-3. 系统运行参数：调试模式、最大生成数量等
+3. 本地知识索引配置：检索后端、索引文件、BM25 参数
+4. SQLite 连接配置：WAL、同步级别、忙等待、内存映射
+5. 系统运行参数：调试模式、最大生成数量等
 """
 
 import os
@@ -51,7 +53,86 @@ DIFY_CONFIG = {
     "endpoint": os.getenv("DIFY_ENDPOINT", "https://dify-test.lbxdrugs.com"),
     
     # 知识检索时的最大返回条数
-    "retrieve_limit": int(os.getenv("DIFY_RETRIEVE_LIMIT", "3"))
+    "retrieve_limit": int(os.getenv("DIFY_RETRIEVE_LIMIT", "3")),
+
+    # 建立连接超时 (秒)
+    "connect_timeout": float(os.getenv("DIFY_CONNECT_TIMEOUT", "3")),
+
+    # 等待响应超时 (秒)，blocking 模式下 Dify 需要完整生成回答
+    "read_timeout": float(os.getenv("DIFY_READ_TIMEOUT", "20")),
+
+    # 连接池大小及保活连接数
+    "max_connections": int(os.getenv("DIFY_MAX_CONNECTIONS", "20")),
+    "max_keepalive_connections": int(os.getenv("DIFY_MAX_KEEPALIVE", "10")),
+
+    # 同时进行的检索请求上限，超出的请求排队等待
+    "max_concurrency": int(os.getenv("DIFY_MAX_CONCURRENCY", "8")),
+
+    # 批量生成时知识预取的并发上限
+    "prefetch_concurrency": int(os.getenv("DIFY_PREFETCH_CONCURRENCY", "4")),
+
+    # 检索结果缓存：有结果的缓存时长 (秒)，0 表示关闭缓存
+    "cache_ttl": int(os.getenv("DIFY_CACHE_TTL", "3600")),
+
+    # 检索结果为空时的缓存时长 (秒)，避免短时间内反复查询无结果的问题
+    "cache_negative_ttl": int(os.getenv("DIFY_CACHE_NEGATIVE_TTL", "300")),
+
+    # 内存缓存最大条目数 (LRU 淘汰)
+    "cache_max_entries": int(os.getenv("DIFY_CACHE_MAX_ENTRIES", "512")),
+
+    # 是否启用 SQLite 二级缓存 (服务重启后仍可命中)
+    "cache_sqlite": os.getenv("DIFY_CACHE_SQLITE", "true").lower() == "true"
+}
+
+# =========================================================
+# 本地知识索引配置
+# =========================================================
+LOCAL_INDEX_CONFIG = {
+    # 知识检索后端：dify (仅 Dify) / local (仅本地索引) / hybrid (本地索引 + Dify)
+    "backend": os.getenv("KNOWLEDGE_BACKEND", "hybrid").lower(),
+
+    # 索引持久化文件 (JSON Lines 追加日志)，路径相对于项目根目录
+    "path": os.getenv("LOCAL_INDEX_PATH", "backend/database/knowledge_index.jsonl"),
+
+    # 本地检索默认返回条数
+    "top_k": int(os.getenv("LOCAL_INDEX_TOP_K", "3")),
+
+    # BM25 参数
+    "k1": float(os.getenv("LOCAL_INDEX_BM25_K1", "1.5")),
+    "b": float(os.getenv("LOCAL_INDEX_BM25_B", "0.75"))
+}
+
+# =========================================================
+# SQLite 连接配置
+# =========================================================
+DB_CONFIG = {
+    # 日志模式：WAL 允许读写并发 (读不阻塞写、写不阻塞读)
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+
+    # 同步级别：WAL 模式下 NORMAL 可保证一致性，且提交无需每次 fsync
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+
+    # 遇到写锁时的等待时长 (毫秒)，超时才报 "database is locked"
+    "busy_timeout_ms": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+
+    # 内存映射 I/O 大小 (字节)，0 表示关闭
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+
+    # 页缓存大小 (KiB)
+    "cache_size_kb": int(os.getenv("SQLITE_CACHE_SIZE_KB", "16384")),
+
+    # 每个连接缓存的预编译语句数量
+    "statement_cache": int(os.getenv("SQLITE_STATEMENT_CACHE", "256")),
+
+    # 异步路由使用的数据库专用线程数 (每个线程一条长连接；SQLite 写入串行，过多线程只会增加锁等待)
+    "async_workers": int(os.getenv("SQLITE_ASYNC_WORKERS", "8")),
+
+    # 写入缓冲 (组提交)：并发的 save_case / save_breakdown_item 合并到一个事务提交
+    "write_buffer_enabled": os.getenv("SQLITE_WRITE_BUFFER", "true").lower() == "true",
+    # 第一条写入入队后最多等待的毫秒数
+    "write_buffer_interval_ms": float(os.getenv("SQLITE_WRITE_BUFFER_INTERVAL_MS", "5")),
+    # 每批最多合并的写入数
+    "write_buffer_max_rows": int(os.getenv("SQLITE_WRITE_BUFFER_MAX_ROWS", "64"))
 }
 
 # =========================================================
@@ -65,5 +146,38 @@ SYSTEM_CONFIG = {
     "max_case_count": 50,
     
     # 智能体对话的最大交互轮次，防止死循环
-    "max_turns": 10
+    "max_turns": 10,
+
+    # 用例生成前置阶段 (上下文/知识检索/团队组装) 的总截止时间 (秒)
+    # 知识检索超过该时间后不再等待，直接开始生成
+    "preflight_deadline": float(os.getenv("PREFLIGHT_DEADLINE", "8")),
+
+    # 注入提示词的知识片段 Token 预算 (去重、排序后按预算打包)
+    "knowledge_token_budget": int(os.getenv("KNOWLEDGE_TOKEN_BUDGET", "600")),
+
+    # 知识片段近似重复阈值 (字符 bigram 相似度，0-1)
+    "knowledge_dedupe_threshold": float(os.getenv("KNOWLEDGE_DEDUPE_THRESHOLD", "0.8")),
+
+    # 用例近似重复判定阈值 (MinHash 估算的 Jaccard 相似度，0-1)
+    # 标题相似度与标题+步骤相似度需同时达到阈值才视为重复；只拦截措辞几乎相同的用例，
+    # "用户名为空/密码为空时登录失败"这类同级反向场景相似度约 0.55-0.6，不应被拦截。
+    # 同一需求的用例步骤常有相同的套话 (打开页面、点击按钮)，因此标题+步骤阈值更严格
+    "duplicate_threshold": float(os.getenv("CASE_DUPLICATE_THRESHOLD", "0.8")),
+    "duplicate_content_threshold": float(os.getenv("CASE_DUPLICATE_CONTENT_THRESHOLD", "0.85")),
+
+    # 增量模式注入提示词的已有用例数量 (每个补充方向 / 总上限)
+    "append_context_per_focus": int(os.getenv("APPEND_CONTEXT_PER_FOCUS", "3")),
+    "append_context_limit": int(os.getenv("APPEND_CONTEXT_LIMIT", "15")),
+
+    # 测试维度规则热加载：检测规则版本的最短间隔 (秒)
+    # 通过接口修改规则会立即生效，该间隔只影响其他进程直接修改数据库的情况
+    "dimension_rule_reload_interval": float(os.getenv("DIMENSION_RULE_RELOAD_INTERVAL", "5")),
+
+    # 列表模糊查询的总数估算：等值过滤结果不超过该行数时精确统计，否则在 ID 区间内随机抽样该数量的行估算
+    "count_estimate_sample": int(os.getenv("COUNT_ESTIMATE_SAMPLE", "2000")),
+
+    # 历史用例数据规范化：启动时若存在未规范化的用例则在后台按批改写 (每批行数 / 批间休眠秒数，避免长时间占用写锁)
+    "normalize_on_startup": os.getenv("NORMALIZE_ON_STARTUP", "true").lower() == "true",
+    "normalize_batch_size": int(os.getenv("NORMALIZE_BATCH_SIZE", "500")),
+    "normalize_batch_pause": float(os.getenv("NORMALIZE_BATCH_PAUSE", "0.05"))
 }
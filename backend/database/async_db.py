@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+异步数据库访问层
+sqlite3 只有同步接口，同步路由 (def) 每个请求占用 Starlette 线程池 (默认 40 个) 中的一个线程，
+列表请求突发时线程池被打满，流式生成请求也拿不到线程。这里改为：
+1. 路由使用 async def，数据库调用提交到专用的数据库线程池 (DB_CONFIG["async_workers"])，
+   协程在等待期间不占用任何线程，大量并发请求只在事件循环中排队；
+2. 线程池中的每个线程复用 connection_manager 的线程级长连接，与同步代码共享同一套连接配置；
+3. 专用线程池与 Starlette 线程池相互隔离，数据库排队不会影响流式响应等其他同步任务。
+
+用法：
+    result = await run_in_db(case_db.get_cases_page, page, size)
+    async_case_db = AsyncDatabaseBase(case_db)
+    result = await async_case_db.get_cases_page(page, size)
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from backend.config import DB_CONFIG
+from .connection import connection_manager
+
+
+class DBExecutor:
+    """
+    数据库专用线程池 (首次使用时创建，关闭后再次使用会重新创建)
+    """
+
+    def __init__(self, max_workers: int = None):
+        """
+        :param max_workers: 线程数 (默认 DB_CONFIG["async_workers"])
+        """
+        self.max_workers = max_workers or DB_CONFIG["async_workers"]
+        self._executor = None
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "running": 0, "max_running": 0}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="db-worker")
+            return self._executor
+
+    def _call(self, func: Callable, args, kwargs):
+        with self._lock:
+            self._stats["running"] += 1
+            self._stats["max_running"] = max(self._stats["max_running"], self._stats["running"])
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._stats["running"] -= 1
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        在数据库线程池中执行同步函数并等待结果
+
+        :param func: 同步函数 (通常是 DatabaseBase 子类或服务层的方法)
+        :return: 函数返回值 (异常原样抛出)
+        """
+        executor = self._get_executor()
+        with self._lock:
+            self._stats["submitted"] += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self._call, func, args, kwargs)
+
+    def shutdown(self, wait: bool = True):
+        """关闭线程池 (服务停止时调用，先于 connection_manager.close_all)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """线程池统计 (提交次数、当前/峰值执行数)"""
+        with self._lock:
+            return {**self._stats, "max_workers": self.max_workers}
+
+
+class AsyncDatabaseBase:
+    """
+    DatabaseBase 的异步版本
+    包装一个同步的数据库操作对象，其公开方法 (execute_query / execute_insert / get_cases_page ...)
+    均变为协程，在数据库线程池中执行；非方法属性原样返回。
+    """
+
+    def __init__(self, target: Any, executor: DBExecutor = None):
+        """
+        :param target: 同步对象 (如 case_db、requirement_service)
+        :param executor: 数据库线程池 (默认全局 db_executor)
+        """
+        self._target = target
+        self._executor = executor or db_executor
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._target, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def wrapper(*args, **kwargs):
+            return await self._executor.run(attr, *args, **kwargs)
+
+        return wrapper
+
+
+# 实例化全局对象
+db_executor = DBExecutor()
+
+
+# 便捷函数
+async def run_in_db(func: Callable, *args, **kwargs) -> Any:
+    """在全局数据库线程池中执行同步函数 (async 路由中使用)"""
+    return await db_executor.run(func, *args, **kwargs)
+
+
+def shutdown_db_executor():
+    """关闭数据库线程池并释放全部连接"""
+    db_executor.shutdown()
+    connection_manager.close_all()
@@ -8,17 +8,20 @@
 @Desc    ：基础类
 """
 import ast
-import sqlite3
 import json
 
+from .connection import connection_manager
+
 DB_PATH = "backend/database/test_cases.db"
 
 
 def get_conn():
-    """获取数据库连接 (Row Factory)"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row  # 让结果可以通过 dict 方式访问
-    return conn
+    """
+    获取数据库连接 (Row Factory)
+    同一线程复用同一条连接 (WAL、busy_timeout 等参数见 DB_CONFIG)，
+    close() 不会真正关闭连接，只回滚未提交的事务。
+    """
+    return connection_manager.get(DB_PATH)
 
 
 def safe_json_loads(json_str):
@@ -71,27 +74,91 @@ def safe_json_loads(json_str):
     ]
 
 
-def execute_page_query(cursor, base_sql, count_sql, params, page, size):
+def execute_page_query(cursor, base_sql, count_sql, params, page, size, counter=None):
     """
     [通用] 分页查询执行器
+
+    :param counter: 总数回调 callable(cursor) -> (总数, 方式)，见 ListCountDB.counter；为空时执行 count_sql 精确统计
     """
     offset = (page - 1) * size
 
-    # 1. 查总数
-    cursor.execute(count_sql, params)
-    total_row = cursor.fetchone()
-    total = total_row[0] if total_row else 0
-
-    # 2. 查数据
+    # 1. 查数据 (多取一条用于判断是否还有下一页)
     final_sql = f"{base_sql} LIMIT ? OFFSET ?"
-    final_params = params + (size, offset)
+    final_params = params + (size + 1, offset)
 
     cursor.execute(final_sql, final_params)
     rows = [dict(row) for row in cursor.fetchall()]
+    has_more = len(rows) > size
+    rows = rows[:size]
+
+    # 2. 查总数
+    if counter is None:
+        cursor.execute(count_sql, params)
+        total_row = cursor.fetchone()
+        total, total_mode = (total_row[0] if total_row else 0), "exact"
+    else:
+        total, total_mode = counter(cursor)
+    if total is not None:
+        if not has_more and (rows or offset == 0):
+            # 已到末页：总数可直接确定
+            total, total_mode = offset + len(rows), "exact"
+        elif has_more:
+            total = max(total, offset + len(rows) + 1)
 
     return {
         "total": total,
+        "total_mode": total_mode,
         "page": page,
         "size": size,
-        "items": rows
+        "items": rows,
+        # 游标：客户端可从任意一页切换到游标分页 (after_id=next_cursor)
+        "next_cursor": rows[-1]['id'] if rows and has_more else None,
+        "prev_cursor": rows[0]['id'] if rows and offset > 0 else None
+    }
+
+
+def execute_keyset_query(cursor, select_sql, where_clauses, params, size, after_id=None, before_id=None,
+                         id_column="id", counter=None):
+    """
+    [通用] 游标 (Keyset) 分页查询执行器
+    结果按 id 倒序：after_id 取该 id 之后 (更旧) 的一页，before_id 取该 id 之前 (更新) 的一页，都为空时取第一页。
+    通过 "id < ?" 直接从索引定位，代价与翻页深度无关。
+
+    :param select_sql: 不含 WHERE / ORDER BY 的查询语句
+    :param where_clauses: 过滤条件列表 (AND 连接)
+    :param params: 过滤条件参数
+    :param id_column: 排序与游标字段 (带表别名时如 "fp.id")
+    :param counter: 总数回调 (见 execute_page_query)，为空时不统计总数 (total 为 None)
+    :return: {"total", "total_mode", "size", "items", "next_cursor", "prev_cursor"}
+    """
+    clauses, params = list(where_clauses), list(params)
+    backward = after_id is None and before_id is not None
+    if after_id is not None:
+        clauses.append(f"{id_column} < ?")
+        params.append(after_id)
+    elif backward:
+        clauses.append(f"{id_column} > ?")
+        params.append(before_id)
+
+    # 多取一条用于判断是否还有下一页
+    order = "ASC" if backward else "DESC"
+    cursor.execute(f"{select_sql} WHERE {' AND '.join(clauses) or '1=1'} ORDER BY {id_column} {order} LIMIT ?",
+                   tuple(params) + (size + 1,))
+    rows = [dict(row) for row in cursor.fetchall()]
+    has_more = len(rows) > size
+    rows = rows[:size]
+    if backward:
+        rows.reverse()
+
+    id_key = id_column.split('.')[-1]
+    has_older = True if backward else has_more
+    has_newer = has_more if backward else after_id is not None
+    total, total_mode = counter(cursor) if counter else (None, "none")
+    return {
+        "total": total,
+        "total_mode": total_mode,
+        "size": size,
+        "items": rows,
+        "next_cursor": rows[-1][id_key] if rows and has_older else None,
+        "prev_cursor": rows[0][id_key] if rows and has_newer else None
     }
\ No newline at end of file
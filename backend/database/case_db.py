@@ -7,121 +7,94 @@
 @Date    ：2025/12/21 12:50
 @Desc    ：
 """
-import re
 from typing import Dict, Any, List
 
-from .base import execute_page_query, safe_json_loads
+from .base import execute_keyset_query, execute_page_query
+from .case_format import (FORMAT_VERSION, dumps, load_steps, load_test_data, parse_steps, parse_test_data,
+                          title_norm_sql)
+from .count_db import list_count_db
+from .search_db import search_db
+from .coverage_db import coverage_db
 from .db_base import DatabaseBase
-import json
+from .duplicate_db import duplicate_db, fingerprint
+from .write_buffer import WriteRejected, write_buffer
+
+
+def find_duplicate_titles(conn) -> List[Dict[str, Any]]:
+    """
+    查找同一功能点下归一化标题相同的用例 (唯一约束 uq_test_cases_req_title 建立前的历史数据)
+    只依赖 case_title 列，迁移 v12 之前也可执行
+
+    :param conn: 数据库连接或游标
+    :return: [{"requirement_id", "title", "ids": 按 ID 升序}]
+    """
+    norm = title_norm_sql()
+    rows = conn.execute(f"""
+        SELECT requirement_id, MIN(case_title) AS title, group_concat(id) AS ids FROM (
+            SELECT id, requirement_id, case_title, {norm} AS norm FROM test_cases
+            WHERE requirement_id IS NOT NULL ORDER BY id)
+        GROUP BY requirement_id, norm HAVING COUNT(*) > 1 ORDER BY requirement_id
+    """).fetchall()
+    return [{"requirement_id": row[0], "title": row[1], "ids": sorted(int(i) for i in row[2].split(","))}
+            for row in rows]
 
 
 class CaseDB(DatabaseBase):
     """测试用例数据库操作类"""
     
-    def get_cases_page(self, page=1, size=10, req_id=None, title=None, status=None):
-        """分页获取测试用例"""
+    def get_cases_page(self, page=1, size=10, req_id=None, title=None, status=None, after_id=None, before_id=None,
+                       include_total=True):
+        """
+        分页获取测试用例
+        传入 after_id / before_id 时使用游标分页，否则按页码分页；
+        总数优先读取维护的计数 (见 ListCountDB)，include_total=False 时不统计
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
 
             where_clauses = ["1=1"]
             params = []
+            filters, like_filters = {}, []  # 供总数策略使用的等值/模糊条件
 
             if req_id:
                 where_clauses.append("requirement_id = ?")
                 params.append(req_id)
+                filters['requirement_id'] = req_id
 
             if title:
-                where_clauses.append("case_title LIKE ?")
-                params.append(f"%{title}%")
+                # 3 个字符及以上走全文索引，更短的词仍用 LIKE
+                clause, param = search_db.text_filter("cases", "case_title", title)
+                where_clauses.append(clause)
+                params.append(param)
+                like_filters.append((clause, param))
 
             if status:  # 🔥 新增 status 过滤逻辑
                 where_clauses.append("status = ?")
                 params.append(status)
+                filters['status'] = status
 
             where_str = " AND ".join(where_clauses)
-
-            base_sql = f"SELECT * FROM test_cases WHERE {where_str} ORDER BY id DESC"
             count_sql = f"SELECT COUNT(*) FROM test_cases WHERE {where_str}"
+            counter = list_count_db.counter("test_cases", filters, like_filters, count_sql, tuple(params),
+                                            include_total)
 
             # 1. 执行分页查询
-            result = execute_page_query(cursor, base_sql, count_sql, tuple(params), page, size)
+            if after_id is not None or before_id is not None:
+                result = execute_keyset_query(cursor, "SELECT * FROM test_cases", where_clauses, params, size,
+                                              after_id, before_id, counter=counter)
+            else:
+                base_sql = f"SELECT * FROM test_cases WHERE {where_str} ORDER BY id DESC"
+                result = execute_page_query(cursor, base_sql, count_sql, tuple(params), page, size, counter)
 
-            # 2. [特有逻辑] 处理 JSON 字段 (steps, test_data)
+            # 2. [特有逻辑] 解析 JSON 字段 (steps, test_data)；规范格式的行直接 json.loads
             for item in result['items']:
-                item['steps'] = safe_json_loads(item.get('steps')) or []
-                item['test_data'] = safe_json_loads(item.get('test_data')) or {}
+                item.pop('title_norm', None)
+                version = item.pop('format_version', 0)
+                item['steps'] = load_steps(item.get('steps'), version)
+                item['test_data'] = load_test_data(item.get('test_data'), version)
 
             return result
     
-    def _normalize_steps(self, steps_raw: Any) -> List[Dict]:
-        """
-        [辅助方法] 标准化测试步骤
-        将各种奇葩格式 (字符串、数字、不规范列表) 统一清洗为标准 List[Dict]
-        """
-        print(f"\n🔍 [Data Clean] 原始 steps 类型: {type(steps_raw)}")
-
-        # 情况 A: 已经是 List -> 直接返回
-        if isinstance(steps_raw, list):
-            return steps_raw
-
-        # 情况 B: 是字符串 -> 尝试解析 JSON 或 清洗文本
-        if isinstance(steps_raw, str):
-            try:
-                # 尝试直接解析 JSON
-                parsed = json.loads(steps_raw)
-                if isinstance(parsed, list):
-                    return parsed
-            except:
-                pass
-
-            # 解析失败，进入文本清洗逻辑
-            print(f"⚠️ [Data Fix] 检测到纯文本步骤，执行清洗...")
-            cleaned_text = steps_raw.replace('\\n', '\n')
-            lines = cleaned_text.strip().split('\n')
-
-            fixed_steps = []
-            for line in lines:
-                line = line.strip()
-                if not line: continue
-                # 正则去除行首序号: "1. ", "1、", "(1)"
-                clean_action = re.sub(r'^(\d+[.、\s)]?|\(\d+\))\s*', '', line)
-                if clean_action:
-                    fixed_steps.append({
-                        "step_id": len(fixed_steps) + 1,
-                        "action": clean_action,
-                        "expected": "（详见预期结果字段）"
-                    })
-
-            # 兜底：如果清洗后为空，把原文本作为一条步骤
-            return fixed_steps if fixed_steps else [{"step_id": 1, "action": steps_raw, "expected": "非标准格式"}]
-
-        # 情况 C: 数字类型 -> 转换为占位符
-        if isinstance(steps_raw, (int, float)):
-            print(f"⚠️ [Data Fix1] 检测到数字类型: {steps_raw}")
-            if steps_raw > 0:
-                return [{"step_id": 1, "action": f"步骤 {steps_raw}", "expected": "AI未生成详细描述"}]
-            return []
-
-        # 情况 D: 其他 -> 返回空列表
-        return []
-    
-    def _normalize_test_data(self, test_data_raw: Any) -> Dict:
-        """
-        [辅助方法] 标准化测试数据
-        统一转换为 Dict
-        """
-        if isinstance(test_data_raw, dict):
-            return test_data_raw
-
-        if isinstance(test_data_raw, str):
-            try:
-                return json.loads(test_data_raw)
-            except:
-                return {"raw_content": test_data_raw}
-
-        print(f"⚠️ [Data Fix2] 检测到数字类型: {test_data_raw}")
-        return {}
-    
     def save_case(self, data: Dict[str, Any]) -> str:
         """
         保存单条用例
@@ -147,26 +120,17 @@ class CaseDB(DatabaseBase):
                 print(f"❌ [DB Error] 缺少必填参数 'requirement_id'。当前数据: {data.keys()}")
                 return "-1"  # 或者抛出异常让 Agent 重试
             
-            # 检查用例标题是否已存在
-            case_title = data.get('case_title', '未命名用例')
-            if case_title:
-                existing_titles = self.get_existing_case_titles(req_id)
-                # 标准化标题比较（去除空格，转为小写）
-                normalized_new_title = case_title.strip().lower()
-                normalized_existing_titles = [title.strip().lower() for title in existing_titles]
-                
-                if normalized_new_title in normalized_existing_titles:
-                    print(f"⚠️ [DB Warning] 用例标题已存在，跳过保存: {case_title}")
-                    return f"DUPLICATE: {case_title}"
-            # --- 1. 数据预处理 (调用辅助方法) ---
-            # 无论输入多乱，这里出来的都是标准的 Python List 和 Dict
-            final_steps_list = self._normalize_steps(data.get('steps', []))
-            final_test_data_dict = self._normalize_test_data(data.get('test_data', {}))
+            case_title = data.get('case_title') or '未命名用例'
+
+            # --- 1. 数据预处理 ---
+            # 无论输入多乱，统一转换为规范格式 (见 case_format)，读取时无需再做修复
+            final_steps_list = parse_steps(data.get('steps', []))
+            final_test_data_dict = parse_test_data(data.get('test_data', {}))
 
             # --- 2. 序列化 (Python Object -> JSON String) ---
             # 统一在入库前做一次 dumps，避免双重序列化
-            steps_json_str = json.dumps(final_steps_list, ensure_ascii=False)
-            test_data_json_str = json.dumps(final_test_data_dict, ensure_ascii=False)
+            steps_json_str = dumps(final_steps_list)
+            test_data_json_str = dumps(final_test_data_dict)
 
             print(f"💾 [DB Save] 最终存入 Steps: {steps_json_str}")
             print(f"💾 [DB Save] 最终存入 data: {data}")
@@ -174,13 +138,14 @@ class CaseDB(DatabaseBase):
             sql = """
                   INSERT INTO test_cases (requirement_id, case_title, pre_condition, steps, expected_result, \
                                           priority, case_type, test_data, status, \
-                                          quality_score, review_comments) \
-                  VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                                          quality_score, review_comments, format_version) \
+                  VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                  ON CONFLICT (requirement_id, title_norm) DO NOTHING
                   """
 
             params = (
                 data['requirement_id'],
-                data.get('case_title', '未命名用例'),
+                case_title,
                 data.get('pre_condition', '无'),
                 steps_json_str,  # 存 JSON 字符串
                 data.get('expected_result', '无'),
@@ -189,11 +154,45 @@ class CaseDB(DatabaseBase):
                 test_data_json_str,  # 存 JSON 字符串
                 'Draft',
                 data.get('quality_score', 0.8),
-                data.get('review_comments', '')
+                data.get('review_comments', ''),
+                FORMAT_VERSION
             )
 
-            # --- 4. 执行事务 ---
-            new_id = self.execute_insert(sql, params)
+            # 指纹计算较耗 CPU，放在事务之外
+            fp = fingerprint(case_title, final_steps_list)
+
+            # --- 4. 写入 (查重、用例插入、覆盖汇总与指纹更新在同一事务内) ---
+            def insert(conn):
+                # 标题完全相同 (忽略首尾空白与大小写)：由唯一索引 (requirement_id, title_norm) 拦截，
+                # changes() 为 0 即说明已存在同名用例
+                cursor = conn.execute(sql, params)
+                if cursor.rowcount == 0:
+                    print(f"⚠️ [DB Warning] 用例标题已存在，跳过保存: {case_title}")
+                    raise WriteRejected(f"DUPLICATE: {case_title}")
+                new_id = cursor.lastrowid
+
+                # 近似重复 (MinHash LSH)：新用例的指纹尚未写入，不会命中自身
+                similar = duplicate_db.find_similar_in(conn, req_id, fp, limit=1)
+                if similar:
+                    hit = similar[0]
+                    print(f"⚠️ [DB Warning] 用例与已有用例近似重复，跳过保存: {case_title} ≈ {hit['case_title']}")
+                    raise WriteRejected(f"DUPLICATE: {case_title} (与用例 ID {hit['case_id']} "
+                                        f"'{hit['case_title']}' 相似度 {hit['score']})")
+
+                coverage_db.apply_insert(conn, {
+                    "requirement_id": params[0], "case_title": params[1], "steps": steps_json_str,
+                    "priority": params[5], "case_type": params[6], "status": params[8],
+                    "quality_score": params[9]
+                })
+                duplicate_db.add(conn, new_id, req_id, fp)
+                return new_id
+
+            # 并发生成任务的写入由写入缓冲合并提交，返回时事务已提交
+            try:
+                new_id = write_buffer.submit(insert)
+            except WriteRejected as rejected:
+                return rejected.result
+            self.notify_change("test_cases", [new_id], "insert")
 
             print(f"✅ [DB Success] 用例保存成功 ID: {new_id}")
             return f"ID: {new_id}"
@@ -214,7 +213,8 @@ class CaseDB(DatabaseBase):
                      tc.pre_condition, \
                      tc.steps, \
                      tc.expected_result, \
-                     tc.status
+                     tc.status, \
+                     tc.format_version
               FROM test_cases tc
                        LEFT JOIN functional_points fp ON tc.requirement_id = fp.id
               WHERE 1 = 1 \
@@ -238,36 +238,30 @@ class CaseDB(DatabaseBase):
         # --- 🔥 数据清洗与格式化 ---
         formatted_rows = []
         for row in rows:
-            # 1. 解析步骤 JSON
-            steps_data = safe_json_loads(row['steps']) or []
+            # 1. 解析步骤 JSON (规范格式，元素均含 step_id / action / expected)
+            steps_data = load_steps(row['steps'], row.pop('format_version'))
 
             excel_steps_list = []
             excel_expects_list = []
             md_steps = []  # Markdown 专用格式列表
 
-            if isinstance(steps_data, list):
-                for step in steps_data:
-                    idx = step.get('step_id', '')
-                    # 去除换行，保持整洁
-                    act = str(step.get('action', '')).replace('\n', ' ')
-                    exp = str(step.get('expected', '')).replace('\n', ' ')
-
-                    # Excel 逻辑保持不变...
-                    excel_steps_list.append(f"{idx}. {act}")
-                    if exp and exp != "无":
-                        excel_expects_list.append(f"{idx}. {exp}")
-
-                    # 🔥 Markdown 核心修改：拼成 "1. 动作 (预期: 结果)"
-                    # 这种格式在 XMind 里显示为一行，非常直观
-                    md_line = f"{idx}. {act}"
-                    if exp and exp != "无":
-                        md_line += f" (预期: {exp})"
-                    md_steps.append(md_line)
+            for step in steps_data:
+                idx = step['step_id']
+                # 去除换行，保持整洁
+                act = step['action'].replace('\n', ' ')
+                exp = step['expected'].replace('\n', ' ')
 
-            else:
-                # 兼容脏数据
-                excel_steps_list.append(str(steps_data))
-                md_steps.append(str(steps_data))
+                # Excel 逻辑保持不变...
+                excel_steps_list.append(f"{idx}. {act}")
+                if exp and exp != "无":
+                    excel_expects_list.append(f"{idx}. {exp}")
+
+                # 🔥 Markdown 核心修改：拼成 "1. 动作 (预期: 结果)"
+                # 这种格式在 XMind 里显示为一行，非常直观
+                md_line = f"{idx}. {act}"
+                if exp and exp != "无":
+                    md_line += f" (预期: {exp})"
+                md_steps.append(md_line)
 
             # ... (中间处理 module_name, pre_condition 的逻辑不变) ...
             row['module_name'] = row['module_name'] or '公共模块'
@@ -295,9 +289,70 @@ class CaseDB(DatabaseBase):
         # 返回列表: ['登录成功', '密码错误', ...]
         return [row['case_title'] for row in rows]
     
+    def get_case_briefs(self, req_id: int = None, case_ids: List[int] = None, with_steps: bool = True):
+        """
+        获取用例摘要 (ID、需求ID、标题、步骤、状态)，供上下文分析使用
+
+        :param req_id: 按需求ID查询
+        :param case_ids: 按用例ID列表查询
+        :param with_steps: 是否读取步骤 (只需要标题时可跳过，减少读取量)
+        :return: 用例摘要列表
+        """
+        columns = "id, requirement_id, case_title, status" + (", steps" if with_steps else "")
+        sql = f"SELECT {columns} FROM test_cases"
+        if case_ids is not None:
+            if not case_ids:
+                return []
+            placeholders = ','.join(['?'] * len(case_ids))
+            return self.execute_query(f"{sql} WHERE id IN ({placeholders}) ORDER BY id", tuple(case_ids))
+        return self.execute_query(f"{sql} WHERE requirement_id = ? ORDER BY id", (req_id,))
+
     def batch_update_status(self, case_ids: List[int], new_status: str):
-        """批量更新用例状态"""
-        return self.batch_update("test_cases", case_ids, "status", new_status)
+        """
+        批量更新用例状态
+        状态更新与覆盖汇总的状态分布调整在同一事务内完成
+        """
+        if not case_ids:
+            return False
+        placeholders = ','.join(['?'] * len(case_ids))
+        try:
+            with self.get_connection() as conn:
+                # 立即加写锁，保证读取旧状态与更新之间不被其他写入插队
+                conn.execute("BEGIN IMMEDIATE")
+                old_cases = [dict(row) for row in conn.execute(
+                    f"SELECT id, requirement_id, status FROM test_cases WHERE id IN ({placeholders})",
+                    tuple(case_ids))]
+                changed = [case for case in old_cases if case['status'] != new_status]
+                conn.execute(f"UPDATE test_cases SET status = ? WHERE id IN ({placeholders})",
+                             (new_status,) + tuple(case_ids))
+                coverage_db.apply_status_change(conn, [c for c in changed if c['requirement_id']], new_status)
+                conn.commit()
+        except Exception as e:
+            print(f"Error in batch_update_status: {e}")
+            return False
+
+        if not old_cases:
+            return False
+        self.notify_change("test_cases", case_ids, "update")
+        return True
+
+    def rename_duplicate_titles(self) -> Dict[int, List[int]]:
+        """
+        为同名用例追加 " [重复#ID]" 后缀 (每组保留 ID 最小的一条不变)，供建立标题唯一约束前人工确认后执行
+        全文索引由触发器同步；近似重复指纹、覆盖汇总与本地知识索引由调用方按返回的需求重建 (见 consistency)
+
+        :return: {需求ID: 被改名的用例ID列表}
+        """
+        with self.get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            renamed: Dict[int, List[int]] = {}
+            for group in find_duplicate_titles(conn):
+                renamed.setdefault(group['requirement_id'], []).extend(group['ids'][1:])
+            ids = [case_id for case_ids in renamed.values() for case_id in case_ids]
+            conn.executemany("UPDATE test_cases SET case_title = case_title || ' [重复#' || id || ']' WHERE id = ?",
+                             [(case_id,) for case_id in ids])
+            conn.commit()
+        return renamed
 
 
 # 实例化
@@ -305,8 +360,9 @@ case_db = CaseDB()
 
 
 # 保持向后兼容
-def get_cases_page(page=1, size=10, req_id=None, title=None, status=None):
-    return case_db.get_cases_page(page, size, req_id, title, status)
+def get_cases_page(page=1, size=10, req_id=None, title=None, status=None, after_id=None, before_id=None,
+                   include_total=True):
+    return case_db.get_cases_page(page, size, req_id, title, status, after_id, before_id, include_total)
 
 def save_case(data: Dict[str, Any]) -> str:
     return case_db.save_case(data)
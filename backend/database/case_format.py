@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+用例步骤 / 测试数据的规范存储格式
+入库时统一转换为规范格式并记录 test_cases.format_version，读取时按版本区分：
+1. format_version == FORMAT_VERSION 的行直接 json.loads，不做任何修复；
+2. 旧数据 (单引号字典、Markdown 代码块、数字、纯文本步骤等) 由后台规范化任务 (normalize_db) 分批改写并记录审计，
+   改写完成前以及仍为旧版本的行 (如直接写库导入的数据) 读取时走兼容解析。
+
+规范格式 (版本 1)：
+- steps: JSON 数组，元素为 {"step_id": 从 1 开始连续编号, "action": 字符串, "expected": 字符串}
+- test_data: JSON 对象 (无法解析为对象的内容放在 raw_content 中)
+"""
+
+import ast
+import json
+import re
+from typing import Any, Dict, List
+
+FORMAT_VERSION = 1
+
+
+def _strip_fence(text: str) -> str:
+    """去除 Markdown 代码块标记 (```json ... ```)"""
+    cleaned = text.strip()
+    if cleaned.startswith("```"):
+        parts = cleaned.split("\n", 1)
+        cleaned = parts[1] if len(parts) > 1 else ""
+        if cleaned.strip().endswith("```"):
+            cleaned = cleaned.strip()[:-3]
+    return cleaned.strip()
+
+
+def _parse_literal(text: str) -> Any:
+    """
+    依次尝试标准 JSON 与 Python 字面量 (单引号) 解析
+
+    :return: 解析结果，均失败时原样返回字符串
+    """
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return text
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value).strip()
+
+
+def _steps_from_text(text: str) -> List[Dict[str, Any]]:
+    """纯文本步骤按行拆分，去除行首序号 ("1. "、"1、"、"(1)")"""
+    lines = text.replace('\\n', '\n').strip().split('\n')
+    actions = [re.sub(r'^(\d+[.、\s)]?|\(\d+\))\s*', '', line.strip()) for line in lines]
+    actions = [action for action in actions if action]
+    if not actions:
+        return [{"step_id": 1, "action": text, "expected": "非标准格式"}]
+    return [{"step_id": i + 1, "action": action, "expected": "（详见预期结果字段）"} for i, action in enumerate(actions)]
+
+
+def parse_steps(raw: Any) -> List[Dict[str, Any]]:
+    """
+    将任意形态的步骤转换为规范格式
+
+    :param raw: 步骤 (列表、JSON/Python 字面量字符串、Markdown 代码块、纯文本、数字等)
+    :return: 规范步骤列表
+    """
+    if isinstance(raw, str):
+        text = _strip_fence(raw)
+        if not text:
+            return []
+        parsed = _parse_literal(text)
+        if isinstance(parsed, str):
+            return _steps_from_text(parsed)
+        raw = parsed
+
+    if isinstance(raw, dict):
+        # {"steps": [...]} 包裹或单个步骤对象
+        raw = raw['steps'] if isinstance(raw.get('steps'), list) else [raw]
+    if isinstance(raw, bool) or raw is None:
+        return []
+    if isinstance(raw, (int, float)):
+        return [{"step_id": 1, "action": f"步骤 {raw}", "expected": "AI未生成详细描述"}] if raw > 0 else []
+    if not isinstance(raw, (list, tuple)):
+        return []
+
+    steps = []
+    for item in raw:
+        if isinstance(item, dict):
+            if 'action' in item or 'expected' in item:
+                action, expected = _text(item.get('action')), _text(item.get('expected'))
+            else:
+                action, expected = _text(item), ""
+        else:
+            action, expected = _text(item), ""
+        if action or expected:
+            steps.append({"step_id": len(steps) + 1, "action": action, "expected": expected})
+    return steps
+
+
+def parse_test_data(raw: Any) -> Dict[str, Any]:
+    """
+    将任意形态的测试数据转换为规范格式 (字典)
+
+    :param raw: 测试数据
+    :return: 字典
+    """
+    if isinstance(raw, str):
+        text = _strip_fence(raw)
+        if not text:
+            return {}
+        parsed = _parse_literal(text)
+        return parsed if isinstance(parsed, dict) else {"raw_content": parsed if parsed != text else raw}
+    if isinstance(raw, dict):
+        return raw
+    if isinstance(raw, (list, tuple)) and raw:
+        return {"raw_content": list(raw)}
+    return {}
+
+
+def title_norm_sql(expr: str = "case_title") -> str:
+    """
+    标题归一化 SQL 表达式 (去掉首尾空白、ASCII 字母转小写)
+    test_cases.title_norm 生成列与按标题查重使用同一表达式，保证两边结果一致
+
+    :param expr: 列名或占位符 (如 "?")
+    """
+    return f"lower(trim({expr}, char(32, 9, 10, 13)))"
+
+
+def dumps(value: Any) -> str:
+    """规范格式序列化 (保留中文)"""
+    return json.dumps(value, ensure_ascii=False)
+
+
+def load_steps(raw: Any, format_version: int = 0) -> List[Dict[str, Any]]:
+    """
+    读取步骤：规范格式直接解析，旧格式走兼容解析
+
+    :param raw: 数据库中的 steps
+    :param format_version: 行的 format_version
+    :return: 规范步骤列表
+    """
+    if format_version == FORMAT_VERSION:
+        return json.loads(raw)
+    return parse_steps(raw)
+
+
+def load_test_data(raw: Any, format_version: int = 0) -> Dict[str, Any]:
+    """读取测试数据：规范格式直接解析，旧格式走兼容解析"""
+    if format_version == FORMAT_VERSION:
+        return json.loads(raw)
+    return parse_test_data(raw)
+
+
+def normalize_row(steps: Any, test_data: Any) -> Dict[str, Any]:
+    """
+    把一行旧数据转换为规范格式
+
+    :return: {"steps": JSON 字符串, "test_data": JSON 字符串, "format_version": FORMAT_VERSION}
+    """
+    return {"steps": dumps(parse_steps(steps)), "test_data": dumps(parse_test_data(test_data)),
+            "format_version": FORMAT_VERSION}
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+SQLite 连接管理
+每个线程复用一条长连接 (同一线程内的协程共享该连接，数据库操作均为同步调用，不会交错)，
+连接建立时统一设置 WAL、busy_timeout、synchronous=NORMAL、内存映射 I/O 及语句缓存：
+1. 不再为每次查询重新打开数据库文件、重新解析 schema；
+2. WAL 模式下流式生成的写入与列表页的读取互不阻塞；
+3. 写写冲突时在 busy_timeout 内等待，而不是立即报 "database is locked"。
+"""
+
+import sqlite3
+import threading
+import weakref
+from typing import Any, Dict
+
+from backend.config import DB_CONFIG
+
+
+class ManagedConnection(sqlite3.Connection):
+    """
+    受管连接
+    close() 只回滚未提交的事务并把连接留给当前线程继续复用，
+    兼容 "conn = get_conn() ... conn.close()" 的旧写法；真正关闭使用 release()。
+    """
+
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+
+    def release(self):
+        """真正关闭连接"""
+        super().close()
+
+
+class ConnectionManager:
+    """
+    线程级 SQLite 连接管理器
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        :param config: 连接参数 (默认使用 DB_CONFIG)
+        """
+        self.config = config or DB_CONFIG
+        self._local = threading.local()
+        self._connections = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._stats = {"opened": 0, "reused": 0, "released": 0}
+
+    def get(self, path: str) -> ManagedConnection:
+        """
+        获取当前线程的连接 (数据库路径变化时重新打开)
+
+        :param path: 数据库文件路径
+        :return: 连接对象
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.path == path:
+            with self._lock:
+                self._stats["reused"] += 1
+            return conn
+        if conn is not None:
+            self._release(conn)
+
+        conn = self._open(path)
+        self._local.conn, self._local.path = conn, path
+        return conn
+
+    def _open(self, path: str) -> ManagedConnection:
+        """打开连接并设置 PRAGMA"""
+        cfg = self.config
+        # check_same_thread=False 仅用于 close_all() 跨线程关闭；连接本身只由所属线程使用
+        conn = sqlite3.connect(path, timeout=cfg["busy_timeout_ms"] / 1000, factory=ManagedConnection,
+                               cached_statements=cfg["statement_cache"], check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # 让结果可以通过 dict 方式访问
+        conn.execute(f"PRAGMA journal_mode = {cfg['journal_mode']}")
+        conn.execute(f"PRAGMA synchronous = {cfg['synchronous']}")
+        conn.execute(f"PRAGMA busy_timeout = {int(cfg['busy_timeout_ms'])}")
+        conn.execute(f"PRAGMA mmap_size = {int(cfg['mmap_size'])}")
+        conn.execute(f"PRAGMA cache_size = {-int(cfg['cache_size_kb'])}")
+        with self._lock:
+            self._connections.add(conn)
+            self._stats["opened"] += 1
+        return conn
+
+    def _release(self, conn: ManagedConnection):
+        try:
+            conn.release()
+        except sqlite3.Error as e:
+            print(f"⚠️ [DB Conn] 关闭连接失败: {e}")
+        with self._lock:
+            self._connections.discard(conn)
+            self._stats["released"] += 1
+
+    def close_thread(self):
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._release(conn)
+            self._local.conn = self._local.path = None
+
+    def close_all(self):
+        """关闭全部线程的连接 (服务停止或切换数据库文件时调用)"""
+        with self._lock:
+            connections = list(self._connections)
+        for conn in connections:
+            self._release(conn)
+        self._local = threading.local()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取连接统计 (打开、复用、关闭次数及当前连接数)"""
+        with self._lock:
+            return {**self._stats, "open_connections": len(self._connections)}
+
+
+# 实例化全局对象
+connection_manager = ConnectionManager()
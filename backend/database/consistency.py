@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+反规范化计数一致性检查
+检查由触发器维护的计数 (functional_points 用例计数、list_counts 列表计数) 与全文检索索引是否与原表一致，
+手工改库、导入旧数据或触发器缺失后可用来发现并修复偏差。
+
+运行方式 (仓库根目录)：
+    python -m backend.database.consistency          # 只检查
+    python -m backend.database.consistency --fix    # 检查并修复
+    python -m backend.database.consistency --rename-duplicate-titles  # 为历史同名用例追加 [重复#ID] 后缀 (迁移 v12 前置步骤)
+"""
+
+import argparse
+import sys
+from typing import Any, Dict, List
+
+from .case_db import case_db
+from .count_db import list_count_db
+from .coverage_db import coverage_db
+from .duplicate_db import duplicate_db
+from .requirement_db import requirement_db
+from .search_db import search_db
+
+
+def check_consistency(fix: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    执行全部一致性检查
+
+    :param fix: 是否修复发现的不一致
+    :return: {检查项: 不一致列表}
+    """
+    return {
+        "functional_points.case_count": requirement_db.check_case_counts(fix),
+        "list_counts": list_count_db.check(fix),
+        "fulltext_index": search_db.check(fix),
+    }
+
+
+def resolve_duplicate_titles(renamed: Dict[int, List[int]]):
+    """
+    同名用例改名后重建派生数据：近似重复指纹与覆盖汇总按需求重建，本地知识索引按用例增量更新
+
+    :param renamed: {需求ID: 被改名的用例ID列表} (见 CaseDB.rename_duplicate_titles)
+    """
+    # 导入即注册本地知识索引的变更监听器
+    from backend.agents.local_knowledge import local_knowledge_index  # noqa: F401
+
+    for req_id in renamed:
+        duplicate_db.rebuild(req_id)
+        coverage_db.rebuild(req_id)
+    case_db.notify_change("test_cases", [case_id for ids in renamed.values() for case_id in ids], "update")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="检查触发器维护的计数与全文索引是否与原表一致")
+    parser.add_argument("--fix", action="store_true", help="发现不一致时重新统计/重建索引修复")
+    parser.add_argument("--rename-duplicate-titles", action="store_true",
+                        help="同一功能点下的同名用例保留最早一条，其余标题追加 [重复#ID] (标题唯一约束迁移失败时使用)")
+    parser.add_argument("--db", help="数据库文件路径 (默认 backend/database/test_cases.db)")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        from . import base
+        base.DB_PATH = args.db
+    # 改名须在迁移 v12 (标题唯一约束) 之前执行，只依赖 test_cases 原有字段
+    renamed = case_db.rename_duplicate_titles() if args.rename_duplicate_titles else {}
+    # 确保迁移已执行 (已是最新时无任何 DDL)
+    from . import init_db
+    init_db.init_tables()
+    if renamed:
+        resolve_duplicate_titles(renamed)
+        print(f"✏️ [Consistency] 已为 {sum(len(ids) for ids in renamed.values())} 条同名用例追加 [重复#ID]: {renamed}")
+
+    report = check_consistency(args.fix)
+    for name, mismatches in report.items():
+        if not mismatches:
+            print(f"✅ [Consistency] {name}: 一致")
+            continue
+        print(f"❌ [Consistency] {name}: {len(mismatches)} 处不一致{' (已修复)' if args.fix else ''}")
+        for item in mismatches[:20]:
+            print(f"   -> {item}")
+    return 0 if args.fix or not any(report.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+列表总数策略
+list_counts 表按 (表名, 过滤条件) 保存行数，由 SQLite 触发器在增删改时同步维护，
+列表页无需每次执行 COUNT(*)：
+1. 无过滤或常用等值过滤 (按需求/状态/项目/优先级) 直接读取计数，结果精确；
+2. 附带 LIKE 模糊过滤时，在 ID 区间内随机抽样，按命中比例乘以等值过滤的计数估算；
+3. 客户端可传 include_total=false 完全跳过总数 (无限滚动)。
+"""
+
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.config import SYSTEM_CONFIG
+from .db_base import DatabaseBase
+
+# 维护计数的过滤维度：表名 -> [字段组合]，() 表示不过滤
+# 触发器由迁移 v7 按此定义的快照创建，修改后需在 init_db.MIGRATIONS 追加新迁移重建触发器
+COUNTED_FILTERS = {
+    "test_cases": [(), ("requirement_id",), ("status",), ("requirement_id", "status")],
+    "requirement_breakdown": [(), ("project_id",), ("review_status",), ("project_id", "review_status")],
+    "functional_points": [(), ("project_id",), ("priority",)],
+}
+
+
+def filter_key(filters: Dict[str, Any]) -> str:
+    """
+    计数键 (字段按名称排序，如 "requirement_id=3&status=Draft")，与触发器生成的键一致
+
+    :param filters: 等值过滤条件
+    :return: 计数键
+    """
+    return "&".join(f"{field}={filters[field]}" for field in sorted(filters))
+
+
+def _key_sql(fields, prefix: str = "") -> str:
+    """生成计算计数键的 SQL 表达式"""
+    if not fields:
+        return "''"
+    parts = [f"'{'&' if i else ''}{field}=' || COALESCE({prefix}{field}, '')" for i, field in enumerate(sorted(fields))]
+    return " || ".join(parts)
+
+
+class ListCountDB(DatabaseBase):
+    """列表计数操作类"""
+
+    @staticmethod
+    def trigger_sql(table: str) -> List[str]:
+        """
+        生成维护计数的触发器语句 (插入 +1，删除 -1，过滤字段变化时从旧键移到新键)
+
+        :param table: 表名
+        :return: SQL 语句列表
+        """
+        combos = COUNTED_FILTERS[table]
+        fields = sorted({field for combo in combos for field in combo})
+
+        def upsert(prefix, delta, combos):
+            values = ", ".join(f"('{table}', {_key_sql(combo, prefix)}, {delta})" for combo in combos)
+            return (f"INSERT INTO list_counts (table_name, filter_key, row_count) VALUES {values} "
+                    f"ON CONFLICT(table_name, filter_key) DO UPDATE SET row_count = row_count + excluded.row_count;")
+
+        changed = " OR ".join(f"OLD.{field} IS NOT NEW.{field}" for field in fields)
+        filtered = [combo for combo in combos if combo]
+        return [
+            f"DROP TRIGGER IF EXISTS trg_{table}_count_insert",
+            f"DROP TRIGGER IF EXISTS trg_{table}_count_delete",
+            f"DROP TRIGGER IF EXISTS trg_{table}_count_update",
+            f"CREATE TRIGGER trg_{table}_count_insert AFTER INSERT ON {table} BEGIN {upsert('NEW.', 1, combos)} END",
+            f"CREATE TRIGGER trg_{table}_count_delete AFTER DELETE ON {table} BEGIN {upsert('OLD.', -1, combos)} END",
+            f"CREATE TRIGGER trg_{table}_count_update AFTER UPDATE OF {', '.join(fields)} ON {table} "
+            f"WHEN {changed} BEGIN {upsert('OLD.', -1, filtered)} {upsert('NEW.', 1, filtered)} END",
+        ]
+
+    @staticmethod
+    def rebuild_sql(table: str) -> List[Tuple[str, tuple]]:
+        """
+        生成从原表重新统计计数的语句
+
+        :param table: 表名
+        :return: [(SQL, 参数), ...]
+        """
+        statements = [("DELETE FROM list_counts WHERE table_name = ?", (table,))]
+        for combo in COUNTED_FILTERS[table]:
+            statements.append((f"""
+                INSERT INTO list_counts (table_name, filter_key, row_count)
+                SELECT ?, {_key_sql(combo)}, COUNT(*) FROM {table} GROUP BY 2
+            """, (table,)))
+        return statements
+
+    def rebuild(self, table: str = None) -> int:
+        """
+        重新统计计数 (修复手工改库等导致的偏差)
+
+        :param table: 表名 (为空时重建全部)
+        :return: 重建的表数量
+        """
+        tables = [table] if table else list(COUNTED_FILTERS)
+        with self.get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for name in tables:
+                for sql, params in self.rebuild_sql(name):
+                    conn.execute(sql, params)
+            conn.commit()
+        return len(tables)
+
+    def check(self, fix: bool = False) -> List[Dict[str, Any]]:
+        """
+        检查计数与原表是否一致
+
+        :param fix: 发现不一致时是否重建对应表的计数
+        :return: 不一致列表 [{"table", "filter_key", "stored", "actual"}]
+        """
+        mismatches = []
+        for table, combos in COUNTED_FILTERS.items():
+            actual = {}
+            for combo in combos:
+                for row in self.execute_query(f"SELECT {_key_sql(combo)} AS k, COUNT(*) AS n FROM {table} GROUP BY 1"):
+                    actual[row['k']] = row['n']
+            stored = {row['filter_key']: row['row_count'] for row in self.execute_query(
+                "SELECT filter_key, row_count FROM list_counts WHERE table_name = ?", (table,))}
+            for key in sorted(set(actual) | set(stored)):
+                if stored.get(key, 0) != actual.get(key, 0):
+                    mismatches.append({"table": table, "filter_key": key,
+                                       "stored": stored.get(key, 0), "actual": actual.get(key, 0)})
+            if fix and any(item['table'] == table for item in mismatches):
+                self.rebuild(table)
+        return mismatches
+
+    @staticmethod
+    def is_counted(table: str, filters: Dict[str, Any]) -> bool:
+        """过滤字段组合是否有维护计数"""
+        return tuple(sorted(filters)) in {tuple(sorted(combo)) for combo in COUNTED_FILTERS.get(table, [])}
+
+    def get_count(self, cursor, table: str, filters: Dict[str, Any]) -> Optional[int]:
+        """
+        读取维护的计数
+
+        :param cursor: 调用方游标
+        :param table: 表名
+        :param filters: 等值过滤条件
+        :return: 行数 (该过滤组合没有维护计数时返回 None)
+        """
+        if not self.is_counted(table, filters):
+            return None
+        row = cursor.execute("SELECT row_count FROM list_counts WHERE table_name = ? AND filter_key = ?",
+                             (table, filter_key(filters))).fetchone()
+        return row[0] if row else 0
+
+    def resolve_total(self, cursor, table: str, filters: Dict[str, Any], like_filters: List[Tuple[str, Any]],
+                      count_sql: str, params: tuple) -> Tuple[Optional[int], str]:
+        """
+        按策略获取列表总数
+
+        :param cursor: 调用方游标
+        :param table: 表名 (不带别名)
+        :param filters: 等值过滤条件 {字段: 值}
+        :param like_filters: 模糊过滤 [(不带别名的条件 SQL, 参数), ...]
+        :param count_sql: 精确统计语句 (兜底)
+        :param params: 精确统计参数
+        :return: (总数, 方式 exact/estimated)
+        """
+        base_total = self.get_count(cursor, table, filters)
+        if base_total is not None and not like_filters:
+            return base_total, "exact"
+
+        sample_size = SYSTEM_CONFIG["count_estimate_sample"]
+        if base_total is None or base_total <= sample_size:
+            cursor.execute(count_sql, params)
+            return cursor.fetchone()[0], "exact"
+
+        # 在 ID 区间内均匀随机抽样 (主键查找，代价与表大小无关)，按命中比例估算
+        # MIN、MAX 分开查询才能各自走主键的首尾定位
+        lo, hi = cursor.execute(f"SELECT (SELECT MIN(id) FROM {table}), (SELECT MAX(id) FROM {table})").fetchone()
+        sample_ids = random.sample(range(lo, hi + 1), min(sample_size, hi - lo + 1))
+        where = " AND ".join([f"id IN ({','.join('?' * len(sample_ids))})"] + [f"{field} = ?" for field in filters])
+        hit = " AND ".join(clause for clause, _ in like_filters)
+        row = cursor.execute(f"SELECT COUNT(*), COALESCE(SUM({hit}), 0) FROM {table} WHERE {where}",
+                             tuple(param for _, param in like_filters) + tuple(sample_ids) + tuple(filters.values())
+                             ).fetchone()
+        sampled, hits = row[0], row[1]
+        if sampled < max(1, sample_size // 10):
+            # 等值过滤很稀疏或 ID 空洞太多，样本不足时退回精确统计
+            cursor.execute(count_sql, params)
+            return cursor.fetchone()[0], "exact"
+        return round(base_total * hits / sampled), "estimated"
+
+    def counter(self, table: str, filters: Dict[str, Any], like_filters: List[Tuple[str, Any]],
+                count_sql: str, params: tuple, include_total: bool = True):
+        """
+        生成分页执行器使用的总数回调
+
+        :param include_total: 为 False 时不统计总数
+        :return: callable(cursor) -> (总数, 方式)
+        """
+        if not include_total:
+            return lambda cursor: (None, "none")
+        return lambda cursor: self.resolve_total(cursor, table, filters, like_filters, count_sql, params)
+
+
+# 实例化全局对象
+list_count_db = ListCountDB()
+
+
+# 保持向后兼容
+def rebuild_list_counts(table: str = None) -> int:
+    return list_count_db.rebuild(table)
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+需求覆盖汇总表数据库操作
+requirement_coverage 按需求保存用例数量、状态/类型/优先级/覆盖类别分布及质量分聚合，
+由 CaseDB 在用例入库、状态变更的同一事务内增量维护，
+读取方只需查询一行小记录，无需扫描 test_cases。
+"""
+
+import json
+from collections import Counter
+from typing import Any, Dict, Iterable, List
+
+from backend.utils.coverage_utils import classify_case
+from .db_base import DatabaseBase
+
+# JSON 计数字段
+COUNT_FIELDS = ("status_counts", "case_type_counts", "priority_counts", "category_counts")
+
+
+class CoverageDB(DatabaseBase):
+    """需求覆盖汇总表操作类"""
+
+    # ---------------------------------------------------------------
+    # 查询
+    # ---------------------------------------------------------------
+    @staticmethod
+    def decode(row: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        解析汇总行：JSON 计数字段转为字典，并计算平均质量分
+
+        :param row: 数据库原始行
+        :return: 汇总字典
+        """
+        item = dict(row)
+        for field in COUNT_FIELDS:
+            item[field] = json.loads(item.get(field) or '{}')
+        count = item.pop('quality_count', 0) or 0
+        total = item.pop('quality_sum', 0) or 0
+        item['quality_avg'] = round(total / count, 4) if count else None
+        item['quality_scored'] = count
+        return item
+
+    def get_coverage(self, req_id: int):
+        """
+        获取单个需求的覆盖汇总
+
+        :param req_id: 需求ID
+        :return: 汇总字典，不存在时返回 None
+        """
+        rows = self.execute_query("SELECT * FROM requirement_coverage WHERE requirement_id = ?", (req_id,))
+        return self.decode(rows[0]) if rows else None
+
+    def get_coverage_batch(self, req_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        批量获取需求覆盖汇总
+
+        :param req_ids: 需求ID列表
+        :return: {需求ID: 汇总字典}
+        """
+        if not req_ids:
+            return {}
+        placeholders = ','.join(['?'] * len(req_ids))
+        rows = self.execute_query(
+            f"SELECT * FROM requirement_coverage WHERE requirement_id IN ({placeholders})", tuple(req_ids))
+        return {row['requirement_id']: self.decode(row) for row in rows}
+
+    # ---------------------------------------------------------------
+    # 增量维护 (由 CaseDB 在写入事务中调用，conn 由调用方提交)
+    # ---------------------------------------------------------------
+    def _load(self, conn, req_id: int) -> Dict[str, Any]:
+        row = conn.execute("SELECT * FROM requirement_coverage WHERE requirement_id = ?", (req_id,)).fetchone()
+        if row is None:
+            summary = {field: Counter() for field in COUNT_FIELDS}
+            summary.update({"requirement_id": req_id, "total_cases": 0, "quality_sum": 0.0, "quality_count": 0,
+                            "quality_min": None, "quality_max": None, "quality_latest": None})
+            return summary
+        summary = dict(row)
+        for field in COUNT_FIELDS:
+            summary[field] = Counter(json.loads(summary.get(field) or '{}'))
+        return summary
+
+    @staticmethod
+    def _save(conn, summary: Dict[str, Any]):
+        conn.execute("""
+            INSERT OR REPLACE INTO requirement_coverage
+            (requirement_id, total_cases, status_counts, case_type_counts, priority_counts, category_counts,
+             quality_sum, quality_count, quality_min, quality_max, quality_latest, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """, (
+            summary["requirement_id"], summary["total_cases"],
+            *[json.dumps({k: v for k, v in summary[field].items() if v > 0}, ensure_ascii=False)
+              for field in COUNT_FIELDS],
+            summary["quality_sum"], summary["quality_count"],
+            summary["quality_min"], summary["quality_max"], summary["quality_latest"]
+        ))
+
+    @staticmethod
+    def _add_case(summary: Dict[str, Any], case: Dict[str, Any]):
+        """将一条用例计入汇总"""
+        summary["total_cases"] += 1
+        summary["status_counts"][case.get('status') or 'Draft'] += 1
+        summary["case_type_counts"][case.get('case_type') or 'Functional'] += 1
+        summary["priority_counts"][case.get('priority') or 'P1'] += 1
+        summary["category_counts"].update(classify_case(case))
+
+        try:
+            score = float(case.get('quality_score'))
+        except (TypeError, ValueError):
+            score = None
+        if score is not None:
+            summary["quality_sum"] += score
+            summary["quality_count"] += 1
+            summary["quality_min"] = score if summary["quality_min"] is None else min(summary["quality_min"], score)
+            summary["quality_max"] = score if summary["quality_max"] is None else max(summary["quality_max"], score)
+            summary["quality_latest"] = score
+
+    def apply_insert(self, conn, case: Dict[str, Any]):
+        """
+        用例入库后更新汇总
+
+        :param conn: 调用方的数据库连接 (与插入处于同一事务)
+        :param case: 用例字段 (requirement_id, case_title, steps, case_type, priority, status, quality_score)
+        """
+        summary = self._load(conn, case['requirement_id'])
+        self._add_case(summary, case)
+        self._save(conn, summary)
+
+    def apply_status_change(self, conn, cases: Iterable[Dict[str, Any]], new_status: str):
+        """
+        用例状态变更后更新汇总的状态分布
+
+        :param conn: 调用方的数据库连接 (与状态更新处于同一事务)
+        :param cases: 变更前的用例 (id, requirement_id, status)
+        :param new_status: 新状态
+        """
+        by_req: Dict[int, List[Dict[str, Any]]] = {}
+        for case in cases:
+            by_req.setdefault(case['requirement_id'], []).append(case)
+        for req_id, req_cases in by_req.items():
+            summary = self._load(conn, req_id)
+            for case in req_cases:
+                summary["status_counts"][case.get('status') or 'Draft'] -= 1
+                summary["status_counts"][new_status] += 1
+            self._save(conn, summary)
+
+    # ---------------------------------------------------------------
+    # 全量重建
+    # ---------------------------------------------------------------
+    def rebuild(self, req_id: int = None) -> int:
+        """
+        从 test_cases 全量重建汇总 (修复/首次回填)
+
+        :param req_id: 只重建指定需求，为空时重建全部
+        :return: 重建的需求数量
+        """
+        sql = """SELECT requirement_id, case_title, steps, case_type, priority, status, quality_score
+                 FROM test_cases WHERE requirement_id IS NOT NULL"""
+        params = ()
+        if req_id is not None:
+            sql += " AND requirement_id = ?"
+            params = (req_id,)
+        sql += " ORDER BY id"
+
+        with self.get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if req_id is None:
+                conn.execute("DELETE FROM requirement_coverage")
+            else:
+                conn.execute("DELETE FROM requirement_coverage WHERE requirement_id = ?", (req_id,))
+
+            summaries: Dict[int, Dict[str, Any]] = {}
+            for row in conn.execute(sql, params):
+                case = dict(row)
+                summary = summaries.get(case['requirement_id'])
+                if summary is None:
+                    summary = summaries[case['requirement_id']] = self._load(conn, case['requirement_id'])
+                self._add_case(summary, case)
+            for summary in summaries.values():
+                self._save(conn, summary)
+            conn.commit()
+        return len(summaries)
+
+    def backfill_if_empty(self) -> int:
+        """
+        汇总表为空而用例表有数据时执行一次全量回填 (升级后首次启动)
+
+        :return: 回填的需求数量
+        """
+        rows = self.execute_query("""
+            SELECT (SELECT COUNT(*) FROM requirement_coverage) AS coverage_rows,
+                   EXISTS(SELECT 1 FROM test_cases) AS has_cases
+        """)
+        if rows and rows[0]['coverage_rows'] == 0 and rows[0]['has_cases']:
+            count = self.rebuild()
+            print(f"   -> 回填: requirement_coverage 已生成 {count} 个需求的覆盖汇总")
+            return count
+        return 0
+
+
+# 实例化全局对象
+coverage_db = CoverageDB()
+
+
+# 保持向后兼容
+def get_coverage(req_id: int):
+    return coverage_db.get_coverage(req_id)
+
+def rebuild_coverage(req_id: int = None) -> int:
+    return coverage_db.rebuild(req_id)
@@ -6,7 +6,7 @@
 """
 
 import sqlite3
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, List
 
 from .base import get_conn
 
@@ -16,6 +16,35 @@ class DatabaseBase:
     数据库操作基类
     提供连接获取、插入、更新、查询等通用方法
     """
+
+    def __init__(self):
+        """初始化数据变更监听器列表"""
+        self._change_listeners: List[Callable[[str, List[int], str], None]] = []
+
+    def add_change_listener(self, callback: Callable[[str, List[int], str], None]):
+        """
+        注册数据变更监听器
+        记录写入成功后，会以 (表名, ID 列表, 动作 insert/update) 回调监听器
+
+        :param callback: 回调函数
+        """
+        self._change_listeners.append(callback)
+
+    def notify_change(self, table: str, ids: List[int], action: str):
+        """
+        通知数据变更 (监听器异常不影响主流程)
+
+        :param table: 表名
+        :param ids: 发生变更的记录 ID 列表
+        :param action: 动作 (insert/update)
+        """
+        if not ids:
+            return
+        for callback in self._change_listeners:
+            try:
+                callback(table, list(ids), action)
+            except Exception as e:
+                print(f"⚠️ [DB Listener] 变更通知处理失败: {e}")
     
     def get_connection(self):
         """
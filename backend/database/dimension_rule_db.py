@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+测试维度规则数据库操作
+dimension_rules 每行定义一个测试维度的识别规则 (关键词、正则、权重、优先级)，
+TestDimensionManager 将全部规则编译为一个匹配器，规则变更时通过变更通知 / 版本号热加载。
+"""
+
+import json
+from typing import Any, Dict, List
+
+from .db_base import DatabaseBase
+
+# 默认规则 (首次启动写入数据库；数据库不可用时也作为兜底规则)
+DEFAULT_DIMENSION_RULES = [
+    {
+        "dimension": "functional", "name": "功能测试", "description": "验证核心业务功能是否正常工作",
+        "priority": "high", "keywords": [], "patterns": [], "always_include": True
+    },
+    {
+        "dimension": "boundary", "name": "边界测试", "description": "测试输入输出的边界值",
+        "priority": "medium",
+        "keywords": ["api", "request", "response", "parameter", "参数", "输入", "长度", "范围", "最大", "最小",
+                     "上限", "下限", "金额", "数量", "字段", "格式", "分页"],
+        "patterns": [r"(?<!\d)\d+\s*(位|个字符|字符|个字|元|次|天|条)", r"(不超过|不少于|至少|最多|超过)\s*\d+"]
+    },
+    {
+        "dimension": "exception", "name": "异常测试", "description": "测试错误处理和异常场景",
+        "priority": "medium",
+        "keywords": ["api", "request", "response", "parameter", "接口", "异常", "失败", "错误", "超时", "重试",
+                     "中断", "断网", "回滚", "校验"],
+        "patterns": [r"(失败|错误)\S{0,6}(提示|处理)"]
+    },
+    {
+        "dimension": "security", "name": "安全测试", "description": "测试权限、数据安全等",
+        "priority": "medium",
+        "keywords": ["user", "login", "auth", "permission", "token", "password", "登录", "注册", "密码", "验证码",
+                     "权限", "角色", "认证", "鉴权", "授权", "加密", "敏感", "支付", "账号", "账户"],
+        "patterns": [r"(短信|邮箱|手机)\s*验证"]
+    },
+    {
+        "dimension": "performance", "name": "性能测试", "description": "测试响应时间、并发处理等",
+        "priority": "low",
+        "keywords": ["performance", "speed", "response time", "load", "性能", "并发", "响应时间", "吞吐", "压力",
+                     "负载", "高峰", "秒杀", "大数据量"],
+        "patterns": [r"(?<!\d)\d+\s*(ms|毫秒|秒)\s*(内|以内)", r"(?<!\d)\d+\s*(qps|tps|并发)"]
+    },
+    {
+        "dimension": "compatibility", "name": "兼容性测试", "description": "测试不同环境、设备等",
+        "priority": "low",
+        "keywords": ["browser", "device", "platform", "compatible", "浏览器", "设备", "平台", "兼容", "移动端",
+                     "手机端", "ios", "android", "分辨率", "小程序"],
+        "patterns": []
+    },
+]
+
+# JSON 列表字段
+LIST_FIELDS = ("keywords", "patterns")
+
+
+class DimensionRuleDB(DatabaseBase):
+    """测试维度规则操作类"""
+
+    @staticmethod
+    def decode(row: Dict[str, Any]) -> Dict[str, Any]:
+        """解析规则行：JSON 列表字段转为列表，开关字段转为布尔值"""
+        item = dict(row)
+        for field in LIST_FIELDS:
+            item[field] = json.loads(item.get(field) or '[]')
+        item['always_include'] = bool(item.get('always_include'))
+        item['is_active'] = bool(item.get('is_active'))
+        return item
+
+    def get_rules(self, active_only: bool = True) -> List[Dict[str, Any]]:
+        """
+        获取维度规则列表
+
+        :param active_only: 是否只返回启用的规则
+        :return: 规则列表 (按 sort_order 排序)
+        """
+        sql = "SELECT * FROM dimension_rules"
+        if active_only:
+            sql += " WHERE is_active = 1"
+        sql += " ORDER BY sort_order, id"
+        return [self.decode(row) for row in self.execute_query(sql)]
+
+    def get_revision(self) -> str:
+        """
+        规则版本号 (任意规则增删改都会改变)，供热加载检测
+
+        :return: 版本字符串
+        """
+        rows = self.execute_query(
+            "SELECT COUNT(*) AS total, COALESCE(SUM(revision), 0) AS revision FROM dimension_rules")
+        return f"{rows[0]['total']}:{rows[0]['revision']}"
+
+    def save_rule(self, data: Dict[str, Any]) -> int:
+        """
+        新增或更新维度规则 (按 dimension 去重)
+
+        :param data: 规则字段 (dimension 必填；name, description, priority, keywords, patterns,
+                     weight, min_score, always_include, is_active, sort_order 可选)
+        :return: 规则 ID
+        """
+        params = (
+            data['dimension'],
+            data.get('name') or data['dimension'],
+            data.get('description', ''),
+            data.get('priority', 'medium'),
+            json.dumps(list(data.get('keywords') or []), ensure_ascii=False),
+            json.dumps(list(data.get('patterns') or []), ensure_ascii=False),
+            float(data.get('weight', 1.0)),
+            float(data.get('min_score', 1.0)),
+            int(bool(data.get('always_include', False))),
+            int(bool(data.get('is_active', True))),
+            int(data.get('sort_order', 0)),
+        )
+        with self.get_connection() as conn:
+            conn.execute("""
+                INSERT INTO dimension_rules
+                (dimension, name, description, priority, keywords, patterns, weight, min_score,
+                 always_include, is_active, sort_order)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(dimension) DO UPDATE SET
+                    name = excluded.name, description = excluded.description, priority = excluded.priority,
+                    keywords = excluded.keywords, patterns = excluded.patterns, weight = excluded.weight,
+                    min_score = excluded.min_score, always_include = excluded.always_include,
+                    is_active = excluded.is_active, sort_order = excluded.sort_order,
+                    revision = dimension_rules.revision + 1, updated_at = CURRENT_TIMESTAMP
+            """, params)
+            rule_id = conn.execute("SELECT id FROM dimension_rules WHERE dimension = ?",
+                                   (data['dimension'],)).fetchone()[0]
+            conn.commit()
+        self.notify_change("dimension_rules", [rule_id], "update")
+        return rule_id
+
+    def set_active(self, dimension: str, is_active: bool) -> bool:
+        """
+        启用/停用维度规则
+
+        :param dimension: 维度标识
+        :param is_active: 是否启用
+        :return: 是否更新成功
+        """
+        with self.get_connection() as conn:
+            rows = conn.execute("""
+                UPDATE dimension_rules SET is_active = ?, revision = revision + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE dimension = ?
+            """, (int(bool(is_active)), dimension)).rowcount
+            row = conn.execute("SELECT id FROM dimension_rules WHERE dimension = ?", (dimension,)).fetchone()
+            conn.commit()
+        if rows:
+            # 监听器只处理非空 ID 列表，需传入规则 ID 才能立即生效
+            self.notify_change("dimension_rules", [row[0]], "update")
+        return rows > 0
+
+    @staticmethod
+    def seed_defaults(cursor):
+        """
+        写入默认规则 (由 seed_data 在规则表为空时调用)
+
+        :param cursor: 调用方游标
+        """
+        for order, rule in enumerate(DEFAULT_DIMENSION_RULES):
+            cursor.execute("""
+                INSERT INTO dimension_rules (dimension, name, description, priority, keywords, patterns,
+                                             always_include, sort_order)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (rule['dimension'], rule['name'], rule['description'], rule['priority'],
+                  json.dumps(rule['keywords'], ensure_ascii=False), json.dumps(rule['patterns'], ensure_ascii=False),
+                  int(rule.get('always_include', False)), order))
+
+
+# 实例化全局对象
+dimension_rule_db = DimensionRuleDB()
+
+
+# 保持向后兼容
+def get_dimension_rules(active_only: bool = True):
+    return dimension_rule_db.get_rules(active_only)
+
+def save_dimension_rule(data: Dict[str, Any]) -> int:
+    return dimension_rule_db.save_rule(data)
@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+用例近似重复索引数据库操作
+每条用例保存两份 MinHash 签名 (标题 / 标题+步骤)，并按标题签名的 LSH 分段写入桶表：
+1. 入库前只需按桶键查出少量候选用例再校验签名，无需遍历需求下全部标题；
+2. 项目级重复报告按桶聚合候选对，校验后用并查集合并为重复组。
+
+判定规则：标题相似度 >= duplicate_threshold 且 标题+步骤相似度 >= duplicate_content_threshold，
+两者都达到阈值才视为重复 (标题几乎相同但步骤不同的用例不受影响)。
+"""
+
+from typing import Any, Dict, List, Tuple
+
+from backend.config import SYSTEM_CONFIG
+from backend.utils import minhash
+from .base import safe_json_loads
+from .db_base import DatabaseBase
+
+Fingerprint = Tuple[List[int], List[int]]
+
+
+def step_texts(steps: Any) -> List[str]:
+    """提取步骤文本 (兼容 JSON 字符串 / 列表 / 纯文本)"""
+    if isinstance(steps, str):
+        parsed = safe_json_loads(steps)
+        steps = parsed if parsed is not None else [steps]
+    if not isinstance(steps, list):
+        return []
+    texts = []
+    for step in steps:
+        if isinstance(step, dict):
+            texts.append(f"{step.get('action') or ''} {step.get('expected') or ''}")
+        else:
+            texts.append(str(step))
+    return texts
+
+
+def fingerprint(title: str, steps: Any = None) -> Fingerprint:
+    """
+    计算用例指纹
+
+    :param title: 用例标题
+    :param steps: 测试步骤
+    :return: (标题签名, 标题+步骤签名)
+    """
+    title_tokens = minhash.shingles(title)
+    content_tokens = set(title_tokens)
+    for text in step_texts(steps):
+        content_tokens |= minhash.shingles(text, prefix='s:')
+    return minhash.signature(title_tokens), minhash.signature(content_tokens)
+
+
+class DuplicateIndexDB(DatabaseBase):
+    """用例近似重复索引操作类"""
+
+    @staticmethod
+    def _thresholds(threshold: float = None, content_threshold: float = None) -> Tuple[float, float]:
+        if threshold is None:
+            threshold = SYSTEM_CONFIG["duplicate_threshold"]
+        if content_threshold is None:
+            content_threshold = SYSTEM_CONFIG["duplicate_content_threshold"]
+        return threshold, content_threshold
+
+    # ---------------------------------------------------------------
+    # 写入 (由 CaseDB 在用例插入事务中调用，conn 由调用方提交)
+    # ---------------------------------------------------------------
+    def add(self, conn, case_id: int, req_id: int, fp: Fingerprint):
+        """
+        写入用例指纹及 LSH 桶
+
+        :param conn: 调用方的数据库连接
+        :param case_id: 用例ID
+        :param req_id: 需求ID
+        :param fp: fingerprint() 的返回值
+        """
+        title_sig, content_sig = fp
+        conn.execute(
+            "INSERT OR REPLACE INTO case_fingerprints (case_id, requirement_id, title_sig, content_sig) VALUES (?, ?, ?, ?)",
+            (case_id, req_id, minhash.pack(title_sig), minhash.pack(content_sig)))
+        conn.executemany(
+            "INSERT OR IGNORE INTO case_lsh_buckets (band, bucket, case_id, requirement_id) VALUES (?, ?, ?, ?)",
+            [(band, key, case_id, req_id) for band, key in enumerate(minhash.band_keys(title_sig))])
+
+    # ---------------------------------------------------------------
+    # 查询
+    # ---------------------------------------------------------------
+    def find_similar_in(self, conn, req_id: int, fp: Fingerprint, threshold: float = None,
+                        content_threshold: float = None, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        在指定需求下查找与指纹近似的用例 (使用调用方连接，可与插入处于同一事务)
+
+        :param conn: 数据库连接
+        :param req_id: 需求ID
+        :param fp: 待比较的指纹
+        :param threshold: 标题相似度阈值
+        :param content_threshold: 标题+步骤相似度阈值
+        :param limit: 最多返回数量
+        :return: [{"case_id", "case_title", "score", "content_score"}, ...] 按相似度降序
+        """
+        threshold, content_threshold = self._thresholds(threshold, content_threshold)
+        title_sig, content_sig = fp
+        keys = list(enumerate(minhash.band_keys(title_sig)))
+        values = ','.join(['(?, ?)'] * len(keys))
+        rows = conn.execute(f"""
+            SELECT DISTINCT f.case_id, f.title_sig, f.content_sig, tc.case_title
+            FROM case_lsh_buckets b
+            JOIN case_fingerprints f ON f.case_id = b.case_id
+            JOIN test_cases tc ON tc.id = b.case_id
+            WHERE (b.band, b.bucket) IN (VALUES {values}) AND b.requirement_id = ?
+        """, (*[v for pair in keys for v in pair], req_id)).fetchall()
+
+        matches = []
+        for row in rows:
+            score = minhash.similarity(title_sig, minhash.unpack(row['title_sig']))
+            content_score = minhash.similarity(content_sig, minhash.unpack(row['content_sig']))
+            if score >= threshold and content_score >= content_threshold:
+                matches.append({"case_id": row['case_id'], "case_title": row['case_title'],
+                                "score": round(score, 4), "content_score": round(content_score, 4)})
+        matches.sort(key=lambda m: (m['score'], m['content_score']), reverse=True)
+        return matches[:limit]
+
+    def find_similar(self, req_id: int, title: str, steps: Any = None, threshold: float = None,
+                     content_threshold: float = None, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        查找需求下与给定标题/步骤近似的已有用例
+
+        :param req_id: 需求ID
+        :param title: 用例标题
+        :param steps: 测试步骤
+        :param threshold: 标题相似度阈值
+        :param content_threshold: 标题+步骤相似度阈值
+        :param limit: 最多返回数量
+        :return: 近似用例列表
+        """
+        with self.get_connection() as conn:
+            return self.find_similar_in(conn, req_id, fingerprint(title, steps), threshold, content_threshold, limit)
+
+    def find_duplicates(self, project_id: int = None, req_id: int = None, threshold: float = None,
+                        content_threshold: float = None) -> Dict[str, Any]:
+        """
+        重复用例报告：按 LSH 桶聚合候选对，校验签名后合并为重复组
+
+        :param project_id: 项目ID (为空时不限项目)
+        :param req_id: 需求ID (为空时不限需求)
+        :param threshold: 标题相似度阈值
+        :param content_threshold: 标题+步骤相似度阈值
+        :return: {"groups": [{"cases": [...], "pairs": [...]}], "candidate_pairs", "duplicate_pairs", ...}
+        """
+        threshold, content_threshold = self._thresholds(threshold, content_threshold)
+        where, params = ["1=1"], []
+        join = ""
+        if project_id is not None:
+            join = "JOIN functional_points fp ON fp.id = b.requirement_id"
+            where.append("fp.project_id = ?")
+            params.append(project_id)
+        if req_id is not None:
+            where.append("b.requirement_id = ?")
+            params.append(req_id)
+
+        with self.get_connection() as conn:
+            buckets = conn.execute(f"""
+                SELECT group_concat(b.case_id) AS ids
+                FROM case_lsh_buckets b {join}
+                WHERE {' AND '.join(where)}
+                GROUP BY b.band, b.bucket
+                HAVING COUNT(*) > 1
+            """, tuple(params)).fetchall()
+
+            candidates = set()
+            for row in buckets:
+                ids = sorted(int(x) for x in row['ids'].split(','))
+                candidates.update((a, b) for i, a in enumerate(ids) for b in ids[i + 1:])
+
+            case_ids = sorted({cid for pair in candidates for cid in pair})
+            cases = self._load_cases(conn, case_ids)
+
+        pairs = []
+        for a, b in sorted(candidates):
+            if a not in cases or b not in cases:
+                continue
+            score = minhash.similarity(cases[a]['title_sig'], cases[b]['title_sig'])
+            content_score = minhash.similarity(cases[a]['content_sig'], cases[b]['content_sig'])
+            if score >= threshold and content_score >= content_threshold:
+                pairs.append({"case_ids": [a, b], "score": round(score, 4), "content_score": round(content_score, 4)})
+
+        groups = self._group(pairs, cases)
+        return {
+            "project_id": project_id,
+            "req_id": req_id,
+            "threshold": threshold,
+            "content_threshold": content_threshold,
+            "candidate_pairs": len(candidates),
+            "duplicate_pairs": len(pairs),
+            "groups": groups
+        }
+
+    @staticmethod
+    def _load_cases(conn, case_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """批量读取用例摘要与签名"""
+        cases = {}
+        for start in range(0, len(case_ids), 500):
+            chunk = case_ids[start:start + 500]
+            placeholders = ','.join(['?'] * len(chunk))
+            for row in conn.execute(f"""
+                SELECT f.case_id, f.requirement_id, f.title_sig, f.content_sig, tc.case_title, tc.status
+                FROM case_fingerprints f JOIN test_cases tc ON tc.id = f.case_id
+                WHERE f.case_id IN ({placeholders})
+            """, tuple(chunk)):
+                item = dict(row)
+                item['title_sig'] = minhash.unpack(item['title_sig'])
+                item['content_sig'] = minhash.unpack(item['content_sig'])
+                cases[item['case_id']] = item
+        return cases
+
+    @staticmethod
+    def _group(pairs: List[Dict[str, Any]], cases: Dict[int, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """并查集合并重复对"""
+        parent: Dict[int, int] = {}
+
+        def find(x):
+            parent.setdefault(x, x)
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for pair in pairs:
+            a, b = pair['case_ids']
+            parent[find(a)] = find(b)
+
+        grouped: Dict[int, Dict[str, Any]] = {}
+        for pair in pairs:
+            group = grouped.setdefault(find(pair['case_ids'][0]), {"case_ids": set(), "pairs": []})
+            group['case_ids'].update(pair['case_ids'])
+            group['pairs'].append(pair)
+
+        result = []
+        for group in grouped.values():
+            result.append({
+                "cases": [{"id": cid, "requirement_id": cases[cid]['requirement_id'],
+                           "case_title": cases[cid]['case_title'], "status": cases[cid]['status']}
+                          for cid in sorted(group['case_ids'])],
+                "pairs": group['pairs']
+            })
+        result.sort(key=lambda g: (-len(g['cases']), g['cases'][0]['id']))
+        return result
+
+    # ---------------------------------------------------------------
+    # 全量重建
+    # ---------------------------------------------------------------
+    def rebuild(self, req_id: int = None) -> int:
+        """
+        从 test_cases 全量重建指纹与桶 (修复/首次回填)
+
+        :param req_id: 只重建指定需求，为空时重建全部
+        :return: 写入的用例数量
+        """
+        sql = "SELECT id, requirement_id, case_title, steps FROM test_cases WHERE requirement_id IS NOT NULL"
+        params: tuple = ()
+        if req_id is not None:
+            sql += " AND requirement_id = ?"
+            params = (req_id,)
+
+        with self.get_connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+            fingerprints = [(row['id'], row['requirement_id'], fingerprint(row['case_title'], row['steps']))
+                            for row in rows]
+
+            conn.execute("BEGIN IMMEDIATE")
+            if req_id is None:
+                conn.execute("DELETE FROM case_fingerprints")
+                conn.execute("DELETE FROM case_lsh_buckets")
+            else:
+                conn.execute("DELETE FROM case_fingerprints WHERE requirement_id = ?", (req_id,))
+                conn.execute("DELETE FROM case_lsh_buckets WHERE requirement_id = ?", (req_id,))
+            for case_id, case_req_id, fp in fingerprints:
+                self.add(conn, case_id, case_req_id, fp)
+            conn.commit()
+        return len(fingerprints)
+
+    def backfill_if_empty(self) -> int:
+        """
+        指纹表为空而用例表有数据时执行一次全量回填 (升级后首次启动)
+
+        :return: 回填的用例数量
+        """
+        rows = self.execute_query("""
+            SELECT EXISTS(SELECT 1 FROM case_fingerprints) AS has_fingerprints,
+                   EXISTS(SELECT 1 FROM test_cases) AS has_cases
+        """)
+        if rows and not rows[0]['has_fingerprints'] and rows[0]['has_cases']:
+            count = self.rebuild()
+            print(f"   -> 回填: case_fingerprints 已生成 {count} 条用例指纹")
+            return count
+        return 0
+
+
+# 实例化全局对象
+duplicate_db = DuplicateIndexDB()
+
+
+# 保持向后兼容
+def find_similar_cases(req_id: int, title: str, steps: Any = None, threshold: float = None):
+    return duplicate_db.find_similar(req_id, title, steps, threshold)
+
+def find_duplicate_cases(project_id: int = None, req_id: int = None, threshold: float = None):
+    return duplicate_db.find_duplicates(project_id, req_id, threshold)
@@ -5,22 +5,33 @@
 @Desc    ：数据库初始化与表结构管理
 该文件负责创建数据库表结构，并处理数据库迁移（Migration）逻辑。
 同时提供种子数据（Seed Data）的初始化功能。
+
+迁移说明：
+1. 表结构变更按版本登记在 MIGRATIONS 中，已执行的版本记录在 schema_version 表；
+2. 启动时只读取一次当前版本，已是最新则跳过全部 DDL；
+3. 每个待执行的迁移在独立事务中执行 (BEGIN IMMEDIATE)，失败时整体回滚，不会留下半成品；
+4. 新增表、字段、索引时在 MIGRATIONS 末尾追加新版本，不要修改已发布的迁移。
 """
 import sqlite3
+import time
+
 from .base import get_conn, DB_PATH
 
 
-def init_tables():
-    """
-    初始化所有数据库表结构
-    如果表不存在则创建，如果存在则跳过。
-    同时包含简单的数据库迁移逻辑，用于在旧表结构上新增字段。
-    """
-    conn = get_conn()
-    cursor = conn.cursor()
+def _add_column(cursor, table, column, definition):
+    """字段不存在时新增 (旧版本数据库补丁)"""
+    # table_xinfo 同时列出生成列 (table_info 不含)
+    columns = {row[1] for row in cursor.execute(f"PRAGMA table_xinfo({table})")}
+    if column not in columns:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        print(f"   -> 补丁: {table} 增加 {column}")
 
-    print("⚙️ [DB Init] 正在检查并初始化数据库表结构...")
 
+def migrate_v1_base_tables(cursor):
+    """
+    基础表结构：项目、功能点、用例、需求拆解、提示词，以及默认项目与默认提示词
+    引入版本表之前的数据库已由旧版 init_tables 建表，因此语句均可重复执行。
+    """
     # --------------------------------------------------------
     # 1. 项目表 (Projects)
     # 用于管理不同的测试项目，实现数据隔离
@@ -68,6 +79,8 @@ def init_tables():
             test_data TEXT,                         -- 测试数据 (JSON字符串: Dict)
             status TEXT DEFAULT 'Draft',            -- 状态 (Draft:草稿, Active:有效, Deprecated:废弃)
             version INTEGER DEFAULT 1,              -- 版本号 (用于乐观锁或版本控制)
+            quality_score REAL,                     -- 评审质量分
+            review_comments TEXT,                   -- 评审意见
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP -- 创建时间
         )
     """)
@@ -111,56 +124,22 @@ def init_tables():
         )
     """)
 
-    # --------------------------------------------------------
-    # 6. 自动迁移逻辑 (Migration)
-    # 防止旧数据库缺少字段导致报错，尝试添加新字段
-    # --------------------------------------------------------
-    try:
-        cursor.execute("ALTER TABLE functional_points ADD COLUMN project_id INTEGER")
-        print("   -> 补丁: functional_points 增加 project_id")
-    except sqlite3.OperationalError:
-        pass
+    # 旧数据库缺少的字段
+    _add_column(cursor, "functional_points", "project_id", "INTEGER")
+    _add_column(cursor, "functional_points", "source_content", "TEXT")
+    _add_column(cursor, "test_cases", "quality_score", "REAL")
+    _add_column(cursor, "test_cases", "review_comments", "TEXT")
 
-    try:
-        cursor.execute("ALTER TABLE functional_points ADD COLUMN source_content TEXT")
-        print("   -> 补丁: functional_points 增加 source_content")
-    except sqlite3.OperationalError:
-        pass
-
-    try:
-        cursor.execute("ALTER TABLE test_cases ADD COLUMN quality_score REAL")
-        print("   -> 补丁: test_cases 增加 quality_score")
-    except sqlite3.OperationalError: pass
-
-    try:
-        cursor.execute("ALTER TABLE test_cases ADD COLUMN review_comments TEXT")
-        print("   -> 补丁: test_cases 增加 review_comments")
-    except sqlite3.OperationalError: pass
-    
-    conn.commit()
-    conn.close()
-    print("✅ [DB Init] 数据库初始化完成")
-
-
-def seed_data():
-    """
-    插入默认的种子数据
-    用于系统首次启动时，预置一些基础数据，如默认项目、默认提示词等。
-    """
-    conn = get_conn()
-    cursor = conn.cursor()
-
-    # 检查是否需要插入默认项目
+    # 默认项目
     cursor.execute("SELECT count(*) FROM projects")
     if cursor.fetchone()[0] == 0:
         cursor.execute("INSERT INTO projects (project_name, description) VALUES (?, ?)",
                        ("默认项目", "系统自动创建的默认演示项目"))
         print("🌱 [DB Seed] 已插入默认项目")
 
-    # 检查是否需要插入默认提示词
+    # 默认提示词
     cursor.execute("SELECT count(*) FROM prompts")
     if cursor.fetchone()[0] == 0:
-        # 插入默认提示词
         default_prompts = [
             {
                 "name": "基础生成器",
@@ -191,7 +170,7 @@ def seed_data():
                 "description": "API测试用例生成提示词"
             }
         ]
-        
+
         for prompt in default_prompts:
             cursor.execute("""
                 INSERT INTO prompts (name, content, domain, type, description)
@@ -205,5 +184,515 @@ def seed_data():
             ))
         print("🌱 [DB Seed] 已插入默认提示词")
 
+
+def migrate_v2_knowledge_cache(cursor):
+    """
+    知识检索缓存表 (Knowledge Cache)
+    说明：Dify 检索结果的二级缓存，按 (端点, 应用, 标准化查询) 的哈希存储
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS knowledge_cache (
+            cache_key TEXT PRIMARY KEY,             -- 缓存键 (哈希)
+            endpoint TEXT,                          -- Dify 端点
+            query TEXT,                             -- 标准化后的查询语句
+            items TEXT,                             -- 检索结果 (JSON字符串: List[Dict])
+            negative INTEGER DEFAULT 0,             -- 是否为空结果缓存
+            expires_at REAL,                        -- 过期时间 (Unix 时间戳)
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP -- 创建时间
+        )
+    """)
+
+
+def migrate_v3_requirement_coverage(cursor):
+    """
+    需求覆盖汇总表 (Requirement Coverage)
+    说明：按需求汇总用例分布，由 CaseDB 在写入事务中增量维护；已有用例在迁移完成后回填
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS requirement_coverage (
+            requirement_id INTEGER PRIMARY KEY,     -- 功能点ID
+            total_cases INTEGER DEFAULT 0,          -- 用例总数
+            status_counts TEXT,                     -- 状态分布 (JSON: {"Draft": 3, "Active": 2})
+            case_type_counts TEXT,                  -- 用例类型分布 (JSON)
+            priority_counts TEXT,                   -- 优先级分布 (JSON)
+            category_counts TEXT,                   -- 覆盖类别分布 (JSON: {"成功场景": 2, ...})
+            quality_sum REAL DEFAULT 0,             -- 质量分合计 (用于计算平均分)
+            quality_count INTEGER DEFAULT 0,        -- 有质量分的用例数
+            quality_min REAL,                       -- 最低质量分
+            quality_max REAL,                       -- 最高质量分
+            quality_latest REAL,                    -- 最近入库用例的质量分
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP -- 更新时间
+        )
+    """)
+
+
+def migrate_v4_case_fingerprints(cursor):
+    """
+    用例近似重复索引 (Case Fingerprints / LSH Buckets)
+    说明：MinHash 签名与 LSH 分段桶，由 CaseDB 在写入事务中维护；已有用例在迁移完成后回填
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS case_fingerprints (
+            case_id INTEGER PRIMARY KEY,            -- 用例ID
+            requirement_id INTEGER,                 -- 功能点ID
+            title_sig BLOB,                         -- 标题 MinHash 签名
+            content_sig BLOB,                       -- 标题+步骤 MinHash 签名
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP -- 创建时间
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS case_lsh_buckets (
+            band INTEGER,                           -- LSH 分段序号
+            bucket INTEGER,                         -- 分段桶键
+            case_id INTEGER,                        -- 用例ID
+            requirement_id INTEGER,                 -- 功能点ID
+            PRIMARY KEY (band, bucket, case_id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_case_lsh_buckets_req ON case_lsh_buckets (requirement_id)")
+
+
+def migrate_v5_dimension_rules(cursor):
+    """
+    测试维度规则表 (Dimension Rules) 及默认规则
+    说明：TestDimensionManager 编译为单个匹配器，变更后热加载
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS dimension_rules (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            dimension TEXT NOT NULL UNIQUE,         -- 维度标识 (functional, security ...)
+            name TEXT,                              -- 维度名称
+            description TEXT,                       -- 维度说明
+            priority TEXT DEFAULT 'medium',         -- 优先级 (high/medium/low)
+            keywords TEXT,                          -- 关键词 (JSON 列表，忽略大小写)
+            patterns TEXT,                          -- 正则表达式 (JSON 列表，匹配小写化后的文本)
+            weight REAL DEFAULT 1.0,                -- 每条命中证据的得分
+            min_score REAL DEFAULT 1.0,             -- 推荐该维度的最低得分
+            always_include INTEGER DEFAULT 0,       -- 是否始终包含 (如功能测试)
+            is_active INTEGER DEFAULT 1,            -- 是否启用
+            sort_order INTEGER DEFAULT 0,           -- 排序
+            revision INTEGER DEFAULT 1,             -- 修订号 (热加载检测)
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP -- 更新时间
+        )
+    """)
+
+    cursor.execute("SELECT count(*) FROM dimension_rules")
+    if cursor.fetchone()[0] == 0:
+        from .dimension_rule_db import dimension_rule_db
+        dimension_rule_db.seed_defaults(cursor)
+        print("🌱 [DB Seed] 已插入默认测试维度规则")
+
+
+def migrate_v6_query_indexes(cursor):
+    """
+    热点查询的二级索引
+    说明：按功能点取用例/查重、用例与拆解项的状态过滤、按项目过滤功能点、按领域取提示词，
+    以及这些列表按 id 倒序分页，均可走索引而不是全表扫描
+    """
+    # 用例：按功能点 (+状态) 过滤并按 id 排序；仅按状态过滤的列表页
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_test_cases_req_status ON test_cases (requirement_id, status, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_test_cases_status ON test_cases (status, id)")
+    # 需求拆解：按项目 (+评审状态) 过滤；仅按评审状态过滤
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_breakdown_project_status
+                      ON requirement_breakdown (project_id, review_status, id)""")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_breakdown_status ON requirement_breakdown (review_status, id)")
+    # 功能点：按项目过滤
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_functional_points_project ON functional_points (project_id)")
+    # 提示词：按领域、类型筛选
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_prompts_domain_type ON prompts (domain, type)")
+
+
+def migrate_v7_list_counts(cursor):
+    """
+    列表计数表 (List Counts)
+    说明：按 (表名, 等值过滤条件) 保存行数，由触发器随增删改维护，列表页据此返回总数而无需 COUNT(*)
+    触发器与回填语句为发布时 count_db.COUNTED_FILTERS 的快照，之后调整计数维度需追加新迁移
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS list_counts (
+            table_name TEXT,                        -- 表名
+            filter_key TEXT,                        -- 过滤条件 (如 "requirement_id=3&status=Draft"，空串表示不过滤)
+            row_count INTEGER DEFAULT 0,            -- 行数
+            PRIMARY KEY (table_name, filter_key)
+        ) WITHOUT ROWID
+    """)
+    upsert = "ON CONFLICT(table_name, filter_key) DO UPDATE SET row_count = row_count + excluded.row_count;"
+
+    # 用例：全部 / requirement_id / status / requirement_id+status
+    for action in ("insert", "delete", "update"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_test_cases_count_{action}")
+    cursor.execute(f"""
+        CREATE TRIGGER trg_test_cases_count_insert AFTER INSERT ON test_cases BEGIN
+            INSERT INTO list_counts (table_name, filter_key, row_count) VALUES
+                ('test_cases', '', 1),
+                ('test_cases', 'requirement_id=' || COALESCE(NEW.requirement_id, ''), 1),
+                ('test_cases', 'status=' || COALESCE(NEW.status, ''), 1),
+                ('test_cases', 'requirement_id=' || COALESCE(NEW.requirement_id, '') || '&status=' || COALESCE(NEW.status, ''), 1)
+            {upsert}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER trg_test_cases_count_delete AFTER DELETE ON test_cases BEGIN
+            INSERT INTO list_counts (table_name, filter_key, row_count) VALUES
+                ('test_cases', '', -1),
+                ('test_cases', 'requirement_id=' || COALESCE(OLD.requirement_id, ''), -1),
+                ('test_cases', 'status=' || COALESCE(OLD.status, ''), -1),
+                ('test_cases', 'requirement_id=' || COALESCE(OLD.requirement_id, '') || '&status=' || COALESCE(OLD.status, ''), -1)
+            {upsert}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER trg_test_cases_count_update AFTER UPDATE OF requirement_id, status ON test_cases
+        WHEN OLD.requirement_id IS NOT NEW.requirement_id OR OLD.status IS NOT NEW.status BEGIN
+            INSERT INTO list_counts (table_name, filter_key, row_count) VALUES
+                ('test_cases', 'requirement_id=' || COALESCE(OLD.requirement_id, ''), -1),
+                ('test_cases', 'status=' || COALESCE(OLD.status, ''), -1),
+                ('test_cases', 'requirement_id=' || COALESCE(OLD.requirement_id, '') || '&status=' || COALESCE(OLD.status, ''), -1)
+            {upsert}
+            INSERT INTO list_counts (table_name, filter_key, row_count) VALUES
+                ('test_cases', 'requirement_id=' || COALESCE(NEW.requirement_id, ''), 1),
+                ('test_cases', 'status=' || COALESCE(NEW.status, ''), 1),
+                ('test_cases', 'requirement_id=' || COALESCE(NEW.requirement_id, '') || '&status=' || COALESCE(NEW.status, ''), 1)
+            {upsert}
+        END
+    """)
+
+    # 需求拆解：全部 / project_id / review_status / project_id+review_status
+    for action in ("insert", "delete", "update"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_requirement_breakdown_count_{action}")
+    cursor.execute(f"""
+        CREATE TRIGGER trg_requirement_breakdown_count_insert AFTER INSERT ON requirement_breakdown BEGIN
+            INSERT INTO list_counts (table_name, filter_key, row_count) VALUES
+                ('requirement_breakdown', '', 1),
+                ('requirement_breakdown', 'project_id=' || COALESCE(NEW.project_id, ''), 1),
+                ('requirement_breakdown', 'review_status=' || COALESCE(NEW.review_status, ''), 1),
+                ('requirement_breakdown', 'project_id=' || COALESCE(NEW.project_id, '') || '&review_status=' || COALESCE(NEW.review_status, ''), 1)
+            {upsert}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER trg_requirement_breakdown_count_delete AFTER DELETE ON requirement_breakdown BEGIN
+            INSERT INTO list_counts (table_name, filter_key, row_count) VALUES
+                ('requirement_breakdown', '', -1),
+                ('requirement_breakdown', 'project_id=' || COALESCE(OLD.project_id, ''), -1),
+                ('requirement_breakdown', 'review_status=' || COALESCE(OLD.review_status, ''), -1),
+                ('requirement_breakdown', 'project_id=' || COALESCE(OLD.project_id, '') || '&review_status=' || COALESCE(OLD.review_status, ''), -1)
+            {upsert}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER trg_requirement_breakdown_count_update AFTER UPDATE OF project_id, review_status ON requirement_breakdown
+        WHEN OLD.project_id IS NOT NEW.project_id OR OLD.review_status IS NOT NEW.review_status BEGIN
+            INSERT INTO list_counts (table_name, filter_key, row_count) VALUES
+                ('requirement_breakdown', 'project_id=' || COALESCE(OLD.project_id, ''), -1),
+                ('requirement_breakdown', 'review_status=' || COALESCE(OLD.review_status, ''), -1),
+                ('requirement_breakdown', 'project_id=' || COALESCE(OLD.project_id, '') || '&review_status=' || COALESCE(OLD.review_status, ''), -1)
+            {upsert}
+            INSERT INTO list_counts (table_name, filter_key, row_count) VALUES
+                ('requirement_breakdown', 'project_id=' || COALESCE(NEW.project_id, ''), 1),
+                ('requirement_breakdown', 'review_status=' || COALESCE(NEW.review_status, ''), 1),
+                ('requirement_breakdown', 'project_id=' || COALESCE(NEW.project_id, '') || '&review_status=' || COALESCE(NEW.review_status, ''), 1)
+            {upsert}
+        END
+    """)
+
+    # 功能点：全部 / project_id / priority
+    for action in ("insert", "delete", "update"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_functional_points_count_{action}")
+    cursor.execute(f"""
+        CREATE TRIGGER trg_functional_points_count_insert AFTER INSERT ON functional_points BEGIN
+            INSERT INTO list_counts (table_name, filter_key, row_count) VALUES
+                ('functional_points', '', 1),
+                ('functional_points', 'project_id=' || COALESCE(NEW.project_id, ''), 1),
+                ('functional_points', 'priority=' || COALESCE(NEW.priority, ''), 1)
+            {upsert}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER trg_functional_points_count_delete AFTER DELETE ON functional_points BEGIN
+            INSERT INTO list_counts (table_name, filter_key, row_count) VALUES
+                ('functional_points', '', -1),
+                ('functional_points', 'project_id=' || COALESCE(OLD.project_id, ''), -1),
+                ('functional_points', 'priority=' || COALESCE(OLD.priority, ''), -1)
+            {upsert}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER trg_functional_points_count_update AFTER UPDATE OF priority, project_id ON functional_points
+        WHEN OLD.priority IS NOT NEW.priority OR OLD.project_id IS NOT NEW.project_id BEGIN
+            INSERT INTO list_counts (table_name, filter_key, row_count) VALUES
+                ('functional_points', 'project_id=' || COALESCE(OLD.project_id, ''), -1),
+                ('functional_points', 'priority=' || COALESCE(OLD.priority, ''), -1)
+            {upsert}
+            INSERT INTO list_counts (table_name, filter_key, row_count) VALUES
+                ('functional_points', 'project_id=' || COALESCE(NEW.project_id, ''), 1),
+                ('functional_points', 'priority=' || COALESCE(NEW.priority, ''), 1)
+            {upsert}
+        END
+    """)
+
+    # 回填
+    backfill = {
+        "test_cases": ["''", "'requirement_id=' || COALESCE(requirement_id, '')", "'status=' || COALESCE(status, '')",
+                       "'requirement_id=' || COALESCE(requirement_id, '') || '&status=' || COALESCE(status, '')"],
+        "requirement_breakdown": ["''", "'project_id=' || COALESCE(project_id, '')",
+                                  "'review_status=' || COALESCE(review_status, '')",
+                                  "'project_id=' || COALESCE(project_id, '') || '&review_status=' || COALESCE(review_status, '')"],
+        "functional_points": ["''", "'project_id=' || COALESCE(project_id, '')", "'priority=' || COALESCE(priority, '')"],
+    }
+    for table, keys in backfill.items():
+        cursor.execute("DELETE FROM list_counts WHERE table_name = ?", (table,))
+        for key in keys:
+            cursor.execute(f"""
+                INSERT INTO list_counts (table_name, filter_key, row_count)
+                SELECT ?, {key}, COUNT(*) FROM {table} GROUP BY 2
+            """, (table,))
+
+
+def migrate_v8_requirement_case_counts(cursor):
+    """
+    功能点用例计数 (functional_points.case_count 及各状态计数)
+    说明：由 test_cases 的插入、删除、状态/所属功能点变更触发器维护，一次性回填已有数据；
+    可用 python -m backend.database.consistency 检查与修复
+    """
+    for column in ("case_count", "draft_case_count", "active_case_count", "deprecated_case_count"):
+        _add_column(cursor, "functional_points", column, "INTEGER NOT NULL DEFAULT 0")
+
+    def adjust(row, sign):
+        # row 为 NEW / OLD；各状态计数按状态是否匹配加减
+        return (f"UPDATE functional_points SET case_count = case_count {sign} 1, "
+                f"draft_case_count = draft_case_count {sign} ({row}.status IS 'Draft'), "
+                f"active_case_count = active_case_count {sign} ({row}.status IS 'Active'), "
+                f"deprecated_case_count = deprecated_case_count {sign} ({row}.status IS 'Deprecated') "
+                f"WHERE id = {row}.requirement_id;")
+
+    cursor.execute("DROP TRIGGER IF EXISTS trg_test_cases_fp_count_insert")
+    cursor.execute("DROP TRIGGER IF EXISTS trg_test_cases_fp_count_delete")
+    cursor.execute("DROP TRIGGER IF EXISTS trg_test_cases_fp_count_update")
+    cursor.execute(f"CREATE TRIGGER trg_test_cases_fp_count_insert AFTER INSERT ON test_cases "
+                   f"BEGIN {adjust('NEW', '+')} END")
+    cursor.execute(f"CREATE TRIGGER trg_test_cases_fp_count_delete AFTER DELETE ON test_cases "
+                   f"BEGIN {adjust('OLD', '-')} END")
+    cursor.execute(f"CREATE TRIGGER trg_test_cases_fp_count_update AFTER UPDATE OF status, requirement_id ON test_cases "
+                   f"WHEN OLD.status IS NOT NEW.status OR OLD.requirement_id IS NOT NEW.requirement_id "
+                   f"BEGIN {adjust('OLD', '-')} {adjust('NEW', '+')} END")
+
+    # 回填
+    cursor.execute("""
+        UPDATE functional_points SET (case_count, draft_case_count, active_case_count, deprecated_case_count) =
+            (SELECT COUNT(*), COALESCE(SUM(status IS 'Draft'), 0), COALESCE(SUM(status IS 'Active'), 0),
+                    COALESCE(SUM(status IS 'Deprecated'), 0)
+             FROM test_cases WHERE requirement_id = functional_points.id)
+    """)
+
+
+def migrate_v9_fulltext_search(cursor):
+    """
+    全文检索索引 (FTS5 trigram)：用例标题/步骤/预期结果，功能点与需求拆解项的名称/描述/验收标准
+    说明：由原表触发器同步维护，一次性回填已有数据；详见 search_db.SearchDB
+    索引列与触发器为发布时 search_db.SEARCH_SCOPES 的快照，之后调整检索范围需追加新迁移
+    """
+    def json_lines(column):
+        # JSON 数组 (步骤/验收标准) 展开为按行拼接的纯文本，非数组原样索引
+        return (f"CASE WHEN json_valid({column}) AND json_type({column}) = 'array' THEN "
+                f"(SELECT group_concat(CASE type WHEN 'object' THEN trim(COALESCE(json_extract(value, '$.action'), '') "
+                f"|| ' ' || COALESCE(json_extract(value, '$.expected'), '')) ELSE value END, char(10)) "
+                f"FROM json_each({column})) ELSE {column} END")
+
+    # (原表, 索引表, 索引列, 触发更新的原表列, 索引列取值 (p 为 NEW. 或空))
+    scopes = [
+        ("test_cases", "test_cases_fts", "case_title, steps_text, expected_result", "case_title, steps, expected_result",
+         lambda p: f"{p}case_title, {json_lines(p + 'steps')}, {p}expected_result"),
+        ("functional_points", "functional_points_fts", "feature_name, description", "feature_name, description",
+         lambda p: f"{p}feature_name, {p}description"),
+        ("requirement_breakdown", "requirement_breakdown_fts", "feature_name, description, acceptance_criteria",
+         "feature_name, description, acceptance_criteria",
+         lambda p: f"{p}feature_name, {p}description, {json_lines(p + 'acceptance_criteria')}"),
+    ]
+    for table, fts, columns, sources, values in scopes:
+        cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({columns}, tokenize='trigram')")
+        insert = f"INSERT INTO {fts} (rowid, {columns}) VALUES (NEW.id, {values('NEW.')});"
+        delete = f"DELETE FROM {fts} WHERE rowid = OLD.id;"
+        for action in ("insert", "delete", "update"):
+            cursor.execute(f"DROP TRIGGER IF EXISTS trg_{table}_fts_{action}")
+        cursor.execute(f"CREATE TRIGGER trg_{table}_fts_insert AFTER INSERT ON {table} BEGIN {insert} END")
+        cursor.execute(f"CREATE TRIGGER trg_{table}_fts_delete AFTER DELETE ON {table} BEGIN {delete} END")
+        cursor.execute(f"CREATE TRIGGER trg_{table}_fts_update AFTER UPDATE OF {sources} ON {table} "
+                       f"BEGIN {delete} {insert} END")
+        # 回填
+        cursor.execute(f"DELETE FROM {fts}")
+        cursor.execute(f"INSERT INTO {fts} (rowid, {columns}) SELECT id, {values('')} FROM {table}")
+
+
+def migrate_v10_case_format(cursor):
+    """
+    用例步骤/测试数据规范格式 (test_cases.format_version)
+    说明：只新增版本字段，已有用例保持 0 (旧格式，读取时走兼容解析)；
+    旧数据由后台规范化任务 (见 normalize_db / normalize_service) 分批改写并记录审计，不阻塞启动
+    """
+    _add_column(cursor, "test_cases", "format_version", "INTEGER NOT NULL DEFAULT 0")
+
+
+def migrate_v11_case_normalize_job(cursor):
+    """
+    历史用例规范化任务表与审计表
+    说明：后台任务按批改写 format_version 落后的用例，断点与进度记录在 case_normalize_runs，
+    每个被改动字段的原值/新值记录在 case_normalize_audit (见 normalize_db)
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS case_normalize_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,       -- 任务ID
+            status TEXT DEFAULT 'running',              -- running / stopped / done / failed
+            target_version INTEGER,                     -- 目标格式版本
+            total INTEGER DEFAULT 0,                    -- 开始时待处理行数
+            scanned INTEGER DEFAULT 0,                  -- 已处理行数
+            changed INTEGER DEFAULT 0,                  -- 内容有改动的行数
+            last_id INTEGER DEFAULT 0,                  -- 断点 (已处理的最大用例ID)
+            error TEXT,                                 -- 失败原因
+            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS case_normalize_audit (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id INTEGER,                             -- 任务ID
+            case_id INTEGER,                            -- 用例ID
+            field TEXT,                                 -- 字段 (steps / test_data)
+            old_value TEXT,                             -- 原值
+            new_value TEXT,                             -- 规范化后的值
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_normalize_audit_case ON case_normalize_audit (case_id)")
+    # 待规范化的行通常很少，按版本索引避免每批从断点起扫描全部已规范化的行
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_test_cases_format_version ON test_cases (format_version)")
+
+
+def migrate_v12_case_title_unique(cursor):
+    """
+    用例标题唯一约束
+    说明：title_norm 为 case_title 归一化后的生成列 (见 case_format.title_norm_sql)，
+    (requirement_id, title_norm) 唯一索引让同一功能点下的同名用例在数据库层面无法重复写入，
+    save_case 以 INSERT ... ON CONFLICT DO NOTHING 插入，无需先查询已有标题。
+    已存在同名用例时迁移失败并列出冲突的用例ID，不改动用户数据；确认后运行
+    python -m backend.database.consistency --rename-duplicate-titles 处理后重启
+    """
+    # 归一化表达式为发布时 case_format.title_norm_sql() 的快照
+    norm = "lower(trim(case_title, char(32, 9, 10, 13)))"
+    duplicates = cursor.execute(f"""
+        SELECT requirement_id, MIN(case_title), group_concat(id) FROM (
+            SELECT id, requirement_id, case_title, {norm} AS norm FROM test_cases
+            WHERE requirement_id IS NOT NULL ORDER BY id)
+        GROUP BY requirement_id, norm HAVING COUNT(*) > 1 ORDER BY requirement_id
+    """).fetchall()
+    if duplicates:
+        report = "; ".join(f"需求 {req_id} '{title}' 用例ID {sorted(int(i) for i in ids.split(','))}"
+                           for req_id, title, ids in duplicates[:20])
+        raise RuntimeError(f"test_cases 存在 {len(duplicates)} 组同名用例，无法建立标题唯一约束: {report}。"
+                           f"请手工处理，或运行 python -m backend.database.consistency --rename-duplicate-titles "
+                           f"为后续重复项追加 [重复#ID] 后缀")
+    _add_column(cursor, "test_cases", "title_norm", f"TEXT GENERATED ALWAYS AS ({norm}) VIRTUAL")
+    cursor.execute("""CREATE UNIQUE INDEX IF NOT EXISTS uq_test_cases_req_title
+                      ON test_cases (requirement_id, title_norm)""")
+
+
+# 迁移清单: (版本号, 说明, 迁移函数)，版本号必须递增
+MIGRATIONS = [
+    (1, "基础表结构与默认数据", migrate_v1_base_tables),
+    (2, "知识检索缓存表", migrate_v2_knowledge_cache),
+    (3, "需求覆盖汇总表", migrate_v3_requirement_coverage),
+    (4, "用例近似重复索引", migrate_v4_case_fingerprints),
+    (5, "测试维度规则表", migrate_v5_dimension_rules),
+    (6, "热点查询索引", migrate_v6_query_indexes),
+    (7, "列表计数表与维护触发器", migrate_v7_list_counts),
+    (8, "功能点用例计数", migrate_v8_requirement_case_counts),
+    (9, "全文检索索引", migrate_v9_fulltext_search),
+    (10, "用例步骤规范格式", migrate_v10_case_format),
+    (11, "历史用例规范化任务与审计表", migrate_v11_case_normalize_job),
+    (12, "用例标题唯一约束", migrate_v12_case_title_unique),
+]
+
+
+def get_schema_version(conn=None) -> int:
+    """
+    获取数据库当前的表结构版本
+
+    :param conn: 数据库连接 (为空时使用当前线程连接)
+    :return: 已执行的最大迁移版本 (尚未建立版本表时为 0)
+    """
+    conn = conn or get_conn()
+    try:
+        row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    except sqlite3.OperationalError:
+        return 0  # 版本表不存在：新数据库或引入版本表之前的旧数据库
+    return row[0] or 0
+
+
+def init_tables():
+    """
+    初始化所有数据库表结构
+    按版本执行尚未执行的迁移；表结构已是最新时直接返回，不执行任何 DDL。
+
+    :return: 本次执行的迁移版本列表
+    """
+    conn = get_conn()
+    latest = MIGRATIONS[-1][0]
+    current = get_schema_version(conn)
+    if current >= latest:
+        if current > latest:
+            print(f"⚠️ [DB Init] 数据库版本 v{current} 高于程序已知的 v{latest}，请确认程序版本")
+        return []
+
+    print(f"⚙️ [DB Init] 数据库版本 v{current}，正在升级到 v{latest}...")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,            -- 迁移版本号
+            description TEXT,                       -- 迁移说明
+            duration_ms REAL,                       -- 执行耗时 (毫秒)
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP -- 执行时间
+        )
+    """)
     conn.commit()
+
+    applied = []
+    for version, description, upgrade in MIGRATIONS:
+        if version <= current:
+            continue
+        started = time.perf_counter()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # 拿到写锁后再确认一次，其他进程可能已经执行了该迁移
+            if get_schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            upgrade(conn.cursor())
+            conn.execute("INSERT INTO schema_version (version, description, duration_ms) VALUES (?, ?, ?)",
+                         (version, description, round((time.perf_counter() - started) * 1000, 2)))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ [DB Init] 迁移 v{version} ({description}) 失败，已回滚: {e}")
+            raise
+        applied.append(version)
+        print(f"   -> 迁移: v{version} {description}")
     conn.close()
+
+    if applied:
+        # 升级后首次启动：根据已有用例回填覆盖汇总表与近似重复索引
+        from .coverage_db import coverage_db
+        coverage_db.backfill_if_empty()
+        from .duplicate_db import duplicate_db
+        duplicate_db.backfill_if_empty()
+    print("✅ [DB Init] 数据库初始化完成")
+    return applied
+
+
+def seed_data():
+    """
+    插入默认的种子数据
+    默认项目、提示词、维度规则已随对应迁移写入 (见 MIGRATIONS)，
+    保留该函数以兼容旧的启动流程：确保迁移已执行。
+    """
+    init_tables()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+知识检索缓存数据库操作模块
+负责 knowledge_cache 表的读写，作为知识检索内存缓存的二级存储。
+"""
+
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+from .db_base import DatabaseBase
+
+
+class KnowledgeCacheDB(DatabaseBase):
+    """
+    知识检索缓存数据库操作类
+    继承自 DatabaseBase
+    """
+
+    def get_entry(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """
+        获取未过期的缓存条目
+
+        :param cache_key: 缓存键
+        :return: 缓存条目 (items 已反序列化)，不存在或已过期返回 None
+        """
+        rows = self.execute_query(
+            "SELECT * FROM knowledge_cache WHERE cache_key = ? AND expires_at > ?",
+            (cache_key, time.time())
+        )
+        if not rows:
+            return None
+        entry = rows[0]
+        entry['items'] = json.loads(entry['items'] or '[]')
+        entry['negative'] = bool(entry['negative'])
+        return entry
+
+    def put_entry(self, cache_key: str, endpoint: str, query: str, items: List[Dict], negative: bool,
+                  expires_at: float):
+        """
+        写入 (或覆盖) 缓存条目
+
+        :param cache_key: 缓存键
+        :param endpoint: Dify 端点
+        :param query: 标准化查询语句
+        :param items: 检索结果
+        :param negative: 是否为空结果
+        :param expires_at: 过期时间戳
+        """
+        sql = """
+            INSERT OR REPLACE INTO knowledge_cache (cache_key, endpoint, query, items, negative, expires_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """
+        self.execute_update(sql, (cache_key, endpoint, query, json.dumps(items, ensure_ascii=False),
+                                  int(negative), expires_at))
+
+    def list_entries(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        列出缓存条目摘要 (不含结果正文)
+
+        :param limit: 最大返回条数
+        :return: 条目列表
+        """
+        sql = """
+            SELECT cache_key, endpoint, query, negative, expires_at, created_at
+            FROM knowledge_cache ORDER BY expires_at DESC LIMIT ?
+        """
+        return self.execute_query(sql, (limit,))
+
+    def delete_entries(self, cache_key: str = None) -> int:
+        """
+        删除缓存条目
+
+        :param cache_key: 缓存键，为空时清空全部
+        :return: 删除的行数
+        """
+        if cache_key:
+            return self.execute_update("DELETE FROM knowledge_cache WHERE cache_key = ?", (cache_key,))
+        return self.execute_update("DELETE FROM knowledge_cache")
+
+    def purge_expired(self) -> int:
+        """
+        清理已过期的条目
+
+        :return: 删除的行数
+        """
+        return self.execute_update("DELETE FROM knowledge_cache WHERE expires_at <= ?", (time.time(),))
+
+
+# 实例化全局对象
+knowledge_cache_db = KnowledgeCacheDB()
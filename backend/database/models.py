@@ -22,7 +22,10 @@ class Requirement(BaseModel):
     feature_name: str
     description: str
     priority: str
-    case_count: int = 0  # 统计该需求下有多少用例 (非数据库字段，查询时聚合)
+    case_count: int = 0  # 该需求下的用例数 (由 test_cases 触发器维护)
+    draft_case_count: int = 0
+    active_case_count: int = 0
+    deprecated_case_count: int = 0
 
 
 # =========================================================
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+历史用例数据规范化
+按 ID 分批扫描 format_version 低于当前版本的用例，把 steps / test_data 改写为规范格式 (见 case_format)：
+1. 每批在一个事务内完成：改写数据、标记为当前版本、写审计记录、推进断点，中断后从断点继续；
+2. 审计表 case_normalize_audit 保存每个被改动字段的原值与新值，可追溯或人工回滚；
+3. 规范化后的行读取时直接 json.loads，不再经过兼容解析。
+"""
+
+import time
+from typing import Any, Dict, List, Optional
+
+from .case_db import case_db
+from .case_format import FORMAT_VERSION, normalize_row
+from .coverage_db import coverage_db
+from .db_base import DatabaseBase
+from .duplicate_db import duplicate_db, fingerprint, step_texts
+
+FIELDS = ("steps", "test_data")
+
+
+class CaseNormalizeDB(DatabaseBase):
+    """历史用例数据规范化操作类"""
+
+    def pending_count(self) -> int:
+        """尚未规范化的用例数量"""
+        return self.execute_query("SELECT COUNT(*) AS n FROM test_cases WHERE format_version < ?",
+                                  (FORMAT_VERSION,))[0]['n']
+
+    def get_run(self, run_id: int = None) -> Optional[Dict[str, Any]]:
+        """
+        获取任务记录
+
+        :param run_id: 任务ID (为空时取最近一次)
+        :return: 任务记录 (没有时返回 None)
+        """
+        if run_id is None:
+            rows = self.execute_query("SELECT * FROM case_normalize_runs ORDER BY id DESC LIMIT 1")
+        else:
+            rows = self.execute_query("SELECT * FROM case_normalize_runs WHERE id = ?", (run_id,))
+        return rows[0] if rows else None
+
+    def start_run(self) -> Dict[str, Any]:
+        """
+        开始任务：最近一次任务未完成 (中断/停止) 时从其断点继续，否则新建任务
+
+        :return: 任务记录
+        """
+        last = self.get_run()
+        if last and last['status'] in ("running", "stopped", "failed"):
+            # 停止期间可能有新的旧格式数据写入，总数按 已扫描 + 当前待处理 重新计算
+            self.execute_update("""UPDATE case_normalize_runs SET status = 'running', error = NULL, total = scanned + ?,
+                                   updated_at = CURRENT_TIMESTAMP WHERE id = ?""", (self.pending_count(), last['id']))
+            return self.get_run(last['id'])
+        run_id = self.execute_insert("INSERT INTO case_normalize_runs (target_version, total) VALUES (?, ?)",
+                                     (FORMAT_VERSION, self.pending_count()))
+        return self.get_run(run_id)
+
+    def finish_run(self, run_id: int, status: str, error: str = None):
+        """
+        结束任务
+
+        :param status: done / stopped / failed
+        :param error: 失败原因
+        """
+        self.execute_update("""UPDATE case_normalize_runs SET status = ?, error = ?, updated_at = CURRENT_TIMESTAMP,
+                               finished_at = CASE WHEN ? = 'done' THEN CURRENT_TIMESTAMP END WHERE id = ?""",
+                            (status, error, status, run_id))
+
+    def normalize_batch(self, run_id: int, batch_size: int = 500) -> Dict[str, int]:
+        """
+        规范化一批用例 (断点之后、版本落后的行)
+
+        :param run_id: 任务ID
+        :param batch_size: 每批行数
+        :return: {"scanned": 本批行数, "changed": 内容有改动的行数, "last_id": 新断点}
+        """
+        touched_reqs, changed_ids = set(), []
+        with self.get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            last_id = conn.execute("SELECT last_id FROM case_normalize_runs WHERE id = ?", (run_id,)).fetchone()[0]
+            rows = conn.execute("""SELECT id, requirement_id, case_title, steps, test_data FROM test_cases
+                                   WHERE id > ? AND format_version < ? ORDER BY id LIMIT ?""",
+                                (last_id, FORMAT_VERSION, batch_size)).fetchall()
+            if not rows:
+                conn.rollback()
+                return {"scanned": 0, "changed": 0, "last_id": last_id}
+
+            updates, audits, changed = [], [], 0
+            for row in rows:
+                fixed = normalize_row(row['steps'], row['test_data'])
+                diffs = [(field, row[field], fixed[field]) for field in FIELDS if row[field] != fixed[field]]
+                updates.append((fixed['steps'], fixed['test_data'], FORMAT_VERSION, row['id']))
+                audits.extend((run_id, row['id'], field, old, new) for field, old, new in diffs)
+                if diffs:
+                    changed += 1
+                    changed_ids.append(row['id'])
+                if row['requirement_id'] and fixed['steps'] != row['steps'] \
+                        and step_texts(fixed['steps']) != step_texts(row['steps']):
+                    # 步骤文本变化 (如纯文本拆行) 会影响近似重复指纹与覆盖分类；仅格式变化时无需重算
+                    duplicate_db.add(conn, row['id'], row['requirement_id'], fingerprint(row['case_title'], fixed['steps']))
+                    touched_reqs.add(row['requirement_id'])
+
+            conn.executemany("UPDATE test_cases SET steps = ?, test_data = ?, format_version = ? WHERE id = ?", updates)
+            conn.executemany("""INSERT INTO case_normalize_audit (run_id, case_id, field, old_value, new_value)
+                                VALUES (?, ?, ?, ?, ?)""", audits)
+            last_id = rows[-1]['id']
+            conn.execute("""UPDATE case_normalize_runs SET last_id = ?, scanned = scanned + ?, changed = changed + ?,
+                            updated_at = CURRENT_TIMESTAMP WHERE id = ?""", (last_id, len(rows), changed, run_id))
+            conn.commit()
+
+        for req_id in touched_reqs:
+            coverage_db.rebuild(req_id)
+        # 通知上下文缓存、本地知识索引等监听器按新内容刷新
+        case_db.notify_change("test_cases", changed_ids, "update")
+        return {"scanned": len(rows), "changed": changed, "last_id": last_id}
+
+    def get_audit(self, case_id: int = None, run_id: int = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        查询审计记录
+
+        :param case_id: 按用例过滤
+        :param run_id: 按任务过滤
+        :param limit: 最多返回条数
+        :return: 审计记录列表 (最新在前)
+        """
+        where, params = ["1=1"], []
+        if case_id is not None:
+            where.append("case_id = ?")
+            params.append(case_id)
+        if run_id is not None:
+            where.append("run_id = ?")
+            params.append(run_id)
+        return self.execute_query(f"SELECT * FROM case_normalize_audit WHERE {' AND '.join(where)} "
+                                  f"ORDER BY id DESC LIMIT ?", tuple(params) + (limit,))
+
+    def run(self, batch_size: int = 500, max_batches: int = None, should_stop=None,
+            on_progress=None) -> Dict[str, Any]:
+        """
+        同步执行规范化任务直到完成 (后台线程与命令行共用)
+
+        :param batch_size: 每批行数
+        :param max_batches: 最多执行的批数 (为空时不限制，用于分段执行)
+        :param should_stop: callable() -> bool，返回 True 时在批次之间停止
+        :param on_progress: callable(进度字典)，每批完成后回调
+        :return: 任务记录
+        """
+        run = self.start_run()
+        start, scanned, batches = time.perf_counter(), 0, 0
+        try:
+            while True:
+                if (should_stop and should_stop()) or (max_batches is not None and batches >= max_batches):
+                    self.finish_run(run['id'], "stopped")
+                    break
+                result = self.normalize_batch(run['id'], batch_size)
+                if not result['scanned']:
+                    self.finish_run(run['id'], "done")
+                    break
+                scanned += result['scanned']
+                batches += 1
+                if on_progress:
+                    elapsed = time.perf_counter() - start
+                    on_progress({"run_id": run['id'], "scanned": scanned, "last_id": result['last_id'],
+                                 "rows_per_sec": round(scanned / elapsed, 1) if elapsed else None})
+        except Exception as e:
+            self.finish_run(run['id'], "failed", str(e))
+            raise
+        return self.get_run(run['id'])
+
+
+# 实例化全局对象
+case_normalize_db = CaseNormalizeDB()
@@ -5,7 +5,8 @@
 负责提示词 (Prompts) 的增删改查，支持按领域和类型筛选。
 """
 
-from typing import Dict, Any, List
+import threading
+from typing import Dict, Any, List, Callable
 
 from .db_base import DatabaseBase
 
@@ -14,7 +15,18 @@ class PromptDB(DatabaseBase):
     """
     提示词数据库操作类
     继承自 DatabaseBase
+    按 ID 读取的提示词会缓存在进程内，更新/删除时自动失效，
+    并通知已注册的监听器 (如 PromptManager 的编译缓存) 一起失效。
     """
+
+    def __init__(self):
+        """初始化提示词行缓存"""
+        super().__init__()
+        self._cache: Dict[int, Dict[str, Any]] = {}
+        self._cache_lock = threading.Lock()
+        self._generations: Dict[int, int] = {}  # prompt_id -> 失效次数，读库期间发生失效时不写入缓存
+        self._listeners: List[Callable[[int], None]] = []
+        self._cache_stats = {"hits": 0, "misses": 0, "invalidations": 0}
     
     def create_table(self):
         """
@@ -69,9 +81,62 @@ class PromptDB(DatabaseBase):
         :param prompt_id: 提示词 ID
         :return: 提示词详情字典
         """
+        with self._cache_lock:
+            cached = self._cache.get(prompt_id)
+            if cached is not None:
+                self._cache_stats["hits"] += 1
+                return dict(cached)
+            self._cache_stats["misses"] += 1
+            generation = self._generations.get(prompt_id, 0)
+
         sql = "SELECT * FROM prompts WHERE id = ?"
         rows = self.execute_query(sql, (prompt_id,))
-        return rows[0] if rows else None
+        if not rows:
+            return None
+
+        with self._cache_lock:
+            # 读库期间提示词被更新/删除时，读到的可能是旧行，不写入缓存
+            if self._generations.get(prompt_id, 0) == generation:
+                self._cache[prompt_id] = rows[0]
+        return dict(rows[0])
+
+    def add_invalidation_listener(self, callback: Callable[[int], None]):
+        """
+        注册缓存失效监听器
+        提示词被更新或删除时，会以 prompt_id 回调监听器
+
+        :param callback: 回调函数，参数为提示词 ID
+        """
+        self._listeners.append(callback)
+
+    def invalidate_cache(self, prompt_id: int):
+        """
+        使指定提示词的缓存失效，并通知所有监听器
+
+        :param prompt_id: 提示词 ID
+        """
+        with self._cache_lock:
+            self._cache.pop(prompt_id, None)
+            self._generations[prompt_id] = self._generations.get(prompt_id, 0) + 1
+            self._cache_stats["invalidations"] += 1
+        for callback in self._listeners:
+            try:
+                callback(prompt_id)
+            except Exception as e:
+                print(f"⚠️ [Prompt Cache] 失效回调异常: {e}")
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        获取提示词行缓存的命中统计
+
+        :return: 包含 hits, misses, invalidations, size, hit_rate 的字典
+        """
+        with self._cache_lock:
+            stats = dict(self._cache_stats)
+            stats["size"] = len(self._cache)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
     
     def create_prompt(self, data: Dict[str, Any]):
         """
@@ -120,6 +185,7 @@ class PromptDB(DatabaseBase):
             prompt_id
         )
         rows_affected = self.execute_update(sql, params)
+        self.invalidate_cache(prompt_id)
         return rows_affected > 0
     
     def delete_prompt(self, prompt_id: int):
@@ -131,6 +197,7 @@ class PromptDB(DatabaseBase):
         """
         sql = "DELETE FROM prompts WHERE id = ?"
         rows_affected = self.execute_update(sql, (prompt_id,))
+        self.invalidate_cache(prompt_id)
         return rows_affected > 0
 
 
@@ -159,3 +226,6 @@ def update_prompt(prompt_id: int, data: Dict[str, Any]):
 
 def delete_prompt(prompt_id: int):
     return prompt_db.delete_prompt(prompt_id)
+
+def get_prompt_cache_stats():
+    return prompt_db.get_cache_stats()
@@ -11,8 +11,15 @@
 import json
 from typing import Dict, Any, List
 
-from backend.database.base import execute_page_query
+from backend.database.base import execute_keyset_query, execute_page_query
+from backend.database.count_db import list_count_db
 from backend.database.db_base import DatabaseBase
+from backend.database.search_db import search_db
+from backend.database.write_buffer import write_buffer
+
+# functional_points 上由 test_cases 触发器维护的用例计数字段 (见 init_db 迁移 v8)
+CASE_STATUS_COLUMNS = {"Draft": "draft_case_count", "Active": "active_case_count", "Deprecated": "deprecated_case_count"}
+CASE_COUNT_COLUMNS = ("case_count",) + tuple(CASE_STATUS_COLUMNS.values())
 
 
 class RequirementDB(DatabaseBase):
@@ -21,7 +28,8 @@ class RequirementDB(DatabaseBase):
     继承自 DatabaseBase
     """
     
-    def get_requirements_page(self, page=1, size=10, feature_name=None, priority=None):
+    def get_requirements_page(self, page=1, size=10, feature_name=None, priority=None, after_id=None, before_id=None,
+                              include_total=True):
         """
         分页获取功能点列表 (Functional Points)
         
@@ -29,7 +37,10 @@ class RequirementDB(DatabaseBase):
         :param size: 每页条数
         :param feature_name: 功能名称模糊查询
         :param priority: 优先级过滤
-        :return: 分页结果字典
+        :param after_id: 游标分页，取该 ID 之后 (更早创建) 的一页
+        :param before_id: 游标分页，取该 ID 之前 (更晚创建) 的一页
+        :param include_total: 是否统计总数 (优先读取维护的计数，模糊查询时为估算值)
+        :return: 分页结果字典 (total_mode 为 exact/estimated/none)
         """
         with self.get_connection() as conn:
             cursor = conn.cursor()
@@ -37,31 +48,51 @@ class RequirementDB(DatabaseBase):
             # 1. 构建动态 SQL
             where_clauses = ["1=1"]
             params = []
+            filters, like_filters = {}, []  # 供总数策略使用的等值/模糊条件
 
             if feature_name:
-                where_clauses.append("feature_name LIKE ?")
-                params.append(f"%{feature_name}%")
+                # 3 个字符及以上走全文索引，更短的词仍用 LIKE (总数估算使用不带别名的条件)
+                clause, param = search_db.text_filter("requirements", "feature_name", feature_name, alias="fp.")
+                where_clauses.append(clause)
+                params.append(param)
+                like_filters.append(search_db.text_filter("requirements", "feature_name", feature_name))
 
             if priority:
-                where_clauses.append("priority = ?")
+                where_clauses.append("fp.priority = ?")
                 params.append(priority)
+                filters['priority'] = priority
 
             where_str = " AND ".join(where_clauses)
+            count_sql = f"SELECT COUNT(*) FROM functional_points fp WHERE {where_str}"
+            counter = list_count_db.counter("functional_points", filters, like_filters, count_sql, tuple(params),
+                                            include_total)
 
             # 2. 定义 SQL 模板
-            # 关联查询 test_cases 表，统计每个功能点下的用例数量
-            base_sql = f"""
+            # 用例数量为触发器维护的 fp.case_count；关联覆盖汇总表读取分布与质量分，无需扫描 test_cases
+            select_sql = """
                 SELECT fp.*, 
-                (SELECT COUNT(*) FROM test_cases tc WHERE tc.requirement_id = fp.id) as case_count 
+                rc.status_counts, rc.category_counts, rc.quality_sum, rc.quality_count
                 FROM functional_points fp 
-                WHERE {where_str}
-                ORDER BY fp.id DESC
+                LEFT JOIN requirement_coverage rc ON rc.requirement_id = fp.id
             """
 
-            count_sql = f"SELECT COUNT(*) FROM functional_points WHERE {where_str}"
-
             # 3. 调用通用分页
-            result = execute_page_query(cursor, base_sql, count_sql, tuple(params), page, size)
+            if after_id is not None or before_id is not None:
+                result = execute_keyset_query(cursor, select_sql, where_clauses, params, size,
+                                              after_id, before_id, id_column="fp.id", counter=counter)
+            else:
+                base_sql = f"{select_sql} WHERE {where_str} ORDER BY fp.id DESC"
+                result = execute_page_query(cursor, base_sql, count_sql, tuple(params), page, size, counter)
+
+            # 4. 解析覆盖分布
+            for item in result['items']:
+                status_counts = json.loads(item.pop('status_counts') or '{}')
+                quality_sum, quality_count = item.pop('quality_sum'), item.pop('quality_count')
+                item['coverage'] = {
+                    "status_counts": status_counts,
+                    "category_counts": json.loads(item.pop('category_counts') or '{}'),
+                    "quality_avg": round(quality_sum / quality_count, 4) if quality_count else None
+                }
 
             return result
     
@@ -97,6 +128,7 @@ class RequirementDB(DatabaseBase):
                 data.get('source_content', '')  # 记录原始需求
             )
             new_id = self.execute_insert(sql, params)
+            self.notify_change("functional_points", [new_id], "insert")
             return f"ID: {new_id}"
         except Exception as e:
             return f"Error: {str(e)}"
@@ -154,13 +186,16 @@ class RequirementDB(DatabaseBase):
                 actual_data.get('review_comments', ''),
                 src_content
             )
-            new_id = self.execute_insert(sql, params)
+            # 并发分析任务的写入由写入缓冲合并提交
+            new_id = write_buffer.submit(lambda conn: conn.execute(sql, params).lastrowid)
+            self.notify_change("requirement_breakdown", [new_id], "insert")
             return f"ID: {new_id}"
         except Exception as e:
             print(f"❌ Save Error: {e}")
             return f"Error: {str(e)}"
     
-    def get_breakdown_page(self, page=1, size=10, project_id=None, feature_name=None, status=None):
+    def get_breakdown_page(self, page=1, size=10, project_id=None, feature_name=None, status=None,
+                           after_id=None, before_id=None, include_total=True):
         """
         分页查询需求拆解项 (供前端 ProTable 使用)
         
@@ -169,31 +204,45 @@ class RequirementDB(DatabaseBase):
         :param project_id: 项目ID过滤
         :param feature_name: 功能名称模糊查询
         :param status: 评审状态过滤
-        :return: 分页结果字典
+        :param after_id: 游标分页，取该 ID 之后 (更早创建) 的一页
+        :param before_id: 游标分页，取该 ID 之前 (更晚创建) 的一页
+        :param include_total: 是否统计总数 (优先读取维护的计数，模糊查询时为估算值)
+        :return: 分页结果字典 (total_mode 为 exact/estimated/none)
         """
         with self.get_connection() as conn:
             cursor = conn.cursor()
 
             where_clauses = ["1=1"]
             params = []
+            filters, like_filters = {}, []  # 供总数策略使用的等值/模糊条件
 
             if project_id:
                 where_clauses.append("project_id = ?")
                 params.append(project_id)
+                filters['project_id'] = project_id
             if feature_name:
-                where_clauses.append("feature_name LIKE ?")
-                params.append(f"%{feature_name}%")
+                clause, param = search_db.text_filter("breakdowns", "feature_name", feature_name)
+                where_clauses.append(clause)
+                params.append(param)
+                like_filters.append((clause, param))
 
             if status:
                 where_clauses.append("review_status = ?")
                 params.append(status)
+                filters['review_status'] = status
 
             where_str = " AND ".join(where_clauses)
+            count_sql = f"SELECT COUNT(*) FROM requirement_breakdown WHERE {where_str}"
+            counter = list_count_db.counter("requirement_breakdown", filters, like_filters, count_sql, tuple(params),
+                                            include_total)
+
+            if after_id is not None or before_id is not None:
+                return execute_keyset_query(cursor, "SELECT * FROM requirement_breakdown", where_clauses, params,
+                                            size, after_id, before_id, counter=counter)
 
             base_sql = f"SELECT * FROM requirement_breakdown WHERE {where_str} ORDER BY id DESC"
-            count_sql = f"SELECT COUNT(*) FROM requirement_breakdown WHERE {where_str}"
 
-            result = execute_page_query(cursor, base_sql, count_sql, tuple(params), page, size)
+            result = execute_page_query(cursor, base_sql, count_sql, tuple(params), page, size, counter)
             return result
     
     def update_breakdown_item(self, item_id: int, data: Dict[str, Any]):
@@ -222,6 +271,7 @@ class RequirementDB(DatabaseBase):
                 item_id
             )
             self.execute_update(sql, params)
+            self.notify_change("requirement_breakdown", [item_id], "update")
             return True
         except Exception as e:
             print(f"Update Error: {e}")
@@ -237,6 +287,7 @@ class RequirementDB(DatabaseBase):
         :return: 是否成功
         """
         try:
+            new_point_id = None
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 # 1. 更新当前表状态
@@ -270,10 +321,15 @@ class RequirementDB(DatabaseBase):
                             item['priority'],
                             item['source_content']
                         ))
+                        new_point_id = cursor.lastrowid
                         print(f"✅ [Sync] 拆解项 ID {item_id} 已同步至功能点库")
                 
                 conn.commit()
-                return True
+
+            self.notify_change("requirement_breakdown", [item_id], "update")
+            if new_point_id:
+                self.notify_change("functional_points", [new_point_id], "insert")
+            return True
         except Exception as e:
             print(f"Status Update Error: {e}")
             return False
@@ -308,6 +364,40 @@ class RequirementDB(DatabaseBase):
         rows = self.execute_query(sql, tuple(item_ids))
         return rows
 
+    @staticmethod
+    def case_count_fix_sql() -> str:
+        """按 test_cases 重新统计全部功能点用例计数的语句 (一致性修复使用)"""
+        status_sums = ", ".join(f"COALESCE(SUM(status IS '{status}'), 0)" for status in CASE_STATUS_COLUMNS)
+        return f"""
+            UPDATE functional_points SET ({', '.join(CASE_COUNT_COLUMNS)}) =
+                (SELECT COUNT(*), {status_sums} FROM test_cases WHERE requirement_id = functional_points.id)
+        """
+
+    def check_case_counts(self, fix: bool = False) -> List[Dict[str, Any]]:
+        """
+        检查功能点用例计数与 test_cases 实际数据是否一致
+
+        :param fix: 发现不一致时是否重新统计修复
+        :return: 不一致列表 [{"requirement_id", "field", "stored", "actual"}]
+        """
+        status_sums = ", ".join(f"SUM(status IS '{status}') AS {column}"
+                                for status, column in CASE_STATUS_COLUMNS.items())
+        rows = self.execute_query(f"""
+            SELECT fp.id, {', '.join(f'fp.{column}' for column in CASE_COUNT_COLUMNS)},
+                   {', '.join(f'COALESCE(c.{column}, 0) AS actual_{column}' for column in CASE_COUNT_COLUMNS)}
+            FROM functional_points fp
+            LEFT JOIN (SELECT requirement_id, COUNT(*) AS case_count, {status_sums}
+                       FROM test_cases GROUP BY requirement_id) c ON c.requirement_id = fp.id
+            WHERE {' OR '.join(f'fp.{column} IS NOT COALESCE(c.{column}, 0)' for column in CASE_COUNT_COLUMNS)}
+        """)
+        mismatches = [{"requirement_id": row['id'], "field": column, "stored": row[column],
+                       "actual": row[f'actual_{column}']}
+                      for row in rows for column in CASE_COUNT_COLUMNS if row[column] != row[f'actual_{column}']]
+        if mismatches and fix:
+            self.execute_update(self.case_count_fix_sql())
+        return mismatches
+
+
 # 实例化并导出方法，供外部直接调用
 requirement_db = RequirementDB()
 get_batch_functional_points = requirement_db.get_batch_functional_points
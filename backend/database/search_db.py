@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+全文检索 (SQLite FTS5 trigram)
+用例、功能点、需求拆解项各建一张 FTS5 索引表 (rowid = 原表 id)，由触发器在增删改时同步维护：
+1. trigram 分词按任意 3 个字符切分，中文无需分词器，MATCH 短语即子串匹配，语义与 LIKE '%词%' 一致；
+2. 不足 3 个字符的词 trigram 无法命中，自动退回 LIKE (在索引表上逐行比较)；
+3. 用例步骤存为 JSON，入索引前抽取 action / expected 文本，避免 JSON 键名参与匹配；
+4. 排序使用 bm25 (标题权重最高)，高亮在返回前统一处理，两种匹配方式结果格式一致。
+"""
+
+import html
+from typing import Any, Dict, List, Optional, Tuple
+
+from .db_base import DatabaseBase
+
+HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE = "<mark>", "</mark>"
+MIN_MATCH_LEN = 3  # trigram 可检索的最短字符数
+
+
+def _json_text(column: str) -> str:
+    """
+    生成从 JSON 数组中抽取纯文本的 SQL 表达式
+    对象元素取 action / expected (用例步骤)，其它元素取原值；非 JSON 数组时返回原文本
+    """
+    return (f"CASE WHEN json_valid({column}) AND json_type({column}) = 'array' THEN "
+            f"(SELECT group_concat(CASE type WHEN 'object' THEN "
+            f"trim(COALESCE(json_extract(value, '$.action'), '') || ' ' || COALESCE(json_extract(value, '$.expected'), '')) "
+            f"ELSE value END, char(10)) FROM json_each({column})) "
+            f"ELSE {column} END")
+
+
+# 检索范围 -> 原表、索引表、索引列 {列名: 取值表达式 (以 {p} 作为 NEW./OLD. 前缀)}、
+# 索引列依赖的原表字段 (UPDATE OF 触发条件)、bm25 权重、可用的等值过滤与返回字段
+# 索引表与触发器由迁移 v9 按此定义的快照创建，修改索引列或来源字段后需在 init_db.MIGRATIONS 追加新迁移
+SEARCH_SCOPES = {
+    "cases": {
+        "table": "test_cases",
+        "fts": "test_cases_fts",
+        "columns": {"case_title": "{p}case_title", "steps_text": _json_text("{p}steps"),
+                    "expected_result": "{p}expected_result"},
+        "sources": ["case_title", "steps", "expected_result"],
+        "weights": (10.0, 1.0, 3.0),
+        "filters": {"req_id": "requirement_id", "status": "status"},
+        "fields": ["id", "requirement_id", "case_title", "priority", "status"],
+    },
+    "requirements": {
+        "table": "functional_points",
+        "fts": "functional_points_fts",
+        "columns": {"feature_name": "{p}feature_name", "description": "{p}description"},
+        "sources": ["feature_name", "description"],
+        "weights": (10.0, 2.0),
+        "filters": {"project_id": "project_id", "priority": "priority"},
+        "fields": ["id", "project_id", "module_name", "feature_name", "priority"],
+    },
+    "breakdowns": {
+        "table": "requirement_breakdown",
+        "fts": "requirement_breakdown_fts",
+        "columns": {"feature_name": "{p}feature_name", "description": "{p}description",
+                    "acceptance_criteria": _json_text("{p}acceptance_criteria")},
+        "sources": ["feature_name", "description", "acceptance_criteria"],
+        "weights": (10.0, 2.0, 1.0),
+        "filters": {"project_id": "project_id", "status": "review_status"},
+        "fields": ["id", "project_id", "module_name", "feature_name", "priority", "review_status"],
+    },
+}
+
+
+def _values_sql(scope: Dict[str, Any], prefix: str) -> str:
+    return ", ".join(expr.replace("{p}", prefix) for expr in scope['columns'].values())
+
+
+def fts_phrase(text: str) -> str:
+    """把用户输入转为 FTS5 短语 (双引号包裹并转义，避免 AND / OR / * 等被当作查询语法)"""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def split_terms(query: str) -> Tuple[List[str], List[str]]:
+    """
+    按空白切分检索词
+
+    :param query: 用户输入
+    :return: (可走 FTS 的词, 不足 3 个字符需退回 LIKE 的词)
+    """
+    terms = list(dict.fromkeys(term for term in (query or "").split() if term))
+    return ([term for term in terms if len(term) >= MIN_MATCH_LEN],
+            [term for term in terms if len(term) < MIN_MATCH_LEN])
+
+
+def highlight(text: Optional[str], terms: List[str], width: int = 60) -> Optional[str]:
+    """
+    高亮命中词并截取片段 (HTML 转义后用 <mark> 包裹，大小写不敏感)
+
+    :param text: 原文
+    :param terms: 检索词
+    :param width: 命中位置前后保留的字符数 (为 0 时不截取)
+    :return: 高亮后的片段 (未命中时返回 None)
+    """
+    if not text:
+        return None
+    lower = text.lower()
+    spans = []
+    for term in terms:
+        start = lower.find(term.lower())
+        while start >= 0:
+            spans.append((start, start + len(term)))
+            start = lower.find(term.lower(), start + len(term))
+    if not spans:
+        return None
+
+    # 合并重叠区间
+    spans.sort()
+    merged = [list(spans[0])]
+    for start, end in spans[1:]:
+        if start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    lo, hi = 0, len(text)
+    if width and len(text) > width * 2:
+        lo, hi = max(0, merged[0][0] - width), min(len(text), merged[0][1] + width)
+    parts, pos = ["…" if lo > 0 else ""], lo
+    for start, end in merged:
+        if start >= hi:
+            break
+        parts.append(html.escape(text[pos:start]))
+        parts.append(HIGHLIGHT_OPEN + html.escape(text[start:min(end, hi)]) + HIGHLIGHT_CLOSE)
+        pos = min(end, hi)
+    parts.append(html.escape(text[pos:hi]))
+    parts.append("…" if hi < len(text) else "")
+    return "".join(parts)
+
+
+class SearchDB(DatabaseBase):
+    """全文检索操作类"""
+
+    @staticmethod
+    def trigger_sql(scope_name: str) -> List[str]:
+        """
+        生成同步索引的触发器语句
+
+        :param scope_name: 检索范围 (cases / requirements / breakdowns)
+        :return: SQL 语句列表
+        """
+        scope = SEARCH_SCOPES[scope_name]
+        table, fts = scope['table'], scope['fts']
+        columns = ", ".join(scope['columns'])
+        insert = f"INSERT INTO {fts} (rowid, {columns}) VALUES (NEW.id, {_values_sql(scope, 'NEW.')});"
+        delete = f"DELETE FROM {fts} WHERE rowid = OLD.id;"
+        return [
+            f"DROP TRIGGER IF EXISTS trg_{table}_fts_insert",
+            f"DROP TRIGGER IF EXISTS trg_{table}_fts_delete",
+            f"DROP TRIGGER IF EXISTS trg_{table}_fts_update",
+            f"CREATE TRIGGER trg_{table}_fts_insert AFTER INSERT ON {table} BEGIN {insert} END",
+            f"CREATE TRIGGER trg_{table}_fts_delete AFTER DELETE ON {table} BEGIN {delete} END",
+            f"CREATE TRIGGER trg_{table}_fts_update AFTER UPDATE OF {', '.join(scope['sources'])} ON {table} "
+            f"BEGIN {delete} {insert} END",
+        ]
+
+    @staticmethod
+    def rebuild_sql(scope_name: str) -> List[str]:
+        """生成从原表重建索引的语句"""
+        scope = SEARCH_SCOPES[scope_name]
+        return [
+            f"DELETE FROM {scope['fts']}",
+            f"INSERT INTO {scope['fts']} (rowid, {', '.join(scope['columns'])}) "
+            f"SELECT id, {_values_sql(scope, '')} FROM {scope['table']}",
+        ]
+
+    def rebuild(self, scope_name: str = None) -> int:
+        """
+        从原表重建索引 (修复手工改库等导致的偏差)
+
+        :param scope_name: 检索范围 (为空时重建全部)
+        :return: 重建的索引数量
+        """
+        names = [scope_name] if scope_name else list(SEARCH_SCOPES)
+        with self.get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for name in names:
+                for sql in self.rebuild_sql(name):
+                    conn.execute(sql)
+            conn.commit()
+        return len(names)
+
+    def check(self, fix: bool = False) -> List[Dict[str, Any]]:
+        """
+        检查索引行与原表是否一一对应
+
+        :param fix: 发现不一致时是否重建对应索引
+        :return: 不一致列表 [{"table", "missing", "orphaned"}]
+        """
+        mismatches = []
+        for name, scope in SEARCH_SCOPES.items():
+            table, fts = scope['table'], scope['fts']
+            missing = self.execute_query(
+                f"SELECT COUNT(*) AS n FROM {table} WHERE id NOT IN (SELECT rowid FROM {fts})")[0]['n']
+            orphaned = self.execute_query(
+                f"SELECT COUNT(*) AS n FROM {fts} WHERE rowid NOT IN (SELECT id FROM {table})")[0]['n']
+            if missing or orphaned:
+                mismatches.append({"table": fts, "missing": missing, "orphaned": orphaned})
+                if fix:
+                    self.rebuild(name)
+        return mismatches
+
+    @staticmethod
+    def text_filter(scope_name: str, column: str, text: str, alias: str = "") -> Tuple[str, Any]:
+        """
+        生成列表页的模糊过滤条件 (替代 column LIKE '%text%')
+        3 个字符及以上走索引表的列限定短语匹配，更短的词保留 LIKE
+
+        :param scope_name: 检索范围
+        :param column: 索引列 (同时是原表字段名)
+        :param text: 用户输入
+        :param alias: 原表别名前缀 (如 "fp.")
+        :return: (条件 SQL, 参数)
+        """
+        fts = SEARCH_SCOPES[scope_name]['fts']
+        if len(text) < MIN_MATCH_LEN:
+            return f"{alias}{column} LIKE ?", f"%{text}%"
+        return f"{alias}id IN (SELECT rowid FROM {fts} WHERE {fts} MATCH ?)", f"{column} : {fts_phrase(text)}"
+
+    def search(self, scope_name: str, query: str, page: int = 1, size: int = 20,
+               **filters) -> Dict[str, Any]:
+        """
+        全文检索 (多个词之间为 AND 关系)
+
+        :param scope_name: 检索范围 (cases / requirements / breakdowns)
+        :param query: 检索词，空格分隔
+        :param page: 页码
+        :param size: 每页条数
+        :param filters: 等值过滤 (见 SEARCH_SCOPES[...]['filters'])
+        :return: {"items", "page", "size", "has_more", "mode"}；
+                 items 含 score (bm25，越小越相关) 与 highlights {列名: 高亮片段}
+        """
+        scope = SEARCH_SCOPES[scope_name]
+        table, fts, columns = scope['table'], scope['fts'], list(scope['columns'])
+        fts_terms, short_terms = split_terms(query)
+        if not fts_terms and not short_terms:
+            return {"items": [], "page": page, "size": size, "has_more": False, "mode": "none"}
+
+        where_clauses, params = [], []
+        if fts_terms:
+            where_clauses.append(f"{fts} MATCH ?")
+            params.append(" AND ".join(fts_phrase(term) for term in fts_terms))
+        for term in short_terms:
+            where_clauses.append("(" + " OR ".join(f"{fts}.{column} LIKE ?" for column in columns) + ")")
+            params.extend([f"%{term}%"] * len(columns))
+        for key, value in filters.items():
+            if value is None or value == "":
+                continue
+            if key not in scope['filters']:
+                raise ValueError(f"不支持的过滤条件: {key}")
+            where_clauses.append(f"t.{scope['filters'][key]} = ?")
+            params.append(value)
+
+        # 有 FTS 条件时按 bm25 排序；只有短词时无法计算相关度，按最新排序
+        if fts_terms:
+            score_sql = f"bm25({fts}, {', '.join(str(w) for w in scope['weights'])})"
+            order_sql = "score"
+        else:
+            score_sql, order_sql = "NULL", "t.id DESC"
+        sql = f"""
+            SELECT {', '.join('t.' + field for field in scope['fields'])},
+                   {', '.join(f'{fts}.{column} AS _fts_{column}' for column in columns)},
+                   {score_sql} AS score
+            FROM {fts} JOIN {table} t ON t.id = {fts}.rowid
+            WHERE {' AND '.join(where_clauses)}
+            ORDER BY {order_sql}
+            LIMIT ? OFFSET ?
+        """
+        rows = self.execute_query(sql, tuple(params) + (size + 1, (page - 1) * size))
+
+        terms = fts_terms + short_terms
+        items = []
+        for row in rows[:size]:
+            item = {field: row[field] for field in scope['fields']}
+            item['score'] = row['score']
+            item['highlights'] = {}
+            for column in columns:
+                snippet = highlight(row[f'_fts_{column}'], terms)
+                if snippet:
+                    item['highlights'][column] = snippet
+            items.append(item)
+        return {"items": items, "page": page, "size": size, "has_more": len(rows) > size,
+                "mode": "fts" if fts_terms else "like"}
+
+
+# 实例化全局对象
+search_db = SearchDB()
+
+
+# 保持向后兼容
+def search(scope_name: str, query: str, page: int = 1, size: int = 20, **filters) -> Dict[str, Any]:
+    return search_db.search(scope_name, query, page, size, **filters)
+
+
+def rebuild_search_index(scope_name: str = None) -> int:
+    return search_db.rebuild(scope_name)
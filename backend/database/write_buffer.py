@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+写入缓冲 (组提交)
+多个生成任务并发调用 save_case / save_breakdown_item 时，每次调用原本各自 BEGIN IMMEDIATE、插入、提交，
+写锁被逐条争抢。这里把各线程提交的写操作放入队列，由后台线程合并执行：
+1. 队列中第一条操作等待 write_buffer_interval_ms，或积累到 write_buffer_max_rows 条时，在一个事务内依次执行；
+2. 每条操作在独立的 SAVEPOINT 中执行，单条失败或被拒绝 (如重复用例) 只回滚自身，不影响同批其他操作；
+3. 事务提交后才唤醒调用方并返回各自的真实结果 (如新行 ID)，调用方看到的语义与逐条提交一致。
+
+用法：
+    def insert(conn):
+        return conn.execute("INSERT INTO ...", params).lastrowid
+    new_id = write_buffer.submit(insert)
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Tuple
+
+from backend.config import DB_CONFIG
+from .base import get_conn
+
+
+class WriteRejected(Exception):
+    """
+    写操作主动放弃 (如查重命中)：回滚该操作的 SAVEPOINT，并把 result 原样抛给调用方
+    """
+
+    def __init__(self, result: Any):
+        super().__init__(result)
+        self.result = result
+
+
+class WriteBuffer:
+    """
+    写入缓冲 (组提交)
+    """
+
+    def __init__(self, interval_ms: float = None, max_rows: int = None, enabled: bool = None):
+        """
+        :param interval_ms: 第一条操作入队后最多等待的毫秒数 (默认 DB_CONFIG["write_buffer_interval_ms"])
+        :param max_rows: 每批最多合并的操作数 (默认 DB_CONFIG["write_buffer_max_rows"])
+        :param enabled: 是否启用缓冲 (关闭时在调用方线程逐条提交)
+        """
+        self.interval = (DB_CONFIG["write_buffer_interval_ms"] if interval_ms is None else interval_ms) / 1000
+        self.max_rows = max_rows or DB_CONFIG["write_buffer_max_rows"]
+        self.enabled = DB_CONFIG["write_buffer_enabled"] if enabled is None else enabled
+        self._queue: List[Tuple[Callable, Future]] = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self._stats = {"submitted": 0, "batches": 0, "max_batch": 0, "rejected": 0, "failed": 0}
+
+    def submit(self, op: Callable[[Any], Any]) -> Any:
+        """
+        提交写操作并等待其所在事务提交
+
+        :param op: callable(conn) -> 结果，在事务内执行 (不要自行 commit/rollback)
+        :return: op 的返回值 (op 抛出的异常，包括 WriteRejected，在提交后原样抛出)
+        """
+        future = Future()
+        with self._cond:
+            self._stats["submitted"] += 1
+            if self.enabled:
+                if self._thread is None or not self._thread.is_alive():
+                    self._stopping = False
+                    self._thread = threading.Thread(target=self._worker, name="db-write-buffer", daemon=True)
+                    self._thread.start()
+                self._queue.append((op, future))
+                if len(self._queue) == 1 or len(self._queue) >= self.max_rows:
+                    self._cond.notify()
+        if not self.enabled:
+            self._flush([(op, future)])
+        return future.result()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopping:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                # 第一条操作入队后等待一个间隔，期间其他任务的写入合并进同一批
+                deadline = time.monotonic() + self.interval
+                while len(self._queue) < self.max_rows and not self._stopping:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, self._queue = self._queue[:self.max_rows], self._queue[self.max_rows:]
+            self._flush(batch)
+
+    def _flush(self, batch: List[Tuple[Callable, Future]]):
+        """在一个事务内执行一批写操作，提交后设置各自的结果"""
+        outcomes = []
+        try:
+            with get_conn() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                for op, _ in batch:
+                    conn.execute("SAVEPOINT buffered_write")
+                    try:
+                        outcomes.append((True, op(conn)))
+                        conn.execute("RELEASE buffered_write")
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO buffered_write")
+                        conn.execute("RELEASE buffered_write")
+                        outcomes.append((False, e))
+                conn.commit()
+        except Exception as e:
+            # 事务本身失败 (如获取写锁超时)：整批操作均未生效
+            with self._cond:
+                self._stats["failed"] += len(batch)
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        with self._cond:
+            self._stats["batches"] += 1
+            self._stats["max_batch"] = max(self._stats["max_batch"], len(batch))
+            self._stats["rejected"] += sum(1 for _, value in outcomes if isinstance(value, WriteRejected))
+            self._stats["failed"] += sum(1 for ok, value in outcomes if not ok
+                                         and not isinstance(value, WriteRejected))
+        for (_, future), (ok, value) in zip(batch, outcomes):
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def stop(self, timeout: float = 5):
+        """写完队列中剩余的操作后停止后台线程 (服务停止时调用)"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """缓冲统计 (提交数、批次数、最大/平均批大小、被拒绝与失败数)"""
+        with self._cond:
+            stats = {**self._stats, "pending": len(self._queue), "enabled": self.enabled,
+                     "interval_ms": self.interval * 1000, "max_rows": self.max_rows}
+        stats["avg_batch"] = round(stats["submitted"] / stats["batches"], 2) if stats["batches"] else None
+        return stats
+
+
+# 实例化全局对象
+write_buffer = WriteBuffer()
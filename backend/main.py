@@ -12,6 +12,10 @@ import traceback
 from backend.api import api_router
 # 引入数据库初始化
 from backend.database import init_db
+from backend.database.async_db import shutdown_db_executor
+from backend.database.write_buffer import write_buffer
+from backend.config import SYSTEM_CONFIG
+from backend.services import normalize_service
 
 
 # 自定义错误响应模型
@@ -34,7 +38,16 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"❌ 数据库初始化失败: {e}")
         raise e
+    # 存在未规范化的历史用例时在后台分批改写，不阻塞启动
+    if SYSTEM_CONFIG["normalize_on_startup"] and normalize_service.status()["pending"]:
+        normalize_service.start()
+        print("🧹 历史用例规范化任务已在后台启动")
     yield
+    normalize_service.stop(wait=5)
+    # 写完写入缓冲中尚未提交的用例/拆解项
+    write_buffer.stop()
+    # 先等数据库线程池中的任务结束，再关闭各线程复用的数据库连接 (WAL 模式下最后一个连接关闭时会合并 -wal 文件)
+    shutdown_db_executor()
     print("🛑 系统关闭")
 
 
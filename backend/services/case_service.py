@@ -22,6 +22,7 @@ from backend.agents.case_agent import run_case_generation_stream, run_batch_func
 from backend.database.case_db import (
     CaseDB, get_existing_case_titles
 )
+from backend.database.duplicate_db import duplicate_db
 from backend.utils.stream_utils import format_sse
 
 # 实例化数据库操作对象
@@ -174,7 +175,28 @@ class CaseService:
         """
         return case_db.save_case(case_data)
     
-    def get_cases(self, page: int = 1, size: int = 10, req_id: int = None, title: str = None, status: str = None):
+    def find_duplicates(self, project_id: int = None, req_id: int = None, threshold: float = None) -> Dict[str, Any]:
+        """
+        近似重复用例报告
+        
+        :param project_id: 项目ID过滤
+        :param req_id: 需求ID过滤
+        :param threshold: 标题相似度阈值 (为空时使用系统配置)
+        :return: 重复组报告
+        """
+        return duplicate_db.find_duplicates(project_id=project_id, req_id=req_id, threshold=threshold)
+    
+    def rebuild_duplicate_index(self, req_id: int = None) -> int:
+        """
+        重建用例近似重复索引
+        
+        :param req_id: 需求ID，为空时重建全部
+        :return: 写入指纹的用例数量
+        """
+        return duplicate_db.rebuild(req_id)
+    
+    def get_cases(self, page: int = 1, size: int = 10, req_id: int = None, title: str = None, status: str = None,
+                  after_id: int = None, before_id: int = None, include_total: bool = True):
         """
         分页查询测试用例
         
@@ -183,9 +205,13 @@ class CaseService:
         :param req_id: 需求ID过滤
         :param title: 标题模糊查询
         :param status: 状态过滤
-        :return: 分页结果
+        :param after_id: 游标分页，取该 ID 之后的一页 (传入时忽略 page)
+        :param before_id: 游标分页，取该 ID 之前的一页
+        :param include_total: 是否统计总数 (无限滚动可传 False)
+        :return: 分页结果 (含 next_cursor / prev_cursor / total_mode)
         """
-        return case_db.get_cases_page(page, size, req_id=req_id, title=title, status=status)
+        return case_db.get_cases_page(page, size, req_id=req_id, title=title, status=status,
+                                      after_id=after_id, before_id=before_id, include_total=include_total)
     
     def batch_update_case_status(self, ids: List[int], status: str) -> bool:
         """
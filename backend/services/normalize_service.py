@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+历史用例数据规范化服务
+在后台守护线程中分批执行 CaseNormalizeDB.run，提供启动、停止与进度查询 (已处理行数、吞吐、预计剩余时间)；
+任务断点保存在数据库中，进程重启或手动停止后再次启动会从断点继续。
+
+命令行运行 (仓库根目录)：
+    python -m backend.services.normalize_service
+"""
+
+import sys
+import threading
+import time
+from typing import Any, Dict, List
+
+from backend.config import SYSTEM_CONFIG
+from backend.database.normalize_db import case_normalize_db
+
+
+class NormalizeService:
+    """历史用例数据规范化服务类"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._progress: Dict[str, Any] = {}
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, batch_size: int = None) -> Dict[str, Any]:
+        """
+        在后台启动规范化任务 (已在运行时直接返回当前进度)
+
+        :param batch_size: 每批行数 (默认 normalize_batch_size)
+        :return: 任务进度
+        """
+        with self._lock:
+            if not self.is_running():
+                self._stop.clear()
+                self._progress = {}
+                self._thread = threading.Thread(target=self._worker, args=(batch_size,),
+                                                name="case-normalize", daemon=True)
+                self._thread.start()
+        return self.status()
+
+    def stop(self, wait: float = None) -> Dict[str, Any]:
+        """
+        请求停止任务 (当前批次完成后停止，断点已保存)
+
+        :param wait: 等待线程退出的秒数
+        :return: 任务进度
+        """
+        self._stop.set()
+        if wait and self._thread:
+            self._thread.join(wait)
+        return self.status()
+
+    def _worker(self, batch_size: int = None):
+        batch_size = batch_size or SYSTEM_CONFIG["normalize_batch_size"]
+        pause = SYSTEM_CONFIG["normalize_batch_pause"]
+
+        def should_stop():
+            # 批次之间短暂休眠，把写锁让给在线请求
+            return self._stop.wait(pause) if pause else self._stop.is_set()
+
+        try:
+            run = case_normalize_db.run(batch_size, should_stop=should_stop, on_progress=self._progress.update)
+            print(f"✅ [Normalize] 任务 {run['id']} {run['status']}: 处理 {run['scanned']} 条，改写 {run['changed']} 条")
+        except Exception as e:
+            print(f"❌ [Normalize] 规范化任务失败: {e}")
+
+    def get_audit(self, case_id: int = None, run_id: int = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """查询审计记录 (见 CaseNormalizeDB.get_audit)"""
+        return case_normalize_db.get_audit(case_id, run_id, limit)
+
+    def status(self) -> Dict[str, Any]:
+        """
+        任务进度
+
+        :return: {"running", "pending", "run" (数据库中的任务记录), "rows_per_sec", "eta_seconds"}
+        """
+        pending = case_normalize_db.pending_count()
+        rate = self._progress.get('rows_per_sec')
+        return {
+            "running": self.is_running(),
+            "pending": pending,
+            "run": case_normalize_db.get_run(),
+            "rows_per_sec": rate,
+            "eta_seconds": round(pending / rate, 1) if rate and self.is_running() else None,
+        }
+
+
+def main() -> int:
+    from backend.database import init_db
+    init_db.init_tables()
+
+    start = time.perf_counter()
+
+    def report(progress):
+        print(f"   -> 已处理 {progress['scanned']} 条 (断点 ID {progress['last_id']}，{progress['rows_per_sec']} 行/秒)")
+
+    run = case_normalize_db.run(SYSTEM_CONFIG["normalize_batch_size"], on_progress=report)
+    print(f"✅ [Normalize] 任务 {run['id']} {run['status']}: 处理 {run['scanned']} 条，改写 {run['changed']} 条，"
+          f"耗时 {time.perf_counter() - start:.1f}s")
+    return 0 if run['status'] == "done" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
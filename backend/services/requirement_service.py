@@ -24,6 +24,7 @@ from backend.database.requirement_db import (
     save_breakdown_item, get_breakdown_page, update_breakdown_item,
     update_breakdown_status, get_batch_breakdown_items, get_batch_functional_points
 )
+from backend.database.coverage_db import get_coverage, rebuild_coverage
 from backend.utils.stream_utils import format_sse
 
 
@@ -97,7 +98,8 @@ class RequirementService:
                 print(f"Error in queue processing: {e}")
                 break
     
-    def get_requirements(self, page: int = 1, size: int = 10, feature_name: str = None, priority: str = None):
+    def get_requirements(self, page: int = 1, size: int = 10, feature_name: str = None, priority: str = None,
+                         after_id: int = None, before_id: int = None, include_total: bool = True):
         """
         分页获取功能点列表 (Functional Points)
         
@@ -105,9 +107,12 @@ class RequirementService:
         :param size: 每页大小
         :param feature_name: 功能名称模糊查询
         :param priority: 优先级过滤
-        :return: 分页结果
+        :param after_id: 游标分页，取该 ID 之后的一页 (传入时忽略 page)
+        :param before_id: 游标分页，取该 ID 之前的一页
+        :param include_total: 是否统计总数 (无限滚动可传 False)
+        :return: 分页结果 (含 next_cursor / prev_cursor / total_mode)
         """
-        return get_requirements_page(page, size, feature_name, priority)
+        return get_requirements_page(page, size, feature_name, priority, after_id, before_id, include_total)
     
     def get_requirement_by_id(self, req_id: int):
         """
@@ -137,7 +142,8 @@ class RequirementService:
         return save_breakdown_item(data)
     
     def get_breakdowns(self, page: int = 1, size: int = 10, project_id: int = None, 
-                      feature_name: str = None, status: str = None):
+                      feature_name: str = None, status: str = None, after_id: int = None, before_id: int = None,
+                      include_total: bool = True):
         """
         分页获取需求拆解项列表
         
@@ -146,9 +152,12 @@ class RequirementService:
         :param project_id: 项目ID过滤
         :param feature_name: 功能名称模糊查询
         :param status: 评审状态过滤
-        :return: 分页结果
+        :param after_id: 游标分页，取该 ID 之后的一页 (传入时忽略 page)
+        :param before_id: 游标分页，取该 ID 之前的一页
+        :param include_total: 是否统计总数 (无限滚动可传 False)
+        :return: 分页结果 (含 next_cursor / prev_cursor / total_mode)
         """
-        return get_breakdown_page(page, size, project_id, feature_name, status)
+        return get_breakdown_page(page, size, project_id, feature_name, status, after_id, before_id, include_total)
     
     def update_breakdown(self, item_id: int, data: Dict[str, Any]):
         """
@@ -188,3 +197,21 @@ class RequirementService:
         :return: 功能点列表
         """
         return get_batch_functional_points(ids)
+    
+    def get_coverage(self, req_id: int):
+        """
+        获取功能点的用例覆盖汇总
+        
+        :param req_id: 功能点 ID
+        :return: 覆盖汇总 (无用例时返回 None)
+        """
+        return get_coverage(req_id)
+    
+    def rebuild_coverage(self, req_id: int = None) -> int:
+        """
+        重建用例覆盖汇总
+        
+        :param req_id: 功能点 ID，为空时重建全部
+        :return: 重建的功能点数量
+        """
+        return rebuild_coverage(req_id)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+用例覆盖分类工具
+定义覆盖类别关键词，并使用多模式匹配器对用例 (标题 + 步骤动作) 进行分类。
+上下文管理器与覆盖汇总表共用同一套规则，保证统计口径一致。
+"""
+
+import json
+from typing import Any, Dict, Set
+
+from backend.utils.pattern_matcher import MultiPatternMatcher
+
+# 覆盖类别 -> 关键词
+COVERAGE_PATTERNS = {
+    '成功场景': ['成功', '正常', '有效'],
+    '失败场景': ['失败', '错误', '无效'],
+    '边界值测试': ['边界', '最大', '最小', '上限', '下限', '临界'],
+    '异常场景': ['异常', '超时', '中断'],
+    '安全测试': ['安全', '权限', '越权', '注入', 'xss', 'csrf'],
+    '性能测试': ['性能', '并发', '压力', '负载']
+}
+
+# 编译后的全局匹配器 (只读，可多线程共享)
+coverage_matcher = MultiPatternMatcher(COVERAGE_PATTERNS)
+
+
+def case_text(case: Dict[str, Any]) -> str:
+    """拼接用例标题与步骤动作，作为分类文本"""
+    parts = [case.get('case_title') or '']
+    steps = case.get('steps')
+    try:
+        steps = json.loads(steps) if isinstance(steps, str) else steps
+    except (TypeError, ValueError):
+        steps = [steps]
+    if isinstance(steps, list):
+        for step in steps:
+            parts.append(str(step.get('action', '')) if isinstance(step, dict) else str(step))
+    return "\n".join(parts)
+
+
+def classify_case(case: Dict[str, Any]) -> Set[str]:
+    """
+    对单条用例进行覆盖分类
+
+    :param case: 用例字典 (至少包含 case_title，可选 steps)
+    :return: 命中的覆盖类别集合
+    """
+    return coverage_matcher.labels(case_text(case))
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+MinHash 近似去重工具
+对文本做字符切片 (shingle) 后计算 MinHash 签名，并按 LSH 分段生成桶键，
+相似文本大概率落入同一个桶，从而无需两两比较即可找出候选重复项。
+"""
+
+import hashlib
+import random
+import re
+import struct
+from typing import Iterable, List, Set
+
+# 签名长度
+NUM_PERM = 128
+
+# LSH 分段：42 段 × 每段 3 行 (使用签名前 126 位)
+# 相似度 0.4 的文本至少命中一个桶的概率约 93%，相似度 0.1 约 4%
+LSH_BANDS = 42
+LSH_ROWS = 3
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# 固定种子生成哈希置换参数，保证签名跨进程、跨版本稳定 (已持久化到数据库)
+_rng = random.Random(20260101)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+_CLEAN_RE = re.compile(r'[\s\W_]+', re.UNICODE)
+
+
+def shingles(text: str, prefix: str = '') -> Set[str]:
+    """
+    字符切片：单字 + 相邻双字 (适合中文短文本，对语序调整较鲁棒)
+
+    :param text: 原始文本
+    :param prefix: 切片前缀 (区分标题/步骤等不同字段)
+    :return: 切片集合
+    """
+    cleaned = _CLEAN_RE.sub('', (text or '').lower())
+    result = {prefix + ch for ch in cleaned}
+    result.update(prefix + cleaned[i:i + 2] for i in range(len(cleaned) - 1))
+    return result
+
+
+def _base_hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=4).digest(), 'little')
+
+
+def signature(tokens: Iterable[str]) -> List[int]:
+    """
+    计算 MinHash 签名
+
+    :param tokens: 切片集合
+    :return: 长度为 NUM_PERM 的签名 (空集合返回全最大值)
+    """
+    sig = [_MAX_HASH] * NUM_PERM
+    for token in set(tokens):
+        h = _base_hash(token)
+        for i, (a, b) in enumerate(_PERMUTATIONS):
+            value = ((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH
+            if value < sig[i]:
+                sig[i] = value
+    return sig
+
+
+def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """由签名估算 Jaccard 相似度"""
+    if not sig_a or not sig_b:
+        return 0.0
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+def band_keys(sig: List[int]) -> List[int]:
+    """
+    LSH 分段桶键
+
+    :param sig: MinHash 签名
+    :return: 每个分段的桶键 (63 位整数，可直接存入 SQLite INTEGER)
+    """
+    keys = []
+    for band in range(LSH_BANDS):
+        chunk = struct.pack(f'<{LSH_ROWS}I', *sig[band * LSH_ROWS:(band + 1) * LSH_ROWS])
+        keys.append(int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), 'little') >> 1)
+    return keys
+
+
+def pack(sig: List[int]) -> bytes:
+    """签名序列化 (BLOB)"""
+    return struct.pack(f'<{NUM_PERM}I', *sig)
+
+
+def unpack(blob: bytes) -> List[int]:
+    """签名反序列化"""
+    return list(struct.unpack(f'<{NUM_PERM}I', blob))
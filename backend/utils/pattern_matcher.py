@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+多模式匹配工具
+基于 Aho-Corasick 自动机，一次扫描文本即可找出所有命中的关键词，
+用于用例覆盖分类、测试维度识别等"关键词 -> 类别"的场景。
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, Set, Tuple
+
+
+class MultiPatternMatcher:
+    """
+    Aho-Corasick 多模式匹配器
+    构建后只读，可在多线程间共享。
+    """
+
+    def __init__(self, patterns: Dict[str, Iterable[str]], ignore_case: bool = True):
+        """
+        编译关键词自动机
+
+        :param patterns: {类别: [关键词, ...]}，同一关键词可属于多个类别
+        :param ignore_case: 是否忽略大小写 (英文关键词)
+        """
+        self.ignore_case = ignore_case
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[str, str]]] = [[]]  # 状态 -> [(关键词, 类别)]
+        self.keyword_count = 0
+
+        for label, keywords in patterns.items():
+            for keyword in keywords:
+                if keyword:
+                    self._add(self._normalize(keyword), label)
+        self._build_fail_links()
+
+    def _normalize(self, text: str) -> str:
+        return text.lower() if self.ignore_case else text
+
+    def _add(self, keyword: str, label: str):
+        """插入关键词到 Trie"""
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = nxt
+        self._output[state].append((keyword, label))
+        self.keyword_count += 1
+
+    def _build_fail_links(self):
+        """BFS 构建失败指针，并合并后缀状态的输出"""
+        # 第一层状态的失败指针均指向根节点 (初始化时已为 0)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+    def find(self, text: str) -> List[Tuple[int, str, str]]:
+        """
+        查找全部命中
+
+        :param text: 待匹配文本
+        :return: [(结束位置, 关键词, 类别), ...]
+        """
+        hits = []
+        state = 0
+        for pos, ch in enumerate(self._normalize(text or '')):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for keyword, label in self._output[state]:
+                hits.append((pos, keyword, label))
+        return hits
+
+    def labels(self, text: str) -> Set[str]:
+        """
+        返回文本命中的全部类别
+
+        :param text: 待匹配文本
+        :return: 类别集合
+        """
+        return {label for _, _, label in self.find(text)}
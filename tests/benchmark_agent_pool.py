@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+Agent 团队构造开销基准测试
+模拟生产环境的并发模式 (每个请求一个线程 + 独立事件循环)，
+对比 "每次新建 Agent" 与 "Agent 池复用" 两种方式的团队构造耗时 p50/p99。
+
+运行方式 (仓库根目录)：
+    python tests/benchmark_agent_pool.py --threads 32 --rounds 20
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-key")
+
+from autogen_agentchat.conditions import TextMentionTermination
+from autogen_agentchat.teams import RoundRobinGroupChat
+
+from backend.agents.agent_pool import AgentPool, AgentTemplate, summarize_timings
+from backend.agents.case_agent import gemini_client
+from backend.agents.prompt_manager import prompt_manager
+from backend.database.case_db import save_case
+
+
+def build_fresh(target_count):
+    """每次新建：重新渲染提示词、包装工具、构造 Agent 和团队"""
+    from autogen_agentchat.agents import AssistantAgent
+    generator = AssistantAgent(
+        name="test_generator", model_client=gemini_client,
+        system_message=prompt_manager.get_prompt('generator', 'base', target_count=target_count)
+    )
+    reviewer = AssistantAgent(
+        name="test_reviewer", model_client=gemini_client, tools=[save_case],
+        system_message=prompt_manager.get_prompt('reviewer', 'base')
+    )
+    return RoundRobinGroupChat([generator, reviewer],
+                               termination_condition=TextMentionTermination("TERMINATE"), max_turns=6)
+
+
+async def build_pooled(pool, target_count):
+    """池化：模板只构建一次，Agent 实例复用"""
+    members = [
+        (("test_generator", "base", "builtin", target_count),
+         lambda: AgentTemplate("test_generator", gemini_client,
+                               prompt_manager.get_prompt('generator', 'base', target_count=target_count))),
+        (("test_reviewer", "base", "builtin", None),
+         lambda: AgentTemplate("test_reviewer", gemini_client,
+                               prompt_manager.get_prompt('reviewer', 'base'), tools=[save_case])),
+    ]
+    team, leases = await pool.build_team(members, termination_condition=TextMentionTermination("TERMINATE"),
+                                         max_turns=6)
+    pool.release_all(leases)
+    return team
+
+
+def run_load(threads, rounds, pooled):
+    """启动 threads 个线程，每个线程在自己的事件循环里构造 rounds 次团队"""
+    pool = AgentPool(max_idle_per_key=threads)
+    samples = []
+    lock = threading.Lock()
+
+    def worker():
+        async def loop():
+            for i in range(rounds):
+                start = time.perf_counter()
+                if pooled:
+                    await build_pooled(pool, 5)
+                else:
+                    build_fresh(5)
+                with lock:
+                    samples.append(time.perf_counter() - start)
+                await asyncio.sleep(0)
+        asyncio.run(loop())
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    wall_start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return summarize_timings(samples), time.perf_counter() - wall_start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"团队构造基准: {args.threads} 并发线程 x {args.rounds} 轮")
+    print("=" * 60)
+    for label, pooled in (("每次新建", False), ("Agent 池", True)):
+        stats, wall = run_load(args.threads, args.rounds, pooled)
+        print(f"{label:8s} count={stats['count']} avg={stats['avg']}ms "
+              f"p50={stats['p50']}ms p99={stats['p99']}ms max={stats['max']}ms wall={wall:.2f}s")
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+同步路由 vs 异步路由 压测
+在 uvicorn 子进程中分别启动两种服务，读取同一个临时数据库 (预置若干用例)：
+  sync  —— 旧写法，def 路由直接调用 case_db，每个请求占用 Starlette 线程池的一个线程；
+  async —— 新写法，即 backend.api 中的 async def 路由，数据库调用提交到专用数据库线程池。
+压测端用 httpx.AsyncClient 模拟 N 个并发客户端循环请求用例列表，统计 RPS、p50/p99 与失败数。
+--streams 可同时保持若干个流式连接 (同步生成器逐块 sleep，模拟 LLM 流式生成占用线程池线程)，
+Starlette 线程池默认 40 个线程，流式连接数接近或超过 40 时同步路由需要排队等线程。
+
+运行方式 (仓库根目录，使用临时数据库，不影响 backend/database/test_cases.db)：
+    python tests/benchmark_async_routes.py --clients 200 --duration 10 --cases 20000 --streams 60
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT_DIR)
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-key")
+
+from backend.agents.agent_pool import summarize_timings
+
+
+def build_app(mode: str, stream_interval: float = 1.0):
+    """构造压测服务：两种模式提供相同的列表接口与流式接口"""
+    from fastapi import FastAPI
+    from fastapi.responses import StreamingResponse
+
+    from backend.api.cases import router as cases_router
+    from backend.database.case_db import case_db
+
+    app = FastAPI()
+    if mode == "async":
+        app.include_router(cases_router, prefix="/cases")
+    else:
+        @app.get("/cases")
+        def list_cases(page: int = 1, size: int = 10):
+            return case_db.get_cases_page(page=page, size=size)
+
+    @app.get("/stream")
+    def stream():
+        def gen():
+            for i in range(1000):
+                time.sleep(stream_interval)
+                yield f"data: {i}\n\n"
+
+        return StreamingResponse(gen(), media_type="text/event-stream")
+
+    return app
+
+
+def serve(mode: str, db_file: str, port: int, stream_interval: float):
+    import uvicorn
+    from backend.database import base
+
+    base.DB_PATH = db_file
+    uvicorn.run(build_app(mode, stream_interval), host="127.0.0.1", port=port, log_level="warning")
+
+
+def seed(db_file: str, cases: int):
+    """直接批量插入用例 (跳过逐条 save_case 的去重检测以加快准备)"""
+    from backend.database import base, init_db
+    from backend.database.connection import connection_manager
+
+    base.DB_PATH = db_file
+    init_db.init_tables()
+    conn = base.get_conn()
+    steps = '[{"step_id": 1, "action": "打开首页", "expected": "加载成功"}]'
+    conn.executemany("""INSERT INTO test_cases (requirement_id, case_title, pre_condition, steps, expected_result,
+                        priority, case_type, test_data) VALUES (?, ?, '已登录', ?, '成功', 'P1', '功能', '{}')""",
+                     [(i % 200 + 1, f"压测用例 {i}", steps) for i in range(cases)])
+    conn.commit()
+    connection_manager.close_all()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_ready(client, base_url: str, timeout: float = 30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if (await client.get(f"{base_url}/cases?size=1")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("服务未能启动")
+
+
+async def hold_stream(client, base_url: str, stop: asyncio.Event):
+    try:
+        async with client.stream("GET", f"{base_url}/stream") as resp:
+            async for _ in resp.aiter_raw():
+                if stop.is_set():
+                    break
+    except Exception:
+        pass
+
+
+async def load(base_url: str, clients: int, duration: float, streams: int):
+    import httpx
+
+    limits = httpx.Limits(max_connections=clients + streams, max_keepalive_connections=clients + streams)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        await wait_ready(client, base_url)
+        stop = asyncio.Event()
+        stream_tasks = [asyncio.create_task(hold_stream(client, base_url, stop)) for _ in range(streams)]
+        await asyncio.sleep(1 if streams else 0)  # 等流式连接占住线程
+
+        samples, errors = [], 0
+        deadline = time.perf_counter() + duration
+
+        async def worker(idx):
+            nonlocal errors
+            page = idx % 50 + 1
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    resp = await client.get(f"{base_url}/cases", params={"page": page, "size": 20})
+                    resp.raise_for_status()
+                    samples.append(time.perf_counter() - start)
+                except Exception:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker(i) for i in range(clients)])
+        wall = time.perf_counter() - start
+        stop.set()
+        for task in stream_tasks:
+            task.cancel()
+        await asyncio.gather(*stream_tasks, return_exceptions=True)
+    return samples, errors, wall
+
+
+def run_mode(mode: str, db_file: str, args) -> str:
+    port = free_port()
+    proc = subprocess.Popen([sys.executable, __file__, "--serve", mode, "--db", db_file, "--port", str(port),
+                             "--stream-interval", str(args.stream_interval)],
+                            cwd=ROOT_DIR)
+    try:
+        samples, errors, wall = asyncio.run(load(f"http://127.0.0.1:{port}", args.clients, args.duration,
+                                                 args.streams))
+    finally:
+        proc.terminate()
+        proc.wait(10)
+    stats = summarize_timings(samples)
+    return (f"{mode:6s} {len(samples) / wall:8.1f} req/s  p50={stats['p50']}ms p99={stats['p99']}ms  "
+            f"失败 {errors}  请求 {len(samples)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=200, help="并发客户端数")
+    parser.add_argument("--duration", type=float, default=10, help="每种模式压测秒数")
+    parser.add_argument("--cases", type=int, default=20000, help="预置用例数")
+    parser.add_argument("--streams", type=int, default=0, help="同时保持的流式连接数")
+    parser.add_argument("--stream-interval", type=float, default=1.0, help="流式连接每块的间隔秒数")
+    parser.add_argument("--serve", choices=["sync", "async"], help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.db, args.port, args.stream_interval)
+        sys.exit(0)
+
+    print("=" * 60)
+    print(f"路由压测: {args.clients} 并发客户端 x {args.duration}s, {args.cases} 条用例, {args.streams} 个流式连接")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "test_cases.db")
+        seed(db_file, args.cases)
+        for mode in ("sync", "async"):
+            print(run_mode(mode, db_file, args))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+测试维度识别基准测试
+一次性对全部功能点语料做维度识别，对比旧实现 (逐维度 any(keyword in desc)，只有少量英文关键词)
+与数据库规则 (编译一次后整批复用，输出得分与命中证据) 的耗时和识别效果。
+
+运行方式 (仓库根目录)：
+    python tests/benchmark_dimension_rules.py             # 使用 backend/database/test_cases.db 中的功能点
+    python tests/benchmark_dimension_rules.py --synthetic 20000 --phrases 8
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-key")
+
+from backend.agents.test_dimension import dimension_manager
+from backend.database.requirement_db import requirement_db
+
+LEGACY_RULES = [
+    ('security', ['user', 'login', 'auth', 'permission']),
+    ('boundary', ['api', 'request', 'response', 'parameter']),
+    ('exception', ['api', 'request', 'response', 'parameter']),
+    ('performance', ['performance', 'speed', 'response time', 'load']),
+    ('compatibility', ['browser', 'device', 'platform', 'compatible']),
+]
+
+SYNTHETIC_PHRASES = [
+    "用户使用手机号和短信验证码登录", "管理员可配置角色权限", "订单金额不超过 50000 元", "接口超时 3 秒后重试",
+    "支持 iOS、Android 与小程序", "列表分页每页最多 100 条", "秒杀活动 1000 并发下单", "导出 Excel 报表",
+    "User can reset password via email", "API returns 400 for invalid parameter", "首页 200ms 内完成加载",
+]
+
+
+def legacy_dimensions(req):
+    desc = req.get('description', '').lower()
+    dims = ['functional']
+    for dimension, keywords in LEGACY_RULES:
+        if any(keyword in desc for keyword in keywords):
+            dims.append(dimension)
+    return dims
+
+
+def load_corpus(synthetic, phrases=3):
+    if synthetic:
+        rng = random.Random(7)
+        return [{"feature_name": f"功能 {i}", "description": "，".join(rng.sample(SYNTHETIC_PHRASES, phrases))}
+                for i in range(synthetic)]
+    return requirement_db.execute_query("SELECT feature_name, description FROM functional_points")
+
+
+def run(corpus):
+    start = time.perf_counter()
+    legacy = [legacy_dimensions(req) for req in corpus]
+    legacy_ms = (time.perf_counter() - start) * 1000
+
+    dimension_manager.get_relevant_dimensions({})  # 预编译
+    start = time.perf_counter()
+    compiled = dimension_manager.classify_batch(corpus)
+    compiled_ms = (time.perf_counter() - start) * 1000
+
+    legacy_hits = Counter(dim for dims in legacy for dim in dims if dim != 'functional')
+    compiled_hits = Counter(item['dimension'] for items in compiled for item in items if item['dimension'] != 'functional')
+    only_functional = sum(1 for dims in legacy if dims == ['functional']), \
+        sum(1 for items in compiled if len(items) == 1)
+    return legacy_ms, compiled_ms, legacy_hits, compiled_hits, only_functional
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--synthetic", type=int, default=0, help="生成 N 条合成需求代替数据库语料")
+    parser.add_argument("--phrases", type=int, default=3, help="每条合成需求包含的短语数量 (控制文本长度)")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.synthetic, args.phrases)
+    legacy_ms, compiled_ms, legacy_hits, compiled_hits, only_functional = run(corpus)
+
+    print("=" * 60)
+    print(f"维度识别基准: {len(corpus)} 条功能点 (规则统计: {dimension_manager.get_stats()})")
+    print("=" * 60)
+    per_req = 1000 / max(len(corpus), 1)
+    print(f"旧实现     {legacy_ms:8.1f} ms ({legacy_ms * per_req:6.1f} us/条)  仅功能测试: {only_functional[0]:6d} 条  命中: {dict(legacy_hits)}")
+    print(f"数据库规则 {compiled_ms:8.1f} ms ({compiled_ms * per_req:6.1f} us/条)  仅功能测试: {only_functional[1]:6d} 条  命中: {dict(compiled_hits)}")
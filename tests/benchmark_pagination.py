@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+分页基准测试
+在临时数据库中生成合成用例表 (默认 100 万条)，对比不同翻页深度下
+页码分页 (LIMIT/OFFSET) 与游标分页 (id < after_id) 的单页耗时。
+
+运行方式 (仓库根目录，使用临时数据库，不影响 backend/database/test_cases.db)：
+    python tests/benchmark_pagination.py --rows 1000000 --size 20
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-key")
+
+from backend.database import base, init_db
+from backend.database.case_db import case_db
+from backend.database.connection import connection_manager
+from backend.database.count_db import list_count_db
+
+STATUSES = ("Draft", "Active", "Deprecated")
+
+
+def build_table(rows, requirements):
+    """用递归 CTE 批量生成合成用例"""
+    conn = base.get_conn()
+    conn.execute("BEGIN")
+    conn.execute("""
+        WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < ?)
+        INSERT INTO test_cases (requirement_id, case_title, steps, status, priority)
+        SELECT n % ? + 1, '合成用例 ' || n,
+               '[{"step_id": 1, "action": "操作 ' || n || '", "expected": "成功"}]',
+               CASE n % 3 WHEN 0 THEN 'Draft' WHEN 1 THEN 'Active' ELSE 'Deprecated' END, 'P1'
+        FROM seq
+    """, (rows, requirements))
+    conn.commit()
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--size", type=int, default=20)
+    parser.add_argument("--requirements", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base.DB_PATH = os.path.join(tmp, "pagination.db")
+        with contextlib.redirect_stdout(io.StringIO()):
+            init_db.init_tables()
+        start = time.perf_counter()
+        build_table(args.rows, args.requirements)
+        print(f"生成 {args.rows} 条用例: {time.perf_counter() - start:.1f}s")
+
+        conn = base.get_conn()
+        count_ms = timed(lambda: conn.execute("SELECT COUNT(*) FROM test_cases WHERE 1=1").fetchone(), args.repeat)
+        counter_ms = timed(lambda: list_count_db.get_count(conn.cursor(), "test_cases", {}), args.repeat)
+        print(f"COUNT(*) 全表: {count_ms:.2f}ms, 读取计数表: {counter_ms:.3f}ms (列表总数默认读取计数表)")
+        print("=" * 84)
+        print(f"{'页码':>8} {'偏移量':>10} {'OFFSET查询(ms)':>16} {'页码分页合计(ms)':>18} {'游标分页(ms)':>14} {'加速比':>8}")
+
+        max_page = args.rows // args.size
+        for page in (1, 10, 100, 1000, 10000, max_page // 2, max_page):
+            if page > max_page:
+                continue
+            offset = (page - 1) * args.size
+            # 游标为上一页最后一条的 ID (不计入耗时)
+            row = conn.execute("SELECT id FROM test_cases ORDER BY id DESC LIMIT 1 OFFSET ?", (offset,)).fetchone()
+            cursor = row[0] + 1
+            query_ms = timed(lambda: conn.execute("SELECT * FROM test_cases WHERE 1=1 ORDER BY id DESC LIMIT ? OFFSET ?",
+                                                  (args.size, offset)).fetchall(), args.repeat)
+            offset_ms = timed(lambda: case_db.get_cases_page(page=page, size=args.size), args.repeat)
+            keyset_ms = timed(lambda: case_db.get_cases_page(size=args.size, after_id=cursor), args.repeat)
+            print(f"{page:>8} {offset:>10} {query_ms:>16.2f} {offset_ms:>18.2f} {keyset_ms:>14.2f} "
+                  f"{offset_ms / keyset_ms:>7.1f}x")
+
+        # 带过滤条件的深分页 (需求 + 状态)
+        print("-" * 84)
+        filtered = dict(req_id=1, status="Active")
+        total = case_db.get_cases_page(page=1, size=args.size, **filtered)['total']
+        last_page = max(1, (total + args.size - 1) // args.size)
+        row = conn.execute("""SELECT id FROM test_cases WHERE requirement_id = 1 AND status = 'Active'
+                              ORDER BY id DESC LIMIT 1 OFFSET ?""", ((last_page - 1) * args.size,)).fetchone()
+        cursor = row[0] + 1 if row else None
+        offset_ms = timed(lambda: case_db.get_cases_page(page=last_page, size=args.size, **filtered), args.repeat)
+        keyset_ms = timed(lambda: case_db.get_cases_page(size=args.size, after_id=cursor, **filtered), args.repeat)
+        print(f"需求1+Active 末页 (共 {total} 条): 页码分页 {offset_ms:.2f}ms, 游标分页 {keyset_ms:.2f}ms")
+        connection_manager.close_all()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+全文检索基准测试
+在临时数据库中生成合成用例 (默认 20 万条)，对比 LIKE '%词%' 全表扫描与 FTS5 trigram 索引的检索耗时，
+并统计触发器同步索引带来的写入开销。
+
+运行方式 (仓库根目录，使用临时数据库，不影响 backend/database/test_cases.db)：
+    python tests/benchmark_search.py --rows 200000
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-key")
+
+from backend.database import base, init_db
+from backend.database.case_db import case_db
+from backend.database.connection import connection_manager
+from backend.database.search_db import search_db
+
+MODULES = ("登录", "注册", "购物车", "订单", "支付", "退款", "优惠券", "消息通知")
+
+
+def build_table(rows):
+    """用递归 CTE 批量生成合成用例 (插入时触发器同步写入索引)"""
+    conn = base.get_conn()
+    conn.execute("BEGIN")
+    conn.execute(f"""
+        WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < ?),
+        modules(i, name) AS (VALUES {', '.join(f"({i}, '{name}')" for i, name in enumerate(MODULES))})
+        INSERT INTO test_cases (requirement_id, case_title, steps, expected_result, status)
+        SELECT n % 2000 + 1, name || '模块用例 ' || n,
+               '[{{"step_id": 1, "action": "进入' || name || '页面并执行操作 ' || n || '", "expected": "页面展示正常"}}]',
+               '编号 ' || n || ' 校验通过', 'Draft'
+        FROM seq JOIN modules ON modules.i = n % {len(MODULES)}
+    """, (rows,))
+    conn.commit()
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base.DB_PATH = os.path.join(tmp, "search.db")
+        with contextlib.redirect_stdout(io.StringIO()):
+            init_db.init_tables()
+        start = time.perf_counter()
+        build_table(args.rows)
+        with_index = time.perf_counter() - start
+
+        conn = base.get_conn()
+        for name in ("insert", "delete", "update"):
+            conn.execute(f"DROP TRIGGER trg_test_cases_fts_{name}")
+        conn.execute("DELETE FROM test_cases")
+        conn.commit()
+        start = time.perf_counter()
+        build_table(args.rows)
+        without_index = time.perf_counter() - start
+        print(f"生成 {args.rows} 条用例: 同步全文索引 {with_index:.1f}s, 不建索引 {without_index:.1f}s")
+        with conn:
+            for sql in search_db.trigger_sql("cases") + search_db.rebuild_sql("cases"):
+                conn.execute(sql)
+
+        rare = f"操作 {args.rows // 2}"
+        print("=" * 72)
+        print(f"{'场景':<28} {'LIKE(ms)':>12} {'FTS5(ms)':>12} {'加速比':>8}")
+        scenarios = [
+            ("步骤文本 (罕见词)", "steps", rare, lambda: search_db.search("cases", rare)),
+            ("步骤文本 (常见词)", "steps", "优惠券页面", lambda: search_db.search("cases", "优惠券页面")),
+            ("标题 (列表过滤, 罕见词)", "case_title", f"用例 {args.rows // 3}",
+             lambda: case_db.get_cases_page(size=20, title=f"用例 {args.rows // 3}")),
+        ]
+        for label, column, term, fts_fn in scenarios:
+            like_ms = timed(lambda: conn.execute(
+                f"SELECT * FROM test_cases WHERE {column} LIKE ? ORDER BY id DESC LIMIT 21", (f"%{term}%",)).fetchall(),
+                args.repeat)
+            fts_ms = timed(fts_fn, args.repeat)
+            print(f"{label:<28} {like_ms:>12.2f} {fts_ms:>12.2f} {like_ms / fts_ms:>7.1f}x")
+        connection_manager.close_all()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+写入缓冲 (组提交) 基准测试
+模拟多个 Reviewer 并发调用入库工具 (save_breakdown_item / save_case)，每次调用之间可加入思考间隔，
+对比逐条提交 (每次调用各自 BEGIN IMMEDIATE + COMMIT) 与写入缓冲 (合并提交) 的
+持续写入吞吐、单次调用延迟 p50/p99 以及平均批大小。
+
+运行方式 (仓库根目录，使用临时数据库，不影响 backend/database/test_cases.db)：
+    python tests/benchmark_write_buffer.py --reviewers 64 --items 50 --kind breakdown
+    python tests/benchmark_write_buffer.py --reviewers 64 --items 20 --kind case --synchronous FULL
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-key")
+
+from backend.agents.agent_pool import summarize_timings
+from backend.config import DB_CONFIG
+from backend.database import base, case_db as case_db_module, init_db, requirement_db as requirement_db_module
+from backend.database.case_db import save_case
+from backend.database.connection import connection_manager
+from backend.database.requirement_db import save_breakdown_item
+from backend.database.write_buffer import WriteBuffer
+
+
+def save_item(kind, reviewer, i):
+    if kind == "breakdown":
+        return save_breakdown_item({"project_id": 1, "module_name": f"模块 {reviewer}",
+                                    "feature_name": f"功能点 {reviewer}-{i}", "description": "压测拆解项",
+                                    "acceptance_criteria": ["条件一", "条件二"]})
+    # 每条用例挂在不同需求下，避免被近似重复检测拦截
+    return save_case({"requirement_id": reviewer * 100000 + i + 1, "case_title": f"用例 {reviewer}-{i}",
+                      "steps": [{"action": f"执行操作 {reviewer * 1000 + i} 号", "expected": f"结果 {i}"}]})
+
+
+def run_load(db_file, buffer, kind, reviewers, items, think_ms):
+    base.DB_PATH = db_file
+    with contextlib.redirect_stdout(io.StringIO()):
+        init_db.init_tables()
+    case_db_module.write_buffer = requirement_db_module.write_buffer = buffer
+
+    samples, errors = [], []
+    lock = threading.Lock()
+    barrier = threading.Barrier(reviewers)
+
+    def reviewer(idx):
+        rng = random.Random(idx)
+        barrier.wait()
+        for i in range(items):
+            if think_ms:
+                time.sleep(rng.uniform(0, think_ms) / 1000)  # 模拟 LLM 两次工具调用之间的间隔
+            start = time.perf_counter()
+            result = save_item(kind, idx, i)
+            elapsed = time.perf_counter() - start
+            with lock:
+                if result.startswith("ID:"):
+                    samples.append(elapsed)
+                else:
+                    errors.append(result)
+
+    threads = [threading.Thread(target=reviewer, args=(i,)) for i in range(reviewers)]
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # 入库日志较多，基准运行时屏蔽
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        buffer.stop()
+    wall = time.perf_counter() - start
+    connection_manager.close_all()
+    return samples, errors, wall
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reviewers", type=int, default=64, help="并发 Reviewer 数")
+    parser.add_argument("--items", type=int, default=50, help="每个 Reviewer 入库条数")
+    parser.add_argument("--kind", choices=["breakdown", "case"], default="breakdown")
+    parser.add_argument("--think-ms", type=float, default=0, help="两次入库之间的随机间隔上限 (毫秒)")
+    parser.add_argument("--interval-ms", type=float, default=DB_CONFIG["write_buffer_interval_ms"])
+    parser.add_argument("--max-rows", type=int, default=DB_CONFIG["write_buffer_max_rows"])
+    parser.add_argument("--synchronous", default=DB_CONFIG["synchronous"], help="NORMAL / FULL (FULL 时每次提交 fsync)")
+    args = parser.parse_args()
+    DB_CONFIG["synchronous"] = args.synchronous
+
+    print("=" * 60)
+    print(f"写入缓冲基准: {args.reviewers} Reviewer x {args.items} 条 {args.kind}, 思考间隔 <= {args.think_ms}ms, "
+          f"synchronous={args.synchronous}")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        modes = (("逐条提交", WriteBuffer(enabled=False)),
+                 ("写入缓冲", WriteBuffer(args.interval_ms, args.max_rows, enabled=True)))
+        for idx, (label, buffer) in enumerate(modes):
+            samples, errors, wall = run_load(os.path.join(tmp, f"mode{idx}.db"), buffer, args.kind,
+                                             args.reviewers, args.items, args.think_ms)
+            stats, buffer_stats = summarize_timings(samples), buffer.get_stats()
+            print(f"{label:6s} {len(samples) / wall:8.1f} 条/s  调用延迟 p50={stats['p50']}ms p99={stats['p99']}ms  "
+                  f"批次 {buffer_stats['batches']} (平均 {buffer_stats['avg_batch']} 条)  失败 {len(errors)}  "
+                  f"wall={wall:.2f}s")
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+pytest 公共夹具
+每个用例使用独立的临时 SQLite 数据库，避免污染 backend/database/test_cases.db
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+# 导入 Agent 模块时会创建 LLM 客户端，需要一个占位 Key
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+
+@pytest.fixture(autouse=True)
+def isolated_local_index(tmp_path, monkeypatch):
+    """本地知识索引写入临时文件，避免生成 backend/database/knowledge_index.jsonl"""
+    from backend.agents.local_knowledge import local_knowledge_index
+
+    monkeypatch.setattr(local_knowledge_index, "path", str(tmp_path / "knowledge_index.jsonl"))
+    local_knowledge_index.unload()
+    yield local_knowledge_index
+    local_knowledge_index.unload()
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """初始化一个临时数据库 (含种子数据)，返回数据库文件路径"""
+    from backend.database import base, init_db
+    from backend.database.connection import connection_manager
+    from backend.agents.context_manager import context_manager
+    from backend.agents.test_dimension import dimension_manager
+    from backend.database.prompt_db import prompt_db
+
+    db_file = str(tmp_path / "test_cases.db")
+    monkeypatch.setattr(base, "DB_PATH", db_file)
+    prompt_db._cache.clear()
+    context_manager.invalidate()
+    dimension_manager.invalidate()
+
+    init_db.init_tables()
+    init_db.seed_data()
+    yield db_file
+    connection_manager.close_all()
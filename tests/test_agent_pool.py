@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+Agent 池测试
+"""
+
+import asyncio
+
+from backend.agents.agent_pool import AgentPool, AgentTemplate
+from backend.agents.case_agent import gemini_client
+from backend.database.case_db import save_case
+
+
+def _members(prompt_id=None):
+    return [
+        (("test_generator", "base", "builtin", 5),
+         lambda: AgentTemplate("test_generator", gemini_client, "生成 5 条用例", prompt_id=prompt_id)),
+        (("test_reviewer", "base", "builtin", None),
+         lambda: AgentTemplate("test_reviewer", gemini_client, "评审并入库", tools=[save_case])),
+    ]
+
+
+def test_agents_are_reused_after_release():
+    pool = AgentPool()
+
+    async def run():
+        team, leases = await pool.build_team(_members(), max_turns=4)
+        first_agents = [agent for _, agent in leases]
+        pool.release_all(leases)
+        _, leases = await pool.build_team(_members(), max_turns=4)
+        return first_agents, [agent for _, agent in leases]
+
+    first, second = asyncio.run(run())
+    assert first == second
+    stats = pool.get_stats()
+    assert stats["template_builds"] == 2 and stats["created"] == 2 and stats["reused"] == 2
+    assert stats["timings_ms"]["team_build"]["count"] == 2
+
+
+def test_prompt_invalidation_drops_templates():
+    pool = AgentPool()
+
+    async def run():
+        _, leases = await pool.build_team(_members(prompt_id=42), max_turns=4)
+        pool.invalidate_prompt(42)
+        pool.release_all(leases)
+        _, leases = await pool.build_team(_members(prompt_id=42), max_turns=4)
+        return leases
+
+    asyncio.run(run())
+    stats = pool.get_stats()
+    assert stats["template_builds"] == 3
+    assert stats["reused"] == 1
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+异步数据库访问层测试
+"""
+
+import asyncio
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.api import api_router
+from backend.database.async_db import AsyncDatabaseBase, DBExecutor, run_in_db
+from backend.database.case_db import case_db
+
+
+def test_run_in_db_uses_dedicated_threads(temp_db):
+    async def main():
+        names = await asyncio.gather(*[run_in_db(lambda: threading.current_thread().name) for _ in range(5)])
+        page = await run_in_db(case_db.get_cases_page, page=1, size=5)
+        return names, page
+
+    names, page = asyncio.run(main())
+    assert all(name.startswith("db-worker") for name in names)
+    assert page['items'] == [] and page['total'] == 0
+
+
+def test_async_database_base_wraps_methods(temp_db):
+    executor = DBExecutor(max_workers=2)
+    async_case_db = AsyncDatabaseBase(case_db, executor)
+
+    async def main():
+        saved = await async_case_db.save_case({"requirement_id": 1, "case_title": "异步保存",
+                                               "steps": [{"action": "打开首页", "expected": "加载成功"}]})
+        return saved, await async_case_db.get_cases_page(page=1, size=5)
+
+    saved, page = asyncio.run(main())
+    executor.shutdown()
+    assert saved.startswith("ID:") and page['items'][0]['case_title'] == "异步保存"
+    assert executor.get_stats()['submitted'] == 2
+    assert async_case_db.execute_query.__name__ == "execute_query"
+
+
+def test_db_errors_propagate():
+    async def main():
+        await run_in_db(lambda: 1 / 0)
+
+    with pytest.raises(ZeroDivisionError):
+        asyncio.run(main())
+
+
+def test_async_routes(temp_db):
+    app = FastAPI()
+    app.include_router(api_router)
+    case_db.save_case({"requirement_id": 1, "case_title": "列表用例", "steps": []})
+    with TestClient(app) as client:
+        resp = client.get("/cases", params={"size": 5})
+        assert resp.status_code == 200 and resp.json()['items'][0]['case_title'] == "列表用例"
+        assert client.get("/projects").status_code == 200
+        assert client.get("/knowledge/cache").status_code == 200
+        assert client.delete("/knowledge/cache").json()['status'] == "success"
+        assert client.get("/knowledge/index").status_code == 200
+        assert client.get("/knowledge/index/search", params={"query": "列表用例"}).status_code == 200
+        resp = client.post("/config/dimension_rules/preview", json={"feature_name": "登录", "description": "密码输入"})
+        assert resp.status_code == 200
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+功能点用例计数 (触发器维护) 与一致性检查测试
+"""
+
+from backend.database import base
+from backend.database.case_db import case_db
+from backend.database.consistency import check_consistency
+from backend.database.requirement_db import requirement_db
+
+
+def _counts(req_id):
+    row = base.get_conn().execute("""SELECT case_count, draft_case_count, active_case_count, deprecated_case_count
+                                     FROM functional_points WHERE id = ?""", (req_id,)).fetchone()
+    return tuple(row)
+
+
+def test_triggers_maintain_requirement_case_counts(temp_db):
+    conn = base.get_conn()
+    conn.executemany("INSERT INTO functional_points (id, project_id, feature_name) VALUES (?, 1, ?)",
+                     [(1, "登录"), (2, "注册")])
+    conn.commit()
+
+    for title in ("登录成功", "密码错误提示", "账号锁定后禁止登录"):
+        assert case_db.save_case({"requirement_id": 1, "case_title": title,
+                                  "steps": [{"step_id": 1, "action": title, "expected": "符合预期"}]}).startswith("ID:")
+    assert _counts(1) == (3, 3, 0, 0)
+
+    ids = [row['id'] for row in case_db.get_case_briefs(req_id=1, with_steps=False)]
+    case_db.batch_update_status(ids[:2], "Active")
+    assert _counts(1) == (3, 1, 2, 0)
+
+    conn.execute("UPDATE test_cases SET requirement_id = 2, status = 'Deprecated' WHERE id = ?", (ids[0],))
+    conn.execute("DELETE FROM test_cases WHERE id = ?", (ids[2],))
+    conn.commit()
+    assert _counts(1) == (1, 0, 1, 0)
+    assert _counts(2) == (1, 0, 0, 1)
+
+    page = requirement_db.get_requirements_page(page=1, size=10)
+    assert {item['id']: item['case_count'] for item in page['items']} == {1: 1, 2: 1}
+    assert not any(check_consistency().values())
+
+
+def test_consistency_check_detects_and_fixes_drift(temp_db):
+    conn = base.get_conn()
+    conn.execute("INSERT INTO functional_points (id, feature_name) VALUES (1, '登录')")
+    conn.execute("INSERT INTO test_cases (requirement_id, case_title, status) VALUES (1, '登录成功', 'Active')")
+    conn.execute("UPDATE functional_points SET case_count = 5, active_case_count = 0 WHERE id = 1")
+    conn.commit()
+
+    mismatches = requirement_db.check_case_counts()
+    assert {(item['field'], item['stored'], item['actual']) for item in mismatches} == {
+        ("case_count", 5, 1), ("active_case_count", 0, 1)}
+
+    requirement_db.check_case_counts(fix=True)
+    assert _counts(1) == (1, 0, 1, 0)
+    assert requirement_db.check_case_counts() == []
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+用例步骤 / 测试数据规范格式测试
+"""
+
+import pytest
+
+from backend.database import base
+from backend.database.case_db import case_db
+from backend.database.case_format import FORMAT_VERSION, load_steps, parse_steps, parse_test_data
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ([{"step_id": "3", "action": "打开首页", "expected": "加载成功", "extra": 1}],
+     [{"step_id": 1, "action": "打开首页", "expected": "加载成功"}]),
+    ("```json\n[{\"action\": \"点击登录\"}]\n```", [{"step_id": 1, "action": "点击登录", "expected": ""}]),
+    ("[{'action': '输入账号', 'expected': None}]", [{"step_id": 1, "action": "输入账号", "expected": ""}]),
+    ("1. 打开首页\n2、点击登录", [{"step_id": 1, "action": "打开首页", "expected": "（详见预期结果字段）"},
+                           {"step_id": 2, "action": "点击登录", "expected": "（详见预期结果字段）"}]),
+    ({"steps": ["打开首页", "", None]}, [{"step_id": 1, "action": "打开首页", "expected": ""}]),
+    (3, [{"step_id": 1, "action": "步骤 3", "expected": "AI未生成详细描述"}]),
+    (-1, []),
+    ("", []),
+    (None, []),
+])
+def test_parse_steps_canonicalizes(raw, expected):
+    assert parse_steps(raw) == expected
+
+
+def test_parse_test_data_always_returns_dict():
+    assert parse_test_data('{"user": "admin"}') == {"user": "admin"}
+    assert parse_test_data("{'user': 'admin'}") == {"user": "admin"}
+    assert parse_test_data("账号 admin") == {"raw_content": "账号 admin"}
+    assert parse_test_data('["a", "b"]') == {"raw_content": ["a", "b"]}
+    assert parse_test_data(None) == {} and parse_test_data(0) == {}
+
+
+def test_saved_cases_are_canonical_and_read_without_repair(temp_db, monkeypatch):
+    assert case_db.save_case({"requirement_id": 1, "case_title": "登录成功",
+                              "steps": "[{'action': '输入账号密码', 'expected': '登录成功'}]",
+                              "test_data": "{'user': 'admin'}"}).startswith("ID:")
+    row = base.get_conn().execute("SELECT steps, test_data, format_version FROM test_cases").fetchone()
+    assert tuple(row) == ('[{"step_id": 1, "action": "输入账号密码", "expected": "登录成功"}]',
+                          '{"user": "admin"}', FORMAT_VERSION)
+
+    # 规范格式的行读取时不调用兼容解析
+    import backend.database.case_format as case_format
+    monkeypatch.setattr(case_format, "parse_steps", lambda raw: pytest.fail("规范格式不应走兼容解析"))
+    item = case_db.get_cases_page(page=1, size=10)['items'][0]
+    assert item['steps'][0]['action'] == "输入账号密码" and item['test_data'] == {"user": "admin"}
+    assert 'format_version' not in item
+
+
+def test_legacy_rows_still_readable(temp_db):
+    conn = base.get_conn()
+    conn.execute("INSERT INTO test_cases (requirement_id, case_title, steps, test_data) VALUES (1, '旧数据', '1. 打开首页', NULL)")
+    conn.commit()
+    item = case_db.get_cases_page(page=1, size=10)['items'][0]
+    assert item['steps'] == load_steps("1. 打开首页") and item['test_data'] == {}
+    export = case_db.get_all_cases_for_export(req_id=1)
+    assert export[0]['excel_steps'] == "1. 打开首页"
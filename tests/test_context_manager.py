@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+上下文管理器测试 (覆盖分类 + 需求级缓存)
+"""
+
+import threading
+
+from backend.agents.context_manager import context_manager
+from backend.database.case_db import batch_update_status, case_db, save_case
+from backend.database.coverage_db import coverage_db
+
+
+def _save(title, action="打开页面"):
+    result = save_case({"requirement_id": 7, "case_title": title,
+                        "steps": [{"step_id": 1, "action": action, "expected": "符合预期"}]})
+    return int(result.split(":")[1])
+
+
+def test_titles_match_every_category():
+    # 旧实现只取第一个命中的关键词
+    assert context_manager.classify("登录成功后并发失败重试") == {"成功场景", "失败场景", "性能测试"}
+    assert context_manager.extract_test_patterns(["输入超长 XSS 脚本"]) == ["安全测试"]
+
+
+def test_context_is_cached_and_updated_incrementally(temp_db, monkeypatch):
+    _save("账号密码正确登录成功")
+    req = {"description": "login page"}
+
+    first = context_manager.get_context(7, req)
+    assert first["existing_cases"] == ["账号密码正确登录成功"]
+    assert "安全测试" in first["coverage_gaps"]
+
+    queries = []
+    original = case_db.get_case_briefs
+    monkeypatch.setattr(case_db, "get_case_briefs", lambda **kw: queries.append(kw) or original(**kw))
+
+    # 步骤中的关键词同样参与分类；新增用例只读取新行
+    case_id = _save("登录页面校验", action="尝试 SQL 注入绕过登录")
+    second = context_manager.get_context(7, req)
+    assert queries == [{"case_ids": [case_id]}]
+    assert second["category_counts"] == {"成功场景": 1, "安全测试": 1}
+    assert "安全测试" not in second["coverage_gaps"]
+
+    # 状态变化使缓存失效，下次按需求重新构建
+    # 状态变化使缓存失效；重建时分类计数取自覆盖汇总表，只读取标题
+    batch_update_status([case_id], "Active")
+    third = context_manager.get_context(7, req)
+    assert queries[-1] == {"req_id": 7, "with_steps": False}
+    assert third["category_counts"] == second["category_counts"]
+    assert context_manager.get_cache_stats()["invalidations"] >= 1
+
+
+
+def test_cache_build_does_not_block_and_replays_concurrent_inserts(temp_db, monkeypatch):
+    _save("账号密码正确登录成功")
+    entered, release = threading.Event(), threading.Event()
+    original = coverage_db.get_coverage
+
+    def slow_coverage(req_id):
+        if req_id == 7:
+            entered.set()
+            release.wait(5)
+        return original(req_id)
+
+    monkeypatch.setattr(coverage_db, "get_coverage", slow_coverage)
+    results = {}
+    builder = threading.Thread(target=lambda: results.update(first=context_manager.get_context(7, {})))
+    builder.start()
+    assert entered.wait(5)
+
+    # 需求 7 构建期间：其他需求的查询不被阻塞，新增用例在安装缓存时回放
+    assert context_manager.get_context(8, {})["existing_cases"] == []
+    _save("登录页面校验", action="尝试 SQL 注入绕过登录")
+    release.set()
+    builder.join(5)
+
+    assert results["first"]["existing_cases"] == ["账号密码正确登录成功", "登录页面校验"]
+    assert results["first"]["category_counts"].get("安全测试") == 1
+    assert context_manager.get_context(7, {})["existing_cases"] == results["first"]["existing_cases"]
+    assert not context_manager._building and not context_manager._events
+
+def test_select_relevant_cases_per_focus():
+    titles = [f"正常登录场景 {i}" for i in range(200)] + ["登录接口超时异常", "密码输入超过最大长度", "越权访问管理页面"]
+    focuses = context_manager.plan_focuses(["异常场景", "边界值测试"], [
+        {"name": "安全测试", "description": "越权与注入"},
+        {"name": "异常场景", "description": "重复的维度会被忽略"},
+    ])
+    assert [label for label, _ in focuses] == ["异常场景", "边界值测试", "安全测试"]
+
+    selected = context_manager.select_relevant_cases(titles, focuses, per_focus=2, limit=5)
+    assert selected[0] == {"focus": "异常场景", "titles": ["登录接口超时异常"]}
+    assert selected[1]["titles"][0] == "密码输入超过最大长度"
+    assert selected[2]["titles"][0] == "越权访问管理页面"
+    assert sum(len(group["titles"]) for group in selected) <= 5
+
+    # 没有命中任何方向时退化为最近用例
+    assert context_manager.select_relevant_cases(titles[:3], [("性能测试", "并发 压力")], per_focus=2) == [
+        {"focus": "最近用例", "titles": ["正常登录场景 2", "正常登录场景 1"]}]
+
+    summary = context_manager.summarize_categories(
+        {"existing_cases": titles, "category_counts": {"异常场景": 1, "成功场景": 200}})
+    assert summary == "共 203 条；成功场景 200、异常场景 1"
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+列表计数 (触发器维护) 与总数策略测试
+"""
+
+from backend.config import SYSTEM_CONFIG
+from backend.database import base
+from backend.database.case_db import case_db
+from backend.database.count_db import COUNTED_FILTERS, filter_key, list_count_db
+
+
+def _insert_cases(rows):
+    conn = base.get_conn()
+    conn.executemany("INSERT INTO test_cases (requirement_id, case_title, steps, status) VALUES (?, ?, '[]', ?)", rows)
+    conn.commit()
+
+
+def _assert_counts_match(table):
+    """计数表与实际 COUNT(*) 一致"""
+    conn = base.get_conn()
+    for combo in COUNTED_FILTERS[table]:
+        columns = ", ".join(combo) or "NULL"
+        for row in conn.execute(f"SELECT {columns}, COUNT(*) FROM {table} GROUP BY {columns}"):
+            filters = {field: row[i] for i, field in enumerate(combo) if row[i] is not None}
+            if len(filters) != len(combo):
+                continue
+            assert list_count_db.get_count(conn.cursor(), table, filters) == row[-1], (combo, filters)
+
+
+def test_triggers_keep_counts_in_sync(temp_db):
+    _insert_cases([(i % 3 + 1, f"用例 {i}", "Draft" if i % 2 else "Active") for i in range(20)])
+    _assert_counts_match("test_cases")
+
+    case_db.batch_update_status([1, 2, 3, 4], "Deprecated")
+    conn = base.get_conn()
+    conn.execute("UPDATE test_cases SET requirement_id = 9 WHERE id IN (5, 6)")
+    conn.execute("DELETE FROM test_cases WHERE id IN (7, 8, 9)")
+    conn.commit()
+    _assert_counts_match("test_cases")
+    assert list_count_db.get_count(conn.cursor(), "test_cases", {}) == 17
+    assert filter_key({"status": "Draft", "requirement_id": 2}) == "requirement_id=2&status=Draft"
+
+    # 计数被破坏后可重建
+    conn.execute("UPDATE list_counts SET row_count = 999")
+    conn.commit()
+    list_count_db.rebuild("test_cases")
+    _assert_counts_match("test_cases")
+
+
+def test_page_total_strategies(temp_db, monkeypatch):
+    monkeypatch.setitem(SYSTEM_CONFIG, "count_estimate_sample", 10)
+    _insert_cases([(1, f"{'登录' if i % 4 == 0 else '注册'}用例 {i}", "Draft") for i in range(40)])
+
+    exact = case_db.get_cases_page(page=1, size=5, req_id=1, status="Draft")
+    assert (exact['total'], exact['total_mode']) == (40, "exact")
+
+    # 模糊过滤：按最近 10 行的命中比例估算 (真实值 10)
+    estimated = case_db.get_cases_page(page=1, size=5, title="登录")
+    assert estimated['total_mode'] == "estimated" and 5 < estimated['total'] <= 40
+
+    # 翻到末页时总数可确定
+    last = case_db.get_cases_page(page=2, size=5, title="登录")
+    assert (last['total'], last['total_mode']) == (10, "exact")
+
+    skipped = case_db.get_cases_page(page=1, size=5, include_total=False)
+    assert skipped['total'] is None and skipped['total_mode'] == "none" and skipped['next_cursor']
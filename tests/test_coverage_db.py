@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+需求覆盖汇总表测试
+"""
+
+from backend.database.case_db import batch_update_status, save_case
+from backend.database.coverage_db import coverage_db
+from backend.database.requirement_db import get_requirements_page, save_analyzed_point
+
+
+def _save(req_id, title, **extra):
+    result = save_case({"requirement_id": req_id, "case_title": title, **extra})
+    return int(result.split(":")[1])
+
+
+def test_summary_follows_inserts_and_status_changes(temp_db):
+    save_analyzed_point({"feature_name": "用户登录", "description": "账号密码登录"})
+    first = _save(1, "登录成功", priority="P0", quality_score=0.9)
+    _save(1, "密码错误登录失败", case_type="Negative", quality_score=0.7)
+    _save(1, "并发登录超时异常", quality_score="0.5")
+
+    coverage = coverage_db.get_coverage(1)
+    assert coverage["total_cases"] == 3
+    assert coverage["priority_counts"] == {"P0": 1, "P1": 2}
+    assert coverage["case_type_counts"] == {"Functional": 2, "Negative": 1}
+    assert coverage["category_counts"] == {"成功场景": 1, "失败场景": 1, "性能测试": 1, "异常场景": 1}
+    assert coverage["quality_avg"] == 0.7 and coverage["quality_min"] == 0.5 and coverage["quality_latest"] == 0.5
+
+    assert batch_update_status([first], "Active")
+    assert coverage_db.get_coverage(1)["status_counts"] == {"Draft": 2, "Active": 1}
+
+    # 全量重建结果与增量维护一致
+    incremental = coverage_db.get_coverage(1)
+    coverage_db.rebuild()
+    rebuilt = coverage_db.get_coverage(1)
+    incremental.pop("updated_at"), rebuilt.pop("updated_at")
+    assert rebuilt == incremental
+
+    page = get_requirements_page()
+    assert page["items"][0]["case_count"] == 3
+    assert page["items"][0]["coverage"]["status_counts"] == {"Draft": 2, "Active": 1}
+
+
+def test_backfill_only_when_empty(temp_db):
+    _save(2, "正常下单")
+    with coverage_db.get_connection() as conn:
+        conn.execute("DELETE FROM requirement_coverage")
+        conn.commit()
+
+    assert coverage_db.backfill_if_empty() == 1
+    assert coverage_db.get_coverage(2)["total_cases"] == 1
+    assert coverage_db.backfill_if_empty() == 0
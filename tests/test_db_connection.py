@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+SQLite 连接管理测试 (线程级复用 + WAL 并发读写)
+"""
+
+import threading
+
+from backend.database.base import get_conn
+from backend.database.case_db import case_db
+from backend.database.connection import connection_manager
+
+
+def _in_thread(func):
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault("value", func()))
+    thread.start()
+    thread.join()
+    return result["value"]
+
+
+def test_connection_reused_per_thread_with_pragmas(temp_db):
+    conn = get_conn()
+    assert get_conn() is conn
+    assert _in_thread(lambda: id(get_conn())) != id(conn)
+
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+
+    # 旧写法 close() 只回滚未提交事务，连接继续可用
+    conn.execute("INSERT INTO projects (project_name) VALUES ('未提交')")
+    conn.close()
+    assert get_conn() is conn
+    assert conn.execute("SELECT COUNT(*) FROM projects WHERE project_name = '未提交'").fetchone()[0] == 0
+
+
+def test_reader_not_blocked_by_open_write_transaction(temp_db):
+    writer = get_conn()
+    writer.execute("BEGIN IMMEDIATE")
+    writer.execute("INSERT INTO test_cases (requirement_id, case_title) VALUES (1, '写入中')")
+
+    # 另一线程读取：不等待写事务提交，看到提交前的快照
+    count = _in_thread(lambda: case_db.execute_query("SELECT COUNT(*) AS n FROM test_cases")[0]["n"])
+    assert count == 0
+
+    writer.commit()
+    assert _in_thread(lambda: case_db.execute_query("SELECT COUNT(*) AS n FROM test_cases")[0]["n"]) == 1
+    assert connection_manager.get_stats()["reused"] > 0
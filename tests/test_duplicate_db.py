@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+用例近似重复索引测试
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from backend.database import base
+from backend.database.case_db import save_case
+from backend.database.duplicate_db import duplicate_db
+from backend.database.requirement_db import save_analyzed_point
+
+WRONG_PASSWORD_STEPS = [
+    {"step_id": 1, "action": "打开登录页面", "expected": "页面正常显示"},
+    {"step_id": 2, "action": "输入正确用户名和错误密码", "expected": "输入成功"},
+    {"step_id": 3, "action": "点击登录按钮", "expected": "提示密码错误"},
+]
+
+
+def test_save_case_rejects_paraphrased_duplicate(temp_db):
+    first = save_case({"requirement_id": 1, "case_title": "密码错误登录失败", "steps": WRONG_PASSWORD_STEPS})
+    assert first.startswith("ID:")
+
+    # 标题完全相同 (大小写/空格不同)
+    assert save_case({"requirement_id": 1, "case_title": " 密码错误登录失败 "}).startswith("DUPLICATE")
+
+    # 仅标点与措辞细微不同的同一场景
+    result = save_case({"requirement_id": 1, "case_title": "密码错误，登录失败", "steps": [
+        {"step_id": 1, "action": "打开登录页面", "expected": "页面正常显示"},
+        {"step_id": 2, "action": "输入正确的用户名和错误的密码", "expected": "输入成功"},
+        {"step_id": 3, "action": "点击登录按钮", "expected": "提示密码错误"},
+    ]})
+    assert result.startswith("DUPLICATE") and first.split(": ")[1] in result
+
+    # 步骤相同但场景不同的用例不受影响
+    assert save_case({"requirement_id": 1, "case_title": "使用正确密码登录成功", "steps": WRONG_PASSWORD_STEPS}).startswith("ID:")
+    # 其他需求下的同名用例不受影响
+    assert save_case({"requirement_id": 2, "case_title": "密码错误登录失败"}).startswith("ID:")
+
+
+def test_sibling_negative_scenarios_are_not_duplicates(temp_db):
+    # 同级的反向场景共享"时登录失败"等词和步骤套话，但属于不同用例，均应入库
+    for field, value in (("用户名", "为空"), ("密码", "为空"), ("用户名", "错误"), ("密码", "错误"), ("验证码", "过期")):
+        result = save_case({"requirement_id": 1, "case_title": f"{field}{value}时登录失败", "steps": [
+            {"step_id": 1, "action": "打开登录页面", "expected": "页面正常显示"},
+            {"step_id": 2, "action": f"{field}{value}，其余字段正确填写", "expected": "输入成功"},
+            {"step_id": 3, "action": "点击登录按钮", "expected": f"提示{field}{value}"},
+        ]})
+        assert result.startswith("ID:"), result
+
+
+def test_title_unique_under_concurrent_saves(temp_db):
+    results = []
+    barrier = threading.Barrier(4)
+
+    def worker(idx):
+        barrier.wait()
+        results.append(save_case({"requirement_id": 1, "case_title": "Login OK" if idx % 2 else " login ok\t",
+                                  "steps": [{"action": f"步骤 {idx}", "expected": "成功"}]}))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(result.split(":")[0] for result in results) == ["DUPLICATE", "DUPLICATE", "DUPLICATE", "ID"]
+
+    # 绕过 save_case 直接写库同样被唯一索引拦截
+    conn = base.get_conn()
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO test_cases (requirement_id, case_title) VALUES (1, 'LOGIN OK ')")
+    conn.rollback()
+
+
+def test_project_duplicate_report_and_rebuild(temp_db):
+    save_analyzed_point({"feature_name": "用户登录", "description": "账号密码登录", "project_id": 1})
+    save_analyzed_point({"feature_name": "找回密码", "description": "短信找回", "project_id": 1})
+    save_case({"requirement_id": 1, "case_title": "密码错误登录失败", "steps": WRONG_PASSWORD_STEPS})
+    save_case({"requirement_id": 2, "case_title": "密码错误，登录失败", "steps": WRONG_PASSWORD_STEPS})
+    save_case({"requirement_id": 2, "case_title": "短信验证码过期", "steps": []})
+
+    report = duplicate_db.find_duplicates(project_id=1)
+    assert report["duplicate_pairs"] == 1
+    assert [c["case_title"] for c in report["groups"][0]["cases"]] == ["密码错误登录失败", "密码错误，登录失败"]
+    assert duplicate_db.find_duplicates(project_id=99)["groups"] == []
+
+    # 清空后重建结果一致，且回填只在指纹表为空时执行
+    with duplicate_db.get_connection() as conn:
+        conn.execute("DELETE FROM case_fingerprints")
+        conn.execute("DELETE FROM case_lsh_buckets")
+        conn.commit()
+    assert duplicate_db.backfill_if_empty() == 3
+    assert duplicate_db.backfill_if_empty() == 0
+    assert duplicate_db.find_duplicates(project_id=1)["groups"] == report["groups"]
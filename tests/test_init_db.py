@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+版本化迁移测试
+"""
+
+import sqlite3
+
+import pytest
+
+from backend.agents.local_knowledge import local_knowledge_index
+from backend.database import base, consistency, init_db
+from backend.database.case_format import title_norm_sql
+from backend.database.count_db import COUNTED_FILTERS, list_count_db
+from backend.database.duplicate_db import duplicate_db
+from backend.database.normalize_db import case_normalize_db
+from backend.database.search_db import SEARCH_SCOPES, search_db
+
+
+def _versions(db_file):
+    conn = sqlite3.connect(db_file)
+    try:
+        return [row[0] for row in conn.execute("SELECT version FROM schema_version ORDER BY version")]
+    finally:
+        conn.close()
+
+
+def test_fresh_database_applies_all_migrations_once(temp_db):
+    latest = init_db.MIGRATIONS[-1][0]
+    assert _versions(temp_db) == [version for version, _, _ in init_db.MIGRATIONS]
+    assert init_db.get_schema_version() == latest
+
+    # 已是最新：不执行任何迁移，也不重复写入默认数据
+    assert init_db.init_tables() == []
+    conn = base.get_conn()
+    assert conn.execute("SELECT COUNT(*) FROM projects").fetchone()[0] == 1
+    assert conn.execute("SELECT COUNT(*) FROM dimension_rules").fetchone()[0] > 0
+
+
+
+def test_frozen_migrations_match_runtime_definitions(temp_db):
+    # 迁移中的触发器为发布时的快照；运行时定义 (COUNTED_FILTERS / SEARCH_SCOPES / 标题归一化) 变化后
+    # 此测试失败，提醒追加新迁移而不是修改已发布的迁移
+    def normalize(sql):
+        return " ".join(sql.split())
+
+    conn = base.get_conn()
+    triggers = {row[0]: normalize(row[1]) for row in conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'")}
+    expected = [sql for table in COUNTED_FILTERS for sql in list_count_db.trigger_sql(table)]
+    expected += [sql for name in SEARCH_SCOPES for sql in search_db.trigger_sql(name)]
+    for sql in expected:
+        if sql.startswith("CREATE TRIGGER"):
+            assert triggers[sql.split()[2]] == normalize(sql)
+
+    table_sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'test_cases'").fetchone()[0]
+    assert f"GENERATED ALWAYS AS ({title_norm_sql()})" in table_sql
+
+def test_legacy_database_is_upgraded_in_place(tmp_path, monkeypatch):
+    db_file = str(tmp_path / "legacy.db")
+    legacy = sqlite3.connect(db_file)
+    # 引入版本表之前的旧库：缺少新字段与新表，但已有用例
+    legacy.executescript("""
+        CREATE TABLE projects (id INTEGER PRIMARY KEY AUTOINCREMENT, project_name TEXT NOT NULL UNIQUE,
+                               description TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        CREATE TABLE functional_points (id INTEGER PRIMARY KEY AUTOINCREMENT, module_name TEXT,
+                                        feature_name TEXT, description TEXT, priority TEXT);
+        CREATE TABLE test_cases (id INTEGER PRIMARY KEY AUTOINCREMENT, requirement_id INTEGER, case_title TEXT,
+                                 pre_condition TEXT, steps TEXT, expected_result TEXT, priority TEXT,
+                                 case_type TEXT, test_data TEXT, status TEXT DEFAULT 'Draft',
+                                 version INTEGER DEFAULT 1, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        INSERT INTO projects (project_name) VALUES ('旧项目');
+        INSERT INTO test_cases (requirement_id, case_title, steps) VALUES (1, '旧用例', '[]');
+        INSERT INTO test_cases (requirement_id, case_title, steps, test_data)
+        VALUES (1, '单引号步骤', "[{'action': '打开首页', 'expected': '加载成功'}]", '账号 admin');
+    """)
+    legacy.close()
+    monkeypatch.setattr(base, "DB_PATH", db_file)
+
+    assert init_db.init_tables() == [version for version, _, _ in init_db.MIGRATIONS]
+    conn = base.get_conn()
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(test_cases)")}
+    assert {"quality_score", "review_comments"} <= columns
+    assert [row[0] for row in conn.execute("SELECT project_name FROM projects")] == ["旧项目"]
+    # 新建的汇总表与指纹表已按已有用例回填
+    assert conn.execute("SELECT total_cases FROM requirement_coverage WHERE requirement_id = 1").fetchone()[0] == 2
+    assert conn.execute("SELECT COUNT(*) FROM case_fingerprints").fetchone()[0] == 2
+    # 迁移只标记旧版本，不改写数据；由后台规范化任务分批改写并记录审计
+    assert [row[0] for row in conn.execute("SELECT format_version FROM test_cases")] == [0, 0]
+    assert case_normalize_db.pending_count() == 2
+    assert case_normalize_db.run()['status'] == "done"
+    assert [tuple(row) for row in conn.execute("SELECT steps, test_data, format_version FROM test_cases ORDER BY id")] == [
+        ("[]", "{}", 1),
+        ('[{"step_id": 1, "action": "打开首页", "expected": "加载成功"}]', '{"raw_content": "账号 admin"}', 1)]
+    assert {item['field'] for item in case_normalize_db.get_audit(case_id=2)} == {"steps", "test_data"}
+
+
+def test_duplicate_titles_block_unique_migration_until_renamed(temp_db):
+    conn = base.get_conn()
+    # 模拟建立唯一约束之前的历史数据：去掉约束后写入同名用例
+    conn.execute("DROP INDEX uq_test_cases_req_title")
+    conn.executemany("INSERT INTO test_cases (requirement_id, case_title, steps, status) VALUES (1, ?, '[]', 'Active')",
+                     [("登录成功",), (" 登录成功 ",), ("退出登录",)])
+    conn.execute("DELETE FROM schema_version WHERE version = 12")
+    conn.commit()
+    duplicate_db.rebuild(1)
+    title_sig = lambda: conn.execute("SELECT title_sig FROM case_fingerprints WHERE case_id = 2").fetchone()[0]
+    old_sig = title_sig()
+
+    # 迁移不改动用户数据，失败并列出冲突的用例ID
+    with pytest.raises(RuntimeError, match=r"用例ID \[1, 2\]"):
+        init_db.init_tables()
+    assert init_db.get_schema_version() == 11
+    assert [row[0] for row in conn.execute("SELECT case_title FROM test_cases ORDER BY id")] == [
+        "登录成功", " 登录成功 ", "退出登录"]
+
+    # 显式执行改名后迁移成功，派生数据随之更新
+    assert consistency.main(["--rename-duplicate-titles", "--db", temp_db]) == 0
+    assert init_db.get_schema_version() == init_db.MIGRATIONS[-1][0]
+    assert conn.execute("SELECT case_title FROM test_cases WHERE id = 2").fetchone()[0] == " 登录成功  [重复#2]"
+    assert title_sig() != old_sig
+    assert "tc:2" in [item["metadata"]["doc_key"] for item in local_knowledge_index.search("重复", limit=5)]
+
+
+def test_failed_migration_rolls_back(temp_db, monkeypatch):
+    def broken(cursor):
+        cursor.execute("CREATE TABLE half_done (id INTEGER)")
+        raise RuntimeError("boom")
+
+    latest = init_db.MIGRATIONS[-1][0]
+    monkeypatch.setattr(init_db, "MIGRATIONS", init_db.MIGRATIONS + [(latest + 1, "坏迁移", broken)])
+    with pytest.raises(RuntimeError):
+        init_db.init_tables()
+
+    conn = base.get_conn()
+    assert init_db.get_schema_version(conn) == latest
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'half_done'").fetchone() is None
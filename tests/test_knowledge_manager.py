@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+KnowledgeManager 异步检索测试
+使用本地 Stub Dify 服务，不依赖外部网络
+"""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from backend.agents.knowledge_manager import (KnowledgeCache, KnowledgeManager, KnowledgePrefetcher,
+                                              estimate_tokens, postprocess_knowledge)
+from backend.config import DIFY_CONFIG
+
+
+class StubDifyHandler(BaseHTTPRequestHandler):
+    """模拟 Dify /v1/chat-messages 接口 (blocking 模式)"""
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        self.server.requests += 1
+        if "慢查询" in body.get("query", ""):
+            time.sleep(0.5)
+
+        payload = json.dumps({
+            "answer": "登录功能需要校验账号密码，连续失败 5 次锁定账号。",
+            "metadata": {"retriever_resources": [
+                {"content": "账号锁定策略：连续失败 5 次锁定 30 分钟", "score": 0.92}
+            ]}
+        }, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_dify():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubDifyHandler)
+    server.connections = 0
+    server.requests = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _manager(server, cache=None):
+    # 默认关闭缓存，保证每次检索都真正访问 Stub 服务；只测试 Dify 通道，不混入本地索引
+    return KnowledgeManager(api_key="stub-key", endpoint=f"http://127.0.0.1:{server.server_address[1]}",
+                            cache=cache or KnowledgeCache(ttl=0), backend="dify")
+
+
+def test_retrieve_reports_latency(stub_dify):
+    manager = _manager(stub_dify)
+    try:
+        result = asyncio.run(manager.aretrieve("登录 账号密码登录"))
+        assert result["status"] == "ok"
+        assert result["latency_ms"] >= 0
+        contents = [item["content"] for item in result["items"]]
+        assert "账号锁定策略：连续失败 5 次锁定 30 分钟" in contents
+        # 同步接口走同一个连接池
+        assert manager.retrieve_knowledge("登录")
+    finally:
+        manager.close()
+
+
+def test_connection_is_reused_across_event_loops(stub_dify):
+    manager = _manager(stub_dify)
+    try:
+        for _ in range(3):
+            # 每个用例生成任务都运行在独立的 asyncio.run 中
+            assert asyncio.run(manager.aretrieve_knowledge("登录"))
+        assert stub_dify.connections == 1
+    finally:
+        manager.close()
+
+
+def test_slow_retrieval_does_not_block_event_loop(stub_dify):
+    manager = _manager(stub_dify)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.05)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        result = await manager.aretrieve("慢查询")
+        task.cancel()
+        return result, ticks
+
+    try:
+        result, ticks = asyncio.run(run())
+        assert result["status"] == "ok"
+        assert ticks >= 5
+    finally:
+        manager.close()
+
+
+def test_read_timeout(stub_dify, monkeypatch):
+    monkeypatch.setitem(DIFY_CONFIG, "read_timeout", 0.1)
+    manager = _manager(stub_dify)
+    try:
+        result = asyncio.run(manager.aretrieve("慢查询"))
+        assert result["status"] == "timeout"
+        assert result["items"] == []
+    finally:
+        manager.close()
+
+
+def test_cache_hits_memory_then_sqlite(stub_dify, temp_db):
+    cache = KnowledgeCache(ttl=60, negative_ttl=5, max_entries=2, use_sqlite=True)
+    manager = _manager(stub_dify, cache)
+    try:
+        first = asyncio.run(manager.aretrieve("登录  账号"))
+        second = asyncio.run(manager.aretrieve(" 登录 账号 "))
+        assert first["cache"] is None and second["cache"] == "memory"
+        assert second["items"] == first["items"]
+        assert stub_dify.connections == 1
+
+        # 内存层清空后，从 SQLite 层命中
+        cache._entries.clear()
+        third = asyncio.run(manager.aretrieve("登录 账号"))
+        assert third["cache"] == "sqlite"
+        assert cache.inspect()["stats"]["sqlite_hits"] == 1
+
+        assert cache.flush() >= 2
+        assert asyncio.run(manager.aretrieve("登录 账号"))["cache"] is None
+    finally:
+        manager.close()
+
+
+def test_negative_results_use_short_ttl():
+    cache = KnowledgeCache(ttl=60, negative_ttl=0.05, max_entries=2, use_sqlite=False)
+    key = cache.make_key("http://dify", "app", "无结果")
+    cache.put(key, "http://dify", "无结果", [])
+    assert cache.get(key) == ([], "memory")
+    time.sleep(0.1)
+    assert cache.get(key) is None
+    assert cache.inspect()["stats"]["expirations"] == 1
+
+
+def test_lru_eviction():
+    cache = KnowledgeCache(ttl=60, negative_ttl=5, max_entries=2, use_sqlite=False)
+    keys = [cache.make_key("http://dify", "app", q) for q in ("a", "b", "c")]
+    cache.put(keys[0], "http://dify", "a", [{"content": "A"}])
+    cache.put(keys[1], "http://dify", "b", [{"content": "B"}])
+    cache.get(keys[0])
+    cache.put(keys[2], "http://dify", "c", [{"content": "C"}])
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+
+
+def test_prefetch_dedupes_and_overlaps_retrievals(stub_dify):
+    manager = _manager(stub_dify)
+    queries = {1: "慢查询 登录", 2: "慢查询 支付", 3: "慢查询  登录", 4: "慢查询 退款"}
+
+    async def run():
+        prefetcher = KnowledgePrefetcher(manager, concurrency=4)
+        prefetcher.start(queries)
+        results = []
+        for key in queries:
+            results.append(await prefetcher.get(key))
+            await asyncio.sleep(0.2)  # 模拟条目生成耗时
+        return prefetcher.summary(), results
+
+    try:
+        summary, results = asyncio.run(run())
+    finally:
+        manager.close()
+
+    assert all(r["prefetched"] for r in results)
+    # "慢查询 登录" 与 "慢查询  登录" 标准化后相同，只检索一次
+    assert summary["unique_queries"] == 3 and stub_dify.requests == 3
+    # 4 条各 0.5s 的检索并发完成，只有第一条需要等待
+    assert summary["sequential_ms"] >= 1900
+    assert summary["waited_ms"] < 800
+    assert summary["saved_ms"] > 1000
+
+
+def test_postprocess_dedupes_ranks_and_packs():
+    items = [
+        {"content": "登录功能需要校验账号密码，连续失败 5 次锁定账号。", "metadata": {"source": "Dify Answer"}},
+        {"content": "账号锁定策略：连续失败 5 次锁定 30 分钟", "score": 0.92},
+        {"content": "账号锁定策略：连续失败 5 次锁定 30 分钟。", "score": 0.90},
+        {"content": "首页轮播图每 5 秒切换一次", "score": 0.95},
+        {"content": "验证码登录：短信验证码 5 分钟内有效。" * 20, "score": 5.1,
+         "metadata": {"source": "local:functional_points"}},
+    ]
+    packed, stats = postprocess_knowledge(items, "账号登录 连续失败锁定", token_budget=120)
+
+    assert stats["deduped"] >= 1
+    texts = [p["content"] for p in packed]
+    assert sum("账号锁定策略" in t for t in texts) == 1
+    # 与需求无关的片段排在相关片段之后
+    assert texts.index(next(t for t in texts if "账号锁定策略" in t)) == 0
+    assert stats["tokens"] <= 120
+    assert all(p["tokens"] == estimate_tokens(p["content"]) for p in packed)
+
+
+def test_postprocess_trims_by_sentence_relevance():
+    text = "页面背景为蓝色。按钮圆角为四像素。密码错误五次后账号被锁定三十分钟。底部展示版权信息。"
+    packed, stats = postprocess_knowledge([{"content": text, "score": 1.0}], "密码错误 账号锁定", token_budget=20)
+
+    assert packed[0]["truncated"]
+    assert "账号被锁定" in packed[0]["content"]
+    assert stats["tokens"] <= 20
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+本地知识索引测试
+"""
+
+import asyncio
+import threading
+import time
+
+from backend.agents.knowledge_manager import KnowledgeManager
+from backend.agents.local_knowledge import LocalKnowledgeIndex, tokenize
+from backend.database.case_db import batch_update_status, save_case
+from backend.database.requirement_db import save_analyzed_point, save_breakdown_item
+
+
+def _seed():
+    save_analyzed_point({"module_name": "账户", "feature_name": "用户登录", "description": "手机号加短信验证码登录"})
+    save_analyzed_point({"module_name": "订单", "feature_name": "订单退款", "description": "已支付订单申请退款"})
+    save_breakdown_item({"feature_name": "密码找回", "description": "通过邮箱重置密码",
+                         "acceptance_criteria": ["重置链接 30 分钟内有效", "新密码不能与旧密码相同"]})
+    result = save_case({"requirement_id": 1, "case_title": "验证码过期后登录失败",
+                        "steps": [{"step_id": 1, "action": "输入过期验证码", "expected": "提示验证码已失效"}]})
+    return int(result.split(":")[1])
+
+
+def test_tokenize_uses_cjk_bigrams():
+    assert tokenize("用户登录 API") == ["用户", "户登", "登录", "api"]
+    assert tokenize("测") == ["测"]
+
+
+def test_index_follows_db_writes(temp_db, isolated_local_index):
+    case_id = _seed()
+    index = isolated_local_index
+
+    top = index.search("登录验证码", limit=5)
+    assert top[0]["metadata"]["doc_key"] == "fp:1"
+    # 草稿用例不参与索引
+    assert all(item["metadata"]["source"] != "local:test_cases" for item in top)
+
+    batch_update_status([case_id], "Active")
+    assert "tc:%d" % case_id in [item["metadata"]["doc_key"] for item in index.search("验证码过期", limit=5)]
+
+    batch_update_status([case_id], "Deprecated")
+    assert "tc:%d" % case_id not in [item["metadata"]["doc_key"] for item in index.search("验证码过期", limit=5)]
+
+    assert index.search("重置链接有效期")[0]["metadata"]["doc_key"] == "bd:1"
+
+
+def test_index_is_restored_from_journal(temp_db, isolated_local_index):
+    _seed()
+    before = isolated_local_index.search("订单退款")
+
+    reloaded = LocalKnowledgeIndex(path=isolated_local_index.path)
+    assert reloaded.search("订单退款") == before
+    assert reloaded.get_stats()["rebuilds"] == 0
+
+
+def test_local_backend_skips_network(temp_db):
+    _seed()
+    manager = KnowledgeManager(endpoint="http://127.0.0.1:9", backend="local")
+
+    result = asyncio.run(manager.aretrieve("短信验证码登录", exclude={"fp:1"}))
+    assert result["status"] in ("ok", "empty")
+    assert all(item["metadata"]["doc_key"] != "fp:1" for item in result["items"])
+    assert result["latency_ms"] < 100
+
+
+def test_local_search_runs_off_event_loop(temp_db, monkeypatch):
+    manager = KnowledgeManager(endpoint="http://127.0.0.1:9", backend="local")
+    threads = []
+    monkeypatch.setattr(manager.local_index, "search",
+                        lambda *args: threads.append(threading.current_thread()) or [])
+
+    asyncio.run(manager.aretrieve("短信验证码登录"))
+    # 首次检索可能触发全量重建，不能在事件循环线程中执行
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def test_search_latency_on_large_index(tmp_path, temp_db):
+    index = LocalKnowledgeIndex(path=str(tmp_path / "large.jsonl"))
+    index.rebuild()
+    modules = ["登录", "支付", "订单", "库存", "会员", "优惠券", "物流", "评价"]
+    for i in range(3000):
+        module = modules[i % len(modules)]
+        index.upsert(f"fp:{i + 100}", {"source": "functional_points", "ref_id": i + 100,
+                                       "title": f"{module}功能 {i}",
+                                       "content": f"{module}模块的第 {i} 个功能点，校验{module}流程的正常与异常场景"})
+
+    start = time.perf_counter()
+    for _ in range(50):
+        assert len(index.search("优惠券异常场景校验", limit=5)) == 5
+    assert (time.perf_counter() - start) / 50 < 0.05
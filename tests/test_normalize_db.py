@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+历史用例数据规范化任务测试
+"""
+
+import json
+
+from backend.database import base
+from backend.database.case_db import case_db
+from backend.database.case_format import FORMAT_VERSION
+from backend.database.normalize_db import case_normalize_db
+from backend.services import normalize_service
+
+DIRTY_STEPS = [
+    "[{'action': '打开首页', 'expected': '加载成功'}]",
+    "```json\n[{\"action\": \"点击登录\", \"expected\": \"跳转首页\"}]\n```",
+    "3",
+    "1. 输入账号\n2. 输入密码",
+    '[{"step_id": 1, "action": "已规范", "expected": "无需改动"}]',
+]
+
+
+def _insert_dirty():
+    conn = base.get_conn()
+    conn.executemany("INSERT INTO test_cases (requirement_id, case_title, steps, test_data) VALUES (1, ?, ?, ?)",
+                     [(f"旧用例 {i}", steps, "{}") for i, steps in enumerate(DIRTY_STEPS)])
+    conn.commit()
+
+
+def test_job_is_resumable_and_audited(temp_db, monkeypatch):
+    _insert_dirty()
+    assert case_normalize_db.pending_count() == 5
+    notified = []
+    monkeypatch.setattr(case_db, "_change_listeners", [lambda table, ids, action: notified.append((table, ids, action))])
+
+    first = case_normalize_db.run(batch_size=2, max_batches=1)
+    assert (first['status'], first['scanned'], first['total']) == ("stopped", 2, 5)
+    assert case_normalize_db.pending_count() == 3
+
+    # 停止期间写入的旧格式数据计入恢复后的总数
+    conn = base.get_conn()
+    conn.execute("INSERT INTO test_cases (requirement_id, case_title, steps, test_data) VALUES (1, '停止后写入', '7', '{}')")
+    conn.commit()
+
+    # 再次启动从断点继续，沿用同一任务
+    second = case_normalize_db.run(batch_size=2)
+    assert second['id'] == first['id']
+    assert (second['status'], second['scanned'], second['changed'], second['total']) == ("done", 6, 5, 6)
+    assert case_normalize_db.pending_count() == 0
+
+    conn = base.get_conn()
+    rows = conn.execute("SELECT id, steps, format_version FROM test_cases ORDER BY id").fetchall()
+    assert {row['format_version'] for row in rows} == {FORMAT_VERSION}
+    # 内容有改动的行通知监听器刷新 (已是规范格式的行不通知)
+    assert [ids for _, ids, _ in notified] == [[rows[0]['id'], rows[1]['id']], [rows[2]['id'], rows[3]['id']],
+                                               [rows[5]['id']]]
+    assert {(table, action) for table, _, action in notified} == {("test_cases", "update")}
+    assert json.loads(rows[0]['steps']) == [{"step_id": 1, "action": "打开首页", "expected": "加载成功"}]
+
+    audit = case_normalize_db.get_audit(case_id=rows[0]['id'])
+    assert [(item['field'], item['old_value']) for item in audit] == [("steps", DIRTY_STEPS[0])]
+    assert case_normalize_db.get_audit(case_id=rows[4]['id']) == []  # 已是规范格式的行只标记版本
+    # 只有步骤文本发生变化 (数字、纯文本) 的行需要重算近似重复指纹，仅格式变化的行跳过
+    assert [row[0] for row in conn.execute("SELECT case_id FROM case_fingerprints ORDER BY case_id")] == [
+        rows[2]['id'], rows[3]['id'], rows[5]['id']]
+
+
+def test_background_service_reports_progress(temp_db):
+    _insert_dirty()
+    normalize_service.start(batch_size=2)
+    normalize_service._thread.join(10)
+
+    status = normalize_service.status()
+    assert status['running'] is False and status['pending'] == 0
+    assert status['run']['status'] == "done" and status['rows_per_sec'] > 0
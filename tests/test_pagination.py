@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+游标 (Keyset) 分页测试
+"""
+
+from backend.database import base
+from backend.database.case_db import case_db
+from backend.database.requirement_db import requirement_db
+
+
+def _insert_cases(count, req_id=1):
+    conn = base.get_conn()
+    conn.executemany("INSERT INTO test_cases (requirement_id, case_title, steps, status) VALUES (?, ?, '[]', ?)",
+                     [(req_id, f"用例 {i}", "Active" if i % 3 == 0 else "Draft") for i in range(count)])
+    conn.commit()
+
+
+def _walk(fetch):
+    """沿 next_cursor 翻到底，返回每页的 ID 列表"""
+    pages, result = [], fetch(None)
+    while True:
+        pages.append([item['id'] for item in result['items']])
+        if result['next_cursor'] is None:
+            return pages
+        result = fetch(result['next_cursor'])
+
+
+def test_case_cursor_walk_matches_offset_pages(temp_db):
+    _insert_cases(25)
+    offset_ids = [[item['id'] for item in case_db.get_cases_page(page, 10)['items']] for page in (1, 2, 3)]
+
+    first = case_db.get_cases_page(page=1, size=10)
+    assert first['next_cursor'] == offset_ids[0][-1]  # 页码分页同样返回游标，便于切换
+    pages = [offset_ids[0]] + _walk(lambda cursor: case_db.get_cases_page(size=10, after_id=cursor or first['next_cursor']))
+    assert pages == offset_ids
+    assert case_db.get_cases_page(size=10, after_id=first['next_cursor'])['total'] == 25
+    assert case_db.get_cases_page(size=10, after_id=first['next_cursor'], include_total=False)['total'] is None
+
+    # 向前翻页回到第一页
+    second = case_db.get_cases_page(size=10, after_id=first['next_cursor'])
+    back = case_db.get_cases_page(size=10, before_id=second['prev_cursor'])
+    assert [item['id'] for item in back['items']] == offset_ids[0]
+    assert back['prev_cursor'] is None and back['next_cursor'] == offset_ids[0][-1]
+
+
+def test_cursor_respects_filters(temp_db):
+    _insert_cases(30, req_id=1)
+    _insert_cases(5, req_id=2)
+
+    pages = _walk(lambda cursor: case_db.get_cases_page(size=4, req_id=1, status="Active", after_id=cursor or 10 ** 9))
+    ids = [case_id for page in pages for case_id in page]
+    expected = [row['id'] for row in case_db.get_cases_page(page=1, size=100, req_id=1, status="Active")['items']]
+    assert ids == expected and len(ids) == 10
+
+
+def test_requirement_and_breakdown_cursor(temp_db):
+    conn = base.get_conn()
+    conn.executemany("INSERT INTO functional_points (project_id, feature_name) VALUES (1, ?)",
+                     [(f"功能 {i}",) for i in range(7)])
+    conn.executemany("INSERT INTO requirement_breakdown (project_id, feature_name, review_status) VALUES (?, ?, 'Pending')",
+                     [(1 + i % 2, f"拆解 {i}") for i in range(9)])
+    conn.commit()
+
+    req_pages = _walk(lambda cursor: requirement_db.get_requirements_page(size=3, after_id=cursor or 10 ** 9))
+    assert [len(page) for page in req_pages] == [3, 3, 1]
+    assert all('case_count' in item for item in requirement_db.get_requirements_page(size=3, after_id=10 ** 9)['items'])
+
+    bd_pages = _walk(lambda cursor: requirement_db.get_breakdown_page(size=2, project_id=1, after_id=cursor or 10 ** 9))
+    assert sum(len(page) for page in bd_pages) == 5
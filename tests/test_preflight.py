@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+用例生成前置阶段测试
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from backend.agents import case_agent
+
+
+def _patch_slow_stages(monkeypatch, knowledge_delay, deadline):
+    def slow_context(req_id, req):
+        time.sleep(0.2)
+        return {"existing_cases": [], "coverage_gaps": []}
+
+    async def slow_knowledge(query, limit=3, exclude=None):
+        await asyncio.sleep(knowledge_delay)
+        return {"items": [{"content": "知识"}], "latency_ms": knowledge_delay * 1000, "status": "ok", "cache": None}
+
+    async def slow_team(target_count, domain, prompt_id, max_turns):
+        await asyncio.sleep(0.2)
+        return "team", []
+
+    monkeypatch.setitem(case_agent.SYSTEM_CONFIG, "preflight_deadline", deadline)
+    monkeypatch.setitem(case_agent.FEATURE_CONFIG, "use_knowledge", True)
+    monkeypatch.setattr(case_agent.context_manager, "get_context", slow_context)
+    monkeypatch.setattr(case_agent.knowledge_manager, "aretrieve", slow_knowledge)
+    monkeypatch.setattr(case_agent, "build_case_team", slow_team)
+
+
+def test_preflight_stages_overlap(monkeypatch, temp_db):
+    _patch_slow_stages(monkeypatch, knowledge_delay=0.2, deadline=2)
+    req = {"feature_name": "登录", "description": "用户名密码登录"}
+
+    started = time.perf_counter()
+    result = asyncio.run(case_agent.run_preflight(1, req, 5, "base", None, 6))
+    elapsed = time.perf_counter() - started
+
+    # 三个 0.2s 的阶段并发执行，总耗时接近单个阶段
+    assert elapsed < 0.45
+    assert result["knowledge"]["status"] == "ok"
+    assert result["team"] == ("team", [])
+    assert set(result["timings"]) >= {"dimension", "context", "knowledge", "team", "total"}
+
+
+def test_preflight_skips_knowledge_after_deadline(monkeypatch, temp_db):
+    _patch_slow_stages(monkeypatch, knowledge_delay=2, deadline=0.3)
+    req = {"feature_name": "登录", "description": "用户名密码登录"}
+
+    started = time.perf_counter()
+    result = asyncio.run(case_agent.run_preflight(1, req, 5, "base", None, 6))
+
+    assert time.perf_counter() - started < 1
+    assert result["knowledge"]["status"] == "deadline"
+    assert result["knowledge"]["items"] == []
+
+
+def test_preflight_cancels_knowledge_when_stage_fails(monkeypatch, temp_db):
+    _patch_slow_stages(monkeypatch, knowledge_delay=2, deadline=5)
+    events = []
+
+    async def tracked_knowledge(query, limit=3, exclude=None):
+        try:
+            await asyncio.sleep(2)
+        except asyncio.CancelledError:
+            events.append("cancelled")
+            raise
+
+    async def failing_team(target_count, domain, prompt_id, max_turns):
+        raise RuntimeError("提示词不存在")
+
+    monkeypatch.setattr(case_agent.knowledge_manager, "aretrieve", tracked_knowledge)
+    monkeypatch.setattr(case_agent, "build_case_team", failing_team)
+    req = {"feature_name": "登录", "description": "用户名密码登录"}
+
+    started = time.perf_counter()
+    with pytest.raises(RuntimeError):
+        asyncio.run(case_agent.run_preflight(1, req, 5, "base", None, 6))
+    # 知识检索在 run_preflight 返回前已被取消并等待结束，而不是遗留到事件循环关闭
+    assert events == ["cancelled"]
+    assert time.perf_counter() - started < 1
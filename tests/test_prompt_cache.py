@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+提示词编译缓存测试
+"""
+
+import pytest
+
+from backend.agents.prompt_manager import CompiledPrompt, PromptManager, PromptTemplateError
+from backend.database.prompt_db import prompt_db
+
+
+def test_compiled_prompt_validates_placeholders():
+    compiled = CompiledPrompt('设计约 {target_count} 个用例，示例：{{"step_id": 1}}')
+    assert compiled.placeholders == {'target_count'}
+    assert compiled.render(target_count=3) == '设计约 3 个用例，示例：{"step_id": 1}'
+
+    with pytest.raises(PromptTemplateError):
+        compiled.render()
+    with pytest.raises(PromptTemplateError):
+        CompiledPrompt('未知占位符 {unknown}')
+
+
+def test_literal_prompt_keeps_raw_braces():
+    compiled = CompiledPrompt('数量 {target_count}，格式 {"a": 1}', literal=True)
+    assert compiled.render(target_count=5) == '数量 5，格式 {"a": 1}'
+    assert compiled.render() == '数量 {target_count}，格式 {"a": 1}'
+
+
+def test_builtin_prompt_is_cached_per_target_count():
+    manager = PromptManager()
+    first = manager.get_prompt('generator', 'web', target_count=5)
+    second = manager.get_prompt('generator', 'web', target_count=5)
+    other = manager.get_prompt('generator', 'web', target_count=8)
+
+    assert first == second
+    assert '**5**' in first and '**8**' in other
+    assert '{{' not in first
+    stats = manager.get_cache_stats()
+    assert stats['hits'] == 1 and stats['misses'] == 2 and stats['compiles'] == 1
+
+
+def test_custom_prompt_invalidated_on_update(temp_db):
+    manager = PromptManager()
+    prompt_id = prompt_db.create_prompt({
+        'name': '缓存测试', 'content': '旧内容', 'domain': 'base', 'type': 'generator'
+    })
+
+    rendered, prompt = manager.get_custom_prompt(prompt_id, 'generator', target_count=4)
+    assert rendered.startswith('设计约 **4** 个测试用例') and rendered.endswith('旧内容')
+    manager.get_custom_prompt(prompt_id, 'generator', target_count=4)
+    assert prompt_db.get_cache_stats()['hits'] >= 1
+
+    prompt_db.update_prompt(prompt_id, {
+        'name': '缓存测试', 'content': '新内容 {target_count} 条', 'domain': 'base', 'type': 'generator'
+    })
+    rendered, _ = manager.get_custom_prompt(prompt_id, 'generator', target_count=4)
+    assert rendered == '新内容 4 条'
+
+    prompt_db.delete_prompt(prompt_id)
+    assert manager.get_custom_prompt(prompt_id, 'generator', target_count=4) is None
+
+
+def test_invalidation_during_read_is_not_overwritten(temp_db, monkeypatch):
+    manager = PromptManager()
+    prompt_id = prompt_db.create_prompt({
+        'name': '并发失效', 'content': '旧内容 {target_count}', 'domain': 'base', 'type': 'generator'
+    })
+    new_data = {'name': '并发失效', 'content': '新内容 {target_count}', 'domain': 'base', 'type': 'generator'}
+
+    # 行缓存：读库之后、写入缓存之前提示词被更新
+    original_query = prompt_db.execute_query
+
+    def query_then_update(sql, params=()):
+        rows = original_query(sql, params)
+        monkeypatch.setattr(prompt_db, "execute_query", original_query)
+        prompt_db.update_prompt(prompt_id, new_data)
+        return rows
+
+    monkeypatch.setattr(prompt_db, "execute_query", query_then_update)
+    assert prompt_db.get_prompt_by_id(prompt_id)['content'] == '旧内容 {target_count}'
+    assert prompt_db.get_prompt_by_id(prompt_id)['content'] == '新内容 {target_count}'
+
+    # 渲染缓存：读取提示词之后、写入渲染缓存之前提示词被更新
+    stale = prompt_db.get_prompt_by_id(prompt_id)
+    original_get = prompt_db.get_prompt_by_id
+
+    def get_then_update(pid):
+        monkeypatch.setattr(prompt_db, "get_prompt_by_id", original_get)
+        prompt_db.update_prompt(pid, {**new_data, 'content': '最新内容 {target_count}'})
+        return stale
+
+    monkeypatch.setattr(prompt_db, "get_prompt_by_id", get_then_update)
+    assert manager.get_custom_prompt(prompt_id, 'generator', target_count=2)[0] == '新内容 2'
+    assert manager.get_custom_prompt(prompt_id, 'generator', target_count=2)[0] == '最新内容 2'
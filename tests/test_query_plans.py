@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+查询计划回归测试
+捕获热点查询实际执行的 SQL，用 EXPLAIN QUERY PLAN 检查过滤条件是否走索引，
+一旦退化为全表扫描 (SCAN <表> 且未使用索引) 即失败。
+"""
+
+import re
+
+import pytest
+
+from backend.database import base
+from backend.database.case_db import case_db
+from backend.database.prompt_db import prompt_db
+from backend.database.requirement_db import requirement_db
+from backend.database.search_db import search_db
+
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+HOT_QUERIES = {
+    "existing_titles": lambda: case_db.get_existing_case_titles(1),
+    "case_briefs": lambda: case_db.get_case_briefs(req_id=1),
+    "save_case": lambda: case_db.save_case({"requirement_id": 1, "case_title": "登录成功",
+                                            "steps": [{"step_id": 1, "action": "输入账号密码", "expected": "登录成功"}]}),
+    "cases_by_req_status": lambda: case_db.get_cases_page(req_id=1, status="Draft"),
+    "cases_by_status": lambda: case_db.get_cases_page(status="Active"),
+    "cases_by_title": lambda: case_db.get_cases_page(req_id=1, title="登录成功"),
+    "requirements_by_feature": lambda: requirement_db.get_requirements_page(feature_name="用户登录"),
+    "search_cases": lambda: search_db.search("cases", "登录成功", req_id=1),
+    "export_by_req": lambda: case_db.get_all_cases_for_export(req_id=1, status="Draft"),
+    "breakdown_by_project": lambda: requirement_db.get_breakdown_page(project_id=1),
+    "breakdown_by_project_status": lambda: requirement_db.get_breakdown_page(project_id=1, status="Pending"),
+    "breakdown_by_status": lambda: requirement_db.get_breakdown_page(status="Pending"),
+    "prompts_by_domain_type": lambda: prompt_db.get_prompts(domain="base", type="generator"),
+}
+
+
+def _capture_sql(action):
+    """执行操作并返回期间执行的带过滤条件的 SELECT 语句 (参数已展开；全量加载类查询本就需要扫表)"""
+    statements = []
+    conn = base.get_conn()
+    conn.set_trace_callback(statements.append)
+    try:
+        action()
+    finally:
+        conn.set_trace_callback(None)
+    return [sql for sql in statements if sql.lstrip().upper().startswith("SELECT") and " WHERE " in sql.upper()]
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_queries_use_indexes(temp_db, name):
+    statements = _capture_sql(HOT_QUERIES[name])
+    assert statements, f"{name} 未执行任何查询"
+
+    conn = base.get_conn()
+    for sql in statements:
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+        scans = [detail for detail in plan if FULL_SCAN.match(detail)]
+        assert not scans, f"{name} 退化为全表扫描: {sql}\n{plan}"
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+全文检索 (FTS5 trigram) 测试
+"""
+
+import json
+
+from backend.database import base
+from backend.database.case_db import case_db
+from backend.database.requirement_db import requirement_db
+from backend.database.search_db import highlight, search_db
+
+
+def _save(title, action, expected="符合预期", req_id=1):
+    assert case_db.save_case({"requirement_id": req_id, "case_title": title,
+                              "steps": [{"step_id": 1, "action": action, "expected": expected}]}).startswith("ID:")
+
+
+def _ids(result):
+    return [item['id'] for item in result['items']]
+
+
+def test_index_follows_case_changes(temp_db):
+    _save("账号密码登录成功", "输入正确的账号和密码", "进入首页")
+    _save("密码错误提示", "输入错误的密码", "提示账号或密码错误")
+
+    hits = search_db.search("cases", "错误的密码")
+    assert [item['case_title'] for item in hits['items']] == ["密码错误提示"] and hits['mode'] == "fts"
+    assert hits['items'][0]['highlights']['steps_text'] == "输入<mark>错误的密码</mark> 提示账号或密码错误"
+    # 步骤只索引文本，JSON 键名不参与匹配
+    assert search_db.search("cases", "action")['items'] == []
+
+    conn = base.get_conn()
+    case_id = hits['items'][0]['id']
+    conn.execute("UPDATE test_cases SET case_title = '密码输错三次锁定' WHERE id = ?", (case_id,))
+    conn.commit()
+    assert _ids(search_db.search("cases", "错误提示")) == []
+    assert _ids(search_db.search("cases", "三次锁定")) == [case_id]
+
+    conn.execute("DELETE FROM test_cases WHERE id = ?", (case_id,))
+    conn.commit()
+    assert _ids(search_db.search("cases", "三次锁定")) == []
+    assert search_db.check() == []
+
+
+def test_ranking_short_terms_and_filters(temp_db):
+    _save("购物车结算", "添加商品后点击结算按钮", req_id=1)
+    _save("订单列表展示", "进入订单页查看购物车结算后的订单", req_id=2)
+
+    ranked = search_db.search("cases", "购物车结算")
+    assert [item['case_title'] for item in ranked['items']] == ["购物车结算", "订单列表展示"]  # 标题命中排前
+    assert ranked['items'][0]['score'] < ranked['items'][1]['score']
+    assert _ids(search_db.search("cases", "购物车结算", req_id=2)) == [ranked['items'][1]['id']]
+
+    # 不足 3 个字符退回 LIKE，与长词组合时为 AND
+    short = search_db.search("cases", "订单")
+    assert short['mode'] == "like" and [item['case_title'] for item in short['items']] == ["订单列表展示"]
+    assert _ids(search_db.search("cases", "购物车 按钮")) == [ranked['items'][0]['id']]
+
+    # 用户输入中的 FTS 语法按普通文本处理
+    assert search_db.search("cases", 'OR "结算* NEAR')['items'] == []
+
+
+def test_list_filters_use_index(temp_db):
+    conn = base.get_conn()
+    conn.executemany("INSERT INTO functional_points (project_id, feature_name) VALUES (1, ?)",
+                     [("用户登录",), ("用户注册",), ("登录日志审计",)])
+    conn.execute("INSERT INTO requirement_breakdown (project_id, feature_name, acceptance_criteria) VALUES (1, '找回密码', ?)",
+                 (json.dumps(["邮箱验证码 5 分钟内有效", "新密码不能与旧密码相同"], ensure_ascii=False),))
+    conn.commit()
+
+    by_fts = requirement_db.get_requirements_page(size=10, feature_name="登录日志")
+    assert [item['feature_name'] for item in by_fts['items']] == ["登录日志审计"]
+    by_like = requirement_db.get_requirements_page(size=10, feature_name="登录")
+    assert {item['feature_name'] for item in by_like['items']} == {"用户登录", "登录日志审计"}
+
+    hits = search_db.search("breakdowns", "验证码")
+    assert hits['items'][0]['highlights']['acceptance_criteria'].startswith("邮箱<mark>验证码</mark>")
+
+
+def test_highlight_escapes_and_truncates():
+    assert highlight("<b>登录</b> 登录", ["登录"], width=0) == "&lt;b&gt;<mark>登录</mark>&lt;/b&gt; <mark>登录</mark>"
+    snippet = highlight("甲" * 100 + "关键字" + "乙" * 100, ["关键字"], width=5)
+    assert snippet == "…甲甲甲甲甲<mark>关键字</mark>乙乙乙乙乙…"
+    assert highlight("无命中", ["关键字"]) is None
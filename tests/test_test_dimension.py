@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+测试维度规则测试 (数据库规则 + 编译匹配 + 热加载)
+"""
+
+from backend.agents import test_dimension
+from backend.agents.test_dimension import dimension_manager
+from backend.database.dimension_rule_db import dimension_rule_db
+
+
+def test_chinese_requirement_scores_with_evidence(temp_db):
+    req = {"feature_name": "短信验证码登录", "description": "手机号输入6位验证码登录，接口超时需提示，支持iOS和Android"}
+    matrix = dimension_manager.generate_test_matrix(req)
+
+    dims = {item["dimension"]: item for item in matrix}
+    assert matrix[0]["dimension"] == "functional"
+    assert set(dims) == {"functional", "security", "boundary", "exception", "compatibility"}
+    assert {"登录", "验证码"} <= set(dims["security"]["evidence"])
+    assert "6位" in dims["boundary"]["evidence"]
+    assert dims["security"]["score"] == len(dims["security"]["evidence"])
+
+    # 旧的英文关键词依然生效
+    assert "security" in dimension_manager.get_relevant_dimensions({"description": "user login page"})
+
+
+def test_rule_changes_are_hot_reloaded(temp_db):
+    req = {"feature_name": "导出报表", "description": "支持导出 Excel 报表"}
+    assert dimension_manager.get_relevant_dimensions(req) == ["functional"]
+
+    # 通过 DimensionRuleDB 修改：立即生效
+    dimension_rule_db.save_rule({"dimension": "data", "name": "数据测试", "description": "导入导出数据正确性",
+                                 "keywords": ["导出", "excel"], "weight": 0.5, "min_score": 1.0})
+    result = dimension_manager.score_dimensions(req)
+    assert [item["dimension"] for item in result] == ["functional", "data"]
+    assert result[1]["score"] == 1.0 and result[1]["evidence"] == ["导出", "excel"]
+
+    # 其他进程直接改库：按版本号检测后热加载
+    manager = test_dimension.TestDimensionManager(reload_interval=0)
+    assert "data" in manager.get_relevant_dimensions(req)
+    with dimension_rule_db.get_connection() as conn:
+        conn.execute("UPDATE dimension_rules SET is_active = 0, revision = revision + 1 WHERE dimension = 'data'")
+        conn.commit()
+    assert "data" not in manager.get_relevant_dimensions(req)
+    assert manager.get_stats()["compiles"] == 2
+
+
+
+def test_set_active_takes_effect_immediately(temp_db):
+    req = {"feature_name": "登录", "description": "输入密码登录系统"}
+    # 版本检测间隔很长，只有变更通知能让启用/停用立即生效
+    manager = test_dimension.TestDimensionManager(reload_interval=3600)
+    assert "security" in manager.get_relevant_dimensions(req)
+
+    assert dimension_rule_db.set_active("security", False)
+    assert "security" not in manager.get_relevant_dimensions(req)
+    assert dimension_rule_db.set_active("security", True)
+    assert "security" in manager.get_relevant_dimensions(req)
+    assert not dimension_rule_db.set_active("missing", False)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+写入缓冲 (组提交) 测试
+"""
+
+import threading
+
+import pytest
+
+from backend.database import base, case_db as case_db_module, requirement_db as requirement_db_module
+from backend.database.case_db import save_case
+from backend.database.requirement_db import save_breakdown_item
+from backend.database.write_buffer import WriteBuffer, WriteRejected
+
+
+def _run_parallel(count, target):
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(idx):
+        barrier.wait()
+        results[idx] = target(idx)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_parallel_saves_are_grouped_and_get_real_ids(temp_db, monkeypatch):
+    buffer = WriteBuffer(interval_ms=50, max_rows=64, enabled=True)
+    monkeypatch.setattr(case_db_module, "write_buffer", buffer)
+    monkeypatch.setattr(requirement_db_module, "write_buffer", buffer)
+
+    results = _run_parallel(20, lambda i: save_breakdown_item({"project_id": 1, "feature_name": f"拆解项 {i}"})
+                            if i % 2 else save_case({"requirement_id": i + 1, "case_title": f"用例 {i}"}))
+    buffer.stop()
+
+    assert all(result.startswith("ID:") for result in results)
+    conn = base.get_conn()
+    for i, result in enumerate(results):
+        table, column = ("requirement_breakdown", "feature_name") if i % 2 else ("test_cases", "case_title")
+        row = conn.execute(f"SELECT {column} FROM {table} WHERE id = ?", (int(result.split(": ")[1]),)).fetchone()
+        assert row[0].endswith(f" {i}")
+
+    stats = buffer.get_stats()
+    assert stats['submitted'] == 20 and stats['batches'] < 20
+
+
+def test_rejected_and_failed_ops_only_roll_back_themselves(temp_db):
+    buffer = WriteBuffer(interval_ms=50, enabled=True)
+    insert = "INSERT INTO projects (project_name) VALUES (?)"
+
+    def op(idx):
+        def run(conn):
+            new_id = conn.execute(insert, (f"项目 {idx}",)).lastrowid
+            if idx == 1:
+                raise WriteRejected("DUPLICATE")
+            if idx == 2:
+                raise ValueError("boom")
+            return new_id
+        return run
+
+    def submit(idx):
+        try:
+            return buffer.submit(op(idx))
+        except Exception as e:
+            return e
+
+    results = _run_parallel(3, submit)
+    buffer.stop()
+
+    assert isinstance(results[0], int)
+    assert isinstance(results[1], WriteRejected) and results[1].result == "DUPLICATE"
+    assert isinstance(results[2], ValueError)
+    names = [row[0] for row in base.get_conn().execute("SELECT project_name FROM projects WHERE project_name LIKE '项目 %'")]
+    assert names == ["项目 0"]
+    assert buffer.get_stats()['rejected'] == 1 and buffer.get_stats()['failed'] == 1
+
+
+def test_disabled_buffer_commits_in_caller_thread(temp_db):
+    buffer = WriteBuffer(enabled=False)
+    new_id = buffer.submit(lambda conn: conn.execute("INSERT INTO projects (project_name) VALUES ('直接提交')").lastrowid)
+    assert buffer._thread is None
+    assert base.get_conn().execute("SELECT project_name FROM projects WHERE id = ?", (new_id,)).fetchone()[0] == "直接提交"
+
+    def reject(conn):
+        raise WriteRejected("skip")
+
+    with pytest.raises(WriteRejected):
+        buffer.submit(reject)